@@ -0,0 +1,68 @@
+"""
+Short-lived cache for the agile analytics endpoints
+Payloads are cached per organization under a version number that Issue and
+Decision writes bump in the database, so a write is visible on the next
+request in every process while repeated dashboard loads in between are
+served from the cache.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_CACHE_KEY = 'agile_analytics:{org_id}:{version}:{name}'
+
+
+def _version(org_id):
+    from apps.agile.models import AgileAnalyticsVersion
+
+    version = AgileAnalyticsVersion.objects.filter(organization_id=org_id).values_list('version', flat=True).first()
+    return version or 0
+
+
+def cached_payload(org_id, name, compute):
+    """Return ``compute()`` for (org, name), cached for AGILE_ANALYTICS_CACHE_SECONDS."""
+    timeout = getattr(settings, 'AGILE_ANALYTICS_CACHE_SECONDS', 60)
+    if not timeout:
+        return compute()
+    key = PAYLOAD_CACHE_KEY.format(org_id=org_id, version=_version(org_id), name=name)
+    payload = cache.get(key)
+    if payload is None:
+        payload = compute()
+        cache.set(key, payload, timeout)
+    return payload
+
+
+def invalidate(org_id):
+    from apps.agile.models import AgileAnalyticsVersion
+
+    bumped = AgileAnalyticsVersion.objects.filter(organization_id=org_id).update(version=F('version') + 1)
+    if not bumped:
+        version, created = AgileAnalyticsVersion.objects.get_or_create(organization_id=org_id, defaults={'version': 1})
+        if not created:
+            AgileAnalyticsVersion.objects.filter(organization_id=org_id).update(version=F('version') + 1)
+
+
+def _on_write(sender, instance, **kwargs):
+    org_id = getattr(instance, 'organization_id', None)
+    if org_id is None:
+        return
+    try:
+        # Bumped in the writer's transaction: readers keep the old version (and
+        # old data) until it commits, then all see the new one together.
+        invalidate(org_id)
+    except Exception:
+        logger.exception("Failed to invalidate analytics cache for org %s", org_id)
+
+
+def connect_signals():
+    from apps.agile.models import Issue
+    from apps.decisions.models import Decision
+
+    for model in (Issue, Decision):
+        post_save.connect(_on_write, sender=model, dispatch_uid=f'agile_analytics_save_{model.__name__}')
+        post_delete.connect(_on_write, sender=model, dispatch_uid=f'agile_analytics_delete_{model.__name__}')
@@ -1,12 +1,14 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Count, Q, Avg
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 from apps.conversations.models import Conversation
 from apps.decisions.models import Decision
+from apps.agile.analytics_cache import cached_payload
 from apps.agile.models import Issue, Sprint, Project
+from apps.organizations import analytics_rollups
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -15,22 +17,31 @@ def analytics_overview(request):
     now = timezone.now()
     last_30_days = now - timedelta(days=30)
     
+    totals = analytics_rollups.gauges(
+        org.id, ['conversation_state', 'decision_status', 'projects', 'issue_status', 'sprint_status']
+    )
+    recent = analytics_rollups.window(org.id, ['conversations', 'decisions'], last_30_days)
+    
     # Conversations
-    total_conversations = Conversation.objects.filter(organization=org).count()
-    recent_conversations = Conversation.objects.filter(organization=org, created_at__gte=last_30_days).count()
+    total_conversations, _ = analytics_rollups.sum_cells(totals, 'conversation_state')
+    recent_conversations, _ = analytics_rollups.sum_cells(recent, 'conversations')
     
     # Decisions
-    total_decisions = Decision.objects.filter(organization=org).count()
-    recent_decisions = Decision.objects.filter(organization=org, created_at__gte=last_30_days).count()
-    decisions_by_status = Decision.objects.filter(organization=org).values('status').annotate(count=Count('id'))
+    total_decisions, _ = analytics_rollups.sum_cells(totals, 'decision_status')
+    recent_decisions, _ = analytics_rollups.sum_cells(recent, 'decisions')
+    decisions_by_status = [
+        {'status': dimension, 'count': count}
+        for (metric, dimension), (count, _value) in totals.items()
+        if metric == 'decision_status' and count
+    ]
     
     # Projects
-    total_projects = Project.objects.filter(organization=org).count()
-    total_issues = Issue.objects.filter(project__organization=org).count()
-    completed_issues = Issue.objects.filter(project__organization=org, status='done').count()
+    total_projects, _ = analytics_rollups.sum_cells(totals, 'projects')
+    total_issues, _ = analytics_rollups.sum_cells(totals, 'issue_status')
+    completed_issues, _ = analytics_rollups.sum_cells(totals, 'issue_status', 'done')
     
     # Sprints
-    active_sprints = Sprint.objects.filter(project__organization=org, status='active').count()
+    active_sprints, _ = analytics_rollups.sum_cells(totals, 'sprint_status', 'active')
     
     return Response({
         'conversations': {
@@ -40,7 +51,7 @@ def analytics_overview(request):
         'decisions': {
             'total': total_decisions,
             'last_30_days': recent_decisions,
-            'by_status': list(decisions_by_status)
+            'by_status': decisions_by_status
         },
         'projects': {
             'total': total_projects,
@@ -53,65 +64,72 @@ def analytics_overview(request):
         }
     })
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def team_analytics(request):
-    org = request.user.organization
-    
-    # User activity
+def _team_payload(org):
     from apps.organizations.models import User
-    users = User.objects.filter(organization=org)
-    
+
+    conversations = dict(
+        Conversation.objects.filter(author__organization=org)
+        .values_list('author_id').annotate(count=Count('id'))
+    )
+    decisions = dict(
+        Decision.objects.filter(decision_maker__organization=org)
+        .values_list('decision_maker_id').annotate(count=Count('id'))
+    )
+    issues = {
+        assignee_id: (assigned, completed)
+        for assignee_id, assigned, completed in Issue.objects.filter(assignee__organization=org)
+        .values_list('assignee_id')
+        .annotate(assigned=Count('id'), completed=Count('id', filter=Q(status='done')))
+    }
+
     user_stats = []
-    for user in users:
-        conversations_count = Conversation.objects.filter(created_by=user).count()
-        decisions_count = Decision.objects.filter(created_by=user).count()
-        issues_assigned = Issue.objects.filter(assignee=user).count()
-        issues_completed = Issue.objects.filter(assignee=user, status='done').count()
-        
+    users = User.objects.filter(organization=org).values_list('id', 'username', 'full_name')
+    for user_id, username, full_name in users:
+        issues_assigned, issues_completed = issues.get(user_id, (0, 0))
         user_stats.append({
-            'user_id': user.id,
-            'username': user.username,
-            'full_name': user.full_name,
-            'conversations': conversations_count,
-            'decisions': decisions_count,
+            'user_id': user_id,
+            'username': username,
+            'full_name': full_name,
+            'conversations': conversations.get(user_id, 0),
+            'decisions': decisions.get(user_id, 0),
             'issues_assigned': issues_assigned,
             'issues_completed': issues_completed
         })
-    
-    return Response({'team_members': user_stats})
+    return {'team_members': user_stats}
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def project_analytics(request, project_id):
-    try:
-        project = Project.objects.get(id=project_id, organization=request.user.organization)
-    except Project.DoesNotExist:
-        return Response({'error': 'Project not found'}, status=404)
-    
+def team_analytics(request):
+    org = request.user.organization
+    return Response(cached_payload(org.id, 'team', lambda: _team_payload(org)))
+
+
+def _project_payload(project):
     # Issue metrics
-    total_issues = Issue.objects.filter(project=project).count()
-    issues_by_status = Issue.objects.filter(project=project).values('status').annotate(count=Count('id'))
-    issues_by_priority = Issue.objects.filter(project=project).values('priority').annotate(count=Count('id'))
-    
+    issues = Issue.objects.filter(project=project)
+    issues_by_status = list(issues.values('status').annotate(count=Count('id')))
+    issues_by_priority = list(issues.values('priority').annotate(count=Count('id')))
+    total_issues = sum(row['count'] for row in issues_by_status)
+
     # Sprint metrics
-    sprints = Sprint.objects.filter(project=project)
-    sprint_stats = []
-    for sprint in sprints:
-        sprint_issues = Issue.objects.filter(sprint=sprint)
-        completed = sprint_issues.filter(status='done').count()
-        total = sprint_issues.count()
-        
-        sprint_stats.append({
+    sprints = Sprint.objects.filter(project=project).annotate(
+        total=Count('issues'),
+        completed=Count('issues', filter=Q(issues__status='done')),
+    )
+    sprint_stats = [
+        {
             'id': sprint.id,
             'name': sprint.name,
             'status': sprint.status,
-            'total_issues': total,
-            'completed_issues': completed,
-            'completion_rate': round((completed / total * 100) if total > 0 else 0, 1)
-        })
-    
-    return Response({
+            'total_issues': sprint.total,
+            'completed_issues': sprint.completed,
+            'completion_rate': round((sprint.completed / sprint.total * 100) if sprint.total > 0 else 0, 1)
+        }
+        for sprint in sprints
+    ]
+
+    return {
         'project': {
             'id': project.id,
             'name': project.name,
@@ -119,8 +137,19 @@ def project_analytics(request, project_id):
         },
         'issues': {
             'total': total_issues,
-            'by_status': list(issues_by_status),
-            'by_priority': list(issues_by_priority)
+            'by_status': issues_by_status,
+            'by_priority': issues_by_priority
         },
         'sprints': sprint_stats
-    })
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def project_analytics(request, project_id):
+    try:
+        project = Project.objects.get(id=project_id, organization=request.user.organization)
+    except Project.DoesNotExist:
+        return Response({'error': 'Project not found'}, status=404)
+
+    return Response(cached_payload(project.organization_id, f'project:{project.id}', lambda: _project_payload(project)))
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+class AgileConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.agile'
+
+    def ready(self):
+        from apps.agile.analytics_cache import connect_signals as connect_analytics_cache_signals
+        from apps.agile.assignee_profile import connect_signals as connect_assignee_profile_signals
+        from apps.agile.ml_models import connect_signals as connect_ml_signals
+
+        connect_analytics_cache_signals()
+        connect_ml_signals()
+        connect_assignee_profile_signals()
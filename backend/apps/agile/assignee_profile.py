@@ -0,0 +1,201 @@
+"""
+Per-project keyword profiles for the heuristic assignee suggestion
+Each profile is an inverted index (term -> issue rows) over a project's
+assigned, non-backlog issues, so scoring a new issue only touches the
+postings of its own terms instead of re-tokenizing the whole project.
+"""
+import itertools
+import logging
+import re
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from apps.agile.models import Issue
+from apps.knowledge.change_feed import FeedIndexCache, record_change
+from apps.organizations import save_snapshots
+
+logger = logging.getLogger(__name__)
+
+MIN_OVERLAP = 3
+KEYWORD_PATTERN = re.compile(r'\b\w+\b')
+PROFILE_FIELDS = ('project_id', 'assignee_id', 'status', 'title', 'description')
+
+
+def _issue_text(title, description):
+    return f"{title} {description or ''}"
+
+
+def _eligible(assignee_id, status):
+    return bool(assignee_id) and status != 'backlog'
+
+
+class ProjectKeywordProfile:
+    """Inverted index of one project's assigned issues.
+
+    Every issue gets a row holding its assignee and appears once in the
+    postings of each distinct term of its title and description. Updates
+    append a fresh row and tombstone the old one; the service rebuilds the
+    profile once tombstones outnumber live rows.
+    """
+
+    def __init__(self, rows=()):
+        self._rows = {}
+        self._assignees = []
+        self._assignee_array = None
+        self._postings = {}
+        self._removed = 0
+        for issue_id, assignee_id, text in rows:
+            self.upsert(issue_id, assignee_id, text)
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def needs_rebuild(self):
+        return self._removed > max(len(self._rows), 1000)
+
+    def upsert(self, issue_id, assignee_id, text):
+        self.remove(issue_id)
+        row = len(self._assignees)
+        self._rows[issue_id] = row
+        self._assignees.append(assignee_id)
+        self._assignee_array = None
+        for term in set(KEYWORD_PATTERN.findall(text.lower())):
+            self._postings.setdefault(term, []).append(row)
+
+    def remove(self, issue_id):
+        row = self._rows.pop(issue_id, None)
+        if row is not None:
+            self._assignees[row] = 0
+            self._assignee_array = None
+            self._removed += 1
+
+    def scores(self, keywords, min_overlap=MIN_OVERLAP):
+        """Counter of assignee -> summed overlap with issues sharing >= min_overlap terms."""
+        postings = [self._postings[term] for term in keywords if term in self._postings]
+        user_scores = Counter()
+        if len(postings) < min_overlap:
+            return user_scores
+        rows, overlaps = np.unique(
+            np.fromiter(itertools.chain.from_iterable(postings), dtype=np.int64),
+            return_counts=True,
+        )
+        if self._assignee_array is None:
+            self._assignee_array = np.asarray(self._assignees, dtype=np.int64)
+        assignees = self._assignee_array[rows]
+        matched = (overlaps >= min_overlap) & (assignees > 0)
+        # Rows are visited in insertion order so ties resolve like a scan would.
+        for assignee_id, overlap in zip(assignees[matched].tolist(), overlaps[matched].tolist()):
+            user_scores[assignee_id] += overlap
+        return user_scores
+
+
+class KeywordProfileService(FeedIndexCache):
+    """Per-process LRU of ProjectKeywordProfile objects, one per project.
+
+    Same scheme as the typeahead indexes: Issue writes append the patch to
+    the ``assignee_profile`` change feed and every process replays it on its
+    next lookup. A project's first lookup builds its profile inline; after
+    AGILE_ASSIGNEE_PROFILE_MAX_AGE seconds (to pick up bulk updates that
+    bypass signals) or once tombstones pile up, it is rebuilt in the
+    background while the old one keeps serving.
+    """
+
+    feed = 'assignee_profile'
+    build_on_miss = True
+
+    @property
+    def max_age(self):
+        return getattr(settings, 'AGILE_ASSIGNEE_PROFILE_MAX_AGE', 600)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'AGILE_ASSIGNEE_PROFILE_MAX_PROJECTS', 256)
+
+    def build(self, project_id):
+        rows = (
+            Issue.objects.filter(project_id=project_id, assignee__isnull=False)
+            .exclude(status='backlog')
+            .values_list('id', 'assignee_id', 'title', 'description')
+        )
+        return ProjectKeywordProfile(
+            (issue_id, assignee_id, _issue_text(title, description))
+            for issue_id, assignee_id, title, description in rows.iterator(chunk_size=2000)
+        )
+
+    def needs_rebuild(self, profile):
+        return profile.needs_rebuild
+
+    def scores(self, project_id, keywords):
+        return self.get(project_id).scores(keywords)
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def apply_change(self, profile, payload):
+        if payload.get('removed'):
+            profile.remove(payload['issue'])
+        else:
+            profile.upsert(payload['issue'], payload['assignee'], payload['text'])
+
+    def _record(self, project_id, issue_id, payload):
+        record_change(self.feed, project_id, str(issue_id), {'issue': issue_id, **payload})
+
+    def instance_saved(self, instance, previous_project_id=None):
+        values = instance.__dict__
+        issue_id = instance.pk
+        if any(field not in values for field in PROFILE_FIELDS):
+            # Saved with deferred fields: read what the profile needs.
+            row = Issue.objects.filter(pk=issue_id).values(*PROFILE_FIELDS).first()
+            if row is None:
+                return
+            values = row
+
+        project_id = values['project_id']
+        if previous_project_id and previous_project_id != project_id:
+            self._record(previous_project_id, issue_id, {'removed': True})
+        if not project_id:
+            return
+        if _eligible(values['assignee_id'], values['status']):
+            self._record(project_id, issue_id, {
+                'assignee': values['assignee_id'],
+                'text': _issue_text(values['title'], values['description']),
+            })
+        else:
+            self._record(project_id, issue_id, {'removed': True})
+
+    def instance_deleted(self, instance):
+        project_id = instance.__dict__.get('project_id')
+        if project_id:
+            self._record(project_id, instance.pk, {'removed': True})
+
+
+keyword_profiles = KeywordProfileService()
+
+
+def _issue_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # The stored project of an updated issue, so a move leaves the old profile.
+    stored = save_snapshots.stored(instance, 'assignee_profile')
+    try:
+        keyword_profiles.instance_saved(instance, stored['project_id'] if stored else None)
+    except Exception:
+        logger.exception("Failed to update keyword profile for issue #%s", instance.pk)
+
+
+def _issue_deleted(sender, instance, **kwargs):
+    try:
+        keyword_profiles.instance_deleted(instance)
+    except Exception:
+        logger.exception("Failed to update keyword profile for issue #%s", instance.pk)
+
+
+def connect_signals():
+    save_snapshots.track(Issue, 'assignee_profile', ('project_id',))
+    post_save.connect(_issue_saved, sender=Issue, dispatch_uid='assignee_profile_issue_save')
+    post_delete.connect(_issue_deleted, sender=Issue, dispatch_uid='assignee_profile_issue_delete')
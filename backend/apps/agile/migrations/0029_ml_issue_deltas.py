@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0036_export_jobs'),
+        ('agile', '0028_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgileMLState',
+            fields=[
+                ('organization', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='organizations.organization')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'agile_ml_states',
+            },
+        ),
+        migrations.CreateModel(
+            name='MLIssueDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organization_id', models.BigIntegerField()),
+                ('before', models.JSONField(null=True)),
+                ('after', models.JSONField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'agile_ml_issue_deltas',
+                'indexes': [models.Index(fields=['organization_id', 'id'], name='agile_ml_is_organiz_085a53_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agile', '0029_ml_issue_deltas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgileAnalyticsVersion',
+            fields=[
+                ('organization_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'agile_analytics_versions',
+            },
+        ),
+    ]
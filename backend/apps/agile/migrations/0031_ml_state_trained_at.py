@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:10
+
+import re
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_trained_orgs(apps, schema_editor):
+    """Flag orgs whose artifact was written before trained_at existed."""
+    from apps.agile.ml_models import MODEL_VERSION, AgileMLModelStore
+
+    AgileMLState = apps.get_model('agile', 'AgileMLState')
+    Organization = apps.get_model('organizations', 'Organization')
+    try:
+        _dirs, names = AgileMLModelStore.storage().listdir('')
+    except (NotImplementedError, FileNotFoundError):
+        return
+    pattern = re.compile(rf'agile_ml_org_(\d+)_{re.escape(MODEL_VERSION)}\.(?:bin|json)')
+    org_ids = {int(match.group(1)) for match in map(pattern.fullmatch, names) if match}
+    now = timezone.now()
+    for org_id in Organization.objects.filter(id__in=org_ids).values_list('id', flat=True):
+        AgileMLState.objects.update_or_create(organization_id=org_id, defaults={'trained_at': now})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agile', '0030_analytics_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agilemlstate',
+            name='trained_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_trained_orgs, migrations.RunPython.noop),
+    ]
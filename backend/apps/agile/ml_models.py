@@ -1,15 +1,33 @@
 import json
-import math
+import logging
 import re
-from collections import Counter, defaultdict
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
 from apps.agile.models import Issue, Sprint
+from apps.organizations import save_snapshots
+
+logger = logging.getLogger(__name__)
 
 
 TOKEN_PATTERN = re.compile(r"\b\w+\b")
 MODEL_VERSION = "v1"
+ARTIFACT_MAGIC = b"AGML\x01"
+TRAINED_FLAG_CACHE_SIZE = 10000
 
 
 def _tokenize(text):
@@ -17,65 +35,224 @@ def _tokenize(text):
 
 
 class NaiveBayesTextClassifier:
-    """Small multinomial Naive Bayes classifier without external deps."""
+    """Multinomial Naive Bayes (Laplace smoothing) over sparse token counts.
+
+    Training keeps a token -> id map, per-label example and token totals,
+    and for every token a sparse {label id: count} dict, so memory follows
+    the number of distinct (label, token) pairs rather than labels x
+    vocabulary. Scoring looks up only the tokens present in the query and
+    builds a small labels x query-tokens log-likelihood block from them;
+    ``predict_proba_batch`` scores many texts together.
+    """
+
+    # Upper bound on (labels x tokens) cells scored per chunk in a batch.
+    BATCH_CELLS = 2_000_000
 
     def __init__(self):
-        self.class_counts = Counter()
-        self.word_counts = defaultdict(Counter)
-        self.class_word_totals = Counter()
-        self.vocabulary = set()
-        self.total_examples = 0
+        self.labels = []
+        self.label_index = {}
+        self.vocab_index = {}
+        self.example_counts = np.zeros(0, dtype=np.int64)
+        self.label_totals = np.zeros(0, dtype=np.int64)
+        self.token_counts = {}
+        self._log_params = None
+
+    @property
+    def total_examples(self):
+        return int(self.example_counts.sum())
+
+    @property
+    def vocabulary(self):
+        return set(self.vocab_index)
+
+    def _label_id(self, label):
+        label_id = self.label_index.get(label)
+        if label_id is None:
+            label_id = self.label_index[label] = len(self.labels)
+            self.labels.append(label)
+            self.example_counts = np.append(self.example_counts, 0)
+            self.label_totals = np.append(self.label_totals, 0)
+        return label_id
+
+    def _token_id(self, token):
+        token_id = self.vocab_index.get(token)
+        if token_id is None:
+            token_id = self.vocab_index[token] = len(self.vocab_index)
+        return token_id
+
+    def _add_count(self, label_id, token_id, count):
+        """Add ``count`` (clamped at zero) to one cell; returns the change applied."""
+        postings = self.token_counts.setdefault(token_id, {})
+        previous = postings.get(label_id, 0)
+        value = max(previous + count, 0)
+        if value:
+            postings[label_id] = value
+        else:
+            postings.pop(label_id, None)
+            if not postings:
+                del self.token_counts[token_id]
+        return value - previous
 
     def fit(self, rows):
+        label_ids = []
+        doc_label_ids = []
+        token_ids = []
         for text, label in rows:
             if not text or label is None:
                 continue
             tokens = _tokenize(text)
             if not tokens:
                 continue
-            self.class_counts[label] += 1
-            self.total_examples += 1
-            for token in tokens:
-                self.word_counts[label][token] += 1
-                self.class_word_totals[label] += 1
-                self.vocabulary.add(token)
+            label_id = self._label_id(label)
+            doc_label_ids.append(label_id)
+            label_ids.extend([label_id] * len(tokens))
+            token_ids.extend(self._token_id(token) for token in tokens)
+
+        if doc_label_ids:
+            label_ids = np.asarray(label_ids, dtype=np.int64)
+            np.add.at(self.example_counts, np.asarray(doc_label_ids, dtype=np.int64), 1)
+            self.label_totals += np.bincount(label_ids, minlength=len(self.labels))
+            pairs, counts = np.unique(
+                (label_ids << 32) | np.asarray(token_ids, dtype=np.int64), return_counts=True,
+            )
+            for pair, count in zip(pairs.tolist(), counts.tolist()):
+                postings = self.token_counts.setdefault(pair & 0xFFFFFFFF, {})
+                postings[pair >> 32] = postings.get(pair >> 32, 0) + count
+            self._log_params = None
         return self
 
+    def update(self, text, label, count=1):
+        """Add (count > 0) or remove (count < 0) one example; False when it has no tokens."""
+        if not text or label is None:
+            return False
+        tokens = _tokenize(text)
+        if not tokens:
+            return False
+        if count > 0:
+            row = self._label_id(label)
+            columns = [self._token_id(token) for token in tokens]
+        else:
+            row = self.label_index.get(label)
+            if row is None:
+                return False
+            columns = [self.vocab_index[token] for token in tokens if token in self.vocab_index]
+
+        # Deltas for rows the last full fit never saw must not drive counts negative.
+        for token_id, occurrences in Counter(columns).items():
+            self.label_totals[row] += self._add_count(row, token_id, occurrences * count)
+        self.example_counts[row] = max(int(self.example_counts[row]) + count, 0)
+        self._log_params = None
+        return True
+
     def is_trained(self):
-        return self.total_examples > 0 and len(self.class_counts) > 0
+        return self.total_examples > 0 and bool((self.example_counts > 0).any())
+
+    def _params(self):
+        """(active label rows, label row -> active position, log prior, log denominators)"""
+        if self._log_params is None:
+            active = np.flatnonzero(self.example_counts > 0)
+            position = np.full(len(self.labels), -1, dtype=np.int64)
+            position[active] = np.arange(len(active))
+            vocab_size = max(len(self.vocab_index), 1)
+            log_prior = np.log(self.example_counts[active] / self.example_counts.sum())
+            log_denominator = np.log(self.label_totals[active] + vocab_size)
+            self._log_params = (active, position, log_prior, log_denominator)
+        return self._log_params
 
     def predict_proba(self, text):
+        return self.predict_proba_batch([text])[0]
+
+    def predict_proba_batch(self, texts):
+        """Label probabilities for each text; ``{}`` for texts with no tokens."""
+        texts = list(texts)
         if not self.is_trained():
-            return {}
-        tokens = _tokenize(text)
-        if not tokens:
-            return {}
-
-        vocab_size = max(len(self.vocabulary), 1)
-        scores = {}
-
-        for label, label_count in self.class_counts.items():
-            prior = math.log(label_count / self.total_examples)
-            total_words_for_label = self.class_word_totals[label]
-            token_score = 0.0
-            for token in tokens:
-                token_count = self.word_counts[label][token]
-                prob = (token_count + 1) / (total_words_for_label + vocab_size)
-                token_score += math.log(prob)
-            scores[label] = prior + token_score
-
-        max_score = max(scores.values())
-        exp_scores = {label: math.exp(score - max_score) for label, score in scores.items()}
-        denom = sum(exp_scores.values()) or 1.0
-        return {label: value / denom for label, value in exp_scores.items()}
+            return [{} for _ in texts]
+
+        params = self._params()
+        labels = [self.labels[row] for row in params[0]]
+        token_lists = [_tokenize(text) for text in texts]
+
+        results = []
+        chunk = []
+        chunk_tokens = 0
+        budget = max(self.BATCH_CELLS // max(len(labels), 1), 1)
+        for tokens in token_lists:
+            if chunk and chunk_tokens + len(tokens) > budget:
+                results.extend(self._score_chunk(chunk, labels, params))
+                chunk, chunk_tokens = [], 0
+            chunk.append(tokens)
+            chunk_tokens += len(tokens)
+        if chunk:
+            results.extend(self._score_chunk(chunk, labels, params))
+        return results
+
+    def _log_likelihood(self, token_ids, position, log_denominator):
+        """labels x len(token_ids) smoothed log likelihoods, read from the sparse counts."""
+        counts = np.zeros((len(log_denominator), len(token_ids)))
+        for column, token_id in enumerate(token_ids):
+            for label_id, count in self.token_counts.get(token_id, {}).items():
+                if position[label_id] >= 0:
+                    counts[position[label_id], column] = count
+        return np.log1p(counts) - log_denominator[:, None]
+
+    def _score_chunk(self, token_lists, labels, params):
+        _active, position, log_prior, log_denominator = params
+        docs = len(token_lists)
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=docs)
+        ids = np.fromiter(
+            (self.vocab_index.get(token, -1) for tokens in token_lists for token in tokens),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        doc_of = np.repeat(np.arange(docs), lengths)
+        known = ids >= 0
+        unseen_counts = np.bincount(doc_of[~known], minlength=docs)
+
+        # Per-document sums of the known tokens' log likelihoods, via prefix sums.
+        query_tokens, columns = np.unique(ids[known], return_inverse=True)
+        contributions = self._log_likelihood(query_tokens.tolist(), position, log_denominator)[:, columns]
+        prefix = np.zeros((len(labels), contributions.shape[1] + 1))
+        np.cumsum(contributions, axis=1, out=prefix[:, 1:])
+        bounds = np.searchsorted(doc_of[known], np.arange(docs + 1))
+        scores = prefix[:, bounds[1:]] - prefix[:, bounds[:-1]]
+        scores += log_prior[:, None] - log_denominator[:, None] * unseen_counts[None, :]
+
+        scores -= scores.max(axis=0, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=0, keepdims=True)
+        return [
+            dict(zip(labels, probabilities[:, doc].tolist())) if lengths[doc] else {}
+            for doc in range(docs)
+        ]
 
     def to_dict(self):
+        # Labels and tokens whose counts were all removed are dropped, so the
+        # result is the same as a fresh fit over the remaining examples.
+        label_rows = np.flatnonzero(self.example_counts > 0)
+        position = np.full(len(self.labels), -1, dtype=np.int64)
+        position[label_rows] = np.arange(len(label_rows))
+        vocabulary = []
+        cells = []
+        for token, token_id in self.vocab_index.items():
+            postings = [
+                (int(position[label_id]), count)
+                for label_id, count in self.token_counts.get(token_id, {}).items()
+                if position[label_id] >= 0
+            ]
+            if postings:
+                cells.extend((row, len(vocabulary), count) for row, count in postings)
+                vocabulary.append(token)
+        cells.sort()
         return {
-            "class_counts": dict(self.class_counts),
-            "word_counts": {str(label): dict(words) for label, words in self.word_counts.items()},
-            "class_word_totals": dict(self.class_word_totals),
-            "vocabulary": sorted(self.vocabulary),
-            "total_examples": self.total_examples,
+            "format": 2,
+            "labels": [self.labels[row] for row in label_rows],
+            "vocabulary": vocabulary,
+            "example_counts": self.example_counts[label_rows].tolist(),
+            "token_counts": {
+                "rows": [row for row, _col, _value in cells],
+                "cols": [col for _row, col, _value in cells],
+                "values": [value for _row, _col, value in cells],
+            },
         }
 
     @classmethod
@@ -83,17 +260,80 @@ class NaiveBayesTextClassifier:
         instance = cls()
         if not data:
             return instance
-        instance.class_counts = Counter(data.get("class_counts", {}))
-        instance.word_counts = defaultdict(Counter)
+        if data.get("format") == 2:
+            for label in data.get("labels", []):
+                instance._label_id(label)
+            for token in data.get("vocabulary", []):
+                instance._token_id(token)
+            instance.example_counts = np.asarray(data.get("example_counts", []), dtype=np.int64)
+            counts = data.get("token_counts") or {}
+            for row, col, value in zip(counts.get("rows", []), counts.get("cols", []), counts.get("values", [])):
+                instance.token_counts.setdefault(col, {})[row] = value
+                instance.label_totals[row] += value
+            return instance
+
+        # Format 1: per-label Counters as written before the array rewrite.
+        for label in data.get("class_counts", {}):
+            instance._label_id(label)
+        for token in data.get("vocabulary", []):
+            instance._token_id(token)
+        for label, count in data.get("class_counts", {}).items():
+            instance.example_counts[instance.label_index[label]] = count
         for label, words in data.get("word_counts", {}).items():
-            instance.word_counts[label] = Counter(words)
-        instance.class_word_totals = Counter(data.get("class_word_totals", {}))
-        instance.vocabulary = set(data.get("vocabulary", []))
-        instance.total_examples = int(data.get("total_examples", 0))
+            row = instance._label_id(label)
+            for token, count in words.items():
+                instance.label_totals[row] += instance._add_count(row, instance._token_id(token), count)
         return instance
 
 
+class LoadedArtifact:
+    """A parsed artifact plus the classifiers built from it, shared per process."""
+
+    def __init__(self, data):
+        self.data = data
+        self._classifiers = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def classifier(self, key):
+        model = self._classifiers.get(key)
+        if model is None:
+            with self._lock:
+                model = self._classifiers.get(key)
+                if model is None:
+                    model = NaiveBayesTextClassifier.from_dict(self.data.get(key, {}))
+                    self._classifiers[key] = model
+        return model
+
+
+def encode_artifact(payload):
+    return ARTIFACT_MAGIC + zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode_artifact(raw):
+    if raw.startswith(ARTIFACT_MAGIC):
+        raw = zlib.decompress(raw[len(ARTIFACT_MAGIC):])
+    return json.loads(raw.decode("utf-8"))
+
+
 class AgileMLModelStore:
+    """Per-organization model artifacts with a process-level LRU registry.
+
+    Artifacts live in the storage backend configured by AGILE_ML_ARTIFACT_STORAGE
+    (local ``model_artifacts/`` by default; point it at shared storage so every
+    worker sees the same models) as zlib-compressed JSON. Loaded artifacts are
+    cached per process keyed by (org, MODEL_VERSION, modified time); the
+    modified time is re-checked at most every AGILE_ML_REGISTRY_RECHECK_SECONDS.
+    """
+
+    _registry = OrderedDict()
+    _checked_at = {}
+    _lock = threading.Lock()
+    _storage = None
+    _storage_config = None
+
     @staticmethod
     def _dir():
         model_dir = Path(__file__).resolve().parent / "model_artifacts"
@@ -101,75 +341,245 @@ class AgileMLModelStore:
         return model_dir
 
     @classmethod
-    def _path(cls, organization_id):
-        return cls._dir() / f"agile_ml_org_{organization_id}_{MODEL_VERSION}.json"
+    def storage(cls):
+        storage_config = getattr(settings, "AGILE_ML_ARTIFACT_STORAGE", None) or {}
+        if cls._storage is None or cls._storage_config != storage_config:
+            if storage_config.get("BACKEND"):
+                storage = import_string(storage_config["BACKEND"])(**storage_config.get("OPTIONS", {}))
+            else:
+                storage = FileSystemStorage(location=str(cls._dir()))
+            cls._storage, cls._storage_config = storage, storage_config
+            cls.clear_registry()
+        return cls._storage
+
+    @classmethod
+    def _name(cls, organization_id):
+        return f"agile_ml_org_{organization_id}_{MODEL_VERSION}.bin"
+
+    @classmethod
+    def _legacy_name(cls, organization_id):
+        return f"agile_ml_org_{organization_id}_{MODEL_VERSION}.json"
 
     @classmethod
     def save(cls, organization_id, payload):
-        path = cls._path(organization_id)
-        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-        return str(path)
+        storage = cls.storage()
+        name = cls._name(organization_id)
+        if storage.exists(name):
+            storage.delete(name)
+        name = storage.save(name, ContentFile(encode_artifact(payload)))
+        cls.evict(organization_id)
+        try:
+            return storage.path(name)
+        except NotImplementedError:
+            return name
 
     @classmethod
-    def load(cls, organization_id):
-        path = cls._path(organization_id)
-        if not path.exists():
+    def _read(cls, organization_id):
+        """(modified time, artifact dict) from storage, or None."""
+        storage = cls.storage()
+        for name in (cls._name(organization_id), cls._legacy_name(organization_id)):
+            if storage.exists(name):
+                with storage.open(name, "rb") as handle:
+                    data = decode_artifact(handle.read())
+                return storage.get_modified_time(name), data
+        return None
+
+    @classmethod
+    def _modified_time(cls, organization_id):
+        storage = cls.storage()
+        for name in (cls._name(organization_id), cls._legacy_name(organization_id)):
+            if storage.exists(name):
+                return storage.get_modified_time(name)
+        return None
+
+    @classmethod
+    def get(cls, organization_id):
+        """The org's LoadedArtifact, or None when no model has been trained."""
+        recheck = getattr(settings, "AGILE_ML_REGISTRY_RECHECK_SECONDS", 5)
+        now = time.monotonic()
+        cached = cls._registry.get(organization_id)
+        if cached is not None and now - cls._checked_at.get(organization_id, 0) < recheck:
+            with cls._lock:
+                if organization_id in cls._registry:
+                    cls._registry.move_to_end(organization_id)
+            return cached[1]
+
+        modified = cls._modified_time(organization_id)
+        if modified is None:
+            cls.evict(organization_id)
+            cls._checked_at[organization_id] = now
+            cls._registry[organization_id] = ((organization_id, MODEL_VERSION, None), None)
             return None
-        return json.loads(path.read_text(encoding="utf-8"))
+        key = (organization_id, MODEL_VERSION, modified)
+        if cached is None or cached[0] != key:
+            read = cls._read(organization_id)
+            if read is None:
+                return None
+            key = (organization_id, MODEL_VERSION, read[0])
+            cached = (key, LoadedArtifact(read[1]))
+
+        with cls._lock:
+            cls._registry[organization_id] = cached
+            cls._registry.move_to_end(organization_id)
+            cls._checked_at[organization_id] = now
+            size = getattr(settings, "AGILE_ML_REGISTRY_SIZE", 64)
+            while len(cls._registry) > size:
+                evicted, _ = cls._registry.popitem(last=False)
+                cls._checked_at.pop(evicted, None)
+        return cached[1]
+
+    @classmethod
+    def load(cls, organization_id):
+        artifact = cls.get(organization_id)
+        return artifact.data if artifact else None
 
     @classmethod
     def exists(cls, organization_id):
-        return cls._path(organization_id).exists()
+        return cls.get(organization_id) is not None
+
+    @classmethod
+    def evict(cls, organization_id):
+        with cls._lock:
+            cls._registry.pop(organization_id, None)
+            cls._checked_at.pop(organization_id, None)
+
+    @classmethod
+    def clear_registry(cls):
+        with cls._lock:
+            cls._registry.clear()
+            cls._checked_at.clear()
+
+
+def issue_example(title, description, assignee_id, story_points):
+    """(text, assignee label, story point label) one issue contributes to training."""
+    text = f"{title or ''} {description or ''}".strip()
+    return (
+        text,
+        str(assignee_id) if assignee_id else None,
+        str(story_points) if story_points is not None else None,
+    )
 
 
 class AgileMLTrainer:
+    """Full retrains plus incremental updates driven by Issue writes.
+
+    ``train_for_organization`` fits both classifiers from every issue of the
+    org. Issue saves and deletes append (old example, new example) rows to
+    MLIssueDelta, and ``apply_pending_changes`` (run periodically, one task
+    per org) folds everything pending into the stored counts with a single
+    artifact write, so the models stay current between full retrains. Both
+    hold the org's AgileMLState row lock while they rewrite the artifact.
+    """
+
+    _trained = OrderedDict()
+    _trained_lock = threading.Lock()
+
+    @classmethod
+    def is_trained(cls, organization_id):
+        """Whether the org has a stored model, per its AgileMLState row.
+
+        Cached per process and re-checked at most every
+        AGILE_ML_REGISTRY_RECHECK_SECONDS, so Issue write signals never touch
+        the artifact storage.
+        """
+        from apps.agile.models import AgileMLState
+
+        recheck = getattr(settings, "AGILE_ML_REGISTRY_RECHECK_SECONDS", 5)
+        now = time.monotonic()
+        cached = cls._trained.get(organization_id)
+        if cached is not None and now - cached[1] < recheck:
+            return cached[0]
+        trained = AgileMLState.objects.filter(organization_id=organization_id, trained_at__isnull=False).exists()
+        cls._remember_trained(organization_id, trained, now)
+        return trained
+
+    @classmethod
+    def _remember_trained(cls, organization_id, trained, now=None):
+        with cls._trained_lock:
+            cls._trained[organization_id] = (trained, time.monotonic() if now is None else now)
+            cls._trained.move_to_end(organization_id)
+            while len(cls._trained) > TRAINED_FLAG_CACHE_SIZE:
+                cls._trained.popitem(last=False)
+
+    @staticmethod
+    def _locked(organization_id):
+        """Take the org's artifact lock; call inside transaction.atomic()."""
+        from apps.agile.models import AgileMLState
+
+        AgileMLState.objects.select_for_update().get(organization_id=organization_id)
+
+    @staticmethod
+    def _ensure_state(organization_id):
+        from apps.agile.models import AgileMLState
+
+        try:
+            AgileMLState.objects.get_or_create(organization_id=organization_id)
+        except IntegrityError:
+            pass  # created concurrently
+
     @staticmethod
-    def train_for_organization(organization_id):
-        issues = Issue.objects.filter(organization_id=organization_id).select_related("assignee", "project")
+    def sprint_baseline(organization_id):
+        """Completed sprint count and mean done ratio, in one aggregated query."""
+        sprint_counts = list(
+            Sprint.objects.filter(organization_id=organization_id, status="completed")
+            .annotate(total=Count("issues"), done=Count("issues", filter=Q(issues__status="done")))
+            .values_list("total", "done")
+        )
+        sprint_ratios = [done / total for total, done in sprint_counts if total]
+        avg_completion_ratio = round((sum(sprint_ratios) / len(sprint_ratios)) if sprint_ratios else 0.0, 4)
+        return len(sprint_counts), {"avg_completion_ratio": avg_completion_ratio}
+
+    @classmethod
+    def train_for_organization(cls, organization_id):
+        from apps.agile.models import AgileMLState, MLIssueDelta
+
+        cls._ensure_state(organization_id)
+        with transaction.atomic():
+            cls._locked(organization_id)
+            # Deltas already written are covered by the issues read below.
+            covered = MLIssueDelta.objects.filter(organization_id=organization_id).aggregate(last=Max("id"))["last"]
+            result = cls._train(organization_id)
+            AgileMLState.objects.filter(organization_id=organization_id).update(trained_at=timezone.now())
+            if covered is not None:
+                MLIssueDelta.objects.filter(organization_id=organization_id, id__lte=covered).delete()
+        cls._remember_trained(organization_id, True)
+        return result
+
+    @staticmethod
+    def _train(organization_id):
+        issues = Issue.objects.filter(organization_id=organization_id).values_list(
+            "title", "description", "assignee_id", "story_points"
+        )
 
         assignee_rows = []
         story_point_rows = []
+        issue_count = 0
 
-        for issue in issues:
-            text = f"{issue.title} {issue.description or ''}".strip()
-            if issue.assignee_id:
-                assignee_rows.append((text, str(issue.assignee_id)))
-            if issue.story_points is not None:
-                story_point_rows.append((text, str(issue.story_points)))
+        for row in issues.iterator(chunk_size=2000):
+            issue_count += 1
+            text, assignee, story_points = issue_example(*row)
+            if assignee:
+                assignee_rows.append((text, assignee))
+            if story_points is not None:
+                story_point_rows.append((text, story_points))
 
         assignee_model = NaiveBayesTextClassifier().fit(assignee_rows)
         story_point_model = NaiveBayesTextClassifier().fit(story_point_rows)
-
-        completed_sprints = Sprint.objects.filter(
-            organization_id=organization_id,
-            status="completed",
-        ).prefetch_related("issues")
-
-        sprint_ratios = []
-        for sprint in completed_sprints:
-            total = sprint.issues.count()
-            if total == 0:
-                continue
-            done = sprint.issues.filter(status="done").count()
-            sprint_ratios.append(done / total)
-
-        avg_completion_ratio = round((sum(sprint_ratios) / len(sprint_ratios)) if sprint_ratios else 0.0, 4)
+        completed_sprints, sprint_baseline = AgileMLTrainer.sprint_baseline(organization_id)
 
         artifact = {
             "metadata": {
                 "organization_id": organization_id,
                 "version": MODEL_VERSION,
                 "trained_at": datetime.utcnow().isoformat() + "Z",
-                "issue_count": issues.count(),
+                "issue_count": issue_count,
                 "assignee_examples": len(assignee_rows),
                 "story_point_examples": len(story_point_rows),
-                "completed_sprints": completed_sprints.count(),
+                "completed_sprints": completed_sprints,
             },
             "assignee_model": assignee_model.to_dict(),
             "story_point_model": story_point_model.to_dict(),
-            "sprint_baseline": {
-                "avg_completion_ratio": avg_completion_ratio,
-            },
+            "sprint_baseline": sprint_baseline,
         }
 
         path = AgileMLModelStore.save(organization_id, artifact)
@@ -180,3 +590,132 @@ class AgileMLTrainer:
             "metadata": artifact["metadata"],
             "baseline": artifact["sprint_baseline"],
         }
+
+    @classmethod
+    def apply_pending_changes(cls, organization_id):
+        """Fold every pending MLIssueDelta of the org into its stored models.
+
+        Returns the number of deltas consumed. Deltas are dropped even when
+        the org has no trained artifact yet; the first full retrain covers them.
+        """
+        from apps.agile.models import MLIssueDelta
+
+        pending = MLIssueDelta.objects.filter(organization_id=organization_id)
+        if not pending.exists():
+            return 0
+        cls._ensure_state(organization_id)
+        with transaction.atomic():
+            cls._locked(organization_id)
+            deltas = list(pending.order_by("id").values_list("id", "before", "after"))
+            if not deltas:
+                return 0
+            cls.apply_issue_changes(organization_id, [(before, after) for _id, before, after in deltas])
+            pending.filter(id__lte=deltas[-1][0]).delete()
+        return len(deltas)
+
+    @classmethod
+    def apply_issue_changes(cls, organization_id, changes):
+        """Fold Issue deltas into the org's stored models.
+
+        ``changes`` is a list of ``[before, after]`` pairs of ``issue_example``
+        tuples, ``None`` for a created (before) or deleted (after) issue. The
+        caller holds the org's artifact lock. Returns False when the org has
+        no trained artifact yet.
+        """
+        # Read from storage rather than the registry, which may lag other workers.
+        read = AgileMLModelStore._read(organization_id)
+        if read is None:
+            return False
+        artifact = read[1]
+        assignee_model = NaiveBayesTextClassifier.from_dict(artifact.get("assignee_model", {}))
+        story_point_model = NaiveBayesTextClassifier.from_dict(artifact.get("story_point_model", {}))
+        metadata = artifact.setdefault("metadata", {})
+
+        for before, after in changes:
+            for example, sign in ((before, -1), (after, 1)):
+                if example is None:
+                    continue
+                text, assignee, story_points = example
+                if assignee and assignee_model.update(text, assignee, sign):
+                    metadata["assignee_examples"] = metadata.get("assignee_examples", 0) + sign
+                if story_points is not None and story_point_model.update(text, story_points, sign):
+                    metadata["story_point_examples"] = metadata.get("story_point_examples", 0) + sign
+            if (before is None) != (after is None):
+                metadata["issue_count"] = metadata.get("issue_count", 0) + (1 if before is None else -1)
+
+        completed_sprints, sprint_baseline = cls.sprint_baseline(organization_id)
+        metadata["completed_sprints"] = completed_sprints
+        metadata["updated_at"] = datetime.utcnow().isoformat() + "Z"
+        artifact["assignee_model"] = assignee_model.to_dict()
+        artifact["story_point_model"] = story_point_model.to_dict()
+        artifact["sprint_baseline"] = sprint_baseline
+        AgileMLModelStore.save(organization_id, artifact)
+        return True
+
+
+# Online updates from Issue writes ------------------------------------------
+
+_EXAMPLE_FIELDS = ("title", "description", "assignee_id", "story_points")
+
+
+def _stored_example(issue_id):
+    row = Issue.objects.filter(pk=issue_id).values_list(*_EXAMPLE_FIELDS).first()
+    return issue_example(*row) if row else None
+
+
+def _loaded_example(instance):
+    """issue_example for the instance's current values; None if any are deferred."""
+    values = instance.__dict__
+    if any(field not in values for field in _EXAMPLE_FIELDS):
+        return None
+    return issue_example(*(values[field] for field in _EXAMPLE_FIELDS))
+
+
+def _tracked(organization_id):
+    return (
+        getattr(settings, "AGILE_ML_ONLINE_TRAINING", True)
+        and organization_id
+        and AgileMLTrainer.is_trained(organization_id)
+    )
+
+
+def _record_issue_change(organization_id, before, after):
+    from apps.agile.models import MLIssueDelta
+
+    if before != after:
+        MLIssueDelta.objects.create(
+            organization_id=organization_id,
+            before=list(before) if before else None,
+            after=list(after) if after else None,
+        )
+
+
+def _issue_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if not _tracked(instance.organization_id):
+            return
+        before = None
+    else:
+        # Only read (by the shared snapshot hook) for orgs that have a model.
+        stored = save_snapshots.stored(instance, "agile_ml")
+        if stored is None:
+            return
+        before = issue_example(*(stored[field] for field in _EXAMPLE_FIELDS))
+    after = _loaded_example(instance) or _stored_example(instance.pk)
+    _record_issue_change(instance.organization_id, before, after)
+
+
+def _issue_deleted(sender, instance, **kwargs):
+    if not _tracked(instance.organization_id):
+        return
+    before = _loaded_example(instance)
+    if before is not None:
+        _record_issue_change(instance.organization_id, before, None)
+
+
+def connect_signals():
+    save_snapshots.track(Issue, "agile_ml", _EXAMPLE_FIELDS, wants=lambda issue: _tracked(issue.organization_id))
+    post_save.connect(_issue_saved, sender=Issue, dispatch_uid="agile_ml_issue_save")
+    post_delete.connect(_issue_deleted, sender=Issue, dispatch_uid="agile_ml_issue_delete")
@@ -1,9 +1,9 @@
 import re
-from collections import Counter
 from datetime import datetime
 from apps.agile.models import Issue, Sprint
 from apps.organizations.models import User
-from apps.agile.ml_models import AgileMLModelStore, NaiveBayesTextClassifier
+from apps.agile.assignee_profile import keyword_profiles
+from apps.agile.ml_models import AgileMLModelStore
 
 class MLService:
     """Lightweight ML service for smart features"""
@@ -20,21 +20,10 @@ class MLService:
 
         text = f"{issue_title} {issue_description}".lower()
         keywords = set(re.findall(r'\b\w+\b', text))
-        
-        # Get users who worked on similar issues
-        similar_issues = Issue.objects.filter(
-            project_id=project_id,
-            assignee__isnull=False
-        ).exclude(status='backlog')
-        
-        user_scores = Counter()
-        for issue in similar_issues:
-            issue_text = f"{issue.title} {issue.description or ''}".lower()
-            issue_keywords = set(re.findall(r'\b\w+\b', issue_text))
-            overlap = len(keywords & issue_keywords)
-            if overlap > 2:
-                user_scores[issue.assignee_id] += overlap
-        
+
+        # Users who worked on similar issues, from the project's keyword profile
+        user_scores = keyword_profiles.scores(project_id, keywords)
+
         if user_scores:
             best_user_id = user_scores.most_common(1)[0][0]
             user = User.objects.get(id=best_user_id)
@@ -49,11 +38,11 @@ class MLService:
     
     @staticmethod
     def _suggest_assignee_from_trained_model(issue_title, issue_description, project_id, organization_id):
-        artifact = AgileMLModelStore.load(organization_id)
+        artifact = AgileMLModelStore.get(organization_id)
         if not artifact:
             return None
 
-        model = NaiveBayesTextClassifier.from_dict(artifact.get("assignee_model", {}))
+        model = artifact.classifier("assignee_model")
         if not model.is_trained():
             return None
 
@@ -117,7 +106,7 @@ class MLService:
 
             model_source = 'heuristic'
             if organization_id:
-                artifact = AgileMLModelStore.load(organization_id)
+                artifact = AgileMLModelStore.get(organization_id)
                 if artifact:
                     baseline = artifact.get("sprint_baseline", {})
                     avg_completion_ratio = baseline.get("avg_completion_ratio")
@@ -229,10 +218,10 @@ class MLService:
 
     @staticmethod
     def _estimate_story_points_from_trained_model(title, description, organization_id):
-        artifact = AgileMLModelStore.load(organization_id)
+        artifact = AgileMLModelStore.get(organization_id)
         if not artifact:
             return None
-        model = NaiveBayesTextClassifier.from_dict(artifact.get("story_point_model", {}))
+        model = artifact.classifier("story_point_model")
         if not model.is_trained():
             return None
 
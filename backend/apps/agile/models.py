@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from apps.organizations.models import User, Organization
 from apps.conversations.models import Conversation
@@ -15,6 +16,8 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         db_table = 'projects'
         ordering = ['-created_at']
@@ -43,6 +46,8 @@ class Sprint(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'sprints'
         ordering = ['-start_date']
@@ -176,6 +181,8 @@ class Issue(models.Model):
     test_coverage = models.IntegerField(null=True, blank=True, help_text='Test coverage percentage')
     watchers = models.ManyToManyField(User, related_name='watched_issues', blank=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'issues'
         ordering = ['-created_at']
@@ -307,6 +314,8 @@ class Blocker(models.Model):
     ticket_url = models.URLField(blank=True)
     ticket_id = models.CharField(max_length=50, blank=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'blockers'
         ordering = ['-created_at']
@@ -348,6 +357,8 @@ class SprintUpdate(models.Model):
     ai_summary = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'sprint_updates'
         ordering = ['-created_at']
@@ -793,3 +804,52 @@ class ProjectCategory(models.Model):
         db_table = 'project_categories'
         unique_together = ['organization', 'name']
         ordering = ['name']
+
+
+class AgileMLState(models.Model):
+    """Per-organization lock row for the stored agile ML artifact.
+
+    Full retrains and delta folds both read-modify-write the artifact, so they
+    run while holding this row with select_for_update. ``trained_at`` marks
+    orgs that have an artifact, so Issue writes can tell whether to record ML
+    deltas without asking the artifact storage.
+    """
+    organization = models.OneToOneField(Organization, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    trained_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'agile_ml_states'
+
+
+class MLIssueDelta(models.Model):
+    """An Issue write not yet folded into the org's stored ML models.
+
+    ``before``/``after`` are ``issue_example`` lists (null for a created or
+    deleted issue). The org id is a plain column so deltas written while an
+    organization is being deleted never block the cascade.
+    """
+    organization_id = models.BigIntegerField()
+    before = models.JSONField(null=True)
+    after = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'agile_ml_issue_deltas'
+        indexes = [
+            models.Index(fields=['organization_id', 'id']),
+        ]
+
+
+class AgileAnalyticsVersion(models.Model):
+    """Per-organization version of the cached analytics payloads.
+
+    Issue and Decision writes bump it in their own transaction, so every
+    process sees the new version exactly when it can see the new data. The
+    org id is a plain column for the same reason as MLIssueDelta.
+    """
+    organization_id = models.BigIntegerField(primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'agile_analytics_versions'
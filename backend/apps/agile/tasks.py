@@ -0,0 +1,21 @@
+from celery import shared_task
+
+
+@shared_task(name="agile.apply_ml_issue_changes", ignore_result=True)
+def apply_ml_issue_changes(organization_id):
+    """Fold the org's pending Issue deltas into its stored ML models."""
+    from .ml_models import AgileMLTrainer
+
+    applied = AgileMLTrainer.apply_pending_changes(organization_id)
+    return {"status": "ok", "organization_id": organization_id, "applied": applied}
+
+
+@shared_task(name="agile.apply_pending_ml_issue_changes", ignore_result=True)
+def apply_pending_ml_issue_changes():
+    """Periodic drain: one fold task per org with pending Issue deltas."""
+    from .models import MLIssueDelta
+
+    organization_ids = list(MLIssueDelta.objects.values_list("organization_id", flat=True).distinct())
+    for organization_id in organization_ids:
+        apply_ml_issue_changes.delay(organization_id)
+    return {"organizations": len(organization_ids)}
@@ -0,0 +1,108 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.conversations.models import Conversation
+from apps.decisions.models import Decision
+from apps.organizations.models import Organization, User
+from .models import AgileAnalyticsVersion, Board, Column, Issue, Project, Sprint
+
+
+@override_settings(AGILE_ANALYTICS_CACHE_SECONDS=60)
+class AgileAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Analytics Org", slug="analytics-org")
+        self.users = [
+            User.objects.create_user(
+                username=f"analytics_{index}", email=f"analytics_{index}@example.com", password="pass",
+                organization=self.org, role="admin" if index == 0 else "contributor",
+            )
+            for index in range(3)
+        ]
+        self.project = Project.objects.create(organization=self.org, name="Analytics", key="ANL", lead=self.users[0])
+        self.board = Board.objects.create(organization=self.org, project=self.project, name="Board")
+        self.column = Column.objects.create(board=self.board, name="Todo", order=0)
+        self.sprints = [
+            Sprint.objects.create(
+                organization=self.org, project=self.project, name=f"Sprint {index}",
+                start_date=date(2024, 1, 1 + index * 14), end_date=date(2024, 1, 14 + index * 14),
+            )
+            for index in range(2)
+        ]
+        statuses = ["done", "done", "in_progress", "todo"]
+        for index, status in enumerate(statuses):
+            self._issue(index, status, assignee=self.users[index % 2], sprint=self.sprints[0])
+        self._issue(9, "done", assignee=None, sprint=None, priority="high")
+        Conversation.objects.create(
+            organization=self.org, author=self.users[1], post_type="update",
+            title="Weekly update", content="Shipped the analytics page.",
+        )
+        Decision.objects.create(
+            organization=self.org, title="Adopt grouped queries",
+            description="Use aggregations for analytics.", decision_maker=self.users[0],
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def _issue(self, number, status, assignee, sprint, priority="medium"):
+        return Issue.objects.create(
+            organization=self.org, project=self.project, board=self.board, column=self.column,
+            key=f"ANL-{number}", title=f"Issue {number}", reporter=self.users[0],
+            assignee=assignee, sprint=sprint, status=status, priority=priority,
+        )
+
+    def test_team_analytics_counts_per_member_in_constant_queries(self):
+        with self.assertNumQueries(5):  # the version plus 4, however many members the org has
+            response = self.client.get("/api/analytics/team/")
+
+        members = {row["user_id"]: row for row in response.data["team_members"]}
+        self.assertEqual(len(members), 3)
+        self.assertEqual(members[self.users[0].id]["issues_assigned"], 2)
+        self.assertEqual(members[self.users[0].id]["issues_completed"], 1)
+        self.assertEqual(members[self.users[0].id]["decisions"], 1)
+        self.assertEqual(members[self.users[1].id]["conversations"], 1)
+        self.assertEqual(members[self.users[1].id]["issues_completed"], 1)
+        self.assertEqual(members[self.users[2].id]["issues_assigned"], 0)
+
+    def test_project_analytics_payload(self):
+        response = self.client.get(f"/api/analytics/projects/{self.project.id}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["issues"]["total"], 5)
+        by_status = {row["status"]: row["count"] for row in response.data["issues"]["by_status"]}
+        self.assertEqual(by_status["done"], 3)
+        sprints = {row["id"]: row for row in response.data["sprints"]}
+        self.assertEqual(sprints[self.sprints[0].id]["total_issues"], 4)
+        self.assertEqual(sprints[self.sprints[0].id]["completed_issues"], 2)
+        self.assertEqual(sprints[self.sprints[0].id]["completion_rate"], 50.0)
+        self.assertEqual(sprints[self.sprints[1].id]["completion_rate"], 0)
+
+    def test_cached_until_an_issue_changes(self):
+        url = f"/api/analytics/projects/{self.project.id}/"
+        self.client.get(url)
+
+        with self.assertNumQueries(2):  # the project lookup and the analytics version
+            self.client.get(url)
+
+        self._issue(10, "done", assignee=self.users[2], sprint=self.sprints[1])
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["issues"]["total"], 6)
+        completed = sum(row["completed_issues"] for row in response.data["sprints"])
+        self.assertEqual(completed, 3)
+
+    def test_version_is_shared_through_the_database(self):
+        url = f"/api/analytics/projects/{self.project.id}/"
+        self.client.get(url)
+
+        # A write seen only by another process still moves this one's version.
+        Issue.objects.filter(project=self.project).update(status="done")
+        AgileAnalyticsVersion.objects.filter(organization_id=self.org.id).update(version=F("version") + 1)
+
+        response = self.client.get(url)
+        by_status = {row["status"]: row["count"] for row in response.data["issues"]["by_status"]}
+        self.assertEqual(by_status, {"done": 5})
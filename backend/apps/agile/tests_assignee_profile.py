@@ -0,0 +1,114 @@
+import re
+from collections import Counter
+
+from django.test import TestCase
+
+from apps.organizations.models import Organization, User
+from .assignee_profile import KeywordProfileService, keyword_profiles
+from .ml_service import MLService
+from .models import Board, Column, Issue, Project
+
+
+def reference_scores(project_id, text):
+    """The per-issue scan the keyword profile replaced."""
+    keywords = set(re.findall(r'\b\w+\b', text.lower()))
+    user_scores = Counter()
+    issues = Issue.objects.filter(project_id=project_id, assignee__isnull=False).exclude(status='backlog')
+    for issue in issues:
+        issue_keywords = set(re.findall(r'\b\w+\b', f"{issue.title} {issue.description or ''}".lower()))
+        overlap = len(keywords & issue_keywords)
+        if overlap > 2:
+            user_scores[issue.assignee_id] += overlap
+    return user_scores
+
+
+class KeywordProfileTests(TestCase):
+    def setUp(self):
+        keyword_profiles.clear()
+        self.addCleanup(keyword_profiles.clear)
+        self.org = Organization.objects.create(name="Profile Org", slug="profile-org")
+        self.users = [
+            User.objects.create_user(
+                username=f"profile_{name}", email=f"{name}@example.com", password="pass",
+                organization=self.org, role="contributor", full_name=name.title(),
+            )
+            for name in ("ana", "ben", "cy")
+        ]
+        self.project = Project.objects.create(organization=self.org, name="Profile", key="PRF", lead=self.users[0])
+        self.other_project = Project.objects.create(organization=self.org, name="Other", key="OTH", lead=self.users[0])
+        self.board = Board.objects.create(organization=self.org, project=self.project, name="Board")
+        self.column = Column.objects.create(board=self.board, name="Todo", order=0)
+        self.issues = [
+            self._issue("Fix login redirect bug", "auth token expires during login", self.users[0]),
+            self._issue("Login page slow on mobile", "auth bundle too large", self.users[1]),
+            self._issue("Dashboard chart colours", "chart legend contrast", self.users[2]),
+            self._issue("Refactor auth token storage", "", self.users[0], status="backlog"),
+            self._issue("Unassigned login auth redirect bug", "", None),
+        ]
+
+    def _issue(self, title, description, assignee, status="todo", project=None):
+        number = Issue.objects.count() + 1
+        return Issue.objects.create(
+            organization=self.org, project=project or self.project, board=self.board, column=self.column,
+            key=f"PRF-{number}", title=title, description=description,
+            reporter=self.users[0], assignee=assignee, status=status,
+        )
+
+    queries = [
+        "login redirect bug with auth token",
+        "chart legend colours on dashboard",
+        "auth login",
+        "nothing in common here",
+    ]
+
+    def assertMatchesScan(self):
+        for query in self.queries:
+            self.assertEqual(
+                keyword_profiles.scores(self.project.id, set(re.findall(r'\b\w+\b', query.lower()))),
+                reference_scores(self.project.id, query),
+            )
+
+    def test_profile_matches_full_scan(self):
+        self.assertMatchesScan()
+
+    def test_issue_writes_patch_the_loaded_profile(self):
+        profile = keyword_profiles.get(self.project.id)
+        other_process = KeywordProfileService()
+        other_process.get(self.project.id)
+
+        self._issue("Auth redirect loop after login", "token refresh bug", self.users[2])
+        issue = Issue.objects.get(pk=self.issues[0].pk)
+        issue.assignee = self.users[1]
+        issue.save()
+        issue = Issue.objects.get(pk=self.issues[3].pk)
+        issue.status = "todo"
+        issue.save()
+        issue = Issue.objects.only("id").get(pk=self.issues[1].pk)
+        issue.project = self.other_project
+        issue.save()
+        self.issues[2].delete()
+
+        self.assertIs(keyword_profiles.get(self.project.id), profile)
+        self.assertMatchesScan()
+        for query in self.queries:
+            keywords = set(re.findall(r'\b\w+\b', query.lower()))
+            self.assertEqual(
+                other_process.scores(self.project.id, keywords),
+                keyword_profiles.scores(self.project.id, keywords),
+            )
+
+    def test_suggestion_keeps_output_contract(self):
+        with self.assertNumQueries(2):  # profile build + user lookup
+            suggestion = MLService.suggest_assignee(
+                "Login redirect bug", "auth token", self.project.id,
+            )
+
+        self.assertEqual(suggestion, {
+            'user_id': self.users[0].id,
+            'name': 'Ana',
+            'confidence': 0.5,
+            'reason': 'Worked on 5 similar issues',
+            'model_source': 'heuristic',
+        })
+        with self.assertNumQueries(2):  # change-feed catch-up + user lookup
+            MLService.suggest_assignee("Login redirect bug", "auth token", self.project.id)
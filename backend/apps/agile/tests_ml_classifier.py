@@ -0,0 +1,133 @@
+import json
+import math
+from collections import Counter, defaultdict
+
+from django.test import SimpleTestCase
+
+from .ml_models import NaiveBayesTextClassifier, _tokenize
+
+
+ROWS = [
+    ("Login page throws 500 after SSO redirect", "7"),
+    ("SSO login loop on Safari", "7"),
+    ("Dashboard chart renders empty", "9"),
+    ("Chart legend overlaps axis labels", "9"),
+    ("Export CSV is missing the header row", "12"),
+    ("", "12"),
+    ("CSV export times out for large projects", None),
+    ("Billing webhook retries forever", "12"),
+]
+
+
+def reference_proba(rows, text):
+    """The per-label, per-token loop the array classifier replaced."""
+    class_counts = Counter()
+    word_counts = defaultdict(Counter)
+    vocabulary = set()
+    for row_text, label in rows:
+        tokens = _tokenize(row_text)
+        if not row_text or label is None or not tokens:
+            continue
+        class_counts[label] += 1
+        word_counts[label].update(tokens)
+        vocabulary.update(tokens)
+    tokens = _tokenize(text)
+    if not tokens:
+        return {}
+    total = sum(class_counts.values())
+    scores = {}
+    for label, count in class_counts.items():
+        denominator = sum(word_counts[label].values()) + len(vocabulary)
+        scores[label] = math.log(count / total) + sum(
+            math.log((word_counts[label][token] + 1) / denominator) for token in tokens
+        )
+    top = max(scores.values())
+    exp_scores = {label: math.exp(score - top) for label, score in scores.items()}
+    return {label: value / sum(exp_scores.values()) for label, value in exp_scores.items()}
+
+
+class NaiveBayesTextClassifierTests(SimpleTestCase):
+    texts = [
+        "SSO login broken",
+        "chart axis",
+        "unknown words only",
+        "",
+        "csv export header login chart",
+    ]
+
+    def assertProbaEqual(self, actual, expected):
+        self.assertEqual(set(actual), set(expected))
+        for label, probability in expected.items():
+            self.assertAlmostEqual(actual[label], probability, places=10)
+
+    def test_matches_reference_implementation(self):
+        model = NaiveBayesTextClassifier().fit(ROWS)
+
+        for text in self.texts:
+            self.assertProbaEqual(model.predict_proba(text), reference_proba(ROWS, text))
+
+    def test_batch_matches_single_predictions(self):
+        model = NaiveBayesTextClassifier().fit(ROWS)
+        model.BATCH_CELLS = 7  # force several chunks
+
+        batch = model.predict_proba_batch(self.texts)
+
+        self.assertEqual(len(batch), len(self.texts))
+        for text, probabilities in zip(self.texts, batch):
+            self.assertProbaEqual(probabilities, model.predict_proba(text))
+        self.assertEqual(batch[3], {})
+
+    def test_fit_twice_extends_counts(self):
+        model = NaiveBayesTextClassifier().fit(ROWS[:3]).fit(ROWS[3:])
+
+        self.assertEqual(model.total_examples, 6)
+        self.assertProbaEqual(model.predict_proba("chart export"), reference_proba(ROWS, "chart export"))
+
+    def test_round_trip_through_json(self):
+        model = NaiveBayesTextClassifier().fit(ROWS)
+
+        restored = NaiveBayesTextClassifier.from_dict(json.loads(json.dumps(model.to_dict())))
+
+        self.assertProbaEqual(restored.predict_proba("sso chart"), model.predict_proba("sso chart"))
+
+    def test_loads_per_label_counter_format(self):
+        legacy = {
+            "class_counts": {"7": 2, "9": 1},
+            "word_counts": {"7": {"sso": 2, "login": 3}, "9": {"chart": 2}},
+            "class_word_totals": {"7": 5, "9": 2},
+            "vocabulary": ["chart", "login", "sso"],
+            "total_examples": 3,
+        }
+        rows = [("sso login login", "7"), ("sso login", "7"), ("chart chart", "9")]
+
+        model = NaiveBayesTextClassifier.from_dict(legacy)
+
+        self.assertProbaEqual(model.predict_proba("login chart"), reference_proba(rows, "login chart"))
+
+    def test_untrained_model_returns_empty(self):
+        model = NaiveBayesTextClassifier()
+
+        self.assertFalse(model.is_trained())
+        self.assertEqual(model.predict_proba_batch(["anything", ""]), [{}, {}])
+
+    def test_counts_are_sparse_and_scoring_reads_only_query_tokens(self):
+        model = NaiveBayesTextClassifier().fit(ROWS)
+        pairs = {
+            (label, token)
+            for text, label in ROWS
+            if text and label is not None
+            for token in _tokenize(text)
+        }
+        self.assertEqual(sum(len(postings) for postings in model.token_counts.values()), len(pairs))
+
+        requested = []
+        original = model._log_likelihood
+
+        def recording(token_ids, *args):
+            requested.append(sorted(token_ids))
+            return original(token_ids, *args)
+
+        model._log_likelihood = recording
+        model.predict_proba("sso login unknown sso")
+
+        self.assertEqual(requested, [sorted(model.vocab_index[token] for token in ("sso", "login"))])
@@ -0,0 +1,70 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, override_settings
+
+from .ml_models import ARTIFACT_MAGIC, AgileMLModelStore, NaiveBayesTextClassifier
+
+
+def _artifact(label):
+    model = NaiveBayesTextClassifier().fit([("login bug", label), ("chart work", "other")])
+    return {"metadata": {"label": label}, "assignee_model": model.to_dict()}
+
+
+class AgileMLModelStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, True)
+        storage_settings = override_settings(
+            AGILE_ML_ARTIFACT_STORAGE={
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": self.location},
+            },
+            AGILE_ML_REGISTRY_RECHECK_SECONDS=0,
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        self.addCleanup(AgileMLModelStore.clear_registry)
+        AgileMLModelStore.clear_registry()
+
+    def test_saves_compressed_binary_and_reuses_parsed_models(self):
+        AgileMLModelStore.save(1, _artifact("7"))
+        with open(os.path.join(self.location, AgileMLModelStore._name(1)), "rb") as handle:
+            self.assertTrue(handle.read().startswith(ARTIFACT_MAGIC))
+
+        with mock.patch.object(FileSystemStorage, "open", wraps=AgileMLModelStore.storage().open) as opened:
+            first = AgileMLModelStore.get(1)
+            second = AgileMLModelStore.get(1)
+
+        self.assertIs(first, second)
+        self.assertEqual(opened.call_count, 1)
+        self.assertIs(first.classifier("assignee_model"), second.classifier("assignee_model"))
+        self.assertEqual(first.get("metadata"), {"label": "7"})
+
+    def test_reloads_when_artifact_changes(self):
+        AgileMLModelStore.save(1, _artifact("7"))
+        self.assertEqual(AgileMLModelStore.load(1)["metadata"]["label"], "7")
+
+        AgileMLModelStore.save(1, _artifact("8"))
+
+        self.assertEqual(AgileMLModelStore.load(1)["metadata"]["label"], "8")
+
+    def test_reads_legacy_json_and_reports_missing(self):
+        with open(os.path.join(self.location, AgileMLModelStore._legacy_name(2)), "w") as handle:
+            json.dump(_artifact("3"), handle, indent=2)
+
+        self.assertTrue(AgileMLModelStore.exists(2))
+        self.assertEqual(AgileMLModelStore.load(2)["metadata"]["label"], "3")
+        self.assertFalse(AgileMLModelStore.exists(99))
+
+    @override_settings(AGILE_ML_REGISTRY_SIZE=2)
+    def test_least_recently_used_org_is_evicted(self):
+        for org_id in (1, 2, 3):
+            AgileMLModelStore.save(org_id, _artifact(str(org_id)))
+            AgileMLModelStore.get(org_id)
+
+        self.assertEqual(list(AgileMLModelStore._registry), [2, 3])
@@ -1,14 +1,24 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIRequestFactory, force_authenticate
 
 from apps.organizations.models import Organization, User
 from .ml_endpoints import model_status, suggest_assignee, train_models
-from .models import Board, Column, Issue, Project
+from .ml_models import AgileMLModelStore, AgileMLTrainer
+from .models import Board, Column, Issue, MLIssueDelta, Project, Sprint
+from .tasks import apply_pending_ml_issue_changes
 
 
 class AgileMLTrainingTests(TestCase):
     def setUp(self):
         self.factory = APIRequestFactory()
+        self.addCleanup(AgileMLTrainer._trained.clear)
         self.org = Organization.objects.create(name="ML Org", slug="ml-org")
         self.admin = User.objects.create_user(
             username="ml_admin",
@@ -117,3 +127,158 @@ class AgileMLTrainingTests(TestCase):
         response = suggest_assignee(suggest_request)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data.get("model_source"), "trained")
+
+
+class AgileMLOnlineTrainingTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, True)
+        storage_settings = override_settings(
+            AGILE_ML_ARTIFACT_STORAGE={
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": self.location},
+            },
+            AGILE_ML_REGISTRY_RECHECK_SECONDS=0,
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        self.addCleanup(AgileMLModelStore.clear_registry)
+        self.addCleanup(AgileMLTrainer._trained.clear)
+
+        self.org = Organization.objects.create(name="Online ML Org", slug="online-ml-org")
+        self.admin = User.objects.create_user(
+            username="online_admin", email="online_admin@example.com", password="pass",
+            organization=self.org, role="admin",
+        )
+        self.dev = User.objects.create_user(
+            username="online_dev", email="online_dev@example.com", password="pass",
+            organization=self.org, role="contributor",
+        )
+        self.project = Project.objects.create(organization=self.org, name="Online", key="ONL", lead=self.admin)
+        self.board = Board.objects.create(organization=self.org, project=self.project, name="Board")
+        self.column = Column.objects.create(board=self.board, name="Todo", order=0)
+        self.issues = [
+            self._issue("ONL-1", "Fix login bug", self.admin, 3),
+            self._issue("ONL-2", "Chart renders empty", self.dev, 5),
+            self._issue("ONL-3", "Export CSV header", None, 2),
+        ]
+
+    def _issue(self, key, title, assignee, story_points, **kwargs):
+        return Issue.objects.create(
+            organization=self.org, project=self.project, board=self.board, column=self.column,
+            key=key, title=title,
+            reporter=self.admin, assignee=assignee, story_points=story_points, **kwargs
+        )
+
+    def _models(self):
+        artifact = AgileMLModelStore.load(self.org.id)
+        return artifact["metadata"], artifact["assignee_model"], artifact["story_point_model"]
+
+    def assertSameCounts(self, incremental, retrained):
+        def counts(model):
+            return {
+                (model["labels"][row], model["vocabulary"][col]): value
+                for row, col, value in zip(*model["token_counts"].values())
+            }
+
+        self.assertEqual(counts(incremental), counts(retrained))
+        self.assertEqual(
+            dict(zip(incremental["labels"], incremental["example_counts"])),
+            dict(zip(retrained["labels"], retrained["example_counts"])),
+        )
+
+    def test_issue_writes_update_the_trained_models(self):
+        AgileMLTrainer.train_for_organization(self.org.id)
+
+        self._issue("ONL-4", "Login page slow", self.dev, 8)
+        issue = Issue.objects.get(pk=self.issues[0].pk)
+        issue.assignee = self.dev
+        issue.story_points = 5
+        issue.save()
+        self.issues[1].delete()
+        self.issues[2].status = "done"  # no training fields changed
+        self.issues[2].save()
+        self.assertEqual(MLIssueDelta.objects.filter(organization_id=self.org.id).count(), 3)
+
+        with patch.object(AgileMLModelStore, "save", wraps=AgileMLModelStore.save) as save:
+            self.assertEqual(AgileMLTrainer.apply_pending_changes(self.org.id), 3)
+        save.assert_called_once()
+        self.assertFalse(MLIssueDelta.objects.exists())
+
+        metadata, assignee_model, story_point_model = self._models()
+        self.assertEqual(metadata["issue_count"], 3)
+        self.assertEqual(metadata["assignee_examples"], 2)
+        self.assertIn("updated_at", metadata)
+
+        AgileMLTrainer.train_for_organization(self.org.id)
+        retrained_metadata, retrained_assignee, retrained_story_points = self._models()
+        self.assertEqual(metadata["story_point_examples"], retrained_metadata["story_point_examples"])
+        self.assertSameCounts(assignee_model, retrained_assignee)
+        self.assertSameCounts(story_point_model, retrained_story_points)
+
+    def test_issue_update_reads_the_stored_row_once(self):
+        AgileMLTrainer.train_for_organization(self.org.id)
+        issue = Issue.objects.get(pk=self.issues[0].pk)
+        issue.assignee = self.dev
+        issue.status = "done"
+
+        with CaptureQueriesContext(connection) as queries:
+            issue.save()
+        reads = [q["sql"] for q in queries if q["sql"].startswith('SELECT "issues"."')]
+        # Issue.save's status lookup, then one snapshot shared by the rollup,
+        # ML and keyword profile handlers.
+        self.assertEqual(len(reads), 2)
+        self.assertIn('"issues"."story_points"', reads[1])
+        self.assertIn('"issues"."project_id"', reads[1])
+        self.assertEqual(MLIssueDelta.objects.filter(organization_id=self.org.id).count(), 1)
+
+    def test_issue_writes_never_touch_the_artifact_storage(self):
+        AgileMLTrainer.train_for_organization(self.org.id)
+        AgileMLModelStore.clear_registry()
+
+        with patch.object(AgileMLModelStore, "storage", side_effect=AssertionError("storage access")):
+            self._issue("ONL-7", "Queue backlog", self.dev, 2)
+            self.issues[0].delete()
+
+        self.assertEqual(MLIssueDelta.objects.filter(organization_id=self.org.id).count(), 2)
+
+    def test_retrain_consumes_pending_deltas(self):
+        AgileMLTrainer.train_for_organization(self.org.id)
+        self._issue("ONL-6", "Login retry storm", self.dev, 3)
+
+        with patch("apps.agile.tasks.apply_ml_issue_changes.delay") as delay:
+            apply_pending_ml_issue_changes()
+        delay.assert_called_once_with(self.org.id)
+
+        AgileMLTrainer.train_for_organization(self.org.id)
+        self.assertFalse(MLIssueDelta.objects.exists())
+        self.assertEqual(AgileMLTrainer.apply_pending_changes(self.org.id), 0)
+        self.assertEqual(self._models()[0]["issue_count"], 4)
+
+    def test_writes_before_first_training_are_ignored(self):
+        self._issue("ONL-5", "Untrained org", self.dev, 1)
+
+        self.assertFalse(MLIssueDelta.objects.exists())
+        self.assertIsNone(AgileMLModelStore.load(self.org.id))
+
+    def test_sprint_baseline_is_one_query(self):
+        for index, done in enumerate((2, 1)):
+            sprint = Sprint.objects.create(
+                organization=self.org, name=f"S{index}", status="completed",
+                start_date=date(2024, 1, 1), end_date=date(2024, 1, 14),
+            )
+            for number in range(2):
+                self._issue(
+                    f"ONL-S{index}{number}", "Sprint work", None, None,
+                    sprint=sprint, status="done" if number < done else "todo",
+                )
+        Sprint.objects.create(
+            organization=self.org, name="Empty", status="completed",
+            start_date=date(2024, 2, 1), end_date=date(2024, 2, 14),
+        )
+
+        with self.assertNumQueries(1):
+            completed, baseline = AgileMLTrainer.sprint_baseline(self.org.id)
+
+        self.assertEqual(completed, 3)
+        self.assertEqual(baseline, {"avg_completion_ratio": 0.75})
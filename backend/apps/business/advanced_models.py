@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from apps.organizations.models import Organization, User
 from .models import Goal
 
@@ -12,6 +13,8 @@ class Milestone(models.Model):
     order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'business_milestones'
         ordering = ['order', 'due_date']
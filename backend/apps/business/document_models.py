@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from apps.organizations.models import Organization, User
 
 class DocumentComment(models.Model):
@@ -40,6 +41,8 @@ class Document(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'business_documents'
         ordering = ['-updated_at']
@@ -311,16 +311,14 @@ def document_comments(request, pk):
             comment.mentioned_users.set(mentioned_users)
             
             # Send notifications
-            from apps.notifications.utils import create_notification
-            for user in mentioned_users:
-                if user != request.user:
-                    create_notification(
-                        user=user,
-                        notification_type='mention',
-                        title=f'{request.user.full_name} mentioned you',
-                        message=f'In document: {document.title}',
-                        link=f'/business/documents/{document.id}'
-                    )
+            from apps.notifications.utils import create_notifications
+            create_notifications(
+                [user for user in mentioned_users if user != request.user],
+                notification_type='mention',
+                title=f'{request.user.full_name} mentioned you',
+                message=f'In document: {document.title}',
+                link=f'/business/documents/{document.id}'
+            )
         
         return Response({
             'id': comment.id,
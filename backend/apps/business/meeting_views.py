@@ -114,15 +114,14 @@ def meetings_list(request):
             meeting.attendees.set(resolved['attendees'])
             
             # Notify attendees
-            from apps.notifications.utils import create_notification
-            for attendee in meeting.attendees.exclude(id=request.user.id):
-                create_notification(
-                    user=attendee,
-                    notification_type='meeting',
-                    title='New meeting invitation',
-                    message=f'{request.user.full_name or request.user.username} invited you to: {meeting.title}',
-                    link=f'/business/meetings/{meeting.id}'
-                )
+            from apps.notifications.utils import create_notifications
+            create_notifications(
+                meeting.attendees.exclude(id=request.user.id).values_list('id', flat=True),
+                notification_type='meeting',
+                title='New meeting invitation',
+                message=f'{request.user.full_name or request.user.username} invited you to: {meeting.title}',
+                link=f'/business/meetings/{meeting.id}'
+            )
         
         return Response({'id': meeting.id}, status=status.HTTP_201_CREATED)
 
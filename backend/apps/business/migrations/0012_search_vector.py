@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:41
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_TABLES = ['business_documents', 'business_goals', 'business_meetings', 'business_milestones', 'business_tasks']
+
+
+def add_search_vector_gin_indexes(apps, schema_editor):
+    # GIN is PostgreSQL-only; other backends keep using icontains search.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_VECTOR_TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_search_vector_gin" ON "{table}" USING gin ("search_vector")'
+        )
+
+
+def drop_search_vector_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_VECTOR_TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_search_vector_gin"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0011_task_scheduling_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='meeting',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='milestone',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(add_search_vector_gin_indexes, drop_search_vector_gin_indexes),
+    ]
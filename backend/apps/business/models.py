@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from apps.organizations.models import Organization, User
 from apps.conversations.models import Conversation
 from apps.decisions.models import Decision
@@ -23,6 +24,8 @@ class Goal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'business_goals'
         ordering = ['-created_at']
@@ -43,6 +46,8 @@ class Meeting(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'business_meetings'
         ordering = ['-meeting_date']
@@ -78,6 +83,8 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'business_tasks'
         ordering = ['-created_at']
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinLengthValidator
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -105,6 +106,8 @@ class Conversation(models.Model):
     mentioned_users = models.ManyToManyField(User, related_name='mentioned_in', blank=True)
     tags = models.ManyToManyField(Tag, related_name='conversations', blank=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'conversations'
         ordering = ['-is_pinned', '-created_at']
@@ -148,6 +151,8 @@ class ConversationReply(models.Model):
     )
     mentioned_users = models.ManyToManyField(User, related_name='mentioned_in_replies', blank=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'conversation_replies'
         ordering = ['created_at']
@@ -211,6 +216,8 @@ class ActionItem(models.Model):
     extracted_by_ai = models.BooleanField(default=False)
     confidence_score = models.FloatField(null=True, blank=True)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'action_items'
         ordering = ['-created_at']
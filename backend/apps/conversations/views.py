@@ -138,16 +138,14 @@ def conversations(request):
             conversation.tags.set(tags)
             
             # Create notifications for mentions
-            from apps.notifications.utils import create_notification
-            for mentioned_user in mentioned_users:
-                if mentioned_user != request.user:
-                    create_notification(
-                        user=mentioned_user,
-                        notification_type='mention',
-                        title=f'{request.user.get_full_name()} mentioned you',
-                        message=f'In: {conversation.title}',
-                        link=f'/conversations/{conversation.id}'
-                    )
+            from apps.notifications.utils import create_notifications
+            create_notifications(
+                [mentioned_user for mentioned_user in mentioned_users if mentioned_user != request.user],
+                notification_type='mention',
+                title=f'{request.user.get_full_name()} mentioned you',
+                message=f'In: {conversation.title}',
+                link=f'/conversations/{conversation.id}'
+            )
             
             # Log activity
             log_activity(
@@ -222,16 +220,14 @@ def conversation_replies(request, conversation_id):
         reply.mentioned_users.set(mentioned_users)
         
         # Create notifications for mentions
-        from apps.notifications.utils import create_notification
-        for mentioned_user in mentioned_users:
-            if mentioned_user != request.user:
-                create_notification(
-                    user=mentioned_user,
-                    notification_type='mention',
-                    title=f'{request.user.get_full_name()} mentioned you',
-                    message=f'In: {conversation.title}',
-                    link=f'/conversations/{conversation.id}'
-                )
+        from apps.notifications.utils import create_notification, create_notifications
+        create_notifications(
+            [mentioned_user for mentioned_user in mentioned_users if mentioned_user != request.user],
+            notification_type='mention',
+            title=f'{request.user.get_full_name()} mentioned you',
+            message=f'In: {conversation.title}',
+            link=f'/conversations/{conversation.id}'
+        )
         
         # Notify conversation author of reply
         if conversation.author != request.user:
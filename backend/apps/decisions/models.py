@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
 from django.db.models.signals import post_save
@@ -126,6 +127,8 @@ class Decision(models.Model):
         related_name='decisions'
     )
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'decisions'
         ordering = ['-created_at']
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:41
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_TABLES = ['integrations_commit', 'integrations_pullrequest']
+
+
+def add_search_vector_gin_indexes(apps, schema_editor):
+    # GIN is PostgreSQL-only; other backends keep using icontains search.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_VECTOR_TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_search_vector_gin" ON "{table}" USING gin ("search_vector")'
+        )
+
+
+def drop_search_vector_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_VECTOR_TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_search_vector_gin"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0008_decisionpullrequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commit',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='pullrequest',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(add_search_vector_gin_indexes, drop_search_vector_gin_indexes),
+    ]
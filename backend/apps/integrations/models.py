@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from apps.organizations.models import Organization, User
 from apps.decisions.models import Decision
 from apps.organizations.encryption_service import EncryptionService
@@ -131,6 +132,8 @@ class PullRequest(models.Model):
     
     commits_count = models.IntegerField(default=0)
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         unique_together = ['organization', 'pr_number']
         ordering = ['-created_at']
@@ -151,6 +154,8 @@ class Commit(models.Model):
     commit_url = models.URLField()
     committed_at = models.DateTimeField()
     
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         ordering = ['-committed_at']
     
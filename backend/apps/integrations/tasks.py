@@ -0,0 +1,37 @@
+import logging
+import time
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="integrations.deliver_webhook_event", ignore_result=True)
+def deliver_webhook_event(organization_id, event, data, event_id, attempt=1, webhook_ids=None, queued_at=None):
+    """Fan one event out to its webhooks; failed endpoints are retried with backoff.
+
+    Only sent requests count towards WEBHOOK_MAX_ATTEMPTS. Endpoints skipped
+    because their circuit is open are tried again when it closes, until the
+    event is WEBHOOK_MAX_DEFER_SECONDS old.
+    """
+    from django.conf import settings
+
+    from .webhook_service import WebhookService
+
+    queued_at = queued_at or time.time()
+    max_attempts = getattr(settings, "WEBHOOK_MAX_ATTEMPTS", 5)
+    defer_until = queued_at + getattr(settings, "WEBHOOK_MAX_DEFER_SECONDS", 86400)
+    retries = WebhookService.dispatch(organization_id, event, data, event_id, attempt, webhook_ids)
+    retrying = 0
+    for retry_ids, countdown, next_attempt in retries:
+        if next_attempt > max_attempts:
+            continue
+        if next_attempt == attempt and time.time() + countdown > defer_until:
+            logger.warning("Dropping webhook event %s for %s: circuit open past the deferral limit", event_id, retry_ids)
+            continue
+        deliver_webhook_event.apply_async(
+            args=(organization_id, event, data, event_id, next_attempt, retry_ids, queued_at),
+            countdown=countdown,
+        )
+        retrying += len(retry_ids)
+    return {"event_id": event_id, "attempt": attempt, "retrying": retrying}
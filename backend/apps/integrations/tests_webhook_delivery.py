@@ -0,0 +1,160 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.integrations.tasks import deliver_webhook_event
+from apps.integrations.webhook_models import Webhook, WebhookDelivery
+from apps.integrations.webhook_service import WebhookService
+from apps.organizations.models import Organization
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    statuses = {"/ok": 200, "/fail": 500, "/gone": 404, "/dead": 503}
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.received.append((self.path, dict(self.headers), json.loads(body)))
+        payload = b"received"
+        self.send_response(self.statuses[self.path])
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class WebhookDeliveryTests(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ReceiverHandler)
+        self.server.received = []
+        self.server.connections = 0
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.org = Organization.objects.create(name="Hooks Org", slug="hooks-org")
+
+    def _webhook(self, path, events=("issue.created",), **kwargs):
+        return Webhook.objects.create(
+            organization=self.org, name=path, url=f"http://127.0.0.1:{self.server.server_port}{path}",
+            events=list(events), **kwargs,
+        )
+
+    def _trigger(self, event="issue.created", payload=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return WebhookService.trigger(self.org.id, event, payload or {"timestamp": "2024-01-01T00:00:00Z", "id": 1})
+
+    def test_trigger_only_queues_the_event(self):
+        self._webhook("/ok")
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(0):
+            WebhookService.trigger(self.org.id, "issue.created", {"id": 1})
+        self.assertEqual(self.server.received, [])
+
+        callbacks[0]()
+        self.assertEqual(len(self.server.received), 1)
+
+    @override_settings(WEBHOOK_MAX_ATTEMPTS=3)
+    def test_fan_out_records_attempts_and_retries_failures(self):
+        ok = self._webhook("/ok", secret="s3cret")
+        failing = self._webhook("/fail")
+        gone = self._webhook("/gone")
+        self._webhook("/ok", events=("sprint.started",))
+
+        event_id = self._trigger()
+
+        deliveries = WebhookDelivery.objects.filter(event_id=event_id)
+        self.assertEqual(
+            sorted(deliveries.values_list("webhook_id", "attempt", "success")),
+            sorted([(ok.id, 1, True), (gone.id, 1, False), (failing.id, 1, False),
+                    (failing.id, 2, False), (failing.id, 3, False)]),
+        )
+        path, headers, body = next(item for item in self.server.received if item[0] == "/ok")
+        self.assertEqual(body["data"]["id"], 1)
+        self.assertEqual(headers["X-Webhook-Signature"], ok.generate_signature(json.dumps(body)))
+        failing.refresh_from_db()
+        self.assertEqual(failing.consecutive_failures, 3)
+
+    def test_sequential_events_reuse_a_keep_alive_connection(self):
+        self._webhook("/ok")
+        for number in range(3):
+            self._trigger(payload={"id": number})
+
+        self.assertEqual(len(self.server.received), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    @override_settings(WEBHOOK_MAX_ATTEMPTS=1, WEBHOOK_CIRCUIT_FAILURES=2)
+    def test_circuit_opens_for_dead_endpoints(self):
+        dead = self._webhook("/dead")
+        self._trigger()
+        self._trigger()
+        dead.refresh_from_db()
+        self.assertIsNotNone(dead.circuit_open_until)
+
+        # Eager tasks ignore the countdown, so keep the deferral from re-running now.
+        with mock.patch.object(deliver_webhook_event, "apply_async") as deferred:
+            deliver_webhook_event(self.org.id, "issue.created", {"event": "issue.created"}, "evt-3")
+
+        self.assertEqual(len(self.server.received), 2)
+        skipped = WebhookDelivery.objects.get(event_id="evt-3")
+        self.assertTrue(skipped.response_body.startswith("Skipped: endpoint circuit open"))
+        deferred.assert_called_once()
+
+    @override_settings(WEBHOOK_MAX_ATTEMPTS=1, WEBHOOK_MAX_DEFER_SECONDS=3600)
+    def test_skipped_events_are_deferred_until_the_circuit_closes(self):
+        dead = self._webhook(
+            "/dead", consecutive_failures=10, circuit_open_until=timezone.now() + timedelta(minutes=5),
+        )
+
+        with mock.patch.object(deliver_webhook_event, "apply_async") as retry:
+            deliver_webhook_event(self.org.id, "issue.created", {"event": "issue.created"}, "evt-1")
+
+        self.assertEqual(self.server.received, [])
+        [call] = retry.call_args_list
+        # Nothing was sent, so the deferred run is still attempt 1.
+        self.assertEqual(call.kwargs["args"][4:6], (1, [dead.id]))
+        self.assertGreaterEqual(call.kwargs["countdown"], 299)
+        queued_at = call.kwargs["args"][6]
+
+        # Deferred again and again while the endpoint stays down...
+        with mock.patch.object(deliver_webhook_event, "apply_async") as retry:
+            deliver_webhook_event(*call.kwargs["args"])
+        self.assertEqual(retry.call_args.kwargs["args"][4:], (1, [dead.id], queued_at))
+
+        # ...until the event is older than the deferral limit.
+        with mock.patch.object(deliver_webhook_event, "apply_async") as retry:
+            deliver_webhook_event(
+                self.org.id, "issue.created", {"event": "issue.created"}, "evt-1", 1, [dead.id], queued_at - 3600,
+            )
+        retry.assert_not_called()
+
+    def test_only_one_worker_probes_a_cooled_down_circuit(self):
+        dead = self._webhook(
+            "/dead", consecutive_failures=10, circuit_open_until=timezone.now() - timedelta(seconds=1),
+        )
+        first, second = Webhook.objects.get(pk=dead.pk), Webhook.objects.get(pk=dead.pk)
+        now = timezone.now()
+
+        self.assertEqual(WebhookService.split_open_circuits([first], now), ([first], []))
+        self.assertEqual(WebhookService.split_open_circuits([second], now), ([], [second]))
+        dead.refresh_from_db()
+        self.assertGreater(dead.circuit_open_until, now)
+
+    @override_settings(WEBHOOK_RETRY_BASE_SECONDS=30, WEBHOOK_RETRY_MAX_SECONDS=100)
+    def test_retry_delay_is_jittered_and_capped(self):
+        delays = [WebhookService.retry_delay(attempt) for attempt in (1, 2, 5) for _ in range(50)]
+        self.assertTrue(all(0 <= delay <= 30 for delay in delays[:50]))
+        self.assertTrue(all(0 <= delay <= 60 for delay in delays[50:100]))
+        self.assertTrue(all(0 <= delay <= 100 for delay in delays[100:]))
+        self.assertGreater(len(set(delays)), 100)
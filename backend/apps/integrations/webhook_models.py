@@ -21,6 +21,10 @@ class Webhook(models.Model):
     secret = models.CharField(max_length=100, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Circuit breaker: after enough consecutive failed attempts deliveries are
+    # skipped until circuit_open_until, then one is let through to probe.
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    circuit_open_until = models.DateTimeField(null=True, blank=True)
     
     def generate_signature(self, payload):
         if not self.secret:
@@ -39,6 +43,10 @@ class WebhookDelivery(models.Model):
     response_body = models.TextField(blank=True)
     delivered_at = models.DateTimeField(auto_now_add=True)
     success = models.BooleanField(default=False)
+    # Attempts of one event to one webhook share an event_id.
+    event_id = models.CharField(max_length=32, blank=True, db_index=True)
+    attempt = models.PositiveSmallIntegerField(default=1)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
 
 class ExternalIntegration(models.Model):
     TYPES = [
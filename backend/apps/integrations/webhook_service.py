@@ -1,62 +1,242 @@
-import requests
 import json
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
 from apps.integrations.webhook_models import Webhook, WebhookDelivery
 
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _session():
+    """Per-thread session; its connection pool keeps one keep-alive pool per host."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=4)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return session
+
+
+def _pool():
+    # Long-lived so worker threads (and their sessions) outlive a single event.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_setting('WEBHOOK_DELIVERY_WORKERS', 8),
+                thread_name_prefix='webhook-delivery',
+            )
+        return _executor
+
+
+def _retryable(status):
+    return status is None or status == 429 or status >= 500
+
+
 class WebhookService:
+    """
+    Outbound webhook delivery.
+    ``trigger`` only queues the event (after the surrounding transaction
+    commits); the Celery task fans it out to matching webhooks over pooled
+    keep-alive connections, writes all delivery rows in one insert, retries
+    failed endpoints with exponential backoff and full jitter, and stops
+    calling endpoints that keep failing until their circuit cools down.
+    Events that reach an open circuit are deferred until it closes, without
+    using up an attempt, for up to WEBHOOK_MAX_DEFER_SECONDS; once it has
+    cooled down a single worker claims the probe delivery.
+    """
+
     @staticmethod
     def trigger(organization_id, event, payload):
-        """Trigger webhooks for an event"""
-        webhooks = Webhook.objects.filter(
-            organization_id=organization_id,
-            is_active=True,
-            events__contains=[event]
+        """Queue webhooks for an event"""
+        from apps.integrations.tasks import deliver_webhook_event
+
+        event_id = uuid.uuid4().hex
+        data = WebhookService.envelope(event, payload)
+        transaction.on_commit(
+            lambda: deliver_webhook_event.delay(organization_id, event, data, event_id)
         )
-        
-        for webhook in webhooks:
-            WebhookService.deliver(webhook, event, payload)
-    
+        return event_id
+
     @staticmethod
-    def deliver(webhook, event, payload):
-        """Deliver webhook to endpoint"""
-        data = {
+    def envelope(event, payload):
+        return {
             'event': event,
             'timestamp': payload.get('timestamp'),
             'data': payload
         }
-        
-        json_payload = json.dumps(data)
-        headers = {'Content-Type': 'application/json'}
-        
-        if webhook.secret:
-            signature = webhook.generate_signature(json_payload)
-            headers['X-Webhook-Signature'] = signature
-        
-        try:
-            response = requests.post(
-                webhook.url,
-                data=json_payload,
-                headers=headers,
-                timeout=10
-            )
-            
-            WebhookDelivery.objects.create(
+
+    @staticmethod
+    def subscribed(organization_id, event, webhook_ids=None):
+        """Active webhooks of the org subscribed to ``event``."""
+        webhooks = Webhook.objects.filter(organization_id=organization_id, is_active=True)
+        if webhook_ids is not None:
+            webhooks = webhooks.filter(id__in=webhook_ids)
+        # The events list is filtered here rather than with a JSON containment
+        # lookup, which not every database backend supports.
+        return [webhook for webhook in webhooks if event in (webhook.events or [])]
+
+    @staticmethod
+    def dispatch(organization_id, event, data, event_id, attempt=1, webhook_ids=None):
+        """
+        Deliver one event to its webhooks concurrently and record every attempt.
+        Returns ``(webhook_ids, countdown, next_attempt)`` groups to try again:
+        failed endpoints after a backoff as the next attempt, skipped ones once
+        their circuit closes as the same attempt, since nothing was sent.
+        """
+        now = timezone.now()
+        webhooks = WebhookService.subscribed(organization_id, event, webhook_ids)
+        targets, open_circuits = WebhookService.split_open_circuits(webhooks, now)
+
+        body = json.dumps(data)
+        if len(targets) > 1:
+            results = list(_pool().map(lambda webhook: WebhookService._post(webhook, body), targets))
+        else:
+            results = [WebhookService._post(webhook, body) for webhook in targets]
+
+        deliveries = [
+            WebhookDelivery(
                 webhook=webhook,
                 event=event,
                 payload=data,
-                response_status=response.status_code,
-                response_body=response.text[:1000],
-                success=200 <= response.status_code < 300
+                response_status=status,
+                response_body=text,
+                success=success,
+                event_id=event_id,
+                attempt=attempt,
+                duration_ms=duration_ms,
             )
-        except Exception as e:
-            WebhookDelivery.objects.create(
+            for webhook, (status, text, success, duration_ms) in zip(targets, results)
+        ]
+        deliveries += [
+            WebhookDelivery(
                 webhook=webhook,
                 event=event,
                 payload=data,
-                response_body=str(e)[:1000],
-                success=False
+                response_body=f'Skipped: endpoint circuit open until {webhook.circuit_open_until.isoformat()}',
+                success=False,
+                event_id=event_id,
+                attempt=attempt,
+            )
+            for webhook in open_circuits
+        ]
+        WebhookDelivery.objects.bulk_create(deliveries)
+
+        succeeded = [webhook.id for webhook, result in zip(targets, results) if result[2]]
+        failed = [webhook.id for webhook, result in zip(targets, results) if not result[2]]
+        WebhookService._record_outcomes(succeeded, failed, now)
+        retry_ids = [
+            webhook.id for webhook, result in zip(targets, results)
+            if not result[2] and _retryable(result[0])
+        ]
+        retries = [(retry_ids, WebhookService.retry_delay(attempt), attempt + 1)] if retry_ids else []
+        jitter = _setting('WEBHOOK_RETRY_BASE_SECONDS', 30)
+        retries += [
+            ([webhook.id], (webhook.circuit_open_until - now).total_seconds() + random.uniform(0, jitter), attempt)
+            for webhook in open_circuits
+        ]
+        return retries
+
+    @staticmethod
+    def split_open_circuits(webhooks, now):
+        """
+        (targets, open_circuits). A circuit whose cooldown has passed lets one
+        probe through: the worker whose conditional update moves
+        circuit_open_until forward delivers, every other one treats it as open.
+        The probe's outcome then closes the circuit or keeps it open.
+        """
+        cooldown = timedelta(seconds=_setting('WEBHOOK_CIRCUIT_COOLDOWN_SECONDS', 600))
+        targets, open_circuits = [], []
+        for webhook in webhooks:
+            opened_until = webhook.circuit_open_until
+            if opened_until is None:
+                targets.append(webhook)
+                continue
+            if opened_until <= now:
+                webhook.circuit_open_until = now + cooldown
+                claimed = Webhook.objects.filter(pk=webhook.pk, circuit_open_until=opened_until).update(
+                    circuit_open_until=webhook.circuit_open_until
+                )
+                if claimed:
+                    targets.append(webhook)
+                    continue
+            open_circuits.append(webhook)
+        return targets, open_circuits
+
+    @staticmethod
+    def retry_delay(attempt):
+        """Full-jitter exponential backoff before attempt ``attempt + 1``."""
+        base = _setting('WEBHOOK_RETRY_BASE_SECONDS', 30)
+        cap = _setting('WEBHOOK_RETRY_MAX_SECONDS', 3600)
+        return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def _record_outcomes(succeeded, failed, now):
+        if succeeded:
+            Webhook.objects.filter(id__in=succeeded).update(consecutive_failures=0, circuit_open_until=None)
+        if failed:
+            threshold = _setting('WEBHOOK_CIRCUIT_FAILURES', 10)
+            cooldown = timedelta(seconds=_setting('WEBHOOK_CIRCUIT_COOLDOWN_SECONDS', 600))
+            Webhook.objects.filter(id__in=failed).update(consecutive_failures=F('consecutive_failures') + 1)
+            Webhook.objects.filter(id__in=failed, consecutive_failures__gte=threshold).update(
+                circuit_open_until=now + cooldown
             )
 
+    @staticmethod
+    def _post(webhook, body):
+        """(status, response text, success, duration ms) for one POST; never raises."""
+        headers = {'Content-Type': 'application/json'}
+        if webhook.secret:
+            headers['X-Webhook-Signature'] = webhook.generate_signature(body)
+        timeout = (
+            _setting('WEBHOOK_CONNECT_TIMEOUT_SECONDS', 3),
+            _setting('WEBHOOK_TIMEOUT_SECONDS', 10),
+        )
+        start = time.perf_counter()
+        try:
+            response = _session().post(webhook.url, data=body, headers=headers, timeout=timeout)
+            status = response.status_code
+            return status, response.text[:1000], 200 <= status < 300, int((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            return None, str(e)[:1000], False, int((time.perf_counter() - start) * 1000)
+    
+    @staticmethod
+    def deliver(webhook, event, payload):
+        """Deliver webhook to endpoint"""
+        data = WebhookService.envelope(event, payload)
+        status, text, success, duration_ms = WebhookService._post(webhook, json.dumps(data))
+        return WebhookDelivery.objects.create(
+            webhook=webhook,
+            event=event,
+            payload=data,
+            response_status=status,
+            response_body=text,
+            success=success,
+            duration_ms=duration_ms,
+        )
+
 class SlackService:
     @staticmethod
     def send_message(webhook_url, text, blocks=None):
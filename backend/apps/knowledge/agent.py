@@ -1,19 +1,23 @@
 """Autonomous agent runtime for Knoledgr.
 
 Drives a Claude tool-use loop until the model emits a final answer, the run
-hits the iteration cap, or a write tool requires human approval. The trace of
-every step is persisted on the AgentRun so the frontend can render the agent's
-reasoning + tool calls + results live.
+hits the iteration cap, or a write tool requires human approval. Every step
+is appended as an AgentStep row and, when streaming, model tokens are pushed
+over the run's websocket as they arrive so the frontend can render the
+agent's reasoning + tool calls + results live.
 """
 
 from __future__ import annotations
 
 import json
 import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timezone as dt_timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 
 from apps.knowledge.agent_tools import all_tool_specs, get_tool, ToolSpec
@@ -29,6 +33,17 @@ logger = logging.getLogger(__name__)
 MAX_ITERATIONS = 12
 MAX_TOOL_OUTPUT_CHARS = 6000
 
+# Streamed text is flushed to the websocket in chunks of at least this many
+# characters, or after this many seconds, whichever comes first.
+STREAM_FLUSH_CHARS = 48
+STREAM_FLUSH_SECONDS = 0.1
+
+# Everything the loop mutates except the legacy `steps` JSON, which is no
+# longer rewritten per iteration (steps are AgentStep rows now).
+RUN_STATE_FIELDS = [
+    "messages", "pending_tool_calls", "status", "final_answer", "error", "iterations", "updated_at",
+]
+
 
 def _now_iso() -> str:
     return timezone.now().isoformat()
@@ -76,30 +91,76 @@ def _fire_run_webhook(run: AgentRun, phase: str) -> None:
         pass
 
 
-def _append_step(run: AgentRun, kind: str, payload: Dict[str, Any]) -> None:
-    step = {"kind": kind, "payload": payload, "ts": _now_iso()}
-    # Dual-write during the transition: JSONField on the run for legacy
-    # readers, AgentStep row for everyone else. Once existing runs have all
-    # been re-rendered through the new reader, the JSONField becomes the
-    # backup and can be dropped.
-    run.steps.append(step)
-    try:
-        from apps.knowledge.models import AgentStep
-        ordinal = len(run.steps)  # we just appended → 1-based ordinal
-        AgentStep.objects.create(
-            run=run, ordinal=ordinal, kind=kind, payload=payload,
-        )
-    except Exception:
-        # Never fail the run because the step table couldn't write — the
-        # JSON copy already has it.
-        logger.exception("AgentStep persist failed for run %s", run.id)
+def _broadcast(run: AgentRun, message: Dict[str, Any]) -> None:
     try:
         from apps.knowledge.consumers import broadcast_run_event
-        broadcast_run_event(run.id, {"type": "step", **step})
+        broadcast_run_event(run.id, message)
     except Exception:
         pass
 
 
+def _next_ordinal(run: AgentRun) -> int:
+    """Next AgentStep ordinal; read from the table once per loaded run."""
+    ordinal = getattr(run, "_last_step_ordinal", None)
+    if ordinal is None:
+        from django.db.models import Max
+        from apps.knowledge.models import AgentStep
+        ordinal = AgentStep.objects.filter(run=run).aggregate(last=Max("ordinal"))["last"]
+        # Legacy runs numbered rows after their JSON steps.
+        ordinal = max(ordinal or 0, len(run.steps or []))
+    run._last_step_ordinal = ordinal + 1
+    return run._last_step_ordinal
+
+
+def _append_step(run: AgentRun, kind: str, payload: Dict[str, Any]) -> None:
+    """Persist one trace step as an append-only AgentStep row and push it live.
+
+    The legacy `steps` JSON on the run only keeps the initial user goal; it is
+    no longer rewritten as the run grows.
+    """
+    from apps.knowledge.models import AgentStep
+
+    ordinal = _next_ordinal(run)
+    step = {"kind": kind, "payload": payload, "ts": _now_iso(), "ordinal": ordinal}
+    try:
+        AgentStep.objects.create(run=run, ordinal=ordinal, kind=kind, payload=payload)
+    except Exception:
+        # Never fail the run because one step couldn't be written.
+        logger.exception("AgentStep persist failed for run %s", run.id)
+    _broadcast(run, {"type": "step", **step})
+
+
+def _save_run(run: AgentRun) -> None:
+    run.save(update_fields=RUN_STATE_FIELDS)
+
+
+def run_steps(run: AgentRun, after: Optional[int] = None) -> List[Dict[str, Any]]:
+    """The run's trace, oldest first.
+
+    New runs keep only the user goal in the legacy JSON and every other step
+    as AgentStep rows; historical runs may only have the JSON. ``after``
+    returns just the rows past that ordinal so a reconnecting client can
+    catch up without refetching the whole trace.
+    """
+    legacy = run.steps or []
+    rows = list(run.step_rows.all())
+    if after is not None:
+        return [_row_payload(r) for r in rows if r.ordinal > after]
+    if not rows:
+        return legacy
+    goal = [step for step in legacy if step.get("kind") == "user_goal"]
+    return goal + [_row_payload(r) for r in rows]
+
+
+def _row_payload(row) -> Dict[str, Any]:
+    return {
+        "kind": row.kind,
+        "payload": row.payload,
+        "ts": row.created_at.isoformat() if row.created_at else None,
+        "ordinal": row.ordinal,
+    }
+
+
 def _to_anthropic_tool_input(value: Any) -> Dict[str, Any]:
     if isinstance(value, dict):
         return value
@@ -157,6 +218,84 @@ def _execute_tool(spec: ToolSpec, *, org, user, tool_input: Dict[str, Any]) -> T
         return None, f"{type(exc).__name__}: {exc}"
 
 
+def _timed_tool(spec: ToolSpec, *, org, user, tool_input: Dict[str, Any], in_thread: bool = False):
+    started = time.monotonic()
+    try:
+        result, err = _execute_tool(spec, org=org, user=user, tool_input=tool_input)
+    finally:
+        if in_thread:
+            # Worker threads get their own DB connection; don't leak it.
+            connection.close()
+    return result, err, round((time.monotonic() - started) * 1000, 1)
+
+
+def _run_read_tools(calls: List[Tuple[ToolSpec, Dict[str, Any]]], *, org, user) -> List[Tuple[Any, Optional[str], float]]:
+    """Execute read tools from one model turn; returns (result, error, latency_ms) per call, in order.
+
+    Each call runs on a worker thread and is bounded by
+    AGENT_TOOL_TIMEOUT_SECONDS, counted from when the tool starts. The turn
+    gets its own pool of at most AGENT_TOOL_WORKERS threads, so a tool that
+    never returns only holds a thread of its own run; once every thread of
+    the pool is held that way, calls still queued are reported as not run.
+    Inside a transaction the calls stay inline and unbounded: worker
+    connections could not see its uncommitted rows.
+    """
+    if connection.in_atomic_block:
+        return [_timed_tool(spec, org=org, user=user, tool_input=tool_input) for spec, tool_input in calls]
+
+    timeout = getattr(settings, "AGENT_TOOL_TIMEOUT_SECONDS", 20)
+    workers = max(1, min(len(calls), getattr(settings, "AGENT_TOOL_WORKERS", 4)))
+    started_at: Dict[int, float] = {}
+
+    def run(index, spec, tool_input):
+        started_at[index] = time.monotonic()
+        return _timed_tool(spec, org=org, user=user, tool_input=tool_input, in_thread=True)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tool")
+    futures = [executor.submit(run, index, spec, tool_input) for index, (spec, tool_input) in enumerate(calls)]
+    outcomes: List[Any] = [None] * len(calls)
+    pending = set(range(len(calls)))
+    abandoned = []
+    try:
+        while pending:
+            now = time.monotonic()
+            for index in sorted(pending):
+                if futures[index].done():
+                    outcomes[index] = futures[index].result()
+                    pending.discard(index)
+                elif index in started_at and now - started_at[index] >= timeout:
+                    logger.warning("Tool '%s' timed out after %ss", calls[index][0].name, timeout)
+                    outcomes[index] = (None, f"Tool timed out after {timeout}s", round(timeout * 1000, 1))
+                    pending.discard(index)
+                    abandoned.append(futures[index])
+            if pending and sum(1 for future in abandoned if not future.done()) >= workers:
+                for index in sorted(pending):
+                    futures[index].cancel()
+                    outcomes[index] = (None, "Tool not run: earlier tools of this turn timed out", 0.0)
+                break
+            if pending:
+                if all(index in started_at for index in pending):
+                    wait_for = max(0.0, min(started_at[index] for index in pending) + timeout - time.monotonic())
+                else:
+                    wait_for = 0.05  # a queued call may be about to start
+                wait([futures[index] for index in pending], timeout=wait_for, return_when=FIRST_COMPLETED)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return outcomes
+
+
+def _cap_step_output(result: Any) -> Any:
+    """Tool output as stored on the step: left as-is unless it is too large."""
+    limit = getattr(settings, "AGENT_TOOL_MAX_RESULT_CHARS", 20000)
+    try:
+        size = len(json.dumps(result, default=str))
+    except Exception:
+        return {"truncated": True, "preview": str(result)[:limit]}
+    if size <= limit:
+        return result
+    return {"truncated": True, "size": size, "preview": json.dumps(result, default=str)[:limit]}
+
+
 # ----------------------------------------------------------------------------
 # Agent loop
 # ----------------------------------------------------------------------------
@@ -178,12 +317,75 @@ def _content_blocks_to_payload(content) -> list:
     return out
 
 
+class _TokenStreamer:
+    """Coalesces streamed text deltas into websocket "token" events."""
+
+    def __init__(self, run: AgentRun):
+        self.run = run
+        self.buffer: List[str] = []
+        self.size = 0
+        self.flushed_at = time.monotonic()
+
+    def text(self, delta: str) -> None:
+        if not delta:
+            return
+        self.buffer.append(delta)
+        self.size += len(delta)
+        if self.size >= STREAM_FLUSH_CHARS or time.monotonic() - self.flushed_at >= STREAM_FLUSH_SECONDS:
+            self.flush()
+
+    def event(self, message: Dict[str, Any]) -> None:
+        self.flush()
+        _broadcast(self.run, {"iteration": self.run.iterations, **message})
+
+    def flush(self) -> None:
+        if self.buffer:
+            _broadcast(self.run, {"type": "token", "iteration": self.run.iterations, "text": "".join(self.buffer)})
+            self.buffer = []
+            self.size = 0
+        self.flushed_at = time.monotonic()
+
+
+def _call_model(client, run: AgentRun, request: Dict[str, Any]):
+    """One model turn. Streams when enabled and supported by the SDK client."""
+    stream = getattr(client.messages, "stream", None)
+    if not getattr(settings, "AGENT_STREAMING", True) or stream is None:
+        return client.messages.create(**request)
+
+    streamer = _TokenStreamer(run)
+    with stream(**request) as events:
+        for event in events:
+            event_type = getattr(event, "type", None)
+            if event_type == "content_block_start":
+                block = getattr(event, "content_block", None)
+                if getattr(block, "type", None) == "tool_use":
+                    streamer.event({
+                        "type": "tool_use_start",
+                        "id": getattr(block, "id", ""),
+                        "name": getattr(block, "name", ""),
+                    })
+            elif event_type == "content_block_delta":
+                delta = getattr(event, "delta", None)
+                if getattr(delta, "type", None) == "text_delta":
+                    streamer.text(getattr(delta, "text", ""))
+            elif event_type == "content_block_stop":
+                streamer.flush()
+        streamer.flush()
+        return events.get_final_message()
+
+
+def _was_cancelled(run: AgentRun) -> bool:
+    return AgentRun.objects.filter(pk=run.pk, status="cancelled").exists()
+
+
 def _run_loop(run: AgentRun, *, org, user) -> AgentRun:
     """Drive the Claude tool-use loop on an existing AgentRun.
 
     The loop is resumable: replays `run.messages` so the model has full context,
     advances until either a final answer, a write tool blocks, or the iteration
-    cap. Persists the AgentRun after every iteration.
+    cap. Steps are appended as they happen; the run's state (not its trace) is
+    saved after every iteration, and a cancel from another request is honoured
+    before the next model call.
     """
 
     client, model = _get_client()
@@ -191,7 +393,7 @@ def _run_loop(run: AgentRun, *, org, user) -> AgentRun:
         run.status = "failed"
         run.error = "Anthropic API key is not configured for this deployment."
         _append_step(run, "final", {"text": run.error})
-        run.save()
+        _save_run(run)
         _fire_run_webhook(run, "failed")
         return run
 
@@ -205,23 +407,26 @@ def _run_loop(run: AgentRun, *, org, user) -> AgentRun:
     system_prompt = profile.system_prompt
 
     while run.iterations < MAX_ITERATIONS:
+        if _was_cancelled(run):
+            run.status = "cancelled"
+            return run
         run.iterations += 1
 
         try:
-            response = client.messages.create(
-                model=model,
-                max_tokens=2048,
-                system=system_prompt,
-                tools=tools_payload,
-                messages=run.messages,
-                temperature=0.2,
-            )
+            response = _call_model(client, run, {
+                "model": model,
+                "max_tokens": 2048,
+                "system": system_prompt,
+                "tools": tools_payload,
+                "messages": run.messages,
+                "temperature": 0.2,
+            })
         except Exception as exc:
             logger.exception("Anthropic call failed: %s", exc)
             run.status = "failed"
             run.error = f"Model call failed: {exc}"
             _append_step(run, "final", {"text": run.error})
-            run.save()
+            _save_run(run)
             _fire_run_webhook(run, "failed")
             return run
 
@@ -246,13 +451,15 @@ def _run_loop(run: AgentRun, *, org, user) -> AgentRun:
             run.final_answer = final_text or run.final_answer
             _append_step(run, "final", {"text": final_text})
             run.status = "completed"
-            run.save()
+            _save_run(run)
             _fire_run_webhook(run, "completed")
             return run
 
-        # Process each tool call.
+        # Process each tool call. Write tools are parked for approval; read
+        # tools are collected and executed together below.
         tool_results: list = []
         pending_writes: list = []
+        read_calls: list = []
         for tu in tool_uses:
             name = tu.get("name", "")
             tu_id = tu.get("id", "")
@@ -299,23 +506,31 @@ def _run_loop(run: AgentRun, *, org, user) -> AgentRun:
                 })
                 continue
 
-            # Read tool — execute now.
-            result, err = _execute_tool(spec, org=org, user=user, tool_input=tu_input)
+            # Read tool — reserve its slot so results keep the model's order.
+            read_calls.append((len(tool_results), tu_id, spec, tu_input))
+            tool_results.append(None)
+
+        outcomes = _run_read_tools([(spec, tu_input) for _slot, _id, spec, tu_input in read_calls], org=org, user=user)
+        for (slot, tu_id, _spec, _input), (result, err, latency_ms) in zip(read_calls, outcomes):
             if err:
-                _append_step(run, "tool_result", {"tool_call_id": tu_id, "error": err})
-                tool_results.append({
+                _append_step(run, "tool_result", {"tool_call_id": tu_id, "error": err, "latency_ms": latency_ms})
+                tool_results[slot] = {
                     "type": "tool_result",
                     "tool_use_id": tu_id,
                     "content": json.dumps({"error": err}),
                     "is_error": True,
-                })
+                }
             else:
-                _append_step(run, "tool_result", {"tool_call_id": tu_id, "output": result})
-                tool_results.append({
+                _append_step(run, "tool_result", {
+                    "tool_call_id": tu_id,
+                    "output": _cap_step_output(result),
+                    "latency_ms": latency_ms,
+                })
+                tool_results[slot] = {
                     "type": "tool_result",
                     "tool_use_id": tu_id,
                     "content": _safe_json(result),
-                })
+                }
 
         # Feed all tool results back as a single user turn.
         run.messages.append({"role": "user", "content": tool_results})
@@ -323,17 +538,17 @@ def _run_loop(run: AgentRun, *, org, user) -> AgentRun:
         if pending_writes:
             run.pending_tool_calls = pending_writes
             run.status = "awaiting_approval"
-            run.save()
+            _save_run(run)
             _fire_run_webhook(run, "awaiting_approval")
             return run
 
-        run.save()
+        _save_run(run)
 
     # Iteration cap exhausted.
     run.status = "failed"
     run.error = "Reached maximum iterations without producing a final answer."
     _append_step(run, "final", {"text": run.error})
-    run.save()
+    _save_run(run)
     _fire_run_webhook(run, "failed")
     return run
 
@@ -478,15 +693,20 @@ def apply_approval(
         tool_input = choice.get("edited_input") or item.get("input") or {}
         if not isinstance(tool_input, dict):
             tool_input = {}
-        result, err = _execute_tool(spec, org=org, user=user, tool_input=tool_input)
+        result, err, latency_ms = _timed_tool(spec, org=org, user=user, tool_input=tool_input)
         if err:
-            _append_step(run, "tool_result", {"tool_call_id": tu_id, "error": err})
+            _append_step(run, "tool_result", {"tool_call_id": tu_id, "error": err, "latency_ms": latency_ms})
             tool_results.append({
                 "type": "tool_result", "tool_use_id": tu_id,
                 "content": json.dumps({"error": err}), "is_error": True,
             })
         else:
-            _append_step(run, "tool_result", {"tool_call_id": tu_id, "output": result, "executed": True})
+            _append_step(run, "tool_result", {
+                "tool_call_id": tu_id,
+                "output": _cap_step_output(result),
+                "executed": True,
+                "latency_ms": latency_ms,
+            })
             tool_results.append({
                 "type": "tool_result", "tool_use_id": tu_id,
                 "content": _safe_json(result),
@@ -502,15 +722,18 @@ def apply_approval(
 
     run.pending_tool_calls = []
     run.status = "running"
-    run.save()
+    _save_run(run)
 
     if background and _kick_background(run):
         return run
     return _run_loop(run, org=org, user=user)
 
 
-def serialize_run(run: AgentRun) -> Dict[str, Any]:
-    """Render-ready JSON payload for the frontend."""
+def serialize_run(run: AgentRun, after: Optional[int] = None) -> Dict[str, Any]:
+    """Render-ready JSON payload for the frontend.
+
+    With ``after`` only steps past that ordinal are included.
+    """
     profile = get_profile(run.profile_slug)
     if profile.tool_names:
         allowed = set(profile.tool_names)
@@ -518,22 +741,10 @@ def serialize_run(run: AgentRun) -> Dict[str, Any]:
     else:
         tool_specs = all_tool_specs()
 
-    # Prefer the AgentStep table when it has rows (new runs); fall back to
-    # the JSON field for historical runs that predate the table.
-    steps = run.steps or []
     try:
-        rows = list(run.step_rows.all().order_by("ordinal"))
-        if rows:
-            steps = [
-                {
-                    "kind": r.kind,
-                    "payload": r.payload,
-                    "ts": r.created_at.isoformat() if r.created_at else None,
-                }
-                for r in rows
-            ]
+        steps = run_steps(run, after=after)
     except Exception:
-        pass
+        steps = run.steps or []
 
     return {
         "id": run.id,
@@ -12,6 +12,7 @@ from apps.knowledge.agent import (
     AgentBudgetExceeded,
     apply_approval,
     resume_run,
+    run_steps,
     serialize_profiles,
     serialize_run,
     start_run,
@@ -112,7 +113,13 @@ def get_agent_run(request, run_id: int):
     run = AgentRun.objects.filter(organization=org, id=run_id).first()
     if not run:
         return Response({"error": "Run not found"}, status=404)
-    return Response(serialize_run(run))
+    after = request.query_params.get("after")
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            return Response({"error": "after must be an integer"}, status=400)
+    return Response(serialize_run(run, after=after))
 
 
 @api_view(["GET"])
@@ -211,7 +218,7 @@ def agent_audit_log(request):
         except ValueError:
             return Response({"error": "user_id must be an integer"}, status=400)
 
-    runs = runs.select_related("user").order_by("-created_at")[:200]
+    runs = runs.select_related("user").prefetch_related("step_rows").order_by("-created_at")[:200]
 
     events = []
     totals = {
@@ -225,7 +232,7 @@ def agent_audit_log(request):
 
     for run in runs:
         totals["runs"] += 1
-        steps = run.steps or []
+        steps = run_steps(run)
         # Build a map call_id -> result step so we can pair them.
         call_index = {}
         result_for = {}
@@ -0,0 +1,358 @@
+"""
+Persistent BM25 inverted index for RECALL
+Keeps per-organization posting lists up to date from model signals so a
+query only reads the postings of its own terms instead of re-tokenizing the
+whole workspace.
+"""
+import hashlib
+from collections import Counter
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .bm25_matrix import bm25_idf, bm25_term_weights
+from .bm25_search import BM25SearchEngine
+from .models import BM25IndexDocument, BM25IndexStats, BM25Posting
+
+# Documents of these types are scored together, mirroring the three
+# HybridSearchEngine entry points.
+CORPUS_FOR_TYPE = {
+    'conversation': 'conversation',
+    'decision': 'decision',
+    'sprint': 'agile',
+    'issue': 'agile',
+    'blocker': 'agile',
+}
+
+MAX_TERM_LENGTH = 64
+SNIPPET_LENGTH = 200
+REBUILD_CHUNK_SIZE = 500
+BUILD_QUEUE_SECONDS = 300
+
+
+def _conversation_document(conv):
+    if conv.is_archived:
+        return None
+    return {
+        'type': 'conversation',
+        'id': conv.id,
+        'title': conv.title or '',
+        'content': conv.content or '',
+        'keywords': conv.ai_keywords or [],
+    }
+
+
+def _decision_document(dec):
+    return {
+        'type': 'decision',
+        'id': dec.id,
+        'title': dec.title or '',
+        'content': f"{dec.description} {dec.rationale}",
+        'keywords': [dec.status],
+    }
+
+
+def _sprint_document(sprint):
+    return {
+        'type': 'sprint',
+        'id': sprint.id,
+        'title': sprint.name or '',
+        'content': f"{sprint.goal} {sprint.summary}",
+        'keywords': ['sprint'],
+    }
+
+
+def _issue_document(issue):
+    return {
+        'type': 'issue',
+        'id': issue.id,
+        'title': f"{issue.key}: {issue.title}",
+        'content': issue.description or '',
+        'keywords': ['issue'],
+    }
+
+
+def _blocker_document(blocker):
+    return {
+        'type': 'blocker',
+        'id': blocker.id,
+        'title': blocker.title or '',
+        'content': blocker.description or '',
+        'keywords': ['blocker'],
+    }
+
+
+def _sources():
+    """(doc_type, model, rebuild queryset filter, document builder) per indexed model."""
+    from apps.conversations.models import Conversation
+    from apps.decisions.models import Decision
+    from apps.agile.models import Sprint, Issue, Blocker
+
+    return [
+        ('conversation', Conversation, {'is_archived': False}, _conversation_document),
+        ('decision', Decision, {}, _decision_document),
+        ('sprint', Sprint, {}, _sprint_document),
+        ('issue', Issue, {}, _issue_document),
+        ('blocker', Blocker, {}, _blocker_document),
+    ]
+
+
+def _source_for_instance(instance):
+    for doc_type, model, _filters, builder in _sources():
+        if isinstance(instance, model):
+            return doc_type, builder
+    return None, None
+
+
+class BM25Index:
+    """Okapi BM25 over the persisted posting lists of one organization.
+
+    Document frequencies come straight from the length of each term's posting
+    list, and average document length from the corpus stats row, so scoring
+    never needs to look at documents that share no term with the query. The
+    arithmetic is the SparseBM25 kernel, so both rank identically.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = BM25SearchEngine()
+
+    def tokenize(self, text):
+        return [token[:MAX_TERM_LENGTH] for token in self.tokenizer.tokenize(text)]
+
+    def _document_terms(self, doc):
+        keywords = ' '.join(str(keyword) for keyword in doc.get('keywords', []))
+        text = f"{doc['title']} {doc['content']} {keywords}"
+        return Counter(self.tokenize(text))
+
+    @staticmethod
+    def _content_hash(doc):
+        raw = '\x1f'.join([doc['title'], doc['content'], '\x1e'.join(str(k) for k in doc.get('keywords', []))])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def is_built(self, org_id, corpus):
+        return BM25IndexStats.objects.filter(organization_id=org_id, corpus=corpus).exists()
+
+    def rebuild(self, org_id, corpus=None):
+        """Re-index every document of one corpus (or all corpora) for an org."""
+        corpora = [corpus] if corpus else sorted(set(CORPUS_FOR_TYPE.values()))
+        for name in corpora:
+            self._rebuild_corpus(org_id, name)
+
+    def _rebuild_corpus(self, org_id, corpus):
+        with transaction.atomic():
+            BM25IndexDocument.objects.filter(organization_id=org_id, corpus=corpus).delete()
+            doc_count = 0
+            total_length = 0
+            batch = []
+
+            for doc_type, model, filters, builder in _sources():
+                if CORPUS_FOR_TYPE[doc_type] != corpus:
+                    continue
+                queryset = model.objects.filter(organization_id=org_id, **filters).order_by('pk')
+                for instance in queryset.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+                    doc = builder(instance)
+                    if doc is None:
+                        continue
+                    terms = self._document_terms(doc)
+                    batch.append((doc, terms))
+                    doc_count += 1
+                    total_length += sum(terms.values())
+                    if len(batch) >= REBUILD_CHUNK_SIZE:
+                        self._create_documents(org_id, corpus, batch)
+                        batch = []
+            if batch:
+                self._create_documents(org_id, corpus, batch)
+
+            BM25IndexStats.objects.update_or_create(
+                organization_id=org_id,
+                corpus=corpus,
+                defaults={'doc_count': doc_count, 'total_length': total_length},
+            )
+
+    def _create_documents(self, org_id, corpus, batch):
+        """Insert (doc, term counter) pairs with one query per table."""
+        documents = BM25IndexDocument.objects.bulk_create([
+            BM25IndexDocument(
+                organization_id=org_id,
+                corpus=corpus,
+                doc_type=doc['type'],
+                object_id=doc['id'],
+                title=doc['title'][:300],
+                snippet=doc['content'][:SNIPPET_LENGTH],
+                keywords=list(doc.get('keywords', [])),
+                length=sum(terms.values()),
+                content_hash=self._content_hash(doc),
+            )
+            for doc, terms in batch
+        ])
+        BM25Posting.objects.bulk_create([
+            BM25Posting(
+                organization_id=org_id,
+                corpus=corpus,
+                term=term,
+                document=document,
+                term_frequency=freq,
+            )
+            for document, (_doc, terms) in zip(documents, batch)
+            for term, freq in terms.items()
+        ], batch_size=REBUILD_CHUNK_SIZE)
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance (driven from signals)
+    # ------------------------------------------------------------------
+
+    def index_instance(self, instance):
+        """Add, refresh or drop one model instance in its org's index."""
+        doc_type, builder = _source_for_instance(instance)
+        if not doc_type:
+            return
+        org_id = instance.organization_id
+        corpus = CORPUS_FOR_TYPE[doc_type]
+        if not self.is_built(org_id, corpus):
+            # The first query rebuilds the whole corpus; nothing to patch yet.
+            return
+
+        doc = builder(instance)
+        if doc is None:
+            self.remove_instance(instance)
+            return
+
+        existing = BM25IndexDocument.objects.filter(
+            organization_id=org_id, doc_type=doc_type, object_id=instance.pk
+        ).first()
+        if existing and existing.content_hash == self._content_hash(doc):
+            return
+
+        terms = self._document_terms(doc)
+        with transaction.atomic():
+            doc_delta = 1
+            length_delta = sum(terms.values())
+            if existing:
+                doc_delta -= 1
+                length_delta -= existing.length
+                existing.delete()
+            self._create_documents(org_id, corpus, [(doc, terms)])
+            BM25IndexStats.objects.filter(organization_id=org_id, corpus=corpus).update(
+                doc_count=F('doc_count') + doc_delta,
+                total_length=F('total_length') + length_delta,
+            )
+
+    def remove_instance(self, instance):
+        doc_type, _builder = _source_for_instance(instance)
+        if not doc_type:
+            return
+        org_id = instance.organization_id
+        corpus = CORPUS_FOR_TYPE[doc_type]
+
+        with transaction.atomic():
+            existing = BM25IndexDocument.objects.filter(
+                organization_id=org_id, doc_type=doc_type, object_id=instance.pk
+            ).first()
+            if not existing:
+                return
+            length = existing.length
+            existing.delete()
+            BM25IndexStats.objects.filter(organization_id=org_id, corpus=corpus).update(
+                doc_count=F('doc_count') - 1,
+                total_length=F('total_length') - length,
+            )
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def schedule_build(self, org_id, corpus):
+        """Queue a background build of one corpus once the current transaction commits."""
+        from .tasks import rebuild_bm25_index
+
+        # Only throttles repeat queueing from this process; the task itself
+        # skips corpora that are already built.
+        if not cache.add(f"knowledge:bm25:build:{org_id}:{corpus}", 1, BUILD_QUEUE_SECONDS):
+            return
+        transaction.on_commit(lambda: rebuild_bm25_index.delay(org_id, corpus))
+
+    def _search_unindexed(self, query, org_id, corpus, limit):
+        """Score a corpus straight from its source rows, for use until its index is built."""
+        documents = []
+        for doc_type, model, filters, builder in _sources():
+            if CORPUS_FOR_TYPE[doc_type] != corpus:
+                continue
+            for instance in model.objects.filter(organization_id=org_id, **filters).iterator(chunk_size=REBUILD_CHUNK_SIZE):
+                doc = builder(instance)
+                if doc is not None:
+                    doc['keywords'] = [str(keyword) for keyword in doc.get('keywords', [])]
+                    documents.append(doc)
+
+        engine = BM25SearchEngine()
+        engine.index_documents(documents)
+        return engine.search(query, limit=limit)
+
+    def search(self, query, org_id, corpus, limit=20):
+        """Return BM25-ranked hits shaped like BM25SearchEngine.search results."""
+        query_terms = Counter(self.tokenize(query))
+        if not query_terms or limit <= 0:
+            return []
+
+        stats = BM25IndexStats.objects.filter(organization_id=org_id, corpus=corpus).first()
+        if stats is None:
+            # Never build inside the request: queue it and score the live rows
+            # the old way until the stats row (the "built" marker) exists.
+            self.schedule_build(org_id, corpus)
+            return self._search_unindexed(query, org_id, corpus, limit)
+        if stats.doc_count <= 0:
+            return []
+
+        rows = list(BM25Posting.objects.filter(
+            organization_id=org_id,
+            corpus=corpus,
+            term__in=list(query_terms),
+        ).values_list('term', 'document_id', 'term_frequency', 'document__length'))
+        if not rows:
+            return []
+
+        terms, document_ids, term_frequencies, lengths = zip(*rows)
+        term_index = {term: index for index, term in enumerate(query_terms)}
+        term_ids = np.fromiter((term_index[term] for term in terms), dtype=np.int64, count=len(rows))
+
+        # Each query term's posting list is complete, so its length is the
+        # term's document frequency across the whole corpus.
+        n_docs = stats.doc_count
+        document_frequency = np.bincount(term_ids, minlength=len(term_index))
+        query_weights = bm25_idf(n_docs, document_frequency) * np.fromiter(
+            query_terms.values(), dtype=np.float64, count=len(query_terms),
+        )
+        contributions = query_weights[term_ids] * bm25_term_weights(
+            term_frequencies, lengths, stats.total_length / n_docs, self.k1, self.b,
+        )
+        candidates, positions = np.unique(np.asarray(document_ids, dtype=np.int64), return_inverse=True)
+        scores = np.bincount(positions, weights=contributions)
+
+        order = np.argsort(-scores, kind='stable')[:limit]
+        top = [(int(candidates[index]), float(scores[index])) for index in order]
+        documents = BM25IndexDocument.objects.in_bulk([document_id for document_id, _score in top])
+
+        results = []
+        for document_id, score in top:
+            document = documents.get(document_id)
+            if document is None or score <= 0:
+                continue
+            results.append({
+                'id': document.object_id,
+                'type': document.doc_type,
+                'title': document.title,
+                'content': document.snippet,
+                'score': float(score),
+                'keywords': document.keywords or [],
+            })
+        return results
+
+
+bm25_index = BM25Index()
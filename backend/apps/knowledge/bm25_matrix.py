@@ -0,0 +1,131 @@
+"""
+Vectorized BM25 scoring for RECALL
+Scores a query as a sparse dot product against a precomputed CSR
+term-document matrix instead of counting terms document by document.
+
+bm25_idf() and bm25_term_weights() are the scoring kernel shared with the
+persistent inverted index in bm25_index, so both rank identically.
+"""
+from collections import Counter
+
+import numpy as np
+
+
+def bm25_idf(n_docs, document_frequency):
+    """IDF in the non-negative log(1 + ...) form, so terms present in most
+    documents of a small workspace still score."""
+    document_frequency = np.asarray(document_frequency, dtype=np.float64)
+    return np.log1p((n_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+def bm25_term_weights(term_frequencies, doc_lengths, avgdl, k1, b):
+    """Saturated, length-normalised weight of each (term, document) entry."""
+    term_frequencies = np.asarray(term_frequencies, dtype=np.float64)
+    doc_lengths = np.asarray(doc_lengths, dtype=np.float64)
+    norms = k1 * (1 - b + b * doc_lengths / (avgdl or 1.0))
+    return term_frequencies * (k1 + 1) / (term_frequencies + norms)
+
+
+class SparseBM25:
+    """Okapi BM25 backed by a CSR term-document matrix.
+
+    Row ``t`` of the matrix holds, for every document containing term ``t``,
+    the saturated and length-normalised term weight
+
+        tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len / avgdl))
+
+    and ``idf[t]`` is kept alongside it. Both only depend on the corpus, so
+    they are computed once; scoring a query reduces to gathering the rows of
+    its terms and summing them per document.
+    """
+
+    def __init__(self, corpus, k1=1.5, b=0.75):
+        vocabulary = {}
+        term_ids = []
+        doc_ids = []
+        term_frequencies = []
+        doc_lengths = np.zeros(len(corpus), dtype=np.float64)
+
+        for doc_index, tokens in enumerate(corpus):
+            doc_lengths[doc_index] = len(tokens)
+            for term, freq in Counter(tokens).items():
+                term_id = vocabulary.setdefault(term, len(vocabulary))
+                term_ids.append(term_id)
+                doc_ids.append(doc_index)
+                term_frequencies.append(freq)
+
+        self.k1 = k1
+        self.b = b
+        self._build(
+            np.asarray(term_ids, dtype=np.int64),
+            np.asarray(doc_ids, dtype=np.int64),
+            np.asarray(term_frequencies, dtype=np.float64),
+            doc_lengths,
+            vocabulary,
+        )
+
+    @classmethod
+    def from_coo(cls, term_ids, doc_ids, term_frequencies, doc_lengths, vocabulary, k1=1.5, b=0.75):
+        """Build directly from (term, doc, tf) triplets, skipping tokenization."""
+        engine = cls.__new__(cls)
+        engine.k1 = k1
+        engine.b = b
+        engine._build(
+            np.asarray(term_ids, dtype=np.int64),
+            np.asarray(doc_ids, dtype=np.int64),
+            np.asarray(term_frequencies, dtype=np.float64),
+            np.asarray(doc_lengths, dtype=np.float64),
+            vocabulary,
+        )
+        return engine
+
+    def _build(self, term_ids, doc_ids, term_frequencies, doc_lengths, vocabulary):
+        self.vocabulary = vocabulary
+        self.corpus_size = len(doc_lengths)
+        self.doc_len = doc_lengths
+        self.avgdl = float(doc_lengths.mean()) if self.corpus_size else 0.0
+
+        vocab_size = len(vocabulary)
+        order = np.argsort(term_ids, kind='stable')
+        self.indices = doc_ids[order]
+        self.indptr = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=vocab_size), out=self.indptr[1:])
+
+        self.data = bm25_term_weights(term_frequencies[order], doc_lengths[self.indices], self.avgdl, self.k1, self.b)
+        self.idf = bm25_idf(self.corpus_size, np.diff(self.indptr))
+
+    def _query_weights(self, query_tokens):
+        counts = Counter(token for token in query_tokens if token in self.vocabulary)
+        term_ids = np.fromiter((self.vocabulary[token] for token in counts), dtype=np.int64, count=len(counts))
+        weights = self.idf[term_ids] * np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        return term_ids, weights
+
+    def get_scores(self, query_tokens):
+        """Score every document, indexed by position in the corpus."""
+        scores = np.zeros(self.corpus_size, dtype=np.float64)
+        term_ids, weights = self._query_weights(query_tokens)
+        if not len(term_ids):
+            return scores
+
+        starts = self.indptr[term_ids]
+        ends = self.indptr[term_ids + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return scores
+
+        # Gather the CSR rows of the query terms and scatter-add them.
+        positions = np.repeat(ends - lengths.cumsum(), lengths) + np.arange(lengths.sum())
+        contributions = self.data[positions] * np.repeat(weights, lengths)
+        return np.bincount(self.indices[positions], weights=contributions, minlength=self.corpus_size)
+
+    def top_k(self, query_tokens, k):
+        """Return up to ``k`` (doc_index, score) pairs with positive score, best first."""
+        if k <= 0 or not self.corpus_size:
+            return []
+        scores = self.get_scores(query_tokens)
+        if k < self.corpus_size:
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(self.corpus_size)
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(index), float(scores[index])) for index in candidates if scores[index] > 0]
@@ -7,35 +7,7 @@ from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
 import re
 from collections import defaultdict
 
-try:
-    from rank_bm25 import BM25Okapi
-except ImportError:
-    class BM25Okapi:
-        """Minimal fallback scorer used when rank_bm25 is unavailable locally."""
-
-        def __init__(self, corpus, k1=1.5, b=0.75):
-            self.corpus = corpus
-            self.k1 = k1
-            self.b = b
-
-        def get_scores(self, query_tokens):
-            scores = []
-            query_terms = [token for token in query_tokens if token]
-            for doc_tokens in self.corpus:
-                if not doc_tokens:
-                    scores.append(0.0)
-                    continue
-                score = 0.0
-                doc_len = len(doc_tokens)
-                for term in query_terms:
-                    term_freq = doc_tokens.count(term)
-                    if term_freq == 0:
-                        continue
-                    score += (term_freq * (self.k1 + 1)) / (
-                        term_freq + self.k1 * (1 - self.b + self.b * (doc_len / max(doc_len, 1)))
-                    )
-                scores.append(float(score))
-            return scores
+from .bm25_matrix import SparseBM25
 
 
 class BM25SearchEngine:
@@ -81,7 +53,7 @@ class BM25SearchEngine:
         
         # Initialize BM25
         if self.documents:
-            self.bm25 = BM25Okapi(self.documents, k1=self.k1, b=self.b)
+            self.bm25 = SparseBM25(self.documents, k1=self.k1, b=self.b)
     
     def search(self, query, limit=20):
         """Search documents using BM25"""
@@ -92,101 +64,45 @@ class BM25SearchEngine:
         if not query_tokens:
             return []
         
-        # Get BM25 scores
-        scores = self.bm25.get_scores(query_tokens)
-        
-        # Get top results
+        # Get top BM25 results
         results = []
-        for idx, score in enumerate(scores):
-            if score > 0:
-                doc = self.doc_map[idx]
-                results.append({
-                    'id': doc['id'],
-                    'type': doc['type'],
-                    'title': doc['title'],
-                    'content': doc['content'][:200],
-                    'score': float(score),
-                    'keywords': doc.get('keywords', [])
-                })
+        for idx, score in self.bm25.top_k(query_tokens, limit):
+            doc = self.doc_map[idx]
+            results.append({
+                'id': doc['id'],
+                'type': doc['type'],
+                'title': doc['title'],
+                'content': doc['content'][:200],
+                'score': score,
+                'keywords': doc.get('keywords', [])
+            })
         
-        # Sort by score descending
-        results.sort(key=lambda x: x['score'], reverse=True)
-        return results[:limit]
+        return results
 
 
 class HybridSearchEngine:
-    """Hybrid search combining BM25 and PostgreSQL full-text search"""
+    """Hybrid search combining BM25 and PostgreSQL full-text search
+
+    BM25 scoring runs against the persistent per-organization inverted index
+    in bm25_index, which signals keep current on every content write.
+    """
     
     def __init__(self):
         self.bm25 = BM25SearchEngine()
     
     def search_conversations(self, query, org_id, limit=20):
         """Search conversations with BM25"""
-        from apps.conversations.models import Conversation
-        
-        # Get conversations from database
-        conversations = Conversation.objects.filter(
-            organization_id=org_id,
-            is_archived=False
-        ).values('id', 'title', 'content', 'ai_keywords', 'post_type')
-        
-        # Prepare documents for BM25
-        documents = []
-        for conv in conversations:
-            documents.append({
-                'id': conv['id'],
-                'type': 'conversation',
-                'title': conv['title'],
-                'content': conv['content'],
-                'keywords': conv['ai_keywords'] or []
-            })
-        
-        # Index and search
-        self.bm25.index_documents(documents)
-        results = self.bm25.search(query, limit)
-        
-        # Enhance with database info
-        for result in results:
-            conv = Conversation.objects.get(id=result['id'])
-            result['author'] = conv.author.get_full_name()
-            result['created_at'] = conv.created_at
-            result['reply_count'] = conv.reply_count
-            result['view_count'] = conv.view_count
-        
-        return results
+        from .bm25_index import bm25_index
+
+        results = bm25_index.search(query, org_id, 'conversation', limit)
+        return self.hydrate(results, org_id)
     
     def search_decisions(self, query, org_id, limit=20):
         """Search decisions with BM25"""
-        from apps.decisions.models import Decision
-        
-        # Get decisions from database
-        decisions = Decision.objects.filter(
-            organization_id=org_id
-        ).values('id', 'title', 'description', 'rationale', 'status')
-        
-        # Prepare documents for BM25
-        documents = []
-        for dec in decisions:
-            documents.append({
-                'id': dec['id'],
-                'type': 'decision',
-                'title': dec['title'],
-                'content': f"{dec['description']} {dec['rationale']}",
-                'keywords': [dec['status']]
-            })
-        
-        # Index and search
-        self.bm25.index_documents(documents)
-        results = self.bm25.search(query, limit)
-        
-        # Enhance with database info
-        for result in results:
-            dec = Decision.objects.get(id=result['id'])
-            result['status'] = dec.status
-            result['impact_level'] = dec.impact_level
-            result['created_at'] = dec.created_at
-        
-        return results
+        from .bm25_index import bm25_index
+
+        results = bm25_index.search(query, org_id, 'decision', limit)
+        return self.hydrate(results, org_id)
     
     def search_all(self, query, org_id, limit=20):
         """Search all content types including agile"""
@@ -202,76 +118,78 @@ class HybridSearchEngine:
     
     def search_agile(self, query, org_id, limit=20):
         """Search sprints, issues, and blockers with BM25"""
+        from .bm25_index import bm25_index
+
+        results = bm25_index.search(query, org_id, 'agile', limit)
+        return self.hydrate(results, org_id)
+    
+    @staticmethod
+    def _hydration_sources():
+        """Per result type: (queryset to load from, fields copied onto the hit)"""
+        from apps.conversations.models import Conversation
+        from apps.decisions.models import Decision
         from apps.agile.models import Sprint, Issue, Blocker
         
-        documents = []
-        
-        # Index sprints
-        sprints = Sprint.objects.filter(
-            organization_id=org_id
-        ).values('id', 'name', 'goal', 'summary')
-        
-        for sprint in sprints:
-            documents.append({
-                'id': sprint['id'],
-                'type': 'sprint',
-                'title': sprint['name'],
-                'content': f"{sprint['goal']} {sprint['summary']}",
-                'keywords': ['sprint']
-            })
-        
-        # Index issues
-        issues = Issue.objects.filter(
-            organization_id=org_id
-        ).values('id', 'title', 'description', 'key')
-        
-        for issue in issues:
-            documents.append({
-                'id': issue['id'],
-                'type': 'issue',
-                'title': f"{issue['key']}: {issue['title']}",
-                'content': issue['description'],
-                'keywords': ['issue']
-            })
+        return {
+            'conversation': (
+                Conversation.objects.select_related('author').only(
+                    'id', 'created_at', 'reply_count', 'view_count',
+                    'author__full_name', 'author__first_name', 'author__last_name', 'author__username',
+                ),
+                ('created_at', 'reply_count', 'view_count'),
+            ),
+            'decision': (
+                Decision.objects.only('id', 'status', 'impact_level', 'created_at'),
+                ('status', 'impact_level', 'created_at'),
+            ),
+            'sprint': (
+                Sprint.objects.only('id', 'status', 'created_at'),
+                ('status', 'created_at'),
+            ),
+            'issue': (
+                Issue.objects.only('id', 'status', 'priority', 'created_at'),
+                ('status', 'priority', 'created_at'),
+            ),
+            'blocker': (
+                Blocker.objects.only('id', 'status', 'created_at'),
+                ('status', 'created_at'),
+            ),
+        }
+    
+    def hydrate(self, results, org_id):
+        """
+        Enhance scored hits with database info
         
-        # Index blockers
-        blockers = Blocker.objects.filter(
-            organization_id=org_id
-        ).values('id', 'title', 'description')
+        Hit IDs are grouped by type and loaded with one in_bulk query per
+        model, so the cost is fixed no matter how many hits come back. Hits
+        whose row has since been deleted are dropped.
+        """
+        if not results:
+            return []
         
-        for blocker in blockers:
-            documents.append({
-                'id': blocker['id'],
-                'type': 'blocker',
-                'title': blocker['title'],
-                'content': blocker['description'],
-                'keywords': ['blocker']
-            })
+        ids_by_type = defaultdict(list)
+        for result in results:
+            ids_by_type[result['type']].append(result['id'])
         
-        # Index and search
-        if documents:
-            self.bm25.index_documents(documents)
-            results = self.bm25.search(query, limit)
-            
-            # Enhance with database info
-            for result in results:
-                if result['type'] == 'sprint':
-                    sprint = Sprint.objects.get(id=result['id'])
-                    result['status'] = sprint.status
-                    result['created_at'] = sprint.created_at
-                elif result['type'] == 'issue':
-                    issue = Issue.objects.get(id=result['id'])
-                    result['status'] = issue.status
-                    result['priority'] = issue.priority
-                    result['created_at'] = issue.created_at
-                elif result['type'] == 'blocker':
-                    blocker = Blocker.objects.get(id=result['id'])
-                    result['status'] = blocker.status
-                    result['created_at'] = blocker.created_at
-            
-            return results
+        sources = self._hydration_sources()
+        rows_by_type = {}
+        for doc_type, ids in ids_by_type.items():
+            queryset, _fields = sources[doc_type]
+            rows_by_type[doc_type] = queryset.filter(organization_id=org_id).in_bulk(ids)
         
-        return []
+        hydrated = []
+        for result in results:
+            row = rows_by_type[result['type']].get(result['id'])
+            if row is None:
+                continue
+            _queryset, fields = sources[result['type']]
+            for field in fields:
+                result[field] = getattr(row, field)
+            if result['type'] == 'conversation':
+                result['author'] = row.author.get_full_name()
+            hydrated.append(result)
+        
+        return hydrated
 
 
 class PostgreSQLFullTextSearch:
@@ -291,7 +209,7 @@ class PostgreSQLFullTextSearch:
         results = Conversation.objects.filter(
             organization_id=org_id,
             is_archived=False
-        ).annotate(
+        ).select_related('author').annotate(
             search=search_vector,
             rank=SearchRank(search_vector, search_query)
         ).filter(
@@ -309,6 +227,9 @@ class PostgreSQLFullTextSearch:
         } for r in results]
 
 
+SUGGESTION_KINDS = ('tag', 'conversation', 'sprint', 'issue')
+
+
 class SearchService:
     """Main search service combining all search methods"""
     
@@ -354,68 +275,27 @@ class SearchService:
     
     def get_suggestions(self, query, org_id, limit=10):
         """Get search suggestions based on partial query"""
-        from apps.conversations.models import Conversation, Tag
-        from apps.agile.models import Sprint, Issue
-        
+        from apps.knowledge.typeahead import typeahead
+
         if not query or len(query) < 2:
             return []
-        
+
         suggestions = []
-        
-        # Suggest tags
-        tags = Tag.objects.filter(
-            organization_id=org_id,
-            name__istartswith=query
-        ).values_list('name', flat=True)[:3]
-        
-        for tag in tags:
-            suggestions.append({
-                'type': 'tag',
-                'text': f'#{tag}',
-                'value': tag
-            })
-        
-        # Suggest conversations
-        conversations = Conversation.objects.filter(
-            organization_id=org_id,
-            title__istartswith=query,
-            is_archived=False
-        ).values('id', 'title')[:3]
-        
-        for conv in conversations:
-            suggestions.append({
-                'type': 'conversation',
-                'text': conv['title'],
-                'value': conv['id']
-            })
-        
-        # Suggest sprints
-        sprints = Sprint.objects.filter(
-            organization_id=org_id,
-            name__istartswith=query
-        ).values('id', 'name')[:2]
-        
-        for sprint in sprints:
+        for suggestion in typeahead.suggest(
+            org_id, query, limit=limit, kinds=SUGGESTION_KINDS, prefix_only=True,
+        ):
+            if suggestion.kind == 'tag':
+                text, value = f'#{suggestion.label}', suggestion.label
+            elif suggestion.kind == 'issue':
+                text, value = f'{suggestion.detail}: {suggestion.label}', suggestion.value
+            else:
+                text, value = suggestion.label, suggestion.value
             suggestions.append({
-                'type': 'sprint',
-                'text': sprint['name'],
-                'value': sprint['id']
+                'type': suggestion.kind,
+                'text': text,
+                'value': value
             })
-        
-        # Suggest issues
-        issues = Issue.objects.filter(
-            organization_id=org_id,
-            title__istartswith=query
-        ).values('id', 'key', 'title')[:2]
-        
-        for issue in issues:
-            suggestions.append({
-                'type': 'issue',
-                'text': f"{issue['key']}: {issue['title']}",
-                'value': issue['id']
-            })
-        
-        return suggestions[:limit]
+        return suggestions
     
     def record_search(self, query, org_id, user_id, results_count, response_time_ms):
         """Record search query for analytics"""
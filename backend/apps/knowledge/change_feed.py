@@ -0,0 +1,160 @@
+"""
+Database change feeds for per-process in-memory indexes
+Indexes such as the typeahead suggestions are held in each web process.
+Instead of invalidating them through a cache version (which a per-process
+cache never shares), writers append the change itself to IndexChange in
+their own transaction, and every process replays the rows it has not seen
+on its next lookup. Consistency therefore only depends on the database.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import IndexChange
+
+logger = logging.getLogger(__name__)
+
+# Changes are replayed from slightly before the last sync, so a transaction
+# that commits up to this long after it wrote its row is still picked up.
+COMMIT_LAG = timedelta(seconds=30)
+RETENTION = timedelta(days=1)
+
+_build_executor = None
+_build_executor_lock = threading.Lock()
+
+
+def _get_build_executor():
+    """Process-wide pool that builds indexes off the request path."""
+    global _build_executor
+    if _build_executor is None:
+        with _build_executor_lock:
+            if _build_executor is None:
+                _build_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='index-build')
+    return _build_executor
+
+
+def record_change(feed, scope_id, key, payload):
+    """Append one change; call inside the transaction that made it."""
+    if scope_id is None:
+        return
+    IndexChange.objects.create(feed=feed, scope_id=scope_id, key=key, payload=payload)
+
+
+def prune_changes(retention=RETENTION):
+    return IndexChange.objects.filter(created_at__lt=timezone.now() - retention).delete()[0]
+
+
+class _LoadedIndex:
+    __slots__ = ('index', 'built_at', 'synced_at', 'applied')
+
+    def __init__(self, index, synced_at):
+        self.index = index
+        self.built_at = time.monotonic()
+        self.synced_at = synced_at
+        # key -> id of the last change applied, so a replayed or late row
+        # never overwrites a newer one.
+        self.applied = {}
+
+
+class FeedIndexCache:
+    """LRU of in-memory indexes, one per scope, kept current from a change feed.
+
+    Subclasses set ``feed`` and implement ``build(scope_id)`` and
+    ``apply_change(index, payload)``. A missing index is built by a
+    background thread once the current transaction commits, and ``get``
+    returns None until it is ready (or, with ``build_on_miss``, builds it
+    inline); an index older than ``max_age`` keeps being served while its
+    replacement is built.
+    """
+
+    feed = None
+    max_age = 300
+    max_entries = 64
+    # Build a missing index in the calling thread instead of returning None.
+    build_on_miss = False
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._building = set()
+        self._lock = threading.Lock()
+
+    def build(self, scope_id):
+        raise NotImplementedError
+
+    def apply_change(self, index, payload):
+        raise NotImplementedError
+
+    def needs_rebuild(self, index):
+        return False
+
+    def get(self, scope_id):
+        with self._lock:
+            loaded = self._entries.get(scope_id)
+            if loaded is not None:
+                self._entries.move_to_end(scope_id)
+        if loaded is None:
+            if self.build_on_miss:
+                return self.load(scope_id)
+            self.schedule_build(scope_id)
+            return None
+
+        self._catch_up(scope_id, loaded)
+        if time.monotonic() - loaded.built_at >= self.max_age or self.needs_rebuild(loaded.index):
+            self.schedule_build(scope_id)
+        return loaded.index
+
+    def load(self, scope_id):
+        """Build and install the index for one scope in the calling thread."""
+        synced_at = timezone.now()
+        started = time.monotonic()
+        loaded = _LoadedIndex(self.build(scope_id), synced_at)
+        logger.debug("Built %s index for %s in %.3fs", self.feed, scope_id, time.monotonic() - started)
+        with self._lock:
+            self._entries[scope_id] = loaded
+            self._entries.move_to_end(scope_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return loaded.index
+
+    def schedule_build(self, scope_id):
+        transaction.on_commit(lambda: self._submit_build(scope_id))
+
+    def _submit_build(self, scope_id):
+        with self._lock:
+            if scope_id in self._building:
+                return
+            self._building.add(scope_id)
+        _get_build_executor().submit(self._build_in_background, scope_id)
+
+    def _build_in_background(self, scope_id):
+        try:
+            self.load(scope_id)
+        except Exception:
+            logger.exception("Failed to build %s index for %s", self.feed, scope_id)
+        finally:
+            with self._lock:
+                self._building.discard(scope_id)
+            connections.close_all()
+
+    def _catch_up(self, scope_id, loaded):
+        now = timezone.now()
+        changes = list(IndexChange.objects.filter(
+            feed=self.feed, scope_id=scope_id, created_at__gte=loaded.synced_at - COMMIT_LAG,
+        ).order_by('id').values_list('id', 'key', 'payload'))
+        with self._lock:
+            for change_id, key, payload in changes:
+                if loaded.applied.get(key, 0) >= change_id:
+                    continue
+                self.apply_change(loaded.index, payload)
+                loaded.applied[key] = change_id
+            loaded.synced_at = max(loaded.synced_at, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
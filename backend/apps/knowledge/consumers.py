@@ -1,12 +1,16 @@
 """Live websocket feed for agent runs.
 
 The frontend polls the run while iterations are in flight; this consumer lets
-us push step/status updates as they happen instead. The consumer joins a
+us push step/status updates and streamed model tokens as they happen instead.
+A client that reconnects can fetch missed steps with
+`GET ai/agent/runs/<id>/?after=<last ordinal seen>`. The consumer joins a
 per-run group `agent_run_<id>` after verifying the user owns the run.
 
 Outbound message shape:
     { "type": "step", "kind": "tool_call" | "tool_result" | "final",
-      "payload": {...}, "ts": "..." }
+      "payload": {...}, "ts": "...", "ordinal": int }
+    { "type": "token", "iteration": int, "text": "..." }   (streamed model text)
+    { "type": "tool_use_start", "iteration": int, "id": "...", "name": "..." }
     { "type": "status", "status": "running" | "awaiting_approval" | "completed" | "failed",
       "final_answer": str | None,
       "pending_tool_calls": [...] }
@@ -0,0 +1,203 @@
+"""
+Shared sentence-embedding model for RECALL semantic search
+One lazily loaded SentenceTransformer per process, with concurrent encode
+calls coalesced into a single forward pass.
+"""
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+
+class _PendingEncode:
+    __slots__ = ('texts', 'done', 'wake', 'leads', 'result', 'error')
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.done = threading.Event()
+        # Set when done, or when the caller is handed the batch leader role.
+        self.wake = threading.Event()
+        self.leads = False
+        self.result = None
+        self.error = None
+
+
+class EmbeddingModel:
+    """Process-wide handle around a SentenceTransformer.
+
+    The model is only imported and loaded on first use (or by ``warmup``).
+    ``encode`` may be called from many threads at once: one caller at a time
+    is the batch leader. It runs queued texts, oldest first and up to
+    ``max_batch_size`` per ``model.encode`` call, handing each caller its
+    own slice of the result, until its own texts are done; then it passes
+    the role to the oldest caller still waiting. When other callers are
+    queued the leader first waits ``max_wait`` seconds for more to join.
+    """
+
+    def __init__(self, model_name, backend='torch', onnx_file='', max_batch_size=64, max_wait=0.005):
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._queue_lock = threading.Lock()
+        self._queue = []
+        self._leader_active = False
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        started = time.monotonic()
+        model = None
+        if self.backend == 'onnx':
+            kwargs = {'backend': 'onnx'}
+            if self.onnx_file:
+                # e.g. onnx/model_qint8_avx512.onnx for the int8-quantized export
+                kwargs['model_kwargs'] = {'file_name': self.onnx_file}
+            try:
+                model = SentenceTransformer(self.model_name, **kwargs)
+            except Exception as exc:
+                logger.warning("ONNX backend unavailable for %s, using torch: %s", self.model_name, exc)
+        if model is None:
+            model = SentenceTransformer(self.model_name)
+        logger.info(
+            "Loaded embedding model %s (%s) in %.2fs",
+            self.model_name, self.backend, time.monotonic() - started,
+        )
+        return model
+
+    def encode(self, texts):
+        """Encode a list of texts to an (n, dim) float32 array."""
+        texts = [text or '' for text in texts]
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        pending = _PendingEncode(texts)
+        with self._queue_lock:
+            self._queue.append(pending)
+            lead = not self._leader_active
+            if lead:
+                self._leader_active = True
+
+        if not lead:
+            pending.wake.wait()
+        if lead or pending.leads:
+            self._lead(pending)
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def encode_one(self, text):
+        return self.encode([text])[0]
+
+    def _lead(self, own):
+        """Run batches until the one holding ``own`` is done, then hand the lead on."""
+        while not own.done.is_set():
+            with self._queue_lock:
+                contended = len(self._queue) > 1
+            if contended and self.max_wait:
+                time.sleep(self.max_wait)
+            with self._queue_lock:
+                batch = []
+                size = 0
+                while self._queue and (not batch or size + len(self._queue[0].texts) <= self.max_batch_size):
+                    item = self._queue.pop(0)
+                    batch.append(item)
+                    size += len(item.texts)
+            self._run_batch(batch)
+        with self._queue_lock:
+            if self._queue:
+                successor = self._queue[0]
+                successor.leads = True
+                successor.wake.set()
+            else:
+                self._leader_active = False
+
+    def _run_batch(self, batch):
+        texts = [text for item in batch for text in item.texts]
+        try:
+            # A single caller may bring more than max_batch_size texts; never
+            # hand the model more than that in one forward pass.
+            vectors = np.concatenate([
+                self.model.encode(
+                    texts[start:start + self.max_batch_size],
+                    convert_to_numpy=True,
+                    batch_size=self.max_batch_size,
+                    show_progress_bar=False,
+                ).astype(np.float32, copy=False)
+                for start in range(0, len(texts), self.max_batch_size)
+            ])
+        except Exception as exc:
+            for item in batch:
+                item.error = exc
+                item.done.set()
+                item.wake.set()
+            return
+
+        offset = 0
+        for item in batch:
+            item.result = vectors[offset:offset + len(item.texts)]
+            offset += len(item.texts)
+            item.done.set()
+            item.wake.set()
+
+
+_shared_model = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_model():
+    """Return this process's shared EmbeddingModel (not loaded until used)."""
+    global _shared_model
+    if _shared_model is None:
+        with _shared_lock:
+            if _shared_model is None:
+                _shared_model = EmbeddingModel(
+                    getattr(settings, 'SEMANTIC_SEARCH_MODEL', DEFAULT_MODEL_NAME),
+                    backend=getattr(settings, 'SEMANTIC_SEARCH_BACKEND', 'torch'),
+                    onnx_file=getattr(settings, 'SEMANTIC_SEARCH_ONNX_FILE', ''),
+                )
+    return _shared_model
+
+
+def warmup():
+    """Load the shared model and run one encode so the first request is fast."""
+    model = get_embedding_model()
+    model.encode(['warmup'])
+    return model
+
+
+def warmup_if_enabled():
+    """Server/worker boot hook; a no-op unless SEMANTIC_SEARCH_WARMUP is set."""
+    if not getattr(settings, 'SEMANTIC_SEARCH_WARMUP', False):
+        return
+    from .embedding_store import embeddings_available
+
+    if not embeddings_available():
+        logger.warning("SEMANTIC_SEARCH_WARMUP is set but sentence_transformers is not installed")
+        return
+    try:
+        warmup()
+    except Exception:
+        logger.exception("Embedding model warmup failed")
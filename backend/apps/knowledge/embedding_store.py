@@ -0,0 +1,272 @@
+"""
+Precomputed embedding store for RECALL semantic search
+Content is embedded once on write (or by a backfill job) and kept as float32
+vectors per organization. Queries run against an in-process index instead of
+re-encoding the whole workspace.
+"""
+import hashlib
+import importlib.util
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import ContentEmbedding
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 64
+BACKFILL_QUEUE_SECONDS = 300
+
+
+def embeddings_available():
+    """True when the sentence-transformers backend can be imported."""
+    return importlib.util.find_spec('sentence_transformers') is not None
+
+
+def _conversation_text(conv):
+    if conv.is_archived:
+        return None
+    return f"{conv.title} {conv.content}"
+
+
+def _decision_text(dec):
+    return f"{dec.title} {dec.description}"
+
+
+def _sources():
+    """kind -> (model, backfill filter, text builder)"""
+    from apps.conversations.models import Conversation
+    from apps.decisions.models import Decision
+
+    return {
+        'conversation': (Conversation, {'is_archived': False}, _conversation_text),
+        'decision': (Decision, {}, _decision_text),
+    }
+
+
+def kind_for_instance(instance):
+    for kind, (model, _filters, _text) in _sources().items():
+        if isinstance(instance, model):
+            return kind
+    return None
+
+
+def _content_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class FlatIndex:
+    """Exact cosine top-k over an L2-normalised float32 matrix.
+
+    Brute force is a single matrix-vector product, which is milliseconds for
+    workspaces into the hundreds of thousands of items. Anything that exposes
+    the same ``search`` signature (IVF, HNSW) can replace it in
+    EmbeddingStore.index_class.
+    """
+
+    def __init__(self, ids, vectors):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors):
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-8)
+        self.vectors = vectors
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query_vector, k):
+        """Return up to ``k`` (object_id, cosine similarity) pairs, best first."""
+        if k <= 0 or not len(self.ids):
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-8)
+        scores = self.vectors @ query
+        if k < len(scores):
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(len(scores))
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(self.ids[i]), float(scores[i])) for i in candidates]
+
+
+class EmbeddingStore:
+    """Persists content embeddings and serves cached per-org indexes.
+
+    ``encoder`` maps a list of texts to an (n, dim) array. Loaded indexes are
+    kept in an LRU of ``max_indexes`` entries and keyed by the row count and
+    latest ``updated_at`` of the org's embeddings, so a write from any worker
+    invalidates them on the next query. Use get_embedding_store() for the
+    process-wide instance so the indexes outlive a single search.
+    """
+
+    index_class = FlatIndex
+    max_indexes = 64
+
+    def __init__(self, encoder, model_name):
+        self.encoder = encoder
+        self.model_name = model_name
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _encode(self, texts):
+        return np.asarray(self.encoder(texts), dtype=np.float32).reshape(len(texts), -1)
+
+    def _save_vectors(self, org_id, kind, pending):
+        """pending: list of (object_id, text, content_hash)"""
+        if not pending:
+            return 0
+        vectors = self._encode([text for _object_id, text, _hash in pending])
+        for (object_id, _text, content_hash), vector in zip(pending, vectors):
+            ContentEmbedding.objects.update_or_create(
+                organization_id=org_id,
+                content_kind=kind,
+                object_id=object_id,
+                defaults={
+                    'model_name': self.model_name,
+                    'dimension': int(vector.shape[0]),
+                    'vector': vector.tobytes(),
+                    'content_hash': content_hash,
+                },
+            )
+        return len(pending)
+
+    def embed_instance(self, instance):
+        """Embed (or drop) one conversation/decision; no-op when unchanged."""
+        kind = kind_for_instance(instance)
+        if not kind:
+            return False
+        _model, _filters, text_for = _sources()[kind]
+        text = text_for(instance)
+        if text is None:
+            self.remove(instance.organization_id, kind, instance.pk)
+            return False
+
+        content_hash = _content_hash(text)
+        unchanged = ContentEmbedding.objects.filter(
+            organization_id=instance.organization_id,
+            content_kind=kind,
+            object_id=instance.pk,
+            model_name=self.model_name,
+            content_hash=content_hash,
+        ).exists()
+        if unchanged:
+            return False
+        self._save_vectors(instance.organization_id, kind, [(instance.pk, text, content_hash)])
+        return True
+
+    def remove(self, org_id, kind, object_id):
+        ContentEmbedding.objects.filter(
+            organization_id=org_id, content_kind=kind, object_id=object_id
+        ).delete()
+
+    def backfill(self, org_id, kind=None, batch_size=BACKFILL_BATCH_SIZE):
+        """Embed every missing or stale item of an org in encoder batches."""
+        embedded = 0
+        for source_kind, (model, filters, text_for) in _sources().items():
+            if kind and source_kind != kind:
+                continue
+            known = dict(
+                ContentEmbedding.objects.filter(
+                    organization_id=org_id, content_kind=source_kind, model_name=self.model_name
+                ).values_list('object_id', 'content_hash')
+            )
+            pending = []
+            queryset = model.objects.filter(organization_id=org_id, **filters).order_by('pk')
+            for instance in queryset.iterator(chunk_size=500):
+                text = text_for(instance)
+                if text is None:
+                    continue
+                content_hash = _content_hash(text)
+                if known.get(instance.pk) == content_hash:
+                    continue
+                pending.append((instance.pk, text, content_hash))
+                if len(pending) >= batch_size:
+                    embedded += self._save_vectors(org_id, source_kind, pending)
+                    pending = []
+            embedded += self._save_vectors(org_id, source_kind, pending)
+        return embedded
+
+    def has_content(self, org_id, kind):
+        """True when the org has anything of this kind to embed."""
+        model, filters, _text = _sources()[kind]
+        return model.objects.filter(organization_id=org_id, **filters).exists()
+
+    def schedule_backfill(self, org_id, kind):
+        """Queue a background backfill of one kind once the current transaction commits."""
+        from .tasks import backfill_org_embeddings
+
+        # Only throttles repeat queueing from this process; the task skips
+        # items whose stored vector is already current.
+        if not cache.add(f"knowledge:embeddings:backfill:{org_id}:{kind}", 1, BACKFILL_QUEUE_SECONDS):
+            return
+        transaction.on_commit(lambda: backfill_org_embeddings.delay(org_id, kind))
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _stamp(self, org_id, kind):
+        return tuple(
+            ContentEmbedding.objects.filter(
+                organization_id=org_id, content_kind=kind, model_name=self.model_name
+            ).aggregate(count=Count('id'), latest=Max('updated_at')).values()
+        )
+
+    def get_index(self, org_id, kind):
+        stamp = self._stamp(org_id, kind)
+        key = (org_id, kind)
+        with self._lock:
+            cached = self._indexes.get(key)
+            if cached and cached[0] == stamp:
+                self._indexes.move_to_end(key)
+                return cached[1]
+
+        rows = ContentEmbedding.objects.filter(
+            organization_id=org_id, content_kind=kind, model_name=self.model_name
+        ).values_list('object_id', 'vector')
+        ids = []
+        vectors = []
+        for object_id, vector in rows:
+            ids.append(object_id)
+            vectors.append(np.frombuffer(bytes(vector), dtype=np.float32))
+        index = self.index_class(ids, np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32))
+
+        with self._lock:
+            self._indexes[key] = (stamp, index)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def search(self, org_id, kind, query_vector, limit):
+        return self.get_index(org_id, kind).search(query_vector, limit)
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_store():
+    """Return this process's shared EmbeddingStore over the shared embedding model."""
+    global _shared_store
+    from .embedding_model import get_embedding_model
+
+    model = get_embedding_model()
+    shared = _shared_store
+    if shared is None or shared[0] is not model:
+        with _shared_lock:
+            shared = _shared_store
+            if shared is None or shared[0] is not model:
+                store = EmbeddingStore(lambda texts: model.encode(list(texts)), model.model_name)
+                shared = _shared_store = (model, store)
+    return shared[1]
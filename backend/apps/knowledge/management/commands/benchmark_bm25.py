@@ -0,0 +1,124 @@
+"""Micro-benchmark the vectorized BM25 scorer on synthetic corpora.
+
+Usage:
+    python manage.py benchmark_bm25
+    python manage.py benchmark_bm25 --sizes 10000 100000 --queries 500
+
+Builds a Zipf-distributed corpus per size directly as (term, doc, tf)
+triplets, then times index construction and top-k scoring with SparseBM25.
+For sizes up to --reference-max-docs the same corpus is also scored with
+rank_bm25's BM25Okapi, when installed and given the same non-negative IDF,
+to show the speedup and confirm the top-k results agree. Needs no database.
+"""
+
+import math
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.knowledge.bm25_matrix import SparseBM25
+
+try:
+    from rank_bm25 import BM25Okapi
+except ImportError:  # pragma: no cover - optional reference implementation
+    BM25Okapi = None
+
+
+def _synthetic_corpus(n_docs, vocab_size, mean_doc_length, rng):
+    doc_lengths = np.maximum(rng.poisson(mean_doc_length, n_docs), 1)
+    total = int(doc_lengths.sum())
+    tokens = np.minimum(rng.zipf(1.3, total) - 1, vocab_size - 1)
+    doc_of_token = np.repeat(np.arange(n_docs), doc_lengths)
+
+    # Collapse (doc, term) duplicates into term frequencies.
+    keys = doc_of_token.astype(np.int64) * vocab_size + tokens
+    unique_keys, term_frequencies = np.unique(keys, return_counts=True)
+    doc_ids = unique_keys // vocab_size
+    term_ids = unique_keys % vocab_size
+    return term_ids, doc_ids, term_frequencies, doc_lengths
+
+
+def _document_frequencies(corpus):
+    frequencies = {}
+    for tokens in corpus:
+        for token in set(tokens):
+            frequencies[token] = frequencies.get(token, 0) + 1
+    return frequencies
+
+
+def _percentile_ms(samples, pct):
+    return float(np.percentile(samples, pct)) * 1000
+
+
+class Command(BaseCommand):
+    help = "Benchmark vectorized BM25 scoring at several corpus sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--vocab-size", type=int, default=50_000)
+        parser.add_argument("--doc-length", type=int, default=40, help="Mean tokens per document.")
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--query-terms", type=int, default=3)
+        parser.add_argument("--top-k", type=int, default=20)
+        parser.add_argument("--reference-max-docs", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **opts):
+        rng = np.random.default_rng(opts["seed"])
+        vocab_size = opts["vocab_size"]
+        vocabulary = {f"t{index}": index for index in range(vocab_size)}
+
+        self.stdout.write("SparseBM25 micro-benchmark")
+        self.stdout.write("--------------------------")
+        for n_docs in opts["sizes"]:
+            term_ids, doc_ids, tfs, doc_lengths = _synthetic_corpus(n_docs, vocab_size, opts["doc_length"], rng)
+
+            started = time.perf_counter()
+            engine = SparseBM25.from_coo(term_ids, doc_ids, tfs, doc_lengths, vocabulary)
+            build_s = time.perf_counter() - started
+
+            # Queries drawn from the same skewed distribution as the corpus.
+            query_ids = np.minimum(rng.zipf(1.3, (opts["queries"], opts["query_terms"])) - 1, vocab_size - 1)
+            queries = [[f"t{term}" for term in row] for row in query_ids]
+
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                engine.top_k(query, opts["top_k"])
+                timings.append(time.perf_counter() - started)
+
+            self.stdout.write(
+                f"  {n_docs:>9,} docs  nnz={len(engine.data):>11,}  build={build_s:7.2f}s  "
+                f"query p50={_percentile_ms(timings, 50):8.2f}ms  p99={_percentile_ms(timings, 99):8.2f}ms"
+            )
+
+            if BM25Okapi is not None and n_docs <= opts["reference_max_docs"]:
+                self._compare_reference(engine, term_ids, doc_ids, tfs, n_docs, queries[:20], opts["top_k"])
+
+    def _compare_reference(self, engine, term_ids, doc_ids, tfs, n_docs, queries, top_k):
+        corpus = [[] for _ in range(n_docs)]
+        for term, doc, tf in zip(term_ids.tolist(), doc_ids.tolist(), tfs.tolist()):
+            corpus[doc].extend([f"t{term}"] * tf)
+        reference = BM25Okapi(corpus)
+        reference.idf = {
+            word: math.log(1 + (n_docs - freq + 0.5) / (freq + 0.5))
+            for word, freq in _document_frequencies(corpus).items()
+        }
+
+        timings = []
+        mismatches = 0
+        for query in queries:
+            started = time.perf_counter()
+            scores = reference.get_scores(query)
+            timings.append(time.perf_counter() - started)
+            expected = np.sort(scores[scores > 0])[::-1][:top_k]
+            actual = [score for _index, score in engine.top_k(query, top_k)]
+            if not np.allclose(actual, expected):
+                mismatches += 1
+
+        style = self.style.SUCCESS if not mismatches else self.style.ERROR
+        self.stdout.write(style(
+            f"  {'':>9}  rank_bm25 reference p50={_percentile_ms(timings, 50):8.2f}ms  "
+            f"top-{top_k} mismatches={mismatches}/{len(queries)}"
+        ))
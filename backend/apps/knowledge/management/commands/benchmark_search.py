@@ -0,0 +1,105 @@
+"""Compare EnhancedSearchEngine's tsvector and icontains paths on a large table.
+
+Usage:
+    python manage.py benchmark_search
+    python manage.py benchmark_search --rows 100000 --queries 50 --keep
+
+Seeds --rows synthetic conversations into a throwaway organization, fills
+their search vectors, and times the same queries through the full-text
+(GIN) path and the icontains path. Needs PostgreSQL; the organization and
+its rows are deleted afterwards unless --keep is given.
+"""
+
+import time
+import uuid
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.conversations.models import Conversation
+from apps.knowledge.search_engine import EnhancedSearchEngine
+from apps.knowledge.search_vectors import fulltext_enabled, rebuild_search_vectors
+from apps.organizations.models import Organization, User
+
+WORDS = (
+    "release migration database failover incident latency deploy pipeline "
+    "customer onboarding billing invoice roadmap quarterly hiring security "
+    "audit compliance vendor contract kubernetes cluster postgres cache "
+    "queue retry webhook dashboard analytics forecast budget review sprint"
+).split()
+
+
+def _percentile_ms(samples, pct):
+    return float(np.percentile(samples, pct)) * 1000
+
+
+class Command(BaseCommand):
+    help = "Benchmark full-text vs icontains search over synthetic conversations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=500_000)
+        parser.add_argument("--queries", type=int, default=30)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded organization and rows.")
+
+    def handle(self, *args, **opts):
+        if not fulltext_enabled():
+            raise CommandError("benchmark_search needs PostgreSQL with SEARCH_USE_FULLTEXT enabled.")
+
+        rng = np.random.default_rng(opts["seed"])
+        suffix = uuid.uuid4().hex[:8]
+        org = Organization.objects.create(name=f"Search benchmark {suffix}", slug=f"search-bench-{suffix}")
+        try:
+            self._run(org, rng, opts)
+        finally:
+            if not opts["keep"]:
+                Conversation.objects.filter(organization=org).delete()
+                User.objects.filter(organization=org).delete()
+                org.delete()
+
+    def _seed(self, org, rng, opts):
+        author = User.objects.create_user(
+            username=f"{org.slug}-author",
+            email=f"{org.slug}@example.com",
+            password=None,
+            organization=org,
+        )
+        started = time.perf_counter()
+        created = 0
+        while created < opts["rows"]:
+            size = min(opts["batch_size"], opts["rows"] - created)
+            Conversation.objects.bulk_create([
+                Conversation(
+                    organization=org,
+                    author=author,
+                    post_type="update",
+                    title=" ".join(rng.choice(WORDS, 5)),
+                    content=" ".join(rng.choice(WORDS, 40)),
+                )
+                for _ in range(size)
+            ])
+            created += size
+        self.stdout.write(f"  seeded {created:,} conversations in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        rebuild_search_vectors(Conversation, ("title", "content"), opts["batch_size"])
+        self.stdout.write(f"  built search vectors in {time.perf_counter() - started:.1f}s")
+
+    def _run(self, org, rng, opts):
+        self.stdout.write("EnhancedSearchEngine benchmark")
+        self.stdout.write("------------------------------")
+        self._seed(org, rng, opts)
+
+        queries = [" ".join(rng.choice(WORDS, int(rng.integers(1, 3)))) for _ in range(opts["queries"])]
+        filters = {"types": ["conversation"]}
+        for label, use_fulltext in (("tsvector", True), ("icontains", False)):
+            engine = EnhancedSearchEngine(use_fulltext=use_fulltext)
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                engine.search(query, org.id, filters=filters, limit=20)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f"  {label:>9}  p50={_percentile_ms(timings, 50):8.2f}ms  p99={_percentile_ms(timings, 99):8.2f}ms"
+            )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from apps.organizations.models import Organization
+from apps.knowledge.bm25_index import bm25_index
+from apps.knowledge.models import BM25IndexStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the persistent BM25 inverted index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--org-slug', type=str, help='Rebuild only specific organization')
+        parser.add_argument(
+            '--corpus',
+            type=str,
+            choices=[choice for choice, _label in BM25IndexStats.CORPUS_CHOICES],
+            help='Rebuild only one corpus (conversation, decision or agile)',
+        )
+
+    def handle(self, *args, **options):
+        if options['org_slug']:
+            orgs = Organization.objects.filter(slug=options['org_slug'])
+        else:
+            orgs = Organization.objects.all()
+
+        for org in orgs:
+            self.stdout.write(f'\nRebuilding BM25 index: {org.name}')
+            bm25_index.rebuild(org.id, options['corpus'])
+            for stats in BM25IndexStats.objects.filter(organization=org).order_by('corpus'):
+                self.stdout.write(f'  {stats.corpus}: {stats.doc_count} documents')
+            self.stdout.write(self.style.SUCCESS(f'  Done: {org.name}'))
+
+        self.stdout.write(self.style.SUCCESS('\nBM25 index rebuilt!'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.knowledge.search_vectors import REBUILD_BATCH_SIZE, _vector_configs, fulltext_enabled, rebuild_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored full-text search vectors used by EnhancedSearchEngine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', type=str, action='append', dest='types', help='Rebuild only this search type (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help='Rows per UPDATE statement')
+
+    def handle(self, *args, **options):
+        if not fulltext_enabled():
+            self.stdout.write(self.style.WARNING('Full-text search is disabled or not on PostgreSQL; nothing to do.'))
+            return
+
+        configs = _vector_configs()
+        types = options['types'] or list(configs)
+        unknown = sorted(set(types) - set(configs))
+        if unknown:
+            raise CommandError(f"Unknown search type(s): {', '.join(unknown)}")
+
+        for item_type in types:
+            config = configs[item_type]
+            updated = rebuild_search_vectors(config['model'], config['search_fields'], options['batch_size'])
+            self.stdout.write(f'  {item_type}: {updated} rows')
+
+        self.stdout.write(self.style.SUCCESS('\nSearch vectors rebuilt!'))
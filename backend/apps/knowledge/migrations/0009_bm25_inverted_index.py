@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0034_rename_agent_budget_org_ym_idx_org_agent_b_organiz_f8b17f_idx_and_more'),
+        ('knowledge', '0008_rename_agent_runs_org_created_idx_agent_runs_organiz_ea9925_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BM25IndexDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corpus', models.CharField(choices=[('conversation', 'Conversations'), ('decision', 'Decisions'), ('agile', 'Agile')], max_length=20)),
+                ('doc_type', models.CharField(max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(blank=True, max_length=300)),
+                ('snippet', models.TextField(blank=True)),
+                ('keywords', models.JSONField(blank=True, default=list)),
+                ('length', models.PositiveIntegerField(default=0)),
+                ('content_hash', models.CharField(blank=True, max_length=40)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bm25_index_documents', to='organizations.organization')),
+            ],
+            options={
+                'db_table': 'bm25_index_documents',
+            },
+        ),
+        migrations.CreateModel(
+            name='BM25Posting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corpus', models.CharField(choices=[('conversation', 'Conversations'), ('decision', 'Decisions'), ('agile', 'Agile')], max_length=20)),
+                ('term', models.CharField(max_length=64)),
+                ('term_frequency', models.PositiveIntegerField(default=1)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='knowledge.bm25indexdocument')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='organizations.organization')),
+            ],
+            options={
+                'db_table': 'bm25_postings',
+                'indexes': [models.Index(fields=['organization', 'corpus', 'term'], name='bm25_postin_organiz_ef1945_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BM25IndexStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corpus', models.CharField(choices=[('conversation', 'Conversations'), ('decision', 'Decisions'), ('agile', 'Agile')], max_length=20)),
+                ('doc_count', models.PositiveIntegerField(default=0)),
+                ('total_length', models.PositiveBigIntegerField(default=0)),
+                ('built_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bm25_index_stats', to='organizations.organization')),
+            ],
+            options={
+                'db_table': 'bm25_index_stats',
+                'unique_together': {('organization', 'corpus')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bm25indexdocument',
+            index=models.Index(fields=['organization', 'corpus'], name='bm25_index__organiz_35fb61_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='bm25indexdocument',
+            unique_together={('organization', 'doc_type', 'object_id')},
+        ),
+    ]
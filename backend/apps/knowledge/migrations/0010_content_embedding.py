@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0034_rename_agent_budget_org_ym_idx_org_agent_b_organiz_f8b17f_idx_and_more'),
+        ('knowledge', '0009_bm25_inverted_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_kind', models.CharField(choices=[('conversation', 'Conversation'), ('decision', 'Decision')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('model_name', models.CharField(max_length=100)),
+                ('dimension', models.PositiveSmallIntegerField()),
+                ('vector', models.BinaryField()),
+                ('content_hash', models.CharField(max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content_embeddings', to='organizations.organization')),
+            ],
+            options={
+                'db_table': 'content_embeddings',
+                'indexes': [models.Index(fields=['organization', 'content_kind', 'updated_at'], name='content_emb_organiz_d01034_idx')],
+                'unique_together': {('organization', 'content_kind', 'object_id')},
+            },
+        ),
+    ]
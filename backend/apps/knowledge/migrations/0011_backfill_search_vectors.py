@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# Frozen copy of the TYPE_CONFIG search_fields at the time of this migration.
+SEARCH_FIELDS = {
+    ('conversations', 'Conversation'): ('title', 'content'),
+    ('conversations', 'ConversationReply'): ('content', 'conversation__title', 'author__username', 'author__full_name'),
+    ('conversations', 'ActionItem'): ('title', 'description', 'conversation__title', 'assignee__username', 'assignee__full_name'),
+    ('decisions', 'Decision'): ('title', 'description', 'rationale', 'plain_language_summary'),
+    ('business', 'Goal'): ('title', 'description'),
+    ('business', 'Milestone'): ('title', 'description', 'goal__title'),
+    ('business', 'Task'): ('title', 'description'),
+    ('business', 'Meeting'): ('title', 'description', 'notes'),
+    ('business', 'Document'): ('title', 'description', 'content'),
+    ('agile', 'Project'): ('name', 'key', 'description'),
+    ('agile', 'Sprint'): ('name', 'goal', 'summary', 'project__name', 'project__key'),
+    ('agile', 'SprintUpdate'): ('title', 'content', 'ai_summary', 'sprint__name', 'sprint__project__name'),
+    ('agile', 'Issue'): ('title', 'description', 'key', 'project__name', 'project__key', 'sprint__name'),
+    ('agile', 'Blocker'): ('title', 'description', 'blocker_type', 'ticket_id', 'conversation__title', 'sprint__name'),
+    ('integrations', 'PullRequest'): ('title', 'branch_name', 'author', 'decision__title', 'pr_url'),
+    ('integrations', 'Commit'): ('message', 'author', 'sha', 'decision__title', 'pull_request__title'),
+}
+
+
+def backfill_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from apps.knowledge.search_vectors import rebuild_search_vectors
+
+    for (app_label, model_name), search_fields in SEARCH_FIELDS.items():
+        rebuild_search_vectors(apps.get_model(app_label, model_name), search_fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0010_content_embedding'),
+        ('agile', '0028_search_vector'),
+        ('business', '0012_search_vector'),
+        ('conversations', '0017_search_vector'),
+        ('decisions', '0017_search_vector'),
+        ('integrations', '0009_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0011_backfill_search_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=40)),
+                ('scope_id', models.BigIntegerField()),
+                ('key', models.CharField(max_length=200)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'db_table': 'index_changes',
+                'indexes': [models.Index(fields=['feed', 'scope_id', 'created_at'], name='index_chang_feed_f3176d_idx')],
+            },
+        ),
+    ]
@@ -139,7 +139,8 @@ class AgentRun(models.Model):
     # Anthropic Messages API conversation history. Replayed to resume the loop.
     messages = models.JSONField(default=list, blank=True)
 
-    # Render-ready trace: [{kind, payload, ts}, ...].
+    # Legacy render-ready trace [{kind, payload, ts}, ...]. New runs only keep
+    # the user goal here; later steps are AgentStep rows.
     steps = models.JSONField(default=list, blank=True)
 
     # Write tool calls awaiting human approval: [{id, name, input}, ...].
@@ -175,9 +176,9 @@ class AgentStep(models.Model):
       - We can push a single step over websocket without re-serializing
         the entire run.
 
-    The legacy JSON `steps` field on AgentRun is kept in sync during the
-    transition window so existing serializers don't break; new readers should
-    prefer this table.
+    Steps are append-only. The legacy JSON `steps` field on AgentRun now only
+    holds the initial user goal (and the full trace of runs that predate this
+    table); read traces through `agent.run_steps`.
     """
 
     KIND_CHOICES = [
@@ -205,3 +206,136 @@ class AgentStep(models.Model):
 
     def __str__(self):
         return f"AgentStep run={self.run_id} #{self.ordinal} {self.kind}"
+
+
+class BM25IndexStats(models.Model):
+    """Per-organization corpus statistics for the persistent BM25 index.
+
+    A row exists only once a corpus has been fully built for an organization;
+    incremental signal updates are skipped until then so a half-indexed corpus
+    is never mistaken for a complete one.
+    """
+
+    CORPUS_CHOICES = [
+        ('conversation', 'Conversations'),
+        ('decision', 'Decisions'),
+        ('agile', 'Agile'),
+    ]
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='bm25_index_stats')
+    corpus = models.CharField(max_length=20, choices=CORPUS_CHOICES)
+    doc_count = models.PositiveIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+    built_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'bm25_index_stats'
+        unique_together = [('organization', 'corpus')]
+
+    def __str__(self):
+        return f"BM25IndexStats org={self.organization_id} {self.corpus} ({self.doc_count} docs)"
+
+
+class BM25IndexDocument(models.Model):
+    """One indexed document: its length plus the fields search results render."""
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='bm25_index_documents')
+    corpus = models.CharField(max_length=20, choices=BM25IndexStats.CORPUS_CHOICES)
+    doc_type = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+
+    title = models.CharField(max_length=300, blank=True)
+    snippet = models.TextField(blank=True)
+    keywords = models.JSONField(default=list, blank=True)
+
+    length = models.PositiveIntegerField(default=0)
+    content_hash = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        db_table = 'bm25_index_documents'
+        unique_together = [('organization', 'doc_type', 'object_id')]
+        indexes = [
+            models.Index(fields=['organization', 'corpus']),
+        ]
+
+    def __str__(self):
+        return f"BM25IndexDocument {self.doc_type}#{self.object_id}"
+
+
+class BM25Posting(models.Model):
+    """Posting list entry: how often `term` occurs in `document`."""
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='+')
+    corpus = models.CharField(max_length=20, choices=BM25IndexStats.CORPUS_CHOICES)
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(BM25IndexDocument, on_delete=models.CASCADE, related_name='postings')
+    term_frequency = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        db_table = 'bm25_postings'
+        indexes = [
+            models.Index(fields=['organization', 'corpus', 'term']),
+        ]
+
+    def __str__(self):
+        return f"BM25Posting {self.term} -> {self.document_id} ({self.term_frequency})"
+
+
+class ContentEmbedding(models.Model):
+    """Precomputed sentence embedding of one conversation or decision.
+
+    Vectors are stored as raw float32 bytes so the semantic index can be
+    loaded with a single query and np.frombuffer, without re-encoding content.
+    """
+
+    KIND_CHOICES = [
+        ('conversation', 'Conversation'),
+        ('decision', 'Decision'),
+    ]
+
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='content_embeddings')
+    content_kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+
+    model_name = models.CharField(max_length=100)
+    dimension = models.PositiveSmallIntegerField()
+    vector = models.BinaryField()
+    content_hash = models.CharField(max_length=40)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'content_embeddings'
+        unique_together = [('organization', 'content_kind', 'object_id')]
+        indexes = [
+            models.Index(fields=['organization', 'content_kind', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"ContentEmbedding {self.content_kind}#{self.object_id} ({self.model_name})"
+
+
+class IndexChange(models.Model):
+    """One entry of an append-only change feed for per-process in-memory indexes.
+
+    Writers append a row in the same transaction as the write; every process
+    holding a copy of the index for ``scope_id`` (an organization or project
+    id, depending on the feed) replays new rows on its next lookup. Rows are
+    pruned once no loaded index can still need them.
+    """
+
+    feed = models.CharField(max_length=40)
+    scope_id = models.BigIntegerField()
+    key = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'index_changes'
+        indexes = [
+            models.Index(fields=['feed', 'scope_id', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"IndexChange {self.feed}:{self.scope_id} {self.key}"
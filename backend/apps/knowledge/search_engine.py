@@ -1,13 +1,25 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from html import unescape
 
-from django.db.models import Q
+from django.conf import settings
+from django.contrib.postgres.search import SearchRank
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.models import F, Q
 from django.utils.html import strip_tags
 
 from apps.conversations.models import ActionItem, Conversation, ConversationReply
 from apps.decisions.models import Decision
 from apps.organizations.models import User
 
+from .search_vectors import fulltext_enabled, prefix_query
+from .typeahead import typeahead
+
+logger = logging.getLogger(__name__)
+
 try:
     from apps.business.models import CalendarConnection, Goal, Meeting, Task
     from apps.business.document_models import Document
@@ -69,6 +81,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'content'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -89,6 +102,7 @@ TYPE_CONFIG = {
         'search_fields': ('content', 'conversation__title', 'author__username', 'author__full_name'),
         'date_field': 'created_at',
         'suggest_field': 'conversation__title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': f'Reply in {item.conversation.title}',
@@ -109,6 +123,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description', 'conversation__title', 'assignee__username', 'assignee__full_name'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -134,6 +149,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description', 'rationale', 'plain_language_summary'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -154,6 +170,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -174,6 +191,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description', 'goal__title'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -198,6 +216,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -218,6 +237,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description', 'notes'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -237,6 +257,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description', 'content'),
         'date_field': 'updated_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -257,6 +278,7 @@ TYPE_CONFIG = {
         'search_fields': ('name', 'key', 'description'),
         'date_field': 'updated_at',
         'suggest_field': 'name',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.name,
@@ -277,6 +299,7 @@ TYPE_CONFIG = {
         'search_fields': ('name', 'goal', 'summary', 'project__name', 'project__key'),
         'date_field': 'created_at',
         'suggest_field': 'name',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.name,
@@ -302,6 +325,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'content', 'ai_summary', 'sprint__name', 'sprint__project__name'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -323,6 +347,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description', 'key', 'project__name', 'project__key', 'sprint__name'),
         'date_field': 'updated_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -351,6 +376,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'description', 'blocker_type', 'ticket_id', 'conversation__title', 'sprint__name'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -523,6 +549,7 @@ TYPE_CONFIG = {
         'search_fields': ('title', 'branch_name', 'author', 'decision__title', 'pr_url'),
         'date_field': 'created_at',
         'suggest_field': 'title',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': item.title,
@@ -555,6 +582,7 @@ TYPE_CONFIG = {
         'search_fields': ('message', 'author', 'sha', 'decision__title', 'pull_request__title'),
         'date_field': 'committed_at',
         'suggest_field': 'message',
+        'search_vector': True,
         'serialize': lambda item: {
             'id': item.id,
             'title': f'{item.sha[:7]} {item.message[:80]}'.strip(),
@@ -692,14 +720,46 @@ def _query_matches_terms(query, match_terms):
 
 
 class EnhancedSearchEngine:
-    def search(self, query, organization_id, filters=None, limit=10):
+    """Search across every TYPE_CONFIG bucket.
+
+    On PostgreSQL, types flagged ``search_vector`` match against their stored,
+    GIN-indexed tsvector and are ordered by SearchRank. Other backends, and
+    queries with no indexable tokens, use the icontains path.
+
+    With ``parallel`` enabled the per-type queries run concurrently on a
+    bounded, process-wide thread pool, on the pool threads' own (persistent)
+    database connections. A ``deadline`` (seconds) caps the wall time of one
+    search: each bucket's statement timeout is the time left when it starts,
+    and buckets that have not finished by then come back empty and are
+    listed under ``meta['timed_out']``. Per-bucket timings are always
+    reported in ``meta['timings_ms']``.
+    """
+
+    def __init__(self, use_fulltext=None, parallel=None, deadline=None):
+        self.use_fulltext = use_fulltext
+        self.parallel = parallel
+        self.deadline = deadline
+
+    def search(self, query, organization_id, filters=None, limit=10, deadline=None):
         filters = filters or {}
-        date_from = _parse_iso(filters.get('date_from'))
-        date_to = _parse_iso(filters.get('date_to'))
+        use_fulltext = fulltext_enabled() if self.use_fulltext is None else self.use_fulltext
+        parallel = getattr(settings, 'SEARCH_PARALLEL', False) if self.parallel is None else self.parallel
+        if deadline is None:
+            deadline = self.deadline if self.deadline is not None else getattr(settings, 'SEARCH_DEADLINE_SECONDS', None)
         requested_types = _requested_types(filters)
         allowed_types = requested_types or {
             item_type for item_type, config in TYPE_CONFIG.items() if config['model'] is not None
         }
+        search_args = {
+            'query': query,
+            'organization_id': organization_id,
+            'filters': filters,
+            'limit': limit,
+            'use_fulltext': use_fulltext,
+            'query_tokens': _tokenize_query(query),
+            'date_from': _parse_iso(filters.get('date_from')),
+            'date_to': _parse_iso(filters.get('date_to')),
+        }
 
         results = {}
         for config in TYPE_CONFIG.values():
@@ -707,95 +767,191 @@ class EnhancedSearchEngine:
             if bucket not in results:
                 results[bucket] = []
 
-        for item_type, config in TYPE_CONFIG.items():
-            model = config['model']
-            if model is None or item_type not in allowed_types:
-                continue
-
-            filters_q = Q(**{config['org_filter']: organization_id})
-            if query:
-                broad_match_terms = config.get('broad_match_terms') or set()
-                if not (broad_match_terms and _query_matches_terms(query, broad_match_terms)):
-                    filters_q &= _build_query(config['search_fields'], query)
-
-            if date_from:
-                filters_q &= Q(**{f"{config['date_field']}__gte": date_from})
-            if date_to:
-                filters_q &= Q(**{f"{config['date_field']}__lte": date_to})
-
-            if filters.get('author'):
-                author_query = str(filters['author']).strip()
-                if item_type == 'conversation':
-                    filters_q &= Q(author__username__icontains=author_query)
-                elif item_type == 'decision':
-                    filters_q &= Q(decision_maker__username__icontains=author_query)
-                elif item_type == 'reply':
-                    filters_q &= Q(author__username__icontains=author_query)
-                elif item_type == 'sprint_update':
-                    filters_q &= Q(author__username__icontains=author_query)
-                elif item_type == 'person':
-                    filters_q &= (Q(username__icontains=author_query) | Q(full_name__icontains=author_query))
-
-            if filters.get('status'):
-                status_query = str(filters['status']).strip()
-                if item_type == 'conversation':
-                    filters_q &= Q(status_label=status_query)
-                elif item_type in {'decision', 'goal', 'task', 'issue', 'sprint', 'blocker', 'action_item'}:
-                    filters_q &= Q(status=status_query)
-                elif item_type == 'milestone':
-                    filters_q &= Q(completed=status_query.lower() in {'completed', 'done', 'true', '1'})
-
-            queryset = model.objects.filter(filters_q).order_by(config['order_by'])[:limit]
-            results[config['bucket']] = [config['serialize'](item) for item in queryset]
+        jobs = [
+            (item_type, config)
+            for item_type, config in TYPE_CONFIG.items()
+            if config['model'] is not None and item_type in allowed_types
+        ]
+        # Worker threads use their own connections and cannot see rows from an
+        # uncommitted transaction on this one, so stay sequential inside atomic().
+        parallel = parallel and len(jobs) > 1 and not connection.in_atomic_block
+        started = time.monotonic()
+        if parallel:
+            outcomes, timed_out = self._run_parallel(jobs, search_args, deadline)
+        else:
+            outcomes, timed_out = self._run_sequential(jobs, search_args, deadline)
+
+        timings = {}
+        for item_type, config in jobs:
+            if item_type in outcomes:
+                items, elapsed = outcomes[item_type]
+                results[config['bucket']] = items
+                timings[item_type] = round(elapsed * 1000, 2)
 
         results['total'] = sum(len(value) for value in results.values() if isinstance(value, list))
+        results['meta'] = {
+            'parallel': parallel,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 2),
+            'timings_ms': timings,
+            'timed_out': sorted(timed_out),
+        }
         return results
 
+    def _run_sequential(self, jobs, search_args, deadline):
+        outcomes = {}
+        timed_out = []
+        cutoff = time.monotonic() + deadline if deadline else None
+        for item_type, config in jobs:
+            if cutoff is not None and time.monotonic() >= cutoff:
+                timed_out.append(item_type)
+                continue
+            outcomes[item_type] = self._timed_search_type(item_type, config, search_args)
+        return outcomes, timed_out
+
+    def _run_parallel(self, jobs, search_args, deadline):
+        executor = _get_search_executor()
+        cutoff = time.monotonic() + deadline if deadline else None
+        futures = {
+            executor.submit(self._search_type_in_thread, item_type, config, search_args, cutoff): item_type
+            for item_type, config in jobs
+        }
+        done, not_done = wait(futures, timeout=deadline or None)
+
+        outcomes = {}
+        timed_out = []
+        for future in not_done:
+            future.cancel()
+            timed_out.append(futures[future])
+        for future in done:
+            item_type = futures[future]
+            try:
+                outcomes[item_type] = future.result()
+            except Exception:
+                logger.exception("Search for %s failed", item_type)
+                outcomes[item_type] = ([], 0.0)
+        return outcomes, timed_out
+
+    def _search_type_in_thread(self, item_type, config, search_args, cutoff):
+        # Pool threads keep their connection between buckets; apply
+        # CONN_MAX_AGE and drop broken connections as a request would.
+        close_old_connections()
+        try:
+            if cutoff is None or connection.vendor != 'postgresql':
+                return self._timed_search_type(item_type, config, search_args)
+            remaining = cutoff - time.monotonic()
+            if remaining <= 0:
+                # Queued past the deadline; the caller already gave up on it.
+                return [], 0.0
+            with transaction.atomic():
+                # Let the server abandon queries the caller will stop waiting for.
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL statement_timeout = %s', [max(1, int(remaining * 1000))])
+                return self._timed_search_type(item_type, config, search_args)
+        finally:
+            close_old_connections()
+
+    def _timed_search_type(self, item_type, config, search_args):
+        started = time.monotonic()
+        items = self._search_type(item_type, config, **search_args)
+        return items, time.monotonic() - started
+
+    def _search_type(self, item_type, config, *, query, organization_id, filters, limit,
+                     use_fulltext, query_tokens, date_from, date_to):
+        model = config['model']
+        filters_q = Q(**{config['org_filter']: organization_id})
+        fulltext_query = None
+        if query:
+            broad_match_terms = config.get('broad_match_terms') or set()
+            if not (broad_match_terms and _query_matches_terms(query, broad_match_terms)):
+                if use_fulltext and config.get('search_vector') and query_tokens:
+                    fulltext_query = prefix_query(query_tokens)
+                    filters_q &= Q(search_vector=fulltext_query)
+                else:
+                    filters_q &= _build_query(config['search_fields'], query)
+
+        if date_from:
+            filters_q &= Q(**{f"{config['date_field']}__gte": date_from})
+        if date_to:
+            filters_q &= Q(**{f"{config['date_field']}__lte": date_to})
+
+        if filters.get('author'):
+            author_query = str(filters['author']).strip()
+            if item_type == 'conversation':
+                filters_q &= Q(author__username__icontains=author_query)
+            elif item_type == 'decision':
+                filters_q &= Q(decision_maker__username__icontains=author_query)
+            elif item_type == 'reply':
+                filters_q &= Q(author__username__icontains=author_query)
+            elif item_type == 'sprint_update':
+                filters_q &= Q(author__username__icontains=author_query)
+            elif item_type == 'person':
+                filters_q &= (Q(username__icontains=author_query) | Q(full_name__icontains=author_query))
+
+        if filters.get('status'):
+            status_query = str(filters['status']).strip()
+            if item_type == 'conversation':
+                filters_q &= Q(status_label=status_query)
+            elif item_type in {'decision', 'goal', 'task', 'issue', 'sprint', 'blocker', 'action_item'}:
+                filters_q &= Q(status=status_query)
+            elif item_type == 'milestone':
+                filters_q &= Q(completed=status_query.lower() in {'completed', 'done', 'true', '1'})
+
+        queryset = model.objects.filter(filters_q)
+        if fulltext_query is not None:
+            queryset = queryset.annotate(
+                search_rank=SearchRank(F('search_vector'), fulltext_query),
+            ).order_by('-search_rank', config['order_by'])
+        else:
+            queryset = queryset.order_by(config['order_by'])
+        return [config['serialize'](item) for item in queryset[:limit]]
+
     def get_suggestions(self, query, organization_id, limit=8):
         if len(query) < 2:
             return []
+        return [
+            suggestion.label
+            for suggestion in typeahead.suggest(organization_id, query, limit=limit, distinct=True)
+        ]
 
-        suggestions = []
-        seen = set()
-        lowered = query.lower()
-
-        def add_suggestion(value):
-            label = (value or '').strip()
-            if not label:
-                return
-            normalized = label.lower()
-            if normalized in seen or lowered not in normalized:
-                return
-            seen.add(normalized)
-            suggestions.append(label)
-
-        conversation_titles = Conversation.objects.filter(
-            organization_id=organization_id,
-            title__icontains=query,
-        ).values_list('title', flat=True)[:limit]
-        for title in conversation_titles:
-            add_suggestion(title)
-
-        for keyword_list in Conversation.objects.filter(
-            organization_id=organization_id,
-            ai_processed=True,
-        ).values_list('ai_keywords', flat=True)[: max(limit * 3, 12)]:
-            for keyword in keyword_list or []:
-                add_suggestion(keyword)
-
-        for item_type, config in TYPE_CONFIG.items():
-            model = config['model'] if config else None
-            if model is None:
-                continue
-            suggest_field = config.get('suggest_field', 'title')
-            titles = model.objects.filter(
-                **{config['org_filter']: organization_id},
-                **{f'{suggest_field}__icontains': query},
-            ).values_list(suggest_field, flat=True)[:limit]
-            for title in titles:
-                add_suggestion(title)
-
-        return suggestions[:limit]
+
+_search_executor = None
+_search_executor_lock = threading.Lock()
+
+
+def _get_search_executor():
+    """Process-wide pool for parallel searches, sized by SEARCH_PARALLEL_WORKERS."""
+    global _search_executor
+    if _search_executor is None:
+        with _search_executor_lock:
+            if _search_executor is None:
+                _search_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'SEARCH_PARALLEL_WORKERS', 4),
+                    thread_name_prefix='search',
+                )
+    return _search_executor
+
+
+def _shutdown_search_executor():
+    """Close every pool thread's database connection, then stop the pool."""
+    global _search_executor
+    with _search_executor_lock:
+        executor, _search_executor = _search_executor, None
+    if executor is None:
+        return
+    # One task per thread: each waits until all of them are running, so
+    # every thread closes its own connection.
+    barrier = threading.Barrier(executor._max_workers)
+
+    def close():
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+        connections.close_all()
+
+    for _ in range(executor._max_workers):
+        executor.submit(close)
+    executor.shutdown(wait=True)
 
 
 def get_search_engine():
@@ -0,0 +1,210 @@
+"""
+Stored full-text search vectors for EnhancedSearchEngine
+Models flagged with ``search_vector`` in TYPE_CONFIG carry a tsvector column
+(GIN-indexed on PostgreSQL) built from their ``search_fields``. It is refreshed
+on save and can be rebuilt in bulk with ``manage.py rebuild_search_vectors``.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.expressions import Combinable
+from django.db.models.signals import post_save, pre_save
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def fulltext_enabled():
+    """Stored vectors are only queried on PostgreSQL; other backends use icontains."""
+    return connection.vendor == 'postgresql' and getattr(settings, 'SEARCH_USE_FULLTEXT', True)
+
+
+def _field_expression(model, path, instance=None):
+    """Column name for local fields, a scalar subquery for ``fk__field`` paths.
+
+    With ``instance`` the expression is built from its in-memory values
+    instead of column references, so it can be written by the row's own
+    INSERT or UPDATE.
+    """
+    if '__' not in path:
+        if instance is None:
+            return path
+        value = getattr(instance, path)
+        return Value('' if value is None else str(value), output_field=TextField())
+    relation, remainder = path.split('__', 1)
+    field = model._meta.get_field(relation)
+    target = OuterRef(field.attname) if instance is None else getattr(instance, field.attname)
+    return Subquery(
+        field.related_model._default_manager.filter(pk=target).values(remainder)[:1]
+    )
+
+
+def vector_expression(model, search_fields, instance=None):
+    """Weighted SearchVector: the first search field ranks 'A', the rest 'B'."""
+    primary, *rest = search_fields
+    vector = SearchVector(_field_expression(model, primary, instance), weight='A')
+    if rest:
+        vector = vector + SearchVector(
+            *[_field_expression(model, path, instance) for path in rest], weight='B'
+        )
+    return vector
+
+
+def prefix_query(tokens):
+    """AND of prefix matches, so 'auth migr' still finds 'authentication migration'."""
+    return SearchQuery(' & '.join(f'{token}:*' for token in tokens), search_type='raw')
+
+
+def refresh_search_vector(model, search_fields, pk):
+    model._default_manager.filter(pk=pk).update(search_vector=vector_expression(model, search_fields))
+
+
+def rebuild_search_vectors(model, search_fields, batch_size=REBUILD_BATCH_SIZE, filters=None):
+    """Recompute the column for every (matching) row, one UPDATE per primary-key range."""
+    manager = model._default_manager
+    queryset = manager.filter(**filters) if filters else manager.all()
+    expression = vector_expression(model, search_fields)
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    updated = 0
+    last_pk = None
+    while True:
+        batch = pks.filter(pk__gt=last_pk) if last_pk is not None else pks
+        batch_pks = list(batch[:batch_size])
+        if not batch_pks:
+            return updated
+        updated += queryset.filter(pk__gte=batch_pks[0], pk__lte=batch_pks[-1]).update(search_vector=expression)
+        last_pk = batch_pks[-1]
+
+
+def _vector_configs():
+    from .search_engine import TYPE_CONFIG
+
+    return {
+        item_type: config
+        for item_type, config in TYPE_CONFIG.items()
+        if config.get('search_vector') and config['model'] is not None
+    }
+
+
+def _config_for(model):
+    for config in _vector_configs().values():
+        if config['model'] is model:
+            return config
+    return None
+
+
+def _dependents():
+    """Referenced model -> (local fields read, [(dependent model, search_fields, lookup)]).
+
+    ``sprint__project__name`` on SprintUpdate makes SprintUpdate depend on
+    Sprint (through ``project_id``) and on Project (through ``name``).
+    """
+    dependents = {}
+    for config in _vector_configs().values():
+        model = config['model']
+        for path in config['search_fields']:
+            relations = path.split('__')
+            current = model
+            for depth, relation in enumerate(relations[:-1], start=1):
+                field = current._meta.get_field(relation)
+                current = field.related_model
+                fields, targets = dependents.setdefault(current, (set(), []))
+                fields.add(current._meta.get_field(relations[depth]))
+                target = (model, config['search_fields'], '__'.join(relations[:depth]))
+                if target not in targets:
+                    targets.append(target)
+    return dependents
+
+
+def _touched(update_fields, search_fields):
+    return update_fields is None or any(path.split('__')[0] in update_fields for path in search_fields)
+
+
+def _vector_before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Write the vector in the row's own INSERT/UPDATE instead of a second UPDATE."""
+    if raw or update_fields is not None or not fulltext_enabled():
+        return
+    config = _config_for(sender)
+    if config:
+        instance.search_vector = vector_expression(sender, config['search_fields'], instance)
+
+
+def _vector_after_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if isinstance(instance.__dict__.get('search_vector'), Combinable):
+        # Don't keep the expression around. Deferring the field instead would
+        # turn the next save() into a partial one that skips the column.
+        instance.search_vector = None
+        return
+    if raw or update_fields is None or not fulltext_enabled():
+        return
+    # A partial save can't add the column to its own UPDATE; refresh it after.
+    config = _config_for(sender)
+    if config and _touched(update_fields, config['search_fields']):
+        try:
+            refresh_search_vector(sender, config['search_fields'], instance.pk)
+        except Exception:
+            logger.exception("Failed to refresh search vector for %s #%s", sender.__name__, instance.pk)
+
+
+def _note_referenced_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Flag a save that changes text other models index, e.g. a project rename."""
+    if raw or instance._state.adding or not fulltext_enabled():
+        return
+    fields = [
+        field.attname for field in _dependents()[sender][0]
+        if update_fields is None or field.name in update_fields or field.attname in update_fields
+    ]
+    if not fields:
+        return
+    stored = sender._default_manager.filter(pk=instance.pk).values(*fields).first()
+    if stored and any(stored[name] != getattr(instance, name) for name in fields):
+        instance._search_vector_dependents_stale = True
+
+
+def _refresh_referenced_change(sender, instance, raw=False, **kwargs):
+    if not instance.__dict__.pop('_search_vector_dependents_stale', False):
+        return
+    from .tasks import refresh_dependent_search_vectors
+
+    label = sender._meta.label
+    pk = instance.pk
+    transaction.on_commit(lambda: refresh_dependent_search_vectors.delay(label, pk))
+
+
+def refresh_dependents(model, pk, batch_size=REBUILD_BATCH_SIZE):
+    """Recompute the vectors of every row whose indexed text reads from ``model`` #pk."""
+    updated = 0
+    for dependent, search_fields, lookup in _dependents().get(model, ((), []))[1]:
+        updated += rebuild_search_vectors(dependent, search_fields, batch_size, filters={lookup: pk})
+    return updated
+
+
+def connect_signals():
+    for item_type, config in _vector_configs().items():
+        pre_save.connect(
+            _vector_before_save,
+            sender=config['model'],
+            dispatch_uid=f'search_vector_fold_{item_type}',
+        )
+        post_save.connect(
+            _vector_after_save,
+            sender=config['model'],
+            dispatch_uid=f'search_vector_refresh_{item_type}',
+        )
+    for model in _dependents():
+        label = model._meta.label_lower
+        pre_save.connect(
+            _note_referenced_change,
+            sender=model,
+            dispatch_uid=f'search_vector_dependents_check_{label}',
+        )
+        post_save.connect(
+            _refresh_referenced_change,
+            sender=model,
+            dispatch_uid=f'search_vector_dependents_refresh_{label}',
+        )
@@ -1,120 +1,102 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 from django.core.cache import cache
 from apps.conversations.models import Conversation
 from apps.decisions.models import Decision
+from .embedding_model import get_embedding_model
+from .embedding_store import get_embedding_store
 import json
 
 class SemanticSearch:
-    """Semantic search using embeddings"""
-    
-    MODEL_NAME = 'all-MiniLM-L6-v2'
-    EMBEDDING_DIM = 384
+    """Semantic search using embeddings
+
+    Content vectors are precomputed by EmbeddingStore (on write, or by the
+    backfill task), so a query only encodes the query text itself. Both the
+    SentenceTransformer and the store with its cached indexes are lazily
+    created, process-wide handles, so constructing SemanticSearch is cheap.
+    """
     
     def __init__(self):
-        self.model = SentenceTransformer(self.MODEL_NAME)
+        self.model = get_embedding_model()
+        self.store = get_embedding_store()
     
     def encode_text(self, text):
         """Encode text to embedding"""
         if not text:
-            return np.zeros(self.EMBEDDING_DIM)
-        return self.model.encode(text, convert_to_numpy=True)
+            return np.zeros(self.model.dimension, dtype=np.float32)
+        return self.model.encode_one(text)
     
-    def search_conversations(self, query, org_id, limit=10):
-        """Search conversations semantically"""
-        query_embedding = self.encode_text(query)
+    def encode_batch(self, texts):
+        """Encode many texts in one model call"""
+        return self.model.encode(list(texts))
+    
+    def _keyword_results(self, query, org_id, kind, limit):
+        """BM25 hits shaped like semantic results, served until the vectors exist"""
+        from .bm25_index import bm25_index
         
-        conversations = Conversation.objects.filter(
-            organization_id=org_id,
-            is_archived=False
-        ).values('id', 'title', 'content')
+        return [
+            {
+                'id': hit['id'],
+                'title': hit['title'],
+                'similarity': hit['score'],
+                'type': kind
+            }
+            for hit in bm25_index.search(query, org_id, kind, limit)
+        ]
+    
+    def _search_store(self, query, query_embedding, org_id, kind, limit):
+        if not self.store.get_index(org_id, kind):
+            if not self.store.has_content(org_id, kind):
+                return []
+            # Never embed inside the request: queue the backfill and answer
+            # with keyword results until the vectors have been stored.
+            self.store.schedule_backfill(org_id, kind)
+            return self._keyword_results(query, org_id, kind, limit)
         
-        results = []
-        for conv in conversations:
-            text = f"{conv['title']} {conv['content']}"
-            embedding = self.encode_text(text)
-            
-            # Calculate cosine similarity
-            similarity = np.dot(query_embedding, embedding) / (
-                np.linalg.norm(query_embedding) * np.linalg.norm(embedding) + 1e-8
-            )
-            
-            results.append({
-                'id': conv['id'],
-                'title': conv['title'],
-                'similarity': float(similarity),
-                'type': 'conversation'
-            })
+        hits = self.store.search(org_id, kind, query_embedding, limit)
+        if kind == 'conversation':
+            titles = dict(Conversation.objects.filter(
+                organization_id=org_id,
+                is_archived=False,
+                id__in=[object_id for object_id, _score in hits]
+            ).values_list('id', 'title'))
+        else:
+            titles = dict(Decision.objects.filter(
+                organization_id=org_id,
+                id__in=[object_id for object_id, _score in hits]
+            ).values_list('id', 'title'))
         
-        return sorted(results, key=lambda x: x['similarity'], reverse=True)[:limit]
+        return [
+            {
+                'id': object_id,
+                'title': titles[object_id],
+                'similarity': similarity,
+                'type': kind
+            }
+            for object_id, similarity in hits
+            if object_id in titles
+        ]
+    
+    def search_conversations(self, query, org_id, limit=10):
+        """Search conversations semantically"""
+        return self._search_store(query, self.encode_text(query), org_id, 'conversation', limit)
     
     def search_decisions(self, query, org_id, limit=10):
         """Search decisions semantically"""
-        query_embedding = self.encode_text(query)
-        
-        decisions = Decision.objects.filter(
-            organization_id=org_id
-        ).values('id', 'title', 'description')
-        
-        results = []
-        for dec in decisions:
-            text = f"{dec['title']} {dec['description']}"
-            embedding = self.encode_text(text)
-            
-            similarity = np.dot(query_embedding, embedding) / (
-                np.linalg.norm(query_embedding) * np.linalg.norm(embedding) + 1e-8
-            )
-            
-            results.append({
-                'id': dec['id'],
-                'title': dec['title'],
-                'similarity': float(similarity),
-                'type': 'decision'
-            })
-        
-        return sorted(results, key=lambda x: x['similarity'], reverse=True)[:limit]
+        return self._search_store(query, self.encode_text(query), org_id, 'decision', limit)
     
     def search_all(self, query, org_id, limit=20):
         """Search all content semantically"""
-        conv_results = self.search_conversations(query, org_id, limit // 2)
-        dec_results = self.search_decisions(query, org_id, limit // 2)
+        query_embedding = self.encode_text(query)
+        conv_results = self._search_store(query, query_embedding, org_id, 'conversation', limit // 2)
+        dec_results = self._search_store(query, query_embedding, org_id, 'decision', limit // 2)
         
         all_results = conv_results + dec_results
         return sorted(all_results, key=lambda x: x['similarity'], reverse=True)[:limit]
     
     def find_similar(self, content, org_id, content_type='conversation', limit=5):
         """Find similar content"""
-        query_embedding = self.encode_text(content)
-        
-        if content_type == 'conversation':
-            items = Conversation.objects.filter(
-                organization_id=org_id,
-                is_archived=False
-            ).values('id', 'title', 'content')
-        else:
-            items = Decision.objects.filter(
-                organization_id=org_id
-            ).values('id', 'title', 'description')
-        
-        results = []
-        for item in items:
-            text = item.get('content') or item.get('description', '')
-            if not text:
-                continue
-            
-            embedding = self.encode_text(text)
-            similarity = np.dot(query_embedding, embedding) / (
-                np.linalg.norm(query_embedding) * np.linalg.norm(embedding) + 1e-8
-            )
-            
-            results.append({
-                'id': item['id'],
-                'title': item['title'],
-                'similarity': float(similarity),
-                'type': content_type
-            })
-        
-        return sorted(results, key=lambda x: x['similarity'], reverse=True)[:limit]
+        kind = 'conversation' if content_type == 'conversation' else 'decision'
+        return self._search_store(content, self.encode_text(content), org_id, kind, limit)
 
 
 class KnowledgeGapDetector:
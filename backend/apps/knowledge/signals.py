@@ -1,11 +1,22 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
+from apps.agile.models import Blocker, Issue, Sprint
 from apps.conversations.models import Conversation
 from apps.decisions.models import Decision
+from apps.knowledge.bm25_index import bm25_index
+from apps.knowledge.embedding_store import embeddings_available, kind_for_instance
+from apps.knowledge.models import ContentEmbedding
+from apps.knowledge.search_vectors import connect_signals as connect_search_vector_signals
+from apps.knowledge.typeahead import connect_signals as connect_typeahead_signals
 from apps.knowledge.unified_models import ContentLink, UnifiedActivity
 from apps.knowledge.context_engine import ContextEngine
 
+logger = logging.getLogger(__name__)
+
 
 def _maybe_autolink_conversation(instance):
     if not instance.ai_processed:
@@ -59,3 +70,59 @@ def track_decision_activity(sender, instance, created, **kwargs):
                 )
             except:
                 pass
+
+
+BM25_INDEXED_MODELS = (Conversation, Decision, Sprint, Issue, Blocker)
+
+
+def update_bm25_index(sender, instance, **kwargs):
+    try:
+        bm25_index.index_instance(instance)
+    except Exception:
+        logger.exception("Failed to update BM25 index for %s #%s", sender.__name__, instance.pk)
+
+
+def remove_from_bm25_index(sender, instance, **kwargs):
+    try:
+        bm25_index.remove_instance(instance)
+    except Exception:
+        logger.exception("Failed to remove %s #%s from BM25 index", sender.__name__, instance.pk)
+
+
+for _model in BM25_INDEXED_MODELS:
+    post_save.connect(update_bm25_index, sender=_model, dispatch_uid=f"bm25_index_save_{_model.__name__}")
+    post_delete.connect(remove_from_bm25_index, sender=_model, dispatch_uid=f"bm25_index_delete_{_model.__name__}")
+
+
+def _dispatch_embedding(kind, object_id):
+    from apps.knowledge.tasks import embed_content
+
+    try:
+        embed_content.delay(kind, object_id)
+    except Exception as exc:
+        # The backfill task picks up anything missed here.
+        logger.warning("Could not queue embedding for %s #%s: %s", kind, object_id, exc)
+
+
+def queue_content_embedding(sender, instance, **kwargs):
+    if not embeddings_available():
+        return
+    kind = kind_for_instance(instance)
+    transaction.on_commit(lambda: _dispatch_embedding(kind, instance.pk))
+
+
+def remove_content_embedding(sender, instance, **kwargs):
+    ContentEmbedding.objects.filter(
+        organization_id=instance.organization_id,
+        content_kind=kind_for_instance(instance),
+        object_id=instance.pk,
+    ).delete()
+
+
+for _model in (Conversation, Decision):
+    post_save.connect(queue_content_embedding, sender=_model, dispatch_uid=f"embedding_save_{_model.__name__}")
+    post_delete.connect(remove_content_embedding, sender=_model, dispatch_uid=f"embedding_delete_{_model.__name__}")
+
+
+connect_search_vector_signals()
+connect_typeahead_signals()
@@ -49,6 +49,38 @@ def train_all_org_knowledge_models_nightly(epochs=3, max_samples=1200):
     }
 
 
+@shared_task(name="knowledge.rebuild_bm25_index", ignore_result=True)
+def rebuild_bm25_index(org_id, corpus):
+    """Build one corpus of an org's BM25 index; queued by the first search that finds it missing."""
+    from django.db import IntegrityError
+    from .bm25_index import bm25_index
+
+    if bm25_index.is_built(org_id, corpus):
+        return
+    try:
+        bm25_index.rebuild(org_id, corpus)
+    except IntegrityError:
+        # Another worker built the same corpus concurrently.
+        logger.info("BM25 index for org %s/%s was built concurrently", org_id, corpus)
+
+
+@shared_task(name="knowledge.refresh_dependent_search_vectors", ignore_result=True)
+def refresh_dependent_search_vectors(model_label, pk):
+    """Re-index rows whose search vector embeds text from a renamed/edited related row."""
+    from django.apps import apps
+    from .search_vectors import refresh_dependents
+
+    refresh_dependents(apps.get_model(model_label), pk)
+
+
+@shared_task(name="knowledge.prune_index_changes", ignore_result=True)
+def prune_index_changes():
+    """Drop change-feed rows no loaded in-memory index can still need."""
+    from .change_feed import prune_changes
+
+    prune_changes()
+
+
 @shared_task(name="knowledge.drive_agent_run", bind=True, max_retries=0)
 def drive_agent_run(self, run_id):
     """Background driver for an AgentRun.
@@ -80,3 +112,45 @@ def drive_agent_run(self, run_id):
 
     run.refresh_from_db()
     return {"status": run.status, "run_id": run_id, "iterations": run.iterations}
+
+
+@shared_task(name="knowledge.embed_content", ignore_result=True)
+def embed_content(kind, object_id):
+    """Compute (or drop) the stored embedding of one conversation/decision."""
+    from .embedding_store import _sources
+    from .semantic_search import SemanticSearch
+
+    model, _filters, _text = _sources()[kind]
+    instance = model.objects.filter(id=object_id).first()
+    if instance is None:
+        return {"status": "missing", "kind": kind, "object_id": object_id}
+
+    changed = SemanticSearch().store.embed_instance(instance)
+    return {"status": "ok", "kind": kind, "object_id": object_id, "changed": changed}
+
+
+@shared_task(name="knowledge.backfill_org_embeddings")
+def backfill_org_embeddings(org_id, kind=None):
+    """Embed every missing or stale conversation/decision of one org."""
+    from .semantic_search import SemanticSearch
+
+    embedded = SemanticSearch().store.backfill(org_id, kind)
+    return {"status": "ok", "org_id": org_id, "embedded": embedded}
+
+
+@shared_task(name="knowledge.backfill_all_org_embeddings")
+def backfill_all_org_embeddings():
+    """Nightly sweep that embeds anything the write-time tasks missed."""
+    from .embedding_store import embeddings_available
+
+    if not embeddings_available():
+        return {"status": "skipped", "reason": "sentence_transformers_not_installed"}
+
+    summaries = []
+    for org_id in Organization.objects.filter(is_active=True).values_list("id", flat=True):
+        summaries.append(backfill_org_embeddings(org_id))
+    return {
+        "status": "ok",
+        "total_orgs": len(summaries),
+        "embedded": sum(row.get("embedded", 0) for row in summaries),
+    }
@@ -0,0 +1,210 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.knowledge import agent
+from apps.knowledge.agent_tools import ToolSpec
+from apps.knowledge.models import AgentRun, AgentStep
+from apps.organizations.models import Organization, User
+
+
+def _text(text):
+    return SimpleNamespace(type="text", text=text)
+
+
+def _tool_use(tool_id, name, tool_input):
+    return SimpleNamespace(type="tool_use", id=tool_id, name=name, input=tool_input)
+
+
+class _FakeStream:
+    def __init__(self, content):
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        for block in self.content:
+            yield SimpleNamespace(type="content_block_start", content_block=block)
+            if block.type == "text":
+                for word in block.text.split(" "):
+                    delta = SimpleNamespace(type="text_delta", text=word + " ")
+                    yield SimpleNamespace(type="content_block_delta", delta=delta)
+            yield SimpleNamespace(type="content_block_stop")
+
+    def get_final_message(self):
+        return SimpleNamespace(content=self.content)
+
+
+class FakeClient:
+    """Replays one scripted assistant turn per model call."""
+
+    def __init__(self, turns):
+        self.turns = list(turns)
+        self.calls = 0
+        self.messages = SimpleNamespace(stream=self._stream, create=self._create)
+
+    def _next(self):
+        self.calls += 1
+        return self.turns.pop(0)
+
+    def _stream(self, **request):
+        return _FakeStream(self._next())
+
+    def _create(self, **request):
+        return SimpleNamespace(content=self._next())
+
+
+class AgentRunLoopTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Agent Org", slug="agent-org")
+        self.user = User.objects.create_user(
+            username="agent_admin",
+            email="agent_admin@example.com",
+            password="pass1234",
+            organization=self.org,
+            role="admin",
+        )
+        self.events = []
+        patcher = mock.patch(
+            "apps.knowledge.consumers.broadcast_run_event",
+            side_effect=lambda run_id, message: self.events.append(message),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _start(self, client):
+        with mock.patch.object(agent, "_get_client", return_value=(client, "test-model")):
+            return agent.start_run(org=self.org, user=self.user, goal="Summarise the week", background=False)
+
+    def test_streams_tokens_and_appends_step_rows(self):
+        answer = "All " + "quiet on the western front " * 4
+        run = self._start(FakeClient([[_text(answer)]]))
+
+        self.assertEqual(run.status, "completed")
+        tokens = [event for event in self.events if event["type"] == "token"]
+        self.assertGreater(len(tokens), 1)
+        self.assertLess(len(tokens), len(answer.split(" ")))  # deltas are coalesced
+        self.assertEqual("".join(event["text"] for event in tokens).strip(), answer.strip())
+
+        self.assertEqual(list(run.step_rows.values_list("ordinal", "kind")), [(2, "thought"), (3, "final")])
+        stored = AgentRun.objects.get(pk=run.pk)
+        self.assertEqual([step["kind"] for step in stored.steps], ["user_goal"])
+
+        payload = agent.serialize_run(stored)
+        self.assertEqual([step["kind"] for step in payload["steps"]], ["user_goal", "thought", "final"])
+        self.assertEqual([step["kind"] for step in agent.serialize_run(stored, after=2)["steps"]], ["final"])
+
+    @override_settings(AGENT_STREAMING=False)
+    def test_read_tool_round_trip_without_streaming(self):
+        spec = ToolSpec("echo", "Echo input", {"type": "object"}, lambda org, user, **kw: kw, is_write=False)
+        client = FakeClient([
+            [_tool_use("tu_1", "echo", {"value": 7})],
+            [_text("Done")],
+        ])
+        with mock.patch.object(agent, "get_tool", return_value=spec):
+            run = self._start(client)
+
+        self.assertEqual(run.status, "completed")
+        self.assertFalse([event for event in self.events if event["type"] == "token"])
+        kinds = list(AgentStep.objects.filter(run=run).values_list("kind", flat=True))
+        self.assertEqual(kinds, ["tool_call", "tool_result", "thought", "final"])
+        stored = AgentRun.objects.get(pk=run.pk)
+        self.assertEqual(stored.messages[2]["content"][0]["tool_use_id"], "tu_1")
+        self.assertEqual(len(stored.steps), 1)
+
+    def test_write_tools_wait_for_approval_while_reads_run(self):
+        specs = {"read": _sleepy_tool("read", 0.0), "write": _sleepy_tool("write", 0.0, is_write=True)}
+        client = FakeClient([[_tool_use("tu_r", "read", {}), _tool_use("tu_w", "write", {"x": 1})]])
+        with mock.patch.object(agent, "get_tool", side_effect=specs.get):
+            run = self._start(client)
+
+        self.assertEqual(run.status, "awaiting_approval")
+        self.assertEqual([call["id"] for call in run.pending_tool_calls], ["tu_w"])
+        results = run.messages[-1]["content"]
+        self.assertEqual([item["tool_use_id"] for item in results], ["tu_r", "tu_w"])
+        result_step = AgentStep.objects.get(run=run, kind="tool_result")
+        self.assertEqual(result_step.payload["tool_call_id"], "tu_r")
+        self.assertIn("latency_ms", result_step.payload)
+
+    def test_cancelled_run_stops_before_next_model_call(self):
+        run = AgentRun.objects.create(
+            organization=self.org, user=self.user, goal="x", status="cancelled",
+            messages=[{"role": "user", "content": "x"}],
+        )
+        client = FakeClient([[_text("never")]])
+        with mock.patch.object(agent, "_get_client", return_value=(client, "test-model")):
+            agent._run_loop(run, org=self.org, user=self.user)
+
+        self.assertEqual(client.calls, 0)
+        self.assertEqual(run.status, "cancelled")
+
+
+def _sleepy_tool(name, seconds, is_write=False):
+    def fn(org, user, **kwargs):
+        time.sleep(seconds)
+        return {"tool": name, **kwargs}
+
+    return ToolSpec(name, name, {"type": "object"}, fn, is_write=is_write)
+
+
+class ReadToolFanOutTests(SimpleTestCase):
+    def test_read_tools_run_concurrently_in_order(self):
+        calls = [(_sleepy_tool(f"t{index}", 0.3), {"n": index}) for index in range(3)]
+
+        started = time.monotonic()
+        outcomes = agent._run_read_tools(calls, org=None, user=None)
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 0.75)
+        self.assertEqual([result["n"] for result, _err, _ms in outcomes], [0, 1, 2])
+        self.assertTrue(all(latency >= 300 for _result, _err, latency in outcomes))
+
+    @override_settings(AGENT_TOOL_TIMEOUT_SECONDS=0.2)
+    def test_slow_tool_times_out_without_blocking_the_others(self):
+        calls = [(_sleepy_tool("slow", 1.0), {}), (_sleepy_tool("fast", 0.0), {})]
+
+        outcomes = agent._run_read_tools(calls, org=None, user=None)
+
+        self.assertIsNone(outcomes[0][0])
+        self.assertIn("timed out", outcomes[0][1])
+        self.assertEqual(outcomes[1][0], {"tool": "fast"})
+
+    @override_settings(AGENT_TOOL_TIMEOUT_SECONDS=0.2)
+    def test_single_tool_is_bounded_too(self):
+        started = time.monotonic()
+        outcomes = agent._run_read_tools([(_sleepy_tool("slow", 1.0), {})], org=None, user=None)
+
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertIn("timed out", outcomes[0][1])
+
+    @override_settings(AGENT_TOOL_TIMEOUT_SECONDS=0.35, AGENT_TOOL_WORKERS=1)
+    def test_timeout_counts_from_when_the_tool_starts(self):
+        calls = [(_sleepy_tool(f"t{index}", 0.2), {"n": index}) for index in range(2)]
+
+        outcomes = agent._run_read_tools(calls, org=None, user=None)
+
+        self.assertEqual([result["n"] for result, _err, _ms in outcomes], [0, 1])
+
+    @override_settings(AGENT_TOOL_TIMEOUT_SECONDS=0.2, AGENT_TOOL_WORKERS=1)
+    def test_queued_tools_are_not_run_behind_a_hung_pool(self):
+        calls = [(_sleepy_tool("hung", 1.0), {}), (_sleepy_tool("queued", 0.0), {})]
+
+        started = time.monotonic()
+        outcomes = agent._run_read_tools(calls, org=None, user=None)
+
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertIn("timed out", outcomes[0][1])
+        self.assertIn("not run", outcomes[1][1])
+
+    @override_settings(AGENT_TOOL_MAX_RESULT_CHARS=50)
+    def test_large_outputs_are_stored_as_previews(self):
+        capped = agent._cap_step_output({"rows": ["x" * 40] * 5})
+        self.assertTrue(capped["truncated"])
+        self.assertEqual(len(capped["preview"]), 50)
+        self.assertEqual(agent._cap_step_output({"ok": 1}), {"ok": 1})
@@ -0,0 +1,211 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.agile.models import Board, Issue, Project
+from apps.conversations.models import Conversation
+from apps.decisions.models import Decision
+from apps.knowledge.bm25_index import bm25_index
+from apps.knowledge.bm25_search import BM25SearchEngine, HybridSearchEngine
+from apps.knowledge.models import BM25IndexDocument, BM25IndexStats, BM25Posting
+from apps.organizations.models import Organization, User
+
+
+class BM25InvertedIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org = Organization.objects.create(name="BM25 Org", slug="bm25-org")
+        self.other_org = Organization.objects.create(name="BM25 Other", slug="bm25-other")
+        self.user = User.objects.create_user(
+            username="bm25_admin",
+            email="bm25_admin@example.com",
+            password="pass1234",
+            organization=self.org,
+            role="admin",
+        )
+        self.other_user = User.objects.create_user(
+            username="bm25_other",
+            email="bm25_other@example.com",
+            password="pass1234",
+            organization=self.other_org,
+            role="admin",
+        )
+        self.auth_conv = Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Authentication rollout",
+            content="Rolling out token authentication to every service.",
+            ai_keywords=["authentication", "tokens"],
+        )
+        self.billing_conv = Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Billing cleanup",
+            content="Invoices are now generated nightly by the billing worker.",
+        )
+        Conversation.objects.create(
+            organization=self.other_org,
+            author=self.other_user,
+            post_type="update",
+            title="Other authentication work",
+            content="Authentication notes that belong to another workspace.",
+        )
+        self.engine = HybridSearchEngine()
+
+    def test_first_query_queues_build_and_scores_source_rows(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            results = self.engine.search_conversations("authentication", self.org.id)
+
+        self.assertEqual([r["id"] for r in results], [self.auth_conv.id])
+        self.assertEqual(results[0]["type"], "conversation")
+        self.assertGreater(results[0]["score"], 0)
+        self.assertFalse(BM25IndexStats.objects.exists())
+
+        # The build runs once, off the request path.
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        with self.captureOnCommitCallbacks() as callbacks:
+            indexed = self.engine.search_conversations("authentication", self.org.id)
+        self.assertEqual(callbacks, [])
+        self.assertEqual([(r["id"], r["score"]) for r in indexed], [(r["id"], r["score"]) for r in results])
+        stats = BM25IndexStats.objects.get(organization=self.org, corpus="conversation")
+        self.assertEqual(stats.doc_count, 2)
+        self.assertFalse(BM25IndexStats.objects.filter(organization=self.other_org).exists())
+
+    def test_signals_update_postings_incrementally(self):
+        bm25_index.rebuild(self.org.id)
+
+        new_conv = Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="question",
+            title="Kubernetes upgrade window",
+            content="When do we schedule the kubernetes upgrade?",
+        )
+        results = self.engine.search_conversations("kubernetes", self.org.id)
+        self.assertEqual([r["id"] for r in results], [new_conv.id])
+
+        new_conv.title = "Cluster maintenance window"
+        new_conv.content = "When do we schedule the cluster maintenance?"
+        new_conv.save()
+        self.assertEqual(self.engine.search_conversations("kubernetes", self.org.id), [])
+        self.assertEqual(
+            [r["id"] for r in self.engine.search_conversations("maintenance", self.org.id)],
+            [new_conv.id],
+        )
+        self.assertFalse(BM25Posting.objects.filter(term="kubernetes").exists())
+        stats = BM25IndexStats.objects.get(organization=self.org, corpus="conversation")
+        self.assertEqual(stats.doc_count, 3)
+
+    def test_archiving_removes_conversation_from_index(self):
+        bm25_index.rebuild(self.org.id, "conversation")
+
+        self.auth_conv.is_archived = True
+        self.auth_conv.save()
+
+        self.assertEqual(self.engine.search_conversations("authentication", self.org.id), [])
+        self.assertFalse(
+            BM25IndexDocument.objects.filter(doc_type="conversation", object_id=self.auth_conv.id).exists()
+        )
+
+    def test_decision_and_agile_corpora(self):
+        decision = Decision.objects.create(
+            organization=self.org,
+            title="Adopt feature flags",
+            description="Every release goes behind feature flags.",
+            rationale="Safer rollouts",
+            decision_maker=self.user,
+            status="approved",
+        )
+        project = Project.objects.create(organization=self.org, name="Core", key="CORE", lead=self.user)
+        board = Board.objects.create(organization=self.org, project=project, name="Core Board", board_type="kanban")
+        issue = Issue.objects.create(
+            organization=self.org,
+            project=project,
+            board=board,
+            key="CORE-1",
+            title="Wire feature flags into deploys",
+            reporter=self.user,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            decisions = self.engine.search_decisions("flags", self.org.id)
+        self.assertEqual([r["id"] for r in decisions], [decision.id])
+        self.assertEqual(decisions[0]["status"], "approved")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            agile = self.engine.search_agile("flags", self.org.id)
+        self.assertEqual([(r["type"], r["id"]) for r in agile], [("issue", issue.id)])
+        self.assertEqual(agile[0]["title"], "CORE-1: Wire feature flags into deploys")
+
+        issue.delete()
+        self.assertEqual(self.engine.search_agile("flags", self.org.id), [])
+        stats = BM25IndexStats.objects.get(organization=self.org, corpus="agile")
+        self.assertEqual(stats.doc_count, 0)
+        self.assertEqual(stats.total_length, 0)
+
+    def test_hydration_uses_fixed_number_of_queries(self):
+        for index in range(6):
+            Conversation.objects.create(
+                organization=self.org,
+                author=self.user,
+                post_type="update",
+                title=f"Authentication follow-up {index}",
+                content="More authentication hardening notes for the rollout.",
+            )
+        bm25_index.rebuild(self.org.id, "conversation")
+
+        # stats + postings + index documents + one hydration query with author join
+        with self.assertNumQueries(4):
+            results = self.engine.search_conversations("authentication", self.org.id)
+
+        self.assertEqual(len(results), 7)
+        for result in results:
+            self.assertEqual(result["author"], self.user.get_full_name())
+            self.assertIn("created_at", result)
+            self.assertIn("reply_count", result)
+
+    def test_index_scores_match_sparse_bm25(self):
+        for index in range(4):
+            Conversation.objects.create(
+                organization=self.org,
+                author=self.user,
+                post_type="update",
+                title=f"Token rotation {index}",
+                content="Rotate authentication tokens " * (index + 1),
+            )
+        bm25_index.rebuild(self.org.id, "conversation")
+        engine = BM25SearchEngine()
+        engine.index_documents([
+            {"id": conv.id, "type": "conversation", "title": conv.title, "content": conv.content,
+             "keywords": conv.ai_keywords or []}
+            for conv in Conversation.objects.filter(organization=self.org)
+        ])
+
+        query = "authentication tokens billing"
+        expected = {r["id"]: r["score"] for r in engine.search(query)}
+        actual = {r["id"]: r["score"] for r in bm25_index.search(query, self.org.id, "conversation")}
+        self.assertEqual(actual.keys(), expected.keys())
+        for conv_id, score in expected.items():
+            self.assertAlmostEqual(actual[conv_id], score)
+
+    def test_empty_corpus_is_built_once(self):
+        with mock.patch("apps.knowledge.tasks.rebuild_bm25_index.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.engine.search_decisions("flags", self.org.id), [])
+                self.assertEqual(self.engine.search_decisions("flags", self.org.id), [])
+        delay.assert_called_once_with(self.org.id, "decision")
+
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.engine.search_decisions("flags", self.org.id)
+        stats = BM25IndexStats.objects.get(organization=self.org, corpus="decision")
+        self.assertEqual(stats.doc_count, 0)
+
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(1):
+            self.assertEqual(self.engine.search_decisions("flags", self.org.id), [])
+        self.assertEqual(callbacks, [])
@@ -0,0 +1,93 @@
+import math
+import random
+import unittest
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from apps.knowledge.bm25_matrix import SparseBM25
+from apps.knowledge.bm25_search import BM25SearchEngine
+
+try:
+    from rank_bm25 import BM25Okapi
+except ImportError:  # pragma: no cover - optional reference implementation
+    BM25Okapi = None
+else:
+    class LuceneIdfBM25(BM25Okapi):
+        """rank_bm25 reference with the non-negative IDF the index uses."""
+
+        def _calc_idf(self, nd):
+            for word, freq in nd.items():
+                self.idf[word] = math.log(1 + (self.corpus_size - freq + 0.5) / (freq + 0.5))
+
+
+def _random_corpus(seed, n_docs=300, vocab_size=120):
+    rng = random.Random(seed)
+    vocab = [f"term{index}" for index in range(vocab_size)]
+    # Skewed draw so some terms occur in most documents.
+    weights = [1.0 / (rank + 1) for rank in range(vocab_size)]
+    return [
+        rng.choices(vocab, weights=weights, k=rng.randint(1, 40))
+        for _ in range(n_docs)
+    ]
+
+
+@unittest.skipUnless(BM25Okapi is not None, "rank_bm25 is not installed")
+class SparseBM25CorrectnessTests(SimpleTestCase):
+    def assert_matches_reference(self, corpus, queries, **params):
+        reference = LuceneIdfBM25(corpus, **params)
+        engine = SparseBM25(corpus, **params)
+        for query in queries:
+            np.testing.assert_allclose(
+                engine.get_scores(query),
+                reference.get_scores(query),
+                rtol=1e-9,
+                atol=1e-12,
+                err_msg=f"query={query}",
+            )
+
+    def test_scores_match_rank_bm25_on_random_corpora(self):
+        for seed in range(5):
+            corpus = _random_corpus(seed)
+            rng = random.Random(seed + 100)
+            queries = [
+                rng.choices([f"term{index}" for index in range(150)], k=rng.randint(1, 6))
+                for _ in range(25)
+            ]
+            self.assert_matches_reference(corpus, queries)
+
+    def test_scores_match_with_custom_parameters_and_repeated_terms(self):
+        corpus = _random_corpus(42, n_docs=80)
+        queries = [["term0", "term0", "term3"], ["term1", "missing", "term1"], ["missing"], []]
+        self.assert_matches_reference(corpus, queries, k1=1.2, b=0.5)
+
+    def test_top_k_agrees_with_full_ranking(self):
+        corpus = _random_corpus(7, n_docs=500)
+        engine = SparseBM25(corpus)
+        query = ["term5", "term9", "term40"]
+        scores = LuceneIdfBM25(corpus).get_scores(query)
+
+        top = engine.top_k(query, 10)
+
+        expected = sorted(scores[scores > 0], reverse=True)[:10]
+        np.testing.assert_allclose([score for _index, score in top], expected)
+        for index, score in top:
+            self.assertAlmostEqual(scores[index], score)
+
+
+class BM25SearchEngineTests(SimpleTestCase):
+    def test_search_ranks_by_relevance(self):
+        engine = BM25SearchEngine()
+        engine.index_documents([
+            {'id': 1, 'type': 'conversation', 'title': 'Database migration', 'content': 'Moving the billing database.'},
+            {'id': 2, 'type': 'conversation', 'title': 'Database migration plan', 'content': 'Database migration steps for the database team.'},
+            {'id': 3, 'type': 'conversation', 'title': 'Lunch', 'content': 'Pizza on friday.'},
+            {'id': 4, 'type': 'conversation', 'title': 'Hiring', 'content': 'Two backend roles open.'},
+            {'id': 5, 'type': 'conversation', 'title': 'Offsite', 'content': 'Venue booked for march.'},
+            {'id': 6, 'type': 'conversation', 'title': 'Release notes', 'content': 'Mobile release shipped.'},
+        ])
+
+        results = engine.search('database migration', limit=5)
+
+        self.assertEqual([result['id'] for result in results], [2, 1])
+        self.assertGreater(results[0]['score'], results[1]['score'])
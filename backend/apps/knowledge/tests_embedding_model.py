@@ -0,0 +1,138 @@
+import threading
+import time
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from apps.knowledge import embedding_model
+from apps.knowledge.embedding_model import EmbeddingModel, _PendingEncode
+from apps.knowledge.semantic_search import SemanticSearch
+
+
+class RecordingModel:
+    """Stands in for a loaded SentenceTransformer and records each forward pass."""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        time.sleep(self.delay)
+        return np.array([[len(text), index] for index, text in enumerate(texts)], dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+
+class EmbeddingModelTests(SimpleTestCase):
+    def make_handle(self, **kwargs):
+        handle = EmbeddingModel("test-model", **kwargs)
+        handle._model = RecordingModel(delay=0.01)
+        return handle
+
+    def test_concurrent_encodes_share_one_forward_pass(self):
+        handle = self.make_handle(max_wait=0.05)
+        results = {}
+        barrier = threading.Barrier(8)
+
+        def worker(index):
+            barrier.wait()
+            results[index] = handle.encode([f"text-{index}", "x" * index])
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(len(handle._model.calls), 8)
+        self.assertEqual(sum(len(call) for call in handle._model.calls), 16)
+        for index, vectors in results.items():
+            self.assertEqual(vectors.shape, (2, 2))
+            self.assertEqual(vectors[0][0], len(f"text-{index}"))
+            self.assertEqual(vectors[1][0], index)
+
+    def test_batches_respect_max_batch_size(self):
+        handle = self.make_handle(max_batch_size=3, max_wait=0)
+        texts = ["a" * length for length in range(1, 8)]
+
+        vectors = handle.encode(texts)
+
+        self.assertEqual([len(call) for call in handle._model.calls], [3, 3, 1])
+        self.assertEqual(sum(handle._model.calls, []), texts)
+        self.assertEqual(vectors.shape, (7, 2))
+        self.assertEqual(vectors[:, 0].tolist(), list(range(1, 8)))
+
+    def test_queued_callers_are_not_packed_past_max_batch_size(self):
+        handle = self.make_handle(max_batch_size=3, max_wait=0)
+        waiting = _PendingEncode(["x", "yy"])
+        handle._queue.append(waiting)
+
+        vectors = handle.encode(["abc", "abcd"])
+
+        self.assertEqual(handle._model.calls, [["x", "yy"], ["abc", "abcd"]])
+        self.assertTrue(waiting.done.is_set())
+        self.assertEqual(waiting.result[:, 0].tolist(), [1, 2])
+        self.assertEqual(vectors[:, 0].tolist(), [3, 4])
+
+    def test_lone_caller_does_not_wait(self):
+        handle = self.make_handle(max_wait=1.0)
+
+        started = time.monotonic()
+        handle.encode(["abc"])
+
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_leader_hands_off_after_its_own_batch(self):
+        handle = self.make_handle(max_wait=0)
+        arrivals = []
+        encode = handle._model.encode
+
+        def encode_while_others_arrive(texts, **kwargs):
+            # Another caller queues up during every forward pass.
+            arrival = _PendingEncode([f"late-{len(arrivals)}"])
+            arrivals.append(arrival)
+            handle._queue.append(arrival)
+            return encode(texts, **kwargs)
+
+        handle._model.encode = encode_while_others_arrive
+        vectors = handle.encode(["abc"])
+
+        self.assertEqual(vectors[:, 0].tolist(), [3])
+        self.assertEqual(handle._model.calls, [["abc"]])
+        self.assertTrue(arrivals[0].leads)
+        self.assertTrue(arrivals[0].wake.is_set())
+        self.assertFalse(arrivals[0].done.is_set())
+        self.assertTrue(handle._leader_active)
+
+    def test_errors_reach_every_caller(self):
+        handle = self.make_handle(max_wait=0)
+
+        def boom(texts, **kwargs):
+            raise RuntimeError("model crashed")
+
+        handle._model.encode = boom
+        with self.assertRaises(RuntimeError):
+            handle.encode(["a"])
+        # The leader slot is released, so later calls still run.
+        handle._model = RecordingModel()
+        self.assertEqual(handle.encode(["abc"]).shape, (1, 2))
+
+    @override_settings(SEMANTIC_SEARCH_MODEL="custom-model", SEMANTIC_SEARCH_BACKEND="onnx")
+    def test_shared_handle_is_lazy_singleton(self):
+        embedding_model._shared_model = None
+        try:
+            first = embedding_model.get_embedding_model()
+            self.assertIs(first, embedding_model.get_embedding_model())
+            self.assertEqual(first.model_name, "custom-model")
+            self.assertEqual(first.backend, "onnx")
+            self.assertIsNone(first._model)
+
+            first._model = RecordingModel()
+            search = SemanticSearch()
+            self.assertEqual(search.encode_text("").shape, (2,))
+            self.assertIs(search.store, SemanticSearch().store)
+            self.assertEqual(search.store.model_name, "custom-model")
+        finally:
+            embedding_model._shared_model = None
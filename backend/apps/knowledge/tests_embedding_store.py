@@ -0,0 +1,163 @@
+import zlib
+from unittest.mock import patch
+
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from apps.conversations.models import Conversation
+from apps.decisions.models import Decision
+from apps.knowledge.embedding_store import EmbeddingStore, FlatIndex
+from apps.knowledge.models import ContentEmbedding
+from apps.knowledge.semantic_search import SemanticSearch
+from apps.organizations.models import Organization, User
+
+
+def bag_of_words_encoder(texts, dim=64):
+    """Deterministic stand-in encoder: hashed bag of words."""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            vectors[row, zlib.crc32(word.encode()) % dim] += 1.0
+    return vectors
+
+
+class FlatIndexTests(SimpleTestCase):
+    def test_returns_top_k_by_cosine(self):
+        index = FlatIndex(
+            [10, 20, 30],
+            np.array([[1.0, 0.0], [0.6, 0.8], [0.0, 5.0]], dtype=np.float32),
+        )
+
+        hits = index.search(np.array([0.0, 1.0]), 2)
+
+        self.assertEqual([object_id for object_id, _score in hits], [30, 20])
+        self.assertAlmostEqual(hits[0][1], 1.0, places=5)
+        self.assertAlmostEqual(hits[1][1], 0.8, places=5)
+
+    def test_empty_index(self):
+        index = FlatIndex([], np.zeros((0, 0), dtype=np.float32))
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.search(np.ones(4), 5), [])
+
+
+class EmbeddingStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Organization.objects.create(name="Embed Org", slug="embed-org")
+        self.user = User.objects.create_user(
+            username="embed_admin",
+            email="embed_admin@example.com",
+            password="pass1234",
+            organization=self.org,
+            role="admin",
+        )
+        self.calls = []
+
+        def encoder(texts):
+            self.calls.append(list(texts))
+            return bag_of_words_encoder(texts)
+
+        self.store = EmbeddingStore(encoder, "test-bow")
+        self.conv = Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Database failover drill",
+            content="We rehearsed database failover on staging.",
+        )
+        Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Team offsite agenda",
+            content="Agenda and travel plans for the offsite.",
+        )
+        self.decision = Decision.objects.create(
+            organization=self.org,
+            title="Adopt managed database",
+            description="Move the primary database to a managed service.",
+            decision_maker=self.user,
+        )
+
+    def test_backfill_embeds_in_batches_and_skips_unchanged(self):
+        self.assertEqual(self.store.backfill(self.org.id), 3)
+        self.assertEqual(len(self.calls), 2)  # one encoder call per kind
+        self.assertEqual(ContentEmbedding.objects.filter(organization=self.org).count(), 3)
+
+        self.calls.clear()
+        self.assertEqual(self.store.backfill(self.org.id), 0)
+        self.assertEqual(self.calls, [])
+
+    def test_search_uses_stored_vectors_and_refreshes_after_writes(self):
+        self.store.backfill(self.org.id)
+        query = bag_of_words_encoder(["database failover"])[0]
+
+        hits = self.store.search(self.org.id, "conversation", query, 1)
+        self.assertEqual(hits[0][0], self.conv.id)
+
+        new_conv = Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Database failover failover failover",
+            content="Database failover runbook, database failover checklist.",
+        )
+        self.assertTrue(self.store.embed_instance(new_conv))
+        self.assertFalse(self.store.embed_instance(new_conv))
+
+        hits = self.store.search(self.org.id, "conversation", query, 3)
+        self.assertEqual(len(hits), 3)
+        self.assertEqual(hits[0][0], new_conv.id)
+
+    def test_index_cache_is_reused_and_bounded(self):
+        self.store.backfill(self.org.id)
+        index = self.store.get_index(self.org.id, "conversation")
+        self.assertIs(self.store.get_index(self.org.id, "conversation"), index)
+
+        self.store.max_indexes = 1
+        self.store.get_index(self.org.id, "decision")
+        self.assertEqual(list(self.store._indexes), [(self.org.id, "decision")])
+
+    def test_archived_conversation_is_dropped(self):
+        self.store.backfill(self.org.id, "conversation")
+
+        self.conv.is_archived = True
+        self.conv.save()
+        self.store.embed_instance(self.conv)
+
+        ids = [object_id for object_id, _score in self.store.search(self.org.id, "conversation", np.ones(64), 10)]
+        self.assertNotIn(self.conv.id, ids)
+
+    def _semantic_search(self):
+        search = SemanticSearch.__new__(SemanticSearch)
+        search.store = self.store
+        search.encode_text = lambda text: bag_of_words_encoder([text])[0]
+        return search
+
+    def test_search_queues_backfill_and_serves_keyword_results(self):
+        search = self._semantic_search()
+
+        with patch("apps.knowledge.tasks.backfill_org_embeddings.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                results = search.search_conversations("database failover", self.org.id)
+                search.search_conversations("database failover", self.org.id)
+
+        delay.assert_called_once_with(self.org.id, "conversation")
+        self.assertEqual(self.calls, [])
+        self.assertEqual(results[0]["id"], self.conv.id)
+        self.assertFalse(ContentEmbedding.objects.exists())
+
+        self.store.backfill(self.org.id, "conversation")
+        results = search.search_conversations("database failover", self.org.id)
+        self.assertEqual(results[0]["id"], self.conv.id)
+        self.assertLessEqual(results[0]["similarity"], 1.0)
+
+    def test_empty_org_does_not_queue_backfill(self):
+        empty_org = Organization.objects.create(name="Empty Org", slug="empty-org")
+
+        with patch("apps.knowledge.tasks.backfill_org_embeddings.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self._semantic_search().search_all("database", empty_org.id), [])
+
+        delay.assert_not_called()
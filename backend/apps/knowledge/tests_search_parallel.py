@@ -0,0 +1,114 @@
+import time
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from apps.conversations.models import Conversation
+from apps.decisions.models import Decision
+from apps.knowledge import search_engine
+from apps.knowledge.search_engine import TYPE_CONFIG, EnhancedSearchEngine
+from apps.organizations.models import Organization, User
+
+
+def _seed(test):
+    test.org = Organization.objects.create(name="Fanout Org", slug="fanout-org")
+    test.user = User.objects.create_user(
+        username="fanout_admin",
+        email="fanout_admin@example.com",
+        password="pass1234",
+        organization=test.org,
+        role="admin",
+    )
+    test.conv = Conversation.objects.create(
+        organization=test.org,
+        author=test.user,
+        post_type="update",
+        title="Quarterly roadmap review",
+        content="Roadmap priorities for the next quarter.",
+    )
+    test.decision = Decision.objects.create(
+        organization=test.org,
+        title="Freeze roadmap scope",
+        description="No new roadmap items until the review.",
+        decision_maker=test.user,
+    )
+
+
+class ParallelSearchTests(TransactionTestCase):
+    def setUp(self):
+        _seed(self)
+        # Pool threads keep their connections; release them before the
+        # test database is flushed or dropped.
+        self.addCleanup(search_engine._shutdown_search_executor)
+
+    def _ids(self, results):
+        return {
+            bucket: [item['id'] for item in items]
+            for bucket, items in results.items()
+            if isinstance(items, list)
+        }
+
+    def test_parallel_matches_sequential(self):
+        sequential = EnhancedSearchEngine(use_fulltext=False, parallel=False).search('roadmap', self.org.id)
+        parallel = EnhancedSearchEngine(use_fulltext=False, parallel=True).search('roadmap', self.org.id)
+
+        self.assertTrue(parallel['meta']['parallel'])
+        self.assertEqual(self._ids(parallel), self._ids(sequential))
+        self.assertEqual(parallel['conversations'][0]['id'], self.conv.id)
+        self.assertEqual(parallel['decisions'][0]['id'], self.decision.id)
+        self.assertIn('conversation', parallel['meta']['timings_ms'])
+
+    def test_deadline_returns_partial_buckets(self):
+        engine = EnhancedSearchEngine(use_fulltext=False, parallel=True, deadline=0.5)
+        original = EnhancedSearchEngine._search_type
+
+        def slow_decisions(self, item_type, config, **kwargs):
+            if item_type == 'decision':
+                time.sleep(1.5)
+            return original(self, item_type, config, **kwargs)
+
+        with mock.patch.object(EnhancedSearchEngine, '_search_type', slow_decisions):
+            results = engine.search('roadmap', self.org.id, filters={'types': ['conversation', 'decision']})
+
+        self.assertEqual(results['meta']['timed_out'], ['decision'])
+        self.assertEqual(results['decisions'], [])
+        self.assertEqual([item['id'] for item in results['conversations']], [self.conv.id])
+        self.assertNotIn('decision', results['meta']['timings_ms'])
+        self.assertEqual(results['total'], 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'statement timeouts are PostgreSQL-only')
+    def test_bucket_gets_the_time_left_and_skips_once_it_is_gone(self):
+        engine = EnhancedSearchEngine(use_fulltext=False, parallel=True)
+        args = {
+            'query': 'roadmap', 'organization_id': self.org.id, 'filters': {}, 'limit': 5,
+            'use_fulltext': False, 'query_tokens': [], 'date_from': None, 'date_to': None,
+        }
+        config = TYPE_CONFIG['decision']
+
+        with mock.patch.object(EnhancedSearchEngine, '_search_type') as search_type:
+            self.assertEqual(engine._search_type_in_thread('decision', config, args, time.monotonic() - 1), ([], 0.0))
+        search_type.assert_not_called()
+
+        def timeout_setting(self, item_type, config, **kwargs):
+            with connection.cursor() as cursor:
+                cursor.execute('SHOW statement_timeout')
+                return [cursor.fetchone()[0]]
+
+        with mock.patch.object(EnhancedSearchEngine, '_search_type', timeout_setting):
+            items, _elapsed = engine._search_type_in_thread('decision', config, args, time.monotonic() + 2)
+        self.assertRegex(items[0], r'^(1\d{3}|2000)ms$|^2s$')
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW statement_timeout')
+            self.assertEqual(cursor.fetchone()[0], '0')
+
+
+class AtomicFallbackTests(TestCase):
+    def setUp(self):
+        _seed(self)
+
+    def test_runs_sequentially_inside_a_transaction(self):
+        results = EnhancedSearchEngine(use_fulltext=False, parallel=True).search('roadmap', self.org.id)
+
+        self.assertFalse(results['meta']['parallel'])
+        self.assertEqual([item['id'] for item in results['conversations']], [self.conv.id])
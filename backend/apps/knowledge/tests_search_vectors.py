@@ -0,0 +1,152 @@
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.agile.models import Board, Issue, Project
+from apps.conversations.models import Conversation
+from apps.knowledge.search_engine import EnhancedSearchEngine
+from apps.knowledge.search_vectors import fulltext_enabled, prefix_query
+from apps.knowledge.tasks import refresh_dependent_search_vectors
+from apps.organizations.models import Organization, User
+
+on_postgres = skipUnless(connection.vendor == 'postgresql', 'stored search vectors need PostgreSQL')
+
+
+class PrefixQueryTests(SimpleTestCase):
+    def test_ands_prefix_terms(self):
+        query = prefix_query(['auth', 'migr'])
+        self.assertEqual(query.source_expressions[0].value, 'auth:* & migr:*')
+
+    @override_settings(SEARCH_USE_FULLTEXT=False)
+    def test_setting_disables_fulltext(self):
+        self.assertFalse(fulltext_enabled())
+
+
+class SearchVectorTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Vector Org", slug="vector-org")
+        self.user = User.objects.create_user(
+            username="vector_admin",
+            email="vector_admin@example.com",
+            password="pass1234",
+            organization=self.org,
+            role="admin",
+        )
+        self.conv = Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Authentication migration plan",
+            content="Moving login to the new identity provider.",
+        )
+        Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Office move",
+            content="Desks are being relocated next week.",
+        )
+
+    def _conversation_ids(self, engine, query):
+        results = engine.search(query, self.org.id, filters={'types': ['conversation']})
+        return [item['id'] for item in results['conversations']]
+
+    def test_icontains_path_without_fulltext(self):
+        engine = EnhancedSearchEngine(use_fulltext=False)
+        self.assertEqual(self._conversation_ids(engine, 'migration'), [self.conv.id])
+
+    @on_postgres
+    def test_prefix_match_and_rank(self):
+        Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Weekly notes",
+            content="Brief mention of the authentication migration.",
+        )
+        engine = EnhancedSearchEngine(use_fulltext=True)
+
+        ids = self._conversation_ids(engine, 'auth migr')
+
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(ids[0], self.conv.id)  # title hits are weighted 'A'
+
+    @on_postgres
+    def test_related_text_is_indexed_on_save(self):
+        project = Project.objects.create(organization=self.org, name="Payments Platform", key="PAY")
+        board = Board.objects.create(organization=self.org, project=project, name="PAY board")
+        issue = Issue.objects.create(
+            organization=self.org,
+            project=project,
+            board=board,
+            key="PAY-1",
+            title="Retry failed charges",
+            reporter=self.user,
+        )
+
+        results = EnhancedSearchEngine(use_fulltext=True).search(
+            'payments', self.org.id, filters={'types': ['issue']}
+        )
+
+        self.assertEqual([item['id'] for item in results['issues']], [issue.id])
+
+    def _issue(self, **extra):
+        project = Project.objects.create(organization=self.org, name="Payments Platform", key="PAY")
+        board = Board.objects.create(organization=self.org, project=project, name="PAY board")
+        return Issue.objects.create(
+            organization=self.org,
+            project=project,
+            board=board,
+            key="PAY-1",
+            title="Retry failed charges",
+            reporter=self.user,
+            **extra,
+        )
+
+    def _issue_ids(self, query):
+        results = EnhancedSearchEngine(use_fulltext=True).search(query, self.org.id, filters={'types': ['issue']})
+        return [item['id'] for item in results['issues']]
+
+    @on_postgres
+    def test_save_writes_vector_in_the_same_statement(self):
+        issue = self._issue()
+        issue.title = "Retry declined charges"
+
+        with CaptureQueriesContext(connection) as queries:
+            issue.save()
+
+        # Other receivers write their own tables (change feeds, ML deltas); only the row matters here.
+        writes = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "issues"')]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('"search_vector" = ', writes[0])
+        self.assertEqual(self._issue_ids('declined'), [issue.id])
+
+    @on_postgres
+    def test_partial_save_refreshes_after_update(self):
+        issue = self._issue()
+        issue.title = "Retry declined charges"
+        issue.save(update_fields=['title'])
+
+        self.assertEqual(self._issue_ids('declined'), [issue.id])
+
+    @on_postgres
+    def test_renaming_a_project_reindexes_its_issues(self):
+        issue = self._issue()
+        project = issue.project
+
+        project.name = "Billing Core"
+        with patch(
+            "apps.knowledge.tasks.refresh_dependent_search_vectors.delay",
+            wraps=refresh_dependent_search_vectors.delay,
+        ) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                project.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                project.save()
+
+        delay.assert_called_once_with("agile.Project", project.pk)
+        self.assertEqual(self._issue_ids('billing'), [issue.id])
+        self.assertEqual(self._issue_ids('payments'), [])
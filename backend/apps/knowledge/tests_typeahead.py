@@ -0,0 +1,143 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.conversations.models import Conversation, Tag
+from apps.knowledge.bm25_search import SearchService
+from apps.knowledge.search_engine import EnhancedSearchEngine
+from apps.knowledge.typeahead import SuggestionIndex, TypeaheadService
+from apps.organizations.models import Organization, SearchAnalytics, User
+
+
+class SuggestionIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = SuggestionIndex()
+        self.index.add("Roadmap review", "conversation", 1)
+        self.index.add("Q3 roadmap", "decision", 2)
+        self.index.add("Billing migration", "issue", 3, detail="PAY-7")
+
+    def labels(self, results):
+        return [item.label for item in results]
+
+    def test_substring_and_prefix_matching(self):
+        self.assertEqual(self.labels(self.index.lookup("roadmap")), ["Roadmap review", "Q3 roadmap"])
+        self.assertEqual(self.labels(self.index.lookup("admap", prefix_only=True)), [])
+        self.assertEqual(self.labels(self.index.lookup("ro", prefix_only=True)), ["Roadmap review"])
+        self.assertEqual(self.labels(self.index.lookup("migr", kinds={"decision"})), [])
+
+    def test_popularity_outranks_position(self):
+        self.index.record_query("q3 roadmap")
+        self.index.record_query("q3 roadmap")
+
+        results = self.index.lookup("roadmap", distinct=True)
+
+        self.assertEqual(self.labels(results), ["Q3 roadmap", "Roadmap review"])
+
+    def test_remove_and_relabel(self):
+        self.index.add("Roadmap retro", "conversation", 1)
+        self.index.remove("decision", 2)
+
+        self.assertEqual(self.labels(self.index.lookup("roadmap")), ["Roadmap retro"])
+
+
+class TypeaheadServiceTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Typeahead Org", slug="typeahead-org")
+        self.user = User.objects.create_user(
+            username="typeahead_admin",
+            email="typeahead_admin@example.com",
+            password="pass1234",
+            organization=self.org,
+            role="admin",
+        )
+        self.conv = Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Kubernetes upgrade plan",
+            content="Upgrade steps.",
+            ai_processed=True,
+            ai_keywords=["kubernetes ingress"],
+        )
+        Tag.objects.create(organization=self.org, name="kubernetes", usage_count=12)
+        self.service = TypeaheadService()
+
+    def test_builds_from_content_tags_keywords_and_searches(self):
+        SearchAnalytics.objects.create(
+            user=self.user, organization=self.org, query="kubernetes costs", results_count=3,
+        )
+        self.service.load(self.org.id)
+
+        labels = [item.label for item in self.service.suggest(self.org.id, "kube", distinct=True)]
+
+        self.assertEqual(labels[0], "kubernetes")  # tag usage_count
+        self.assertCountEqual(
+            labels, ["kubernetes", "Kubernetes upgrade plan", "kubernetes ingress", "kubernetes costs"],
+        )
+
+    def test_cold_lookup_queues_build_and_queries_titles(self):
+        with patch.object(self.service, "_submit_build") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                labels = [item.label for item in self.service.suggest(self.org.id, "kube", distinct=True)]
+
+        submit.assert_called_once_with(self.org.id)
+        self.assertCountEqual(labels, ["kubernetes", "Kubernetes upgrade plan"])
+        self.assertNotIn(self.org.id, self.service._entries)
+
+    def test_writes_reach_every_process_through_the_feed(self):
+        other_process = TypeaheadService()
+        self.service.load(self.org.id)
+        other_process.load(self.org.id)
+
+        self.service.instance_saved(Conversation(
+            pk=9999, organization=self.org, title="Kubernetes cost report", is_archived=False,
+        ))
+        self.conv.is_archived = True
+        self.conv.save()
+
+        for service in (self.service, other_process):
+            labels = [item.label for item in service.suggest(self.org.id, "kubernetes", kinds={"conversation"})]
+            self.assertEqual(labels, ["Kubernetes cost report"])
+
+        # Replaying the same rows again does not re-add or duplicate entries.
+        index = other_process.get(self.org.id)
+        self.assertEqual(len(index), len(other_process.get(self.org.id)))
+
+    @override_settings(SEARCH_SUGGEST_MAX_INDEXES=1)
+    def test_keeps_only_the_most_recently_used_indexes(self):
+        other_org = Organization.objects.create(name="Other Org", slug="other-org")
+        self.service.load(self.org.id)
+        self.service.load(other_org.id)
+
+        self.assertEqual(list(self.service._entries), [other_org.id])
+
+
+class SuggestionEndpointsTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Suggest Org", slug="suggest-org")
+        self.user = User.objects.create_user(
+            username="suggest_admin",
+            email="suggest_admin@example.com",
+            password="pass1234",
+            organization=self.org,
+            role="admin",
+        )
+        Conversation.objects.create(
+            organization=self.org,
+            author=self.user,
+            post_type="update",
+            title="Incident retro",
+            content="Notes.",
+        )
+        Tag.objects.create(organization=self.org, name="incident")
+
+    def test_enhanced_engine_returns_labels(self):
+        suggestions = EnhancedSearchEngine().get_suggestions("incid", self.org.id)
+        self.assertCountEqual(suggestions, ["Incident retro", "incident"])
+
+    def test_search_service_keeps_payload_shape(self):
+        suggestions = SearchService().get_suggestions("incid", self.org.id)
+        self.assertCountEqual(
+            [(item["type"], item["text"]) for item in suggestions],
+            [("tag", "#incident"), ("conversation", "Incident retro")],
+        )
@@ -0,0 +1,456 @@
+"""
+Typeahead suggestion index for RECALL search
+One in-memory n-gram index per organization over every suggestible title,
+tag and AI keyword, plus the org's most frequent recorded searches. A
+keystroke is answered from memory instead of one icontains query per model.
+"""
+import heapq
+import itertools
+import logging
+import math
+from datetime import timedelta
+
+import numpy as np
+
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .change_feed import FeedIndexCache, record_change
+
+logger = logging.getLogger(__name__)
+
+POPULAR_QUERY_DAYS = 90
+POPULAR_QUERY_LIMIT = 2000
+
+
+def normalize(text):
+    return ' '.join(str(text or '').lower().split())
+
+
+def _gram_codes(data, size):
+    """Integer codes of every ``size``-byte window of ``data`` (uint8 array)."""
+    codes = np.zeros(len(data) - size + 1, dtype=np.int64)
+    for offset in range(size):
+        codes = (codes << 8) | data[offset:len(data) - size + 1 + offset]
+    return codes
+
+
+def _label_grams(normalized, size):
+    data = np.frombuffer(normalized.encode('utf-8'), dtype=np.uint8).astype(np.int64)
+    if len(data) < size:
+        return set()
+    return set(_gram_codes(data, size).tolist())
+
+
+def _lookup_path(instance, path):
+    value = instance
+    for part in path.split('__'):
+        value = getattr(value, part, None)
+        if value is None:
+            return None
+    return value
+
+
+def _sources():
+    """kind -> (model, org lookup, label field, detail field, popularity field, filters)"""
+    from apps.conversations.models import Tag
+
+    from .search_engine import TYPE_CONFIG
+
+    sources = {}
+    for item_type, config in TYPE_CONFIG.items():
+        label_field = config.get('suggest_field', 'title')
+        # Replies suggest their conversation's title, which is already indexed.
+        if config['model'] is None or '__' in label_field:
+            continue
+        filters = {'is_archived': False} if item_type == 'conversation' else {}
+        detail_field = 'key' if item_type == 'issue' else None
+        sources[item_type] = (config['model'], config['org_filter'], label_field, detail_field, None, filters)
+    sources['tag'] = (Tag, 'organization_id', 'name', None, 'usage_count', {})
+    return sources
+
+
+class Suggestion:
+    __slots__ = ('label', 'normalized', 'kind', 'value', 'detail', 'popularity')
+
+    def __init__(self, label, kind, value, detail=None, popularity=0.0):
+        self.label = label
+        self.normalized = normalize(label)
+        self.kind = kind
+        self.value = value
+        self.detail = detail
+        self.popularity = popularity
+
+
+class _GramPostings:
+    """CSR postings: for every byte n-gram code, the sorted ids containing it."""
+
+    def __init__(self, encoded, size):
+        self.codes = np.zeros(0, dtype=np.int64)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.ids = np.zeros(0, dtype=np.int64)
+        if not encoded:
+            return
+        lengths = np.fromiter((len(item) for item in encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.int64)
+        if len(data) < size:
+            return
+        owner = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+        codes = _gram_codes(data, size)
+        # Drop windows that straddle two labels.
+        inside = owner[:len(codes)] == owner[size - 1:]
+        count = len(encoded)
+        keys = np.sort(codes[inside] * count + owner[:len(codes)][inside])
+        if not len(keys):
+            return
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        gram_codes = keys // count
+        self.ids = keys % count
+        starts = np.flatnonzero(np.concatenate(([True], gram_codes[1:] != gram_codes[:-1])))
+        self.codes = gram_codes[starts]
+        self.indptr = np.append(starts, len(keys)).astype(np.int64)
+
+    def get(self, code):
+        position = int(np.searchsorted(self.codes, code))
+        if position == len(self.codes) or self.codes[position] != code:
+            return self.ids[:0]
+        return self.ids[self.indptr[position]:self.indptr[position + 1]]
+
+
+class SuggestionIndex:
+    """Byte bigram/trigram index over normalized labels.
+
+    The bulk of the index is built in one vectorized pass into CSR postings
+    (numpy arrays); entries added afterwards go to a small delta map and
+    removals are tombstoned, until the next rebuild. A query of three or
+    more bytes intersects its trigram postings (shorter ones use bigrams),
+    then confirms the substring match, so results agree with the old
+    ``icontains`` lookups.
+
+    Entries are ranked by popularity (how often the label was searched, or a
+    tag's usage count), then by whether the label starts with the query or
+    one of its words does, then by length. When a short query matches more
+    than ``max_scored`` entries only that many are scored, taken in static
+    (popularity, length) order.
+    """
+
+    max_scored = 2000
+
+    def __init__(self, entries=(), popularity=None):
+        self.popularity = dict(popularity or {})
+        self._entries = []
+        self._by_key = {}
+        self._removed = set()
+        self._delta = {}
+        base = []
+        for entry in entries:
+            if not entry.normalized:
+                continue
+            previous = self._by_key.get((entry.kind, entry.value))
+            if previous is not None:
+                self._removed.add(previous)
+            self._by_key[(entry.kind, entry.value)] = len(self._entries)
+            self._entries.append(entry)
+            base.append(entry.normalized.encode('utf-8'))
+        self._base_size = len(self._entries)
+        self._postings = {size: _GramPostings(base, size) for size in (2, 3)}
+        # Static order used to pick which candidates to score first.
+        weights = np.fromiter(
+            (entry.popularity + self.popularity.get(entry.normalized, 0.0) for entry in self._entries),
+            dtype=np.float64, count=self._base_size,
+        )
+        lengths = np.fromiter((len(item) for item in base), dtype=np.int64, count=self._base_size)
+        self._static_rank = np.empty(self._base_size, dtype=np.int64)
+        self._static_rank[np.lexsort((lengths, -weights))] = np.arange(self._base_size)
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def add(self, label, kind, value, detail=None, popularity=0.0):
+        entry = Suggestion((label or '').strip(), kind, value, detail, popularity)
+        if not entry.normalized:
+            return
+        self.remove(kind, value)
+        entry_id = len(self._entries)
+        self._entries.append(entry)
+        self._by_key[(kind, value)] = entry_id
+        for size in (2, 3):
+            for code in _label_grams(entry.normalized, size):
+                self._delta.setdefault((size, code), set()).add(entry_id)
+
+    def remove(self, kind, value):
+        entry_id = self._by_key.pop((kind, value), None)
+        if entry_id is not None:
+            self._removed.add(entry_id)
+
+    def record_query(self, query, weight=1.0):
+        normalized = normalize(query)
+        if not normalized:
+            return
+        self.popularity[normalized] = self.popularity.get(normalized, 0.0) + weight
+        if ('query', normalized) not in self._by_key:
+            self.add(query, 'query', normalized)
+
+    def _candidates(self, normalized):
+        """(base ids as a sorted array, delta ids as a set)"""
+        data = np.frombuffer(normalized.encode('utf-8'), dtype=np.uint8).astype(np.int64)
+        size = 3 if len(data) >= 3 else 2
+        codes = np.unique(_gram_codes(data, size)).tolist()
+
+        postings = sorted((self._postings[size].get(code) for code in codes), key=len)
+        base = postings[0]
+        for posting in postings[1:]:
+            if not len(base):
+                break
+            base = np.intersect1d(base, posting, assume_unique=True)
+
+        delta = set.intersection(*[self._delta.get((size, code), set()) for code in codes])
+        return base, delta
+
+    def _score(self, entry, normalized):
+        popularity = entry.popularity + self.popularity.get(entry.normalized, 0.0)
+        if entry.normalized.startswith(normalized):
+            position = 2
+        elif f' {normalized}' in entry.normalized:
+            position = 1
+        else:
+            position = 0
+        # On ties, a real title beats the recorded search that spells it.
+        return (math.log1p(popularity), position, entry.kind != 'query', -len(entry.normalized))
+
+    def lookup(self, query, limit=10, kinds=None, prefix_only=False, distinct=False):
+        normalized = normalize(query)
+        if len(normalized) < 2 or limit <= 0:
+            return []
+
+        base, delta = self._candidates(normalized)
+        if len(base) > self.max_scored:
+            base = base[np.argsort(self._static_rank[base], kind='stable')]
+        candidates = base.tolist() + sorted(delta)
+
+        scored = []
+        for entry_id in candidates:
+            if entry_id in self._removed:
+                continue
+            entry = self._entries[entry_id]
+            if kinds is not None and entry.kind not in kinds:
+                continue
+            if prefix_only:
+                matched = entry.normalized.startswith(normalized)
+            else:
+                matched = normalized in entry.normalized
+            if matched:
+                scored.append((self._score(entry, normalized), entry_id, entry))
+                if len(scored) >= self.max_scored:
+                    break
+
+        # Duplicate labels may fill the top ``limit``, so distinct lookups rank everything.
+        ranked = sorted(scored, reverse=True) if distinct else heapq.nlargest(limit, scored)
+        results = []
+        seen = set()
+        for _score, _entry_id, entry in ranked:
+            if distinct:
+                if entry.normalized in seen:
+                    continue
+                seen.add(entry.normalized)
+            results.append(entry)
+            if len(results) >= limit:
+                break
+        return results
+
+
+class TypeaheadService(FeedIndexCache):
+    """Per-process LRU of SuggestionIndex objects, one per organization.
+
+    Saves and deletes append a patch to the ``typeahead`` change feed in
+    their own transaction, and every process replays new patches on its next
+    lookup, so no shared cache is needed. Indexes are built in the
+    background: until an organization's index is ready, lookups run a few
+    bounded title queries instead. Indexes are rebuilt after
+    SEARCH_SUGGEST_MAX_AGE seconds so popularity stays current.
+    """
+
+    feed = 'typeahead'
+
+    @property
+    def max_age(self):
+        return getattr(settings, 'SEARCH_SUGGEST_MAX_AGE', 300)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'SEARCH_SUGGEST_MAX_INDEXES', 64)
+
+    def _popular_queries(self, org_id):
+        from apps.knowledge.models import SearchQuery
+        from apps.organizations.models import SearchAnalytics
+
+        since = timezone.now() - timedelta(days=POPULAR_QUERY_DAYS)
+        counts = {}
+        labels = {}
+        recorded = (
+            SearchAnalytics.objects.filter(organization_id=org_id, searched_at__gte=since, results_count__gt=0)
+            .values_list('query')
+            .annotate(total=Count('id'))
+            .order_by('-total')[:POPULAR_QUERY_LIMIT],
+            SearchQuery.objects.filter(organization_id=org_id, created_at__gte=since, results_count__gt=0)
+            .values_list('query_text')
+            .annotate(total=Count('id'))
+            .order_by('-total')[:POPULAR_QUERY_LIMIT],
+        )
+        for rows in recorded:
+            for text, total in rows:
+                normalized = normalize(text)
+                if not normalized:
+                    continue
+                counts[normalized] = counts.get(normalized, 0) + total
+                labels.setdefault(normalized, text.strip())
+        return counts, labels
+
+    def _source_entries(self, org_id, sources, **lookups):
+        for kind, (model, org_lookup, label_field, detail_field, popularity_field, filters) in sources.items():
+            rows = model.objects.filter(
+                **{org_lookup: org_id},
+                **filters,
+                **{f'{label_field}__{lookup}': value for lookup, value in lookups.items()},
+            ).values_list('pk', label_field, detail_field or 'pk', popularity_field or 'pk')
+            for pk, label, detail, popularity in rows.iterator(chunk_size=2000):
+                yield Suggestion(
+                    (label or '').strip(),
+                    kind,
+                    pk,
+                    detail if detail_field else None,
+                    float(popularity or 0) if popularity_field else 0.0,
+                )
+
+    def build(self, org_id):
+        from apps.conversations.models import Conversation
+
+        counts, labels = self._popular_queries(org_id)
+        entries = list(self._source_entries(org_id, _sources()))
+
+        keywords = {}
+        keyword_lists = Conversation.objects.filter(
+            organization_id=org_id, ai_processed=True, is_archived=False,
+        ).values_list('ai_keywords', flat=True)
+        for keyword_list in keyword_lists.iterator(chunk_size=2000):
+            for keyword in keyword_list or []:
+                if isinstance(keyword, str):
+                    keywords.setdefault(normalize(keyword), keyword.strip())
+        entries.extend(Suggestion(label, 'keyword', normalized) for normalized, label in keywords.items())
+        entries.extend(Suggestion(label, 'query', normalized) for normalized, label in labels.items())
+        return SuggestionIndex(entries, counts)
+
+    def _fallback_index(self, org_id, query, limit, kinds, prefix_only):
+        """Titles and tags matching ``query``, fetched directly while the index builds."""
+        sources = {kind: source for kind, source in _sources().items() if kinds is None or kind in kinds}
+        lookup = 'istartswith' if prefix_only else 'icontains'
+        entries = []
+        for kind, source in sources.items():
+            entries.extend(itertools.islice(
+                self._source_entries(org_id, {kind: source}, **{lookup: query.strip()}), limit,
+            ))
+        return SuggestionIndex(entries)
+
+    def suggest(self, org_id, query, limit=10, kinds=None, prefix_only=False, distinct=False):
+        index = self.get(org_id)
+        if index is None:
+            if len(normalize(query)) < 2 or limit <= 0:
+                return []
+            index = self._fallback_index(org_id, query, limit, kinds, prefix_only)
+        return index.lookup(
+            query, limit=limit, kinds=kinds, prefix_only=prefix_only, distinct=distinct,
+        )
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def apply_change(self, index, payload):
+        kind, value = payload['kind'], payload['value']
+        if payload.get('removed'):
+            index.remove(kind, value)
+            return
+        index.add(payload['label'], kind, value, payload.get('detail'), payload.get('popularity', 0.0))
+        for keyword in payload.get('keywords', ()):
+            index.add(keyword, 'keyword', normalize(keyword))
+
+    def _source_for(self, instance):
+        for kind, source in _sources().items():
+            if type(instance) is source[0]:
+                return kind, source
+        return None, None
+
+    def instance_saved(self, instance):
+        kind, source = self._source_for(instance)
+        if not kind:
+            return
+        _model, org_lookup, label_field, detail_field, popularity_field, filters = source
+        org_id = _lookup_path(instance, org_lookup)
+        payload = {'kind': kind, 'value': instance.pk}
+        if any(getattr(instance, field, None) != value for field, value in filters.items()):
+            payload['removed'] = True
+        else:
+            detail = getattr(instance, detail_field, None) if detail_field else None
+            payload.update({
+                'label': getattr(instance, label_field, '') or '',
+                'detail': None if detail is None else str(detail),
+                'popularity': float(getattr(instance, popularity_field, 0) or 0) if popularity_field else 0.0,
+            })
+            if kind == 'conversation':
+                payload['keywords'] = [
+                    keyword for keyword in getattr(instance, 'ai_keywords', None) or []
+                    if isinstance(keyword, str)
+                ]
+        record_change(self.feed, org_id, f'{kind}:{instance.pk}', payload)
+
+    def instance_deleted(self, instance):
+        kind, source = self._source_for(instance)
+        if not kind:
+            return
+        org_id = _lookup_path(instance, source[1])
+        record_change(
+            self.feed, org_id, f'{kind}:{instance.pk}', {'kind': kind, 'value': instance.pk, 'removed': True},
+        )
+
+    def record_query(self, org_id, query):
+        """Count a search towards popularity in this process's loaded index."""
+        with self._lock:
+            loaded = self._entries.get(org_id)
+            if loaded:
+                loaded.index.record_query(query)
+
+
+typeahead = TypeaheadService()
+
+
+def _on_source_saved(sender, instance, **kwargs):
+    try:
+        typeahead.instance_saved(instance)
+    except Exception:
+        logger.exception("Failed to update typeahead index for %s #%s", sender.__name__, instance.pk)
+
+
+def _on_source_deleted(sender, instance, **kwargs):
+    try:
+        typeahead.instance_deleted(instance)
+    except Exception:
+        logger.exception("Failed to remove %s #%s from typeahead index", sender.__name__, instance.pk)
+
+
+def _on_search_recorded(sender, instance, created, **kwargs):
+    if created and getattr(instance, 'results_count', 0):
+        query = getattr(instance, 'query', None) or getattr(instance, 'query_text', '')
+        typeahead.record_query(instance.organization_id, query)
+
+
+def connect_signals():
+    from apps.knowledge.models import SearchQuery
+    from apps.organizations.models import SearchAnalytics
+
+    for kind, source in _sources().items():
+        post_save.connect(_on_source_saved, sender=source[0], dispatch_uid=f'typeahead_save_{kind}')
+        post_delete.connect(_on_source_deleted, sender=source[0], dispatch_uid=f'typeahead_delete_{kind}')
+    for model in (SearchAnalytics, SearchQuery):
+        post_save.connect(_on_search_recorded, sender=model, dispatch_uid=f'typeahead_record_{model.__name__}')
@@ -1,76 +1,106 @@
 import logging
 import re
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from html import escape
 from urllib.parse import urljoin
 
-import requests
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+
+from .email_transports import SendResult, get_transport
 
 logger = logging.getLogger(__name__)
 
 
-def send_email(to_email, subject, html_content, text_content=None, reply_to=None):
-    if not text_content:
-        text_content = html_to_text(html_content)
-    support_email = reply_to or get_support_email()
-    entity_ref_id = f"knoledgr-{uuid.uuid4()}"
-    headers = {
-        "X-Entity-Ref-ID": entity_ref_id,
+_send_pool = None
+_send_pool_lock = threading.Lock()
+
+
+def _email_headers(support_email):
+    return {
+        "X-Entity-Ref-ID": f"knoledgr-{uuid.uuid4()}",
         "X-Auto-Response-Suppress": "OOF, AutoReply",
         "List-Unsubscribe": f"<mailto:{support_email}?subject=unsubscribe>",
     }
 
-    # Prefer Resend when configured; otherwise fallback to Django email backend.
-    if not settings.RESEND_API_KEY:
-        try:
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[to_email],
-                reply_to=[support_email] if support_email else None,
-                headers=headers,
-            )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send(fail_silently=False)
-            logger.info("Sent email via Django backend to %s (Resend key not configured)", to_email)
-            return True
-        except Exception:
-            logger.exception("Fallback Django email send failed for %s", to_email)
-            return False
-
-    payload = {
+
+def build_email_message(to_email, subject, html_content, text_content=None, reply_to=None):
+    """Provider payload for one email, as accepted by every transport."""
+    support_email = reply_to or get_support_email()
+    message = {
         "from": settings.DEFAULT_FROM_EMAIL,
         "to": [to_email],
         "subject": subject,
         "html": html_content,
-        "text": text_content,
-        "headers": headers,
+        "text": text_content or html_to_text(html_content),
+        "headers": _email_headers(support_email),
     }
     if support_email:
-        payload["reply_to"] = support_email
+        message["reply_to"] = support_email
+    return message
 
+
+def send_email(to_email, subject, html_content, text_content=None, reply_to=None):
+    message = build_email_message(to_email, subject, html_content, text_content, reply_to)
     try:
-        response = requests.post(
-            "https://api.resend.com/emails",
-            headers={
-                "Authorization": f"Bearer {settings.RESEND_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=20,
-        )
-        if not response.ok:
-            logger.error("Resend email failed (%s): %s", response.status_code, response.text)
-            return False
-        return True
+        return get_transport().send(message).ok
     except Exception:
         logger.exception("Unexpected email error for %s", to_email)
         return False
 
 
+def send_email_batch(messages, reply_to=None):
+    """
+    Send several emails through the transport's batch path.
+
+    `messages` are dicts with to_email, subject, html_content and optional
+    text_content. Returns one SendResult(ok, message_id, error, retryable)
+    per message; Resend sends up to 100 per request, and a rejected batch is
+    resent one message at a time.
+    """
+    payloads = [
+        build_email_message(
+            message["to_email"], message["subject"], message["html_content"],
+            message.get("text_content"), reply_to,
+        )
+        for message in messages
+    ]
+    try:
+        return get_transport().send_batch(payloads)
+    except Exception as exc:
+        logger.exception("Email batch send failed")
+        return [SendResult(False, error=str(exc), retryable=True)] * len(messages)
+
+
+def _executor():
+    global _send_pool
+    with _send_pool_lock:
+        if _send_pool is None:
+            _send_pool = ThreadPoolExecutor(
+                max_workers=settings.EMAIL_SEND_WORKERS, thread_name_prefix="email-send",
+            )
+        return _send_pool
+
+
+def send_email_async(to_email, subject, html_content, text_content=None, reply_to=None):
+    """Hand an email to the background send pool; returns a Future resolving to send_email's result."""
+    return _executor().submit(send_email, to_email, subject, html_content, text_content, reply_to)
+
+
+def send_emails(messages, reply_to=None):
+    """
+    Send many emails concurrently, in transport-sized batches over the pooled
+    connections. Returns one SendResult per message, in order.
+    """
+    size = max(1, get_transport().batch_limit)
+    chunks = [messages[start:start + size] for start in range(0, len(messages), size)]
+    results = []
+    for chunk_results in _executor().map(lambda chunk: send_email_batch(chunk, reply_to), chunks):
+        results.extend(chunk_results)
+    return results
+
+
 def send_notification_email(user, notification):
     app_name = "Knoledgr"
     link = notification.link or "/notifications"
@@ -373,6 +403,33 @@ def render_email_template(preheader, title, body_html, cta_label, cta_url, reaso
 """
 
 
+_PREHEADER_SLOT = "\x00preheader\x00"
+_BODY_SLOT = "\x00body\x00"
+
+
+class EmailLayout:
+    """
+    render_email_template() rendered once for a batch of emails that share a
+    title, CTA and variant; only the preheader and body vary per recipient.
+    """
+
+    def __init__(self, title, cta_label, cta_url, reason_text="", variant="default"):
+        shell = render_email_template(
+            preheader=_PREHEADER_SLOT,
+            title=title,
+            body_html=_BODY_SLOT,
+            cta_label=cta_label,
+            cta_url=cta_url,
+            reason_text=reason_text,
+            variant=variant,
+        )
+        self._head, rest = shell.split(_PREHEADER_SLOT)
+        self._middle, self._tail = rest.split(_BODY_SLOT)
+
+    def render(self, preheader, body_html):
+        return f"{self._head}{escape(preheader or 'Knoledgr')}{self._middle}{body_html}{self._tail}"
+
+
 def build_text_email(title, body_lines, cta_label, cta_url, reason_text):
     lines = [
         f"Knoledgr - {title}",
@@ -0,0 +1,84 @@
+"""
+Local stand-in for the Resend HTTP API.
+
+Accepts POST /emails and /emails/batch over plain HTTP with keep-alive,
+answers like Resend and only counts what it receives, so the send path can
+be exercised and benchmarked without network access or a provider account.
+Like Resend it rejects with 422 any request addressed to an invalid
+recipient (here: one containing "invalid"), and under /busy it answers 429.
+"""
+import json
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; don't let Nagle hold the body back.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.record(connections=1)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"null")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        messages = payload if isinstance(payload, list) else [payload]
+        if self.path.startswith("/busy/"):
+            self._reply(429, {"message": "Too many requests"})
+        elif any("invalid" in address for message in messages for address in (message or {}).get("to") or []):
+            self._reply(422, {"message": "Invalid `to` field"})
+        elif self.path == "/emails":
+            self.server.record(requests=1, messages=1)
+            self._reply(200, {"id": str(uuid.uuid4())})
+        elif self.path == "/emails/batch" and isinstance(payload, list):
+            self.server.record(requests=1, messages=len(payload))
+            self._reply(200, {"data": [{"id": str(uuid.uuid4())} for _ in payload]})
+        else:
+            self._reply(404, {"message": "Not found"})
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class EmailSinkServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0):
+        super().__init__((host, port), _SinkHandler)
+        self.latency = latency_ms / 1000.0
+        self.stats = {"connections": 0, "requests": 0, "messages": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def start(self):
+        """Serve from a daemon thread; returns self for use in tests and benchmarks."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,203 @@
+"""
+Outbound email transports.
+
+Messages are Resend-shaped payload dicts (from, to, subject, html, text,
+headers, reply_to). get_transport() returns the transport configured by
+EMAIL_TRANSPORT; with no BACKEND set it is Resend when RESEND_API_KEY is
+present and Django's EMAIL_BACKEND otherwise.
+"""
+import logging
+import threading
+import uuid
+from typing import NamedTuple
+
+import requests
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+_transport = None
+_transport_config = None
+_transport_lock = threading.Lock()
+
+
+class SendResult(NamedTuple):
+    ok: bool
+    message_id: str = ""
+    error: str = ""
+    # The failure was the provider's or the network's (429, 5xx, timeout),
+    # not the message's, so the same message can be sent again later.
+    retryable: bool = False
+
+
+def _retryable_status(status):
+    return status is None or status == 429 or status >= 500
+
+
+class BaseTransport:
+    # Largest number of messages the provider accepts in one request.
+    batch_limit = 1
+
+    def send(self, message):
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        return [self.send(message) for message in messages]
+
+    def close(self):
+        pass
+
+
+class ResendTransport(BaseTransport):
+    """
+    Resend HTTP API over one shared session.
+
+    The session's connection pool is thread-safe, so every sender thread
+    reuses the same keep-alive connections instead of opening a TLS
+    connection per email. `base_url` can point at a local sink.
+    """
+
+    batch_limit = 100
+
+    def __init__(self, api_key=None, base_url="https://api.resend.com", pool_size=None, timeout=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (
+            settings.EMAIL_CONNECT_TIMEOUT_SECONDS,
+            timeout or settings.EMAIL_TIMEOUT_SECONDS,
+        )
+        pool_size = pool_size or settings.EMAIL_HTTP_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key or settings.RESEND_API_KEY}",
+            "Content-Type": "application/json",
+        })
+
+    def _post(self, path, payload):
+        """(body, error, status); body is None when the request failed."""
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        except requests.RequestException as exc:
+            logger.exception("Resend request to %s failed", path)
+            return None, str(exc), None
+        if not response.ok:
+            logger.error("Resend email failed (%s): %s", response.status_code, response.text)
+            return None, f"Provider returned {response.status_code}", response.status_code
+        try:
+            return response.json(), "", response.status_code
+        except ValueError:
+            return {}, "", response.status_code
+
+    def send(self, message):
+        body, error, status = self._post("/emails", message)
+        if body is None:
+            return SendResult(False, error=error, retryable=_retryable_status(status))
+        return SendResult(True, body.get("id", ""))
+
+    def send_batch(self, messages):
+        results = []
+        for start in range(0, len(messages), self.batch_limit):
+            chunk = messages[start:start + self.batch_limit]
+            # Resend accepts or rejects a batch as a whole.
+            body, error, status = self._post("/emails/batch", chunk)
+            if body is None:
+                if _retryable_status(status) or status in (401, 403) or len(chunk) == 1:
+                    results.extend([SendResult(False, error=error, retryable=_retryable_status(status))] * len(chunk))
+                else:
+                    # A message in the batch was rejected; send one by one so
+                    # only the bad ones fail.
+                    results.extend(self.send(message) for message in chunk)
+                continue
+            ids = [item.get("id", "") for item in (body.get("data") or [])]
+            ids += [""] * (len(chunk) - len(ids))
+            results.extend(SendResult(True, message_id) for message_id in ids[:len(chunk)])
+        return results
+
+    def close(self):
+        self.session.close()
+
+
+class DjangoTransport(BaseTransport):
+    """Django's EMAIL_BACKEND; a batch goes out over a single backend connection."""
+
+    def __init__(self, backend=None, **options):
+        self.backend = backend
+        self.options = options
+
+    def _build(self, message, connection):
+        email = EmailMultiAlternatives(
+            subject=message["subject"],
+            body=message["text"],
+            from_email=message["from"],
+            to=message["to"],
+            reply_to=[message["reply_to"]] if message.get("reply_to") else None,
+            headers=message.get("headers"),
+            connection=connection,
+        )
+        email.attach_alternative(message["html"], "text/html")
+        return email
+
+    def send(self, message):
+        return self.send_batch([message])[0]
+
+    def send_batch(self, messages):
+        results = []
+        connection = get_connection(self.backend, **self.options)
+        try:
+            connection.open()
+            for message in messages:
+                try:
+                    self._build(message, connection).send(fail_silently=False)
+                    logger.info("Sent email via Django backend to %s (Resend key not configured)", message["to"][0])
+                    results.append(SendResult(True))
+                except Exception as exc:
+                    logger.exception("Fallback Django email send failed for %s", message["to"][0])
+                    results.append(SendResult(False, error=str(exc)))
+        finally:
+            connection.close()
+        return results
+
+
+class InMemoryTransport(BaseTransport):
+    """Accepts and keeps every message in process, e.g. for offline benchmarks and tests."""
+
+    batch_limit = 100
+
+    def __init__(self):
+        self.outbox = []
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        with self.lock:
+            self.outbox.append(message)
+        return SendResult(True, f"memory-{uuid.uuid4()}")
+
+    def send_batch(self, messages):
+        return [self.send(message) for message in messages]
+
+
+def get_transport():
+    """Shared transport configured by EMAIL_TRANSPORT, rebuilt when the settings change."""
+    global _transport, _transport_config
+    transport_config = (
+        repr(getattr(settings, "EMAIL_TRANSPORT", None) or {}),
+        settings.RESEND_API_KEY,
+    )
+    with _transport_lock:
+        if _transport is None or _transport_config != transport_config:
+            if _transport is not None:
+                _transport.close()
+            backend = getattr(settings, "EMAIL_TRANSPORT", None) or {}
+            if backend.get("BACKEND"):
+                _transport = import_string(backend["BACKEND"])(**backend.get("OPTIONS", {}))
+            elif settings.RESEND_API_KEY:
+                _transport = ResendTransport()
+            else:
+                _transport = DjangoTransport()
+            _transport_config = transport_config
+        return _transport
@@ -2,19 +2,18 @@
 Notification helpers for creating notifications on events
 """
 from .models import Notification
+from .utils import create_notifications
 
 
 def notify_mentioned_users(conversation, mentioned_user_ids):
     """Create mention notifications"""
-    for user_id in mentioned_user_ids:
-        if user_id != conversation.author_id:
-            Notification.objects.create(
-                user_id=user_id,
-                notification_type='mention',
-                title=f"Mentioned by {conversation.author.get_full_name()}",
-                message=conversation.title,
-                link=f'/conversations/{conversation.id}',
-            )
+    create_notifications(
+        [user_id for user_id in mentioned_user_ids if user_id != conversation.author_id],
+        notification_type='mention',
+        title=f"Mentioned by {conversation.author.get_full_name()}",
+        message=conversation.title,
+        link=f'/conversations/{conversation.id}',
+    )
 
 
 def notify_conversation_reply(reply, conversation):
@@ -31,34 +30,30 @@ def notify_conversation_reply(reply, conversation):
 
 def notify_decision_created(decision):
     """Create notification for new decision"""
-    from apps.organizations.models import User
-    
     # Notify stakeholders
-    for stakeholder_id in decision.stakeholders or []:
-        if stakeholder_id != decision.decision_maker_id:
-            Notification.objects.create(
-                user_id=stakeholder_id,
-                notification_type='decision',
-                title=f"New decision: {decision.title}",
-                message=decision.description[:100],
-                link=f'/decisions/{decision.id}',
-            )
+    create_notifications(
+        [
+            stakeholder_id for stakeholder_id in decision.stakeholders or []
+            if stakeholder_id != decision.decision_maker_id
+        ],
+        notification_type='decision',
+        title=f"New decision: {decision.title}",
+        message=decision.description[:100],
+        link=f'/decisions/{decision.id}',
+    )
 
 
 def notify_decision_status_change(decision, old_status):
     """Create notification when decision status changes"""
     if old_status != decision.status:
-        from apps.organizations.models import User
-        
         # Notify stakeholders
-        for stakeholder_id in decision.stakeholders or []:
-            Notification.objects.create(
-                user_id=stakeholder_id,
-                notification_type='decision',
-                title=f"Decision status: {decision.status}",
-                message=f"{decision.title} is now {decision.status}",
-                link=f'/decisions/{decision.id}',
-            )
+        create_notifications(
+            decision.stakeholders or [],
+            notification_type='decision',
+            title=f"Decision status: {decision.status}",
+            message=f"{decision.title} is now {decision.status}",
+            link=f'/decisions/{decision.id}',
+        )
 
 
 def notify_reaction(conversation, user, reaction_type):
@@ -78,15 +73,13 @@ def notify_sprint_started(sprint):
     from apps.organizations.models import User
     
     # Notify all team members
-    team_members = User.objects.filter(organization_id=sprint.organization_id)
-    for member in team_members:
-        Notification.objects.create(
-            user_id=member.id,
-            notification_type='system',
-            title=f"Sprint started: {sprint.name}",
-            message=sprint.goal[:100],
-            link=f'/sprint/{sprint.id}',
-        )
+    create_notifications(
+        User.objects.filter(organization_id=sprint.organization_id).values_list('id', flat=True),
+        notification_type='system',
+        title=f"Sprint started: {sprint.name}",
+        message=sprint.goal[:100],
+        link=f'/sprint/{sprint.id}',
+    )
 
 
 def notify_blocker_created(blocker):
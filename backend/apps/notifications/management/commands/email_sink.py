@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.email_service import build_email_message
+from apps.notifications.email_sink import EmailSinkServer
+from apps.notifications.email_transports import ResendTransport
+
+
+class Command(BaseCommand):
+    help = "Run a local fake of the Resend API, or benchmark the email transport against it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8025)
+        parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every response")
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            default=0,
+            metavar="COUNT",
+            help="Send COUNT emails through ResendTransport to an in-process sink and report throughput",
+        )
+        parser.add_argument("--batch", action="store_true", help="Benchmark the batch endpoint instead of single sends")
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent senders during the benchmark")
+
+    def handle(self, *args, **options):
+        if options["benchmark"]:
+            self._benchmark(options)
+            return
+
+        sink = EmailSinkServer(options["host"], options["port"], options["latency_ms"])
+        self.stdout.write(
+            f"Email sink listening on {sink.url}. Set EMAIL_TRANSPORT_BACKEND="
+            "apps.notifications.email_transports.ResendTransport and "
+            f"EMAIL_TRANSPORT_OPTIONS='{{\"base_url\": \"{sink.url}\"}}' to send to it."
+        )
+        try:
+            sink.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.server_close()
+            self.stdout.write(f"Received {sink.stats}")
+
+    def _benchmark(self, options):
+        from concurrent.futures import ThreadPoolExecutor
+
+        count = options["benchmark"]
+        sink = EmailSinkServer(options["host"], 0, options["latency_ms"]).start()
+        transport = ResendTransport(api_key="sink", base_url=sink.url, pool_size=options["workers"])
+        messages = [
+            build_email_message(f"bench-{number}@example.com", "Benchmark", "<p>Benchmark</p>")
+            for number in range(count)
+        ]
+        if options["batch"]:
+            size = transport.batch_limit
+            jobs = [messages[start:start + size] for start in range(0, count, size)]
+            send = transport.send_batch
+        else:
+            jobs = messages
+            send = transport.send
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            list(pool.map(send, jobs))
+        elapsed = time.perf_counter() - started
+        transport.close()
+        sink.stop()
+
+        self.stdout.write(
+            f"Sent {sink.stats['messages']} emails in {sink.stats['requests']} requests over "
+            f"{sink.stats['connections']} connections in {elapsed:.2f}s "
+            f"({sink.stats['messages'] / elapsed:.0f} emails/s)"
+        )
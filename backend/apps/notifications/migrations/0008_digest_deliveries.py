@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0007_rename_email_campa_organiz_91b61c_idx_email_campa_organiz_b85cee_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(max_length=20)),
+                ('window_end', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_deliveries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notification_digest_deliveries',
+                'indexes': [models.Index(fields=['window_end'], name='notificatio_window__049132_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='digestdelivery',
+            constraint=models.UniqueConstraint(fields=('user', 'frequency', 'window_end'), name='digest_delivery_unique'),
+        ),
+    ]
@@ -117,3 +117,23 @@ class EmailCampaignRecipient(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['campaign', 'email'], name='campaign_email_unique'),
         ]
+
+
+class DigestDelivery(models.Model):
+    """A digest sent to one user for the window ending at ``window_end``.
+
+    A redelivered or retried digest chunk skips users that already have a row.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='digest_deliveries')
+    frequency = models.CharField(max_length=20)
+    window_end = models.DateTimeField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_digest_deliveries'
+        indexes = [
+            models.Index(fields=['window_end']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'frequency', 'window_end'], name='digest_delivery_unique'),
+        ]
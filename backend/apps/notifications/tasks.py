@@ -1,17 +1,31 @@
-from celery import shared_task
-from django.utils import timezone
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from html import escape
-from .models import Notification, EmailCampaign, EmailCampaignRecipient
+
+from celery import group, shared_task
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import DigestDelivery, Notification, EmailCampaign, EmailCampaignRecipient
 from .email_service import (
     send_notification_email as send_notification_email_via_resend,
     send_email,
+    send_email_batch,
     build_frontend_url,
     render_email_template,
     build_text_email,
+    EmailLayout,
 )
+from .email_transports import SendResult, get_transport
 from apps.organizations.models import User
 
+logger = logging.getLogger(__name__)
+
 
 def _notification_allowed_for_user(notification, user):
     if notification.notification_type == 'mention' and not getattr(user, 'mention_notifications', True):
@@ -28,6 +42,25 @@ def _notification_allowed_for_user(notification, user):
         return False
     return True
 
+def _wants_immediate_email(notification, user):
+    if not user.email:
+        return False
+
+    # Check if user has email notifications enabled
+    if not user.email_notifications:
+        return False
+
+    digest_frequency = getattr(user, 'digest_frequency', 'daily')
+    if digest_frequency == 'never':
+        return False
+
+    # Realtime sends immediately. Hourly/daily/weekly are sent by digest tasks.
+    if digest_frequency not in {'realtime', ''}:
+        return False
+
+    return _notification_allowed_for_user(notification, user)
+
+
 @shared_task
 def send_notification_email(notification_id):
     """Send email for a notification"""
@@ -35,22 +68,7 @@ def send_notification_email(notification_id):
         notification = Notification.objects.get(id=notification_id)
         user = notification.user
 
-        if not user.email:
-            return
-        
-        # Check if user has email notifications enabled
-        if not user.email_notifications:
-            return
-
-        digest_frequency = getattr(user, 'digest_frequency', 'daily')
-        if digest_frequency == 'never':
-            return
-
-        # Realtime sends immediately. Hourly/daily/weekly are sent by digest tasks.
-        if digest_frequency not in {'realtime', ''}:
-            return
-
-        if not _notification_allowed_for_user(notification, user):
+        if not _wants_immediate_email(notification, user):
             return
 
         send_notification_email_via_resend(user, notification)
@@ -61,35 +79,53 @@ def send_notification_email(notification_id):
 
 
 @shared_task
-def send_notification_digest(user_id, frequency='daily'):
-    try:
-        user = User.objects.get(id=user_id)
-    except User.DoesNotExist:
-        return
+def send_notification_emails(notification_ids):
+    """Send emails for a batch of notifications, loading them and their users in one query."""
+    notifications = Notification.objects.filter(
+        id__in=notification_ids,
+        user__email_notifications=True,
+        user__digest_frequency__in=['realtime', ''],
+    ).select_related('user')
+    for notification in notifications:
+        if not _wants_immediate_email(notification, notification.user):
+            continue
+        try:
+            send_notification_email_via_resend(notification.user, notification)
+        except Exception as e:
+            print(f"Failed to send email: {e}")
 
-    if not user.email or not getattr(user, 'email_notifications', True):
-        return
 
-    digest_frequency = getattr(user, 'digest_frequency', 'daily')
-    if digest_frequency != frequency:
-        return
+DIGEST_WINDOWS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+    'weekly': timedelta(days=7),
+}
+DIGEST_REASON = 'You received this email because digest notifications are enabled in your Knoledgr account.'
 
-    now = timezone.now()
-    window = {
-        'hourly': timedelta(hours=1),
-        'daily': timedelta(days=1),
-        'weekly': timedelta(days=7),
-    }.get(frequency, timedelta(days=1))
 
-    notifications = Notification.objects.filter(
-        user=user,
-        created_at__gte=now - window,
-        created_at__lte=now,
-    ).order_by('-created_at')
+def _digest_recipients(frequency):
+    return User.objects.filter(
+        is_active=True,
+        email_notifications=True,
+        digest_frequency=frequency,
+    ).exclude(email='')
+
+
+def _digest_layout(frequency):
+    return EmailLayout(
+        title=f"Your {frequency.capitalize()} digest",
+        cta_label='Open notifications',
+        cta_url=build_frontend_url('/notifications'),
+        reason_text=DIGEST_REASON,
+        variant='digest',
+    )
 
+
+def _build_digest(user, notifications, frequency, layout):
+    """Return (subject, html, text) for a user's digest, or None when there is nothing to send."""
     filtered = [n for n in notifications if _notification_allowed_for_user(n, user)]
     if not filtered:
-        return
+        return None
 
     try:
         from apps.organizations.automation_engine import SmartNotificationEngine
@@ -141,54 +177,155 @@ def send_notification_digest(user_id, frequency='daily'):
         + "</ul>"
     )
 
-    html = render_email_template(
-        preheader=f"{len(filtered)} updates in your {frequency} digest",
-        title=f"Your {frequency.capitalize()} digest",
-        body_html=html_body,
-        cta_label='Open notifications',
-        cta_url=digest_url,
-        reason_text='You received this email because digest notifications are enabled in your Knoledgr account.',
-        variant='digest',
-    )
+    html = layout.render(f"{len(filtered)} updates in your {frequency} digest", html_body)
     text = build_text_email(
         title=f"{frequency.capitalize()} digest",
         body_lines=text_lines,
         cta_label='Open notifications',
         cta_url=digest_url,
-        reason_text='You received this email because digest notifications are enabled in your Knoledgr account.',
+        reason_text=DIGEST_REASON,
     )
+    return subject, html, text
+
+
+@shared_task
+def send_notification_digest(user_id, frequency='daily'):
+    try:
+        user = User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        return
+
+    if not user.email or not getattr(user, 'email_notifications', True):
+        return
+
+    digest_frequency = getattr(user, 'digest_frequency', 'daily')
+    if digest_frequency != frequency:
+        return
+
+    now = timezone.now()
+    window = DIGEST_WINDOWS.get(frequency, timedelta(days=1))
+
+    notifications = Notification.objects.filter(
+        user=user,
+        created_at__gte=now - window,
+        created_at__lte=now,
+    ).order_by('-created_at')
 
+    message = _build_digest(user, notifications, frequency, _digest_layout(frequency))
+    if message is None:
+        return
+    subject, html, text = message
     send_email(user.email, subject, html, text_content=text)
 
 
+# Delivery rows only need to outlive redeliveries and retries of their run.
+DIGEST_DELIVERY_RETENTION = timedelta(days=30)
+
+
+def _send_digest_batch(messages):
+    """Send prepared digests concurrently; return the ids of users whose send failed."""
+    def send(item):
+        user, (subject, html, text) = item
+        try:
+            return send_email(user.email, subject, html, text_content=text)
+        except Exception:
+            logger.exception("Digest send failed for user %s", user.id)
+            return False
+
+    workers = max(1, min(settings.DIGEST_SEND_CONCURRENCY, len(messages)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='digest-send') as pool:
+        results = list(pool.map(send, messages))
+    return [user.id for (user, _), ok in zip(messages, results) if not ok]
+
+
+@shared_task(acks_late=True)
+def send_digest_chunk(user_ids, frequency, until, attempt=1):
+    """
+    Send the digests for one shard of users.
+
+    Users and their notifications for the window ending at `until` are loaded
+    in two queries and the email layout is rendered once. Users with a
+    DigestDelivery row for this window are skipped, so a redelivered chunk
+    does not email anyone twice; failed sends are retried as a smaller chunk.
+    """
+    window_end = parse_datetime(until)
+    window = DIGEST_WINDOWS.get(frequency, timedelta(days=1))
+    already_sent = DigestDelivery.objects.filter(user=OuterRef('pk'), frequency=frequency, window_end=window_end)
+    users = list(_digest_recipients(frequency).filter(id__in=user_ids).exclude(Exists(already_sent)))
+    if not users:
+        return {'sent': 0, 'failed': 0}
+
+    notifications_by_user = defaultdict(list)
+    for notification in Notification.objects.filter(
+        user_id__in=[user.id for user in users],
+        created_at__gte=window_end - window,
+        created_at__lte=window_end,
+    ).order_by('user_id', '-created_at'):
+        notifications_by_user[notification.user_id].append(notification)
+
+    layout = _digest_layout(frequency)
+    messages = []
+    for user in users:
+        message = _build_digest(user, notifications_by_user.get(user.id, []), frequency, layout)
+        if message is not None:
+            messages.append((user, message))
+    if not messages:
+        return {'sent': 0, 'failed': 0}
+
+    failed = set(_send_digest_batch(messages))
+    DigestDelivery.objects.bulk_create(
+        [
+            DigestDelivery(user=user, frequency=frequency, window_end=window_end)
+            for user, _ in messages
+            if user.id not in failed
+        ],
+        ignore_conflicts=True,
+    )
+
+    if failed and attempt < settings.DIGEST_MAX_ATTEMPTS:
+        send_digest_chunk.apply_async(
+            args=(sorted(failed), frequency, until, attempt + 1),
+            countdown=settings.DIGEST_RETRY_SECONDS * attempt,
+        )
+    return {'sent': len(messages) - len(failed), 'failed': len(failed)}
+
+
+def _dispatch_digests(frequency):
+    """Shard the users due a digest into chunks and send the chunks in parallel."""
+    now = timezone.now()
+    until = now.isoformat()
+    DigestDelivery.objects.filter(window_end__lt=now - DIGEST_DELIVERY_RETENTION).delete()
+    chunk_size = max(1, settings.DIGEST_CHUNK_SIZE)
+    user_ids = _digest_recipients(frequency).order_by('id').values_list('id', flat=True)
+
+    chunks = []
+    chunk = []
+    for user_id in user_ids.iterator(chunk_size=chunk_size):
+        chunk.append(user_id)
+        if len(chunk) == chunk_size:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+
+    if chunks:
+        group(send_digest_chunk.s(ids, frequency, until) for ids in chunks).apply_async()
+    return len(chunks)
+
+
 @shared_task
 def send_hourly_digests():
-    for user_id in User.objects.filter(
-        is_active=True,
-        email_notifications=True,
-        digest_frequency='hourly',
-    ).values_list('id', flat=True):
-        send_notification_digest(user_id, 'hourly')
+    return _dispatch_digests('hourly')
 
 
 @shared_task
 def send_daily_digests():
-    for user_id in User.objects.filter(
-        is_active=True,
-        email_notifications=True,
-        digest_frequency='daily',
-    ).values_list('id', flat=True):
-        send_notification_digest(user_id, 'daily')
+    return _dispatch_digests('daily')
 
 
 @shared_task
 def send_weekly_digests():
-    for user_id in User.objects.filter(
-        is_active=True,
-        email_notifications=True,
-        digest_frequency='weekly',
-    ).values_list('id', flat=True):
-        send_notification_digest(user_id, 'weekly')
+    return _dispatch_digests('weekly')
 
 
 def _campaign_audience_queryset(campaign):
@@ -233,8 +370,86 @@ def _build_campaign_email(campaign, user):
     return html, text
 
 
+class _SendThrottle:
+    """Spaces provider requests so all workers together stay under `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_at)
+            self.next_at = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def _materialize_campaign_recipients(campaign):
+    """Insert a pending recipient row per audience member; rows from an earlier run are kept."""
+    batch_size = settings.CAMPAIGN_BATCH_SIZE
+    audience = _campaign_audience_queryset(campaign).values_list('id', 'email')
+    batch = []
+    for user_id, email in audience.iterator(chunk_size=batch_size):
+        batch.append(EmailCampaignRecipient(campaign=campaign, user_id=user_id, email=email, status='pending'))
+        if len(batch) == batch_size:
+            EmailCampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        EmailCampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _campaign_send_jobs(campaign, recipients, batch_limit):
+    """Group a page of eligible recipients into provider requests: (recipients, messages) pairs."""
+    messages = []
+    for recipient in recipients:
+        html, text = _build_campaign_email(campaign, recipient.user)
+        messages.append({
+            'to_email': recipient.user.email,
+            'subject': campaign.subject,
+            'html_content': html,
+            'text_content': text,
+        })
+    # Transports without a batch endpoint get one message per request.
+    size = max(1, batch_limit)
+    return [
+        (recipients[index:index + size], messages[index:index + size])
+        for index in range(0, len(recipients), size)
+    ]
+
+
+def _send_campaign_job(job, throttle, batch_limit):
+    recipients, messages = job
+    throttle.wait()
+    if batch_limit == 1:
+        message = messages[0]
+        try:
+            ok = send_email(message['to_email'], message['subject'], message['html_content'],
+                            text_content=message['text_content'])
+        except Exception:
+            logger.exception("Campaign send failed for %s", message['to_email'])
+            return [SendResult(False, retryable=True)]
+        return [SendResult(ok)]
+    return send_email_batch(messages)
+
+
 @shared_task
-def send_marketing_campaign(campaign_id):
+def send_marketing_campaign(campaign_id, attempt=1):
+    """
+    Send a campaign to its audience.
+
+    Recipients are materialized with bulk inserts, then pending rows are sent
+    page by page through a throttled worker pool, in batch requests when the
+    email transport supports them. Each page's statuses go out in one bulk_update and the
+    campaign counters are bumped with F() expressions, so progress is visible
+    while sending and a re-run only picks up rows still pending. Rows the
+    provider could not take (429, 5xx, timeouts) stay pending and the
+    campaign is run again with backoff, up to CAMPAIGN_MAX_ATTEMPTS runs.
+    """
     campaign = EmailCampaign.objects.filter(id=campaign_id).first()
     if not campaign:
         return
@@ -244,53 +459,86 @@ def send_marketing_campaign(campaign_id):
     campaign.status = 'sending'
     campaign.save(update_fields=['status', 'updated_at'])
 
-    audience = _campaign_audience_queryset(campaign)
-    for user in audience.iterator():
-        EmailCampaignRecipient.objects.get_or_create(
-            campaign=campaign,
-            email=user.email,
-            defaults={'user': user, 'status': 'pending'},
-        )
-
-    recipients = EmailCampaignRecipient.objects.filter(campaign=campaign, status='pending').select_related('user')
-    sent_count = 0
-    failed_count = 0
-    suppressed_count = 0
-
-    for recipient in recipients.iterator():
-        user = recipient.user
-        if not user or not user.marketing_opt_in or user.marketing_unsubscribed_at:
-            recipient.status = 'suppressed'
-            recipient.error_message = 'User not eligible for marketing at send-time'
-            recipient.save(update_fields=['status', 'error_message', 'updated_at'])
-            suppressed_count += 1
-            continue
-
-        html, text = _build_campaign_email(campaign, user)
-        ok = send_email(user.email, campaign.subject, html, text_content=text)
-        if ok:
-            recipient.status = 'sent'
-            recipient.sent_at = timezone.now()
-            recipient.error_message = ''
-            recipient.save(update_fields=['status', 'sent_at', 'error_message', 'updated_at'])
-            sent_count += 1
-        else:
-            recipient.status = 'failed'
-            recipient.error_message = 'Provider rejected request or delivery failed'
-            recipient.save(update_fields=['status', 'error_message', 'updated_at'])
-            failed_count += 1
+    _materialize_campaign_recipients(campaign)
+
+    throttle = _SendThrottle(settings.CAMPAIGN_SEND_RATE)
+    batch_limit = get_transport().batch_limit
+    workers = max(1, settings.CAMPAIGN_SEND_CONCURRENCY)
+    totals = {'sent': 0, 'failed': 0, 'suppressed': 0}
+    final_attempt = attempt >= settings.CAMPAIGN_MAX_ATTEMPTS
+    deferred = 0
+    pending = EmailCampaignRecipient.objects.filter(campaign=campaign, status='pending').select_related('user')
+    last_id = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='campaign-send') as pool:
+        while True:
+            page = list(pending.filter(id__gt=last_id).order_by('id')[:settings.CAMPAIGN_BATCH_SIZE])
+            if not page:
+                break
+            last_id = page[-1].id
+            now = timezone.now()
+
+            eligible = []
+            for recipient in page:
+                user = recipient.user
+                if not user or not user.marketing_opt_in or user.marketing_unsubscribed_at:
+                    recipient.status = 'suppressed'
+                    recipient.error_message = 'User not eligible for marketing at send-time'
+                    recipient.updated_at = now
+                else:
+                    eligible.append(recipient)
+
+            jobs = _campaign_send_jobs(campaign, eligible, batch_limit)
+            sends = pool.map(lambda job: _send_campaign_job(job, throttle, batch_limit), jobs)
+            for (recipients, _), results in zip(jobs, sends):
+                for recipient, result in zip(recipients, results):
+                    ok, message_id, error, retryable = SendResult(*result)
+                    recipient.updated_at = timezone.now()
+                    if ok:
+                        recipient.status = 'sent'
+                        recipient.sent_at = recipient.updated_at
+                        recipient.provider_message_id = message_id
+                        recipient.error_message = ''
+                    elif retryable and not final_attempt:
+                        # Left pending for the next run.
+                        recipient.error_message = error or 'Provider temporarily unavailable'
+                        deferred += 1
+                    else:
+                        recipient.status = 'failed'
+                        recipient.error_message = error or 'Provider rejected request or delivery failed'
+
+            EmailCampaignRecipient.objects.bulk_update(
+                page, ['status', 'sent_at', 'provider_message_id', 'error_message', 'updated_at'],
+            )
+            counts = {key: sum(1 for recipient in page if recipient.status == key) for key in totals}
+            for key, value in counts.items():
+                totals[key] += value
+            EmailCampaign.objects.filter(id=campaign.id).update(
+                sent_count=F('sent_count') + counts['sent'],
+                failed_count=F('failed_count') + counts['failed'],
+                suppressed_count=F('suppressed_count') + counts['suppressed'],
+                updated_at=timezone.now(),
+            )
 
+    if deferred:
+        send_marketing_campaign.apply_async(
+            args=(campaign.id, attempt + 1),
+            countdown=settings.CAMPAIGN_RETRY_SECONDS * 2 ** (attempt - 1),
+        )
+        return {
+            'campaign_id': campaign.id,
+            'sent': totals['sent'],
+            'failed': totals['failed'],
+            'suppressed': totals['suppressed'],
+            'deferred': deferred,
+        }
+
+    campaign.refresh_from_db(fields=['sent_count', 'failed_count', 'suppressed_count'])
     campaign.total_recipients = campaign.recipients.count()
-    campaign.sent_count = campaign.recipients.filter(status='sent').count()
-    campaign.failed_count = campaign.recipients.filter(status='failed').count()
-    campaign.suppressed_count = campaign.recipients.filter(status='suppressed').count()
     campaign.status = 'sent' if campaign.failed_count == 0 else 'failed'
     campaign.sent_at = timezone.now()
     campaign.save(update_fields=[
         'total_recipients',
-        'sent_count',
-        'failed_count',
-        'suppressed_count',
         'status',
         'sent_at',
         'updated_at',
@@ -298,9 +546,9 @@ def send_marketing_campaign(campaign_id):
 
     return {
         'campaign_id': campaign.id,
-        'sent': sent_count,
-        'failed': failed_count,
-        'suppressed': suppressed_count,
+        'sent': totals['sent'],
+        'failed': totals['failed'],
+        'suppressed': totals['suppressed'],
     }
 
 
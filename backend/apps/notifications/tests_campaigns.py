@@ -1,10 +1,13 @@
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIRequestFactory, force_authenticate
 
 from apps.organizations.models import Organization, User
 from .campaign_views import unsubscribe_marketing
+from .email_transports import SendResult
 from .models import EmailCampaign, EmailCampaignRecipient
 from .tasks import send_marketing_campaign
 
@@ -76,3 +79,104 @@ class MarketingCampaignTests(TestCase):
         self.opted_in.refresh_from_db()
         self.assertFalse(self.opted_in.marketing_opt_in)
         self.assertIsNotNone(self.opted_in.marketing_unsubscribed_at)
+
+
+@override_settings(RESEND_API_KEY='re_test', CAMPAIGN_SEND_RATE=0, CAMPAIGN_BATCH_SIZE=120)
+class CampaignEngineTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='Bulk Org', slug='bulk-org')
+        User.objects.bulk_create([
+            User(
+                username=f'reader-{number}',
+                email=f'reader-{number}@example.com',
+                organization=self.org,
+                marketing_opt_in=True,
+            )
+            for number in range(230)
+        ])
+        self.campaign = EmailCampaign.objects.create(
+            organization=self.org, name='Digest', subject='Monthly news', body_html='<p>News</p>',
+        )
+
+    def _accept(self, messages, reply_to=None):
+        self.batches.append([message['to_email'] for message in messages])
+        return [(True, f"msg-{message['to_email']}", '') for message in messages]
+
+    def test_large_campaign_uses_batches_and_bulk_writes(self):
+        self.batches = []
+        with patch('apps.notifications.tasks.send_email_batch', side_effect=self._accept), \
+                patch('apps.notifications.tasks.send_email') as single_send, \
+                CaptureQueriesContext(connection) as queries:
+            result = send_marketing_campaign(self.campaign.id)
+
+        single_send.assert_not_called()
+        self.assertEqual(result['sent'], 230)
+        # Pages of 120 recipients split into provider batches of at most 100.
+        self.assertEqual(sorted(len(batch) for batch in self.batches), [10, 20, 100, 100])
+        self.assertLess(len(queries), 25)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.total_recipients, self.campaign.sent_count), ('sent', 230, 230))
+        recipient = EmailCampaignRecipient.objects.get(campaign=self.campaign, email='reader-7@example.com')
+        self.assertEqual(recipient.provider_message_id, 'msg-reader-7@example.com')
+        self.assertIsNotNone(recipient.sent_at)
+
+    def test_rejected_batch_fails_its_rows_and_rerun_skips_them(self):
+        calls = []
+
+        def reject_first(messages, reply_to=None):
+            calls.append(len(messages))
+            if len(calls) == 1:
+                return [(False, '', 'Provider returned 422')] * len(messages)
+            return [(True, 'ok', '')] * len(messages)
+
+        User.objects.filter(username='reader-0').update(marketing_opt_in=False)
+        EmailCampaignRecipient.objects.create(
+            campaign=self.campaign, user=User.objects.get(username='reader-0'), email='reader-0@example.com',
+        )
+        with patch('apps.notifications.tasks.send_email_batch', side_effect=reject_first), \
+                self.settings(CAMPAIGN_SEND_CONCURRENCY=1):
+            send_marketing_campaign(self.campaign.id)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, 'failed')
+        self.assertEqual(
+            (self.campaign.sent_count, self.campaign.failed_count, self.campaign.suppressed_count), (129, 100, 1),
+        )
+        self.assertEqual(EmailCampaignRecipient.objects.filter(campaign=self.campaign).count(), 230)
+        self.assertEqual(
+            EmailCampaignRecipient.objects.filter(campaign=self.campaign, status='failed').first().error_message,
+            'Provider returned 422',
+        )
+
+        # Nothing is left pending, so a second run neither sends nor double counts.
+        with patch('apps.notifications.tasks.send_email_batch') as again:
+            send_marketing_campaign(self.campaign.id)
+        again.assert_not_called()
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.sent_count, 129)
+
+    def test_provider_outage_leaves_rows_pending_for_the_next_run(self):
+        calls = []
+
+        def unavailable_first(messages, reply_to=None):
+            calls.append(len(messages))
+            if len(calls) == 1:
+                return [SendResult(False, error='Provider returned 503', retryable=True)] * len(messages)
+            return [SendResult(True, 'ok')] * len(messages)
+
+        with patch('apps.notifications.tasks.send_email_batch', side_effect=unavailable_first), \
+                patch.object(send_marketing_campaign, 'apply_async') as rerun, \
+                self.settings(CAMPAIGN_SEND_CONCURRENCY=1, CAMPAIGN_RETRY_SECONDS=60):
+            result = send_marketing_campaign(self.campaign.id)
+
+            self.assertEqual((result['sent'], result['failed'], result['deferred']), (130, 0, 100))
+            self.assertEqual(rerun.call_args.kwargs, {'args': (self.campaign.id, 2), 'countdown': 60})
+            self.campaign.refresh_from_db()
+            self.assertEqual(self.campaign.status, 'sending')
+            self.assertEqual(EmailCampaignRecipient.objects.filter(campaign=self.campaign, status='pending').count(), 100)
+
+            send_marketing_campaign(self.campaign.id, 2)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.sent_count, self.campaign.failed_count), ('sent', 230, 0))
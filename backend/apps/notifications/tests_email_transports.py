@@ -0,0 +1,83 @@
+from django.core import mail
+from django.test import SimpleTestCase, override_settings
+
+from .email_service import send_email, send_email_async, send_emails
+from .email_sink import EmailSinkServer
+from .email_transports import DjangoTransport, InMemoryTransport, ResendTransport, get_transport
+
+
+class EmailTransportTests(SimpleTestCase):
+    def setUp(self):
+        self.sink = EmailSinkServer().start()
+        self.addCleanup(self.sink.stop)
+
+    def _use_sink(self, path=''):
+        override = override_settings(EMAIL_TRANSPORT={
+            'BACKEND': 'apps.notifications.email_transports.ResendTransport',
+            'OPTIONS': {'base_url': f'{self.sink.url}{path}'},
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_sends_share_one_keep_alive_connection(self):
+        self._use_sink()
+        results = [send_email(f'user{n}@example.com', 'Hello', '<p>Hi there</p>') for n in range(5)]
+
+        self.assertEqual(results, [True] * 5)
+        self.assertIs(get_transport(), get_transport())
+        self.assertEqual(self.sink.stats, {'connections': 1, 'requests': 5, 'messages': 5})
+
+    def test_send_emails_uses_provider_batches(self):
+        self._use_sink()
+        messages = [
+            {'to_email': f'user{n}@example.com', 'subject': 'News', 'html_content': '<p>News</p>'}
+            for n in range(250)
+        ]
+        results = send_emails(messages)
+
+        self.assertEqual(len(results), 250)
+        self.assertTrue(all(result.ok and result.message_id for result in results))
+        self.assertEqual((self.sink.stats['requests'], self.sink.stats['messages']), (3, 250))
+
+    def test_rejected_batch_falls_back_to_single_sends(self):
+        self._use_sink()
+        messages = [
+            {'to_email': email, 'subject': 'News', 'html_content': '<p>News</p>'}
+            for email in ('one@example.com', 'invalid@example', 'three@example.com')
+        ]
+        results = send_emails(messages)
+
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertEqual(results[1].error, 'Provider returned 422')
+        self.assertFalse(results[1].retryable)
+        self.assertEqual(self.sink.stats['messages'], 2)
+
+    def test_throttled_batch_is_retryable(self):
+        self._use_sink('/busy')
+        results = send_emails([
+            {'to_email': f'user{n}@example.com', 'subject': 'News', 'html_content': '<p>News</p>'} for n in range(3)
+        ])
+        self.assertEqual({(result.ok, result.retryable) for result in results}, {(False, True)})
+
+    def test_provider_errors_fail_the_send(self):
+        self._use_sink('/missing')
+        self.assertFalse(send_email('user@example.com', 'Hello', '<p>Hi</p>'))
+
+    @override_settings(RESEND_API_KEY='', EMAIL_TRANSPORT={})
+    def test_default_transport_follows_resend_key(self):
+        self.assertIsInstance(get_transport(), DjangoTransport)
+        self.assertTrue(send_email('user@example.com', 'Hello', '<p>Hi <b>there</b></p>', reply_to='help@example.com'))
+        [sent] = mail.outbox
+        self.assertEqual((sent.to, sent.reply_to, sent.body), (['user@example.com'], ['help@example.com'], 'Hi there'))
+        self.assertEqual(sent.alternatives[0][1], 'text/html')
+
+        with self.settings(RESEND_API_KEY='re_live'):
+            transport = get_transport()
+            self.assertIsInstance(transport, ResendTransport)
+            self.assertEqual(transport.session.headers['Authorization'], 'Bearer re_live')
+
+    @override_settings(EMAIL_TRANSPORT={'BACKEND': 'apps.notifications.email_transports.InMemoryTransport'})
+    def test_async_send_resolves_through_the_transport(self):
+        self.assertTrue(send_email_async('user@example.com', 'Later', '<p>Queued</p>').result(timeout=5))
+        self.assertIsInstance(get_transport(), InMemoryTransport)
+        self.assertEqual(get_transport().outbox[0]['subject'], 'Later')
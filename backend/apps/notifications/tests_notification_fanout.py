@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase, override_settings
+
+from apps.organizations.models import Organization, User
+from .helpers import notify_sprint_started
+from .models import Notification
+from .utils import create_notifications
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class NotificationFanOutTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name='Fan Out Org', slug='fan-out-org')
+        self.users = [
+            User.objects.create_user(
+                username=f'member-{number}',
+                email=f'member-{number}@example.com',
+                password='pass',
+                organization=self.org,
+                digest_frequency='realtime' if number < 2 else 'daily',
+            )
+            for number in range(12)
+        ]
+        self.layer = get_channel_layer()
+        self.channels = {}
+        for user in self.users:
+            channel = async_to_sync(self.layer.new_channel)()
+            async_to_sync(self.layer.group_add)(f'notifications_{user.id}', channel)
+            self.channels[user.id] = channel
+
+    def _received(self, user):
+        return async_to_sync(self.layer.receive)(self.channels[user.id])['message']['notification']
+
+    def test_broadcast_is_one_insert_and_one_dispatch(self):
+        with patch('apps.notifications.tasks.send_notification_email_via_resend') as send, \
+                patch('apps.notifications.utils.async_to_sync', wraps=async_to_sync) as bridge:
+            with self.assertNumQueries(1), self.captureOnCommitCallbacks() as callbacks:
+                notifications = create_notifications(
+                    self.users, 'system', 'Release', 'Version 2 is out', link='/releases/2',
+                )
+            with self.assertNumQueries(1):
+                for callback in callbacks:
+                    callback()
+
+        self.assertEqual(len(notifications), 12)
+        self.assertEqual(bridge.call_count, 1)
+        for user, notification in zip(self.users, notifications):
+            received = self._received(user)
+            self.assertEqual((received['id'], received['title']), (notification.id, 'Release'))
+        # Only realtime subscribers are emailed; digest users wait for their digest.
+        self.assertEqual(sorted(call.args[0].id for call in send.call_args_list), [u.id for u in self.users[:2]])
+
+    def test_helpers_use_bulk_path_without_signals(self):
+        sprint = type('Sprint', (), {'id': 3, 'name': 'Sprint 3', 'goal': 'Ship it', 'organization_id': self.org.id})
+
+        with patch('apps.notifications.signals.dispatch_notification') as per_row, \
+                patch('apps.notifications.tasks.send_notification_email_via_resend'):
+            with self.captureOnCommitCallbacks(execute=True):
+                notify_sprint_started(sprint)
+
+        per_row.assert_not_called()
+        self.assertEqual(Notification.objects.filter(link='/sprint/3').count(), 12)
+        self.assertEqual(self._received(self.users[-1])['title'], 'Sprint started: Sprint 3')
+
+    def test_empty_audience_is_a_no_op(self):
+        with self.assertNumQueries(0), self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(create_notifications([], 'system', 'Nobody', 'Nothing'), [])
+        self.assertEqual(callbacks, [])
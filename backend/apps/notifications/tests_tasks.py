@@ -1,10 +1,13 @@
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
 from apps.organizations.models import Organization, User
-from .models import Notification
-from .tasks import send_notification_digest, send_notification_email
+from .email_service import EmailLayout, render_email_template
+from .models import DigestDelivery, Notification
+from .tasks import send_daily_digests, send_digest_chunk, send_notification_digest, send_notification_email
 
 
 class NotificationTaskTests(TestCase):
@@ -113,3 +116,85 @@ class NotificationTaskTests(TestCase):
                 text = mock_send_email.call_args.kwargs.get('text_content', '')
                 self.assertIn('You have 2 bundled updates', html)
                 self.assertIn('You have 2 bundled updates', text)
+
+
+@override_settings(DIGEST_CHUNK_SIZE=2, DIGEST_MAX_ATTEMPTS=2, DIGEST_RETRY_SECONDS=0)
+class DigestChunkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        dispatch_patcher = patch('apps.notifications.signals.dispatch_notification')
+        dispatch_patcher.start()
+        self.addCleanup(dispatch_patcher.stop)
+        self.org = Organization.objects.create(name='Digest Org', slug='digest-org')
+        self.users = []
+        for number in range(5):
+            user = User.objects.create_user(
+                username=f'digest-{number}',
+                email=f'digest-{number}@example.com',
+                password='pass',
+                organization=self.org,
+                digest_frequency='daily',
+            )
+            Notification.objects.create(
+                user=user,
+                notification_type='task',
+                title=f'Task for {number}',
+                message='Moved to review',
+                link=f'/issues/{number}',
+            )
+            self.users.append(user)
+        User.objects.create_user(
+            username='weekly-reader', email='weekly@example.com', password='pass',
+            organization=self.org, digest_frequency='weekly',
+        )
+
+    def test_layout_matches_full_render(self):
+        layout = EmailLayout('Your Daily digest', 'Open notifications', 'https://app/notifications', 'Why', 'digest')
+        self.assertEqual(
+            layout.render('3 <updates>', '<p>Body</p>'),
+            render_email_template(
+                preheader='3 <updates>', title='Your Daily digest', body_html='<p>Body</p>',
+                cta_label='Open notifications', cta_url='https://app/notifications',
+                reason_text='Why', variant='digest',
+            ),
+        )
+
+    def test_daily_run_is_sharded_into_chunks(self):
+        with patch('apps.notifications.tasks.send_email', return_value=True) as mock_send_email:
+            self.assertEqual(send_daily_digests(), 3)
+
+        recipients = sorted(call.args[0] for call in mock_send_email.call_args_list)
+        self.assertEqual(recipients, sorted(user.email for user in self.users))
+        html_by_email = {call.args[0]: call.args[2] for call in mock_send_email.call_args_list}
+        self.assertIn('Task for 3', html_by_email['digest-3@example.com'])
+        self.assertNotIn('Task for 3', html_by_email['digest-4@example.com'])
+
+    def test_chunk_loads_users_and_notifications_in_two_queries(self):
+        until = timezone.now().isoformat()
+        # Plus one insert recording the deliveries.
+        with patch('apps.notifications.tasks.send_email', return_value=True), self.assertNumQueries(3):
+            result = send_digest_chunk([user.id for user in self.users], 'daily', until)
+        self.assertEqual(result, {'sent': 5, 'failed': 0})
+        self.assertEqual(DigestDelivery.objects.filter(frequency='daily').count(), 5)
+
+    def test_failed_sends_are_retried_without_resending_the_rest(self):
+        until = timezone.now().isoformat()
+        flaky = self.users[1].email
+        attempts = []
+
+        def send(to_email, *args, **kwargs):
+            attempts.append(to_email)
+            return to_email != flaky or attempts.count(flaky) > 1
+
+        ids = [user.id for user in self.users[:3]]
+        with patch('apps.notifications.tasks.send_email', side_effect=send):
+            result = send_digest_chunk(ids, 'daily', until)
+            self.assertEqual(result, {'sent': 2, 'failed': 1})
+            self.assertEqual(attempts.count(flaky), 2)
+
+            # A redelivered chunk skips everyone who already got this run's digest,
+            # even in another worker with its own cache.
+            cache.clear()
+            self.assertEqual(send_digest_chunk(ids, 'daily', until), {'sent': 0, 'failed': 0})
+        self.assertEqual(len(attempts), 4)
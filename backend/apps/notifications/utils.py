@@ -1,39 +1,83 @@
+import asyncio
+
 from .models import Notification
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
 
-def dispatch_in_app_notification(notification):
-    """Push a newly-created notification to the user's websocket channel."""
+def notification_event(notification):
+    """Channel layer event pushing one notification to the user's websocket group."""
+    return {
+        'type': 'notification_message',
+        'message': {
+            'type': 'notification',
+            'notification': {
+                'id': notification.id,
+                'type': notification.notification_type,
+                'title': notification.title,
+                'message': notification.message,
+                'link': notification.link,
+                'is_read': notification.is_read,
+                'created_at': notification.created_at.isoformat(),
+            }
+        }
+    }
+
+async def _group_send_all(channel_layer, notifications):
+    # One event loop for the whole batch; sends overlap instead of each
+    # paying its own sync->async hop and Redis round-trip in turn.
+    limit = asyncio.Semaphore(max(1, getattr(settings, 'NOTIFICATIONS_FANOUT_CONCURRENCY', 50)))
+
+    async def send(notification):
+        async with limit:
+            await channel_layer.group_send(f'notifications_{notification.user_id}', notification_event(notification))
+
+    results = await asyncio.gather(*(send(notification) for notification in notifications), return_exceptions=True)
+    return [result for result in results if isinstance(result, Exception)]
+
+def dispatch_in_app_notifications(notifications):
+    """Push newly-created notifications to their users' websocket channels in one batch."""
+    notifications = list(notifications)
+    if not notifications:
+        return
     try:
         channel_layer = get_channel_layer()
         if not channel_layer:
             return
-        async_to_sync(channel_layer.group_send)(
-            f'notifications_{notification.user_id}',
-            {
-                'type': 'notification_message',
-                'message': {
-                    'type': 'notification',
-                    'notification': {
-                        'id': notification.id,
-                        'type': notification.notification_type,
-                        'title': notification.title,
-                        'message': notification.message,
-                        'link': notification.link,
-                        'is_read': notification.is_read,
-                        'created_at': notification.created_at.isoformat(),
-                    }
-                }
-            }
-        )
+        errors = async_to_sync(_group_send_all)(channel_layer, notifications)
+        if errors:
+            print(f"Failed to send {len(errors)} WebSocket notifications: {errors[0]}")
     except Exception as e:
         print(f"Failed to send WebSocket notification: {e}")
 
+def dispatch_in_app_notification(notification):
+    """Push a newly-created notification to the user's websocket channel."""
+    dispatch_in_app_notifications([notification])
+
+def dispatch_email_notifications(notifications):
+    """Queue email delivery for a batch of newly-created notifications as one task."""
+    notification_ids = [notification.id for notification in notifications]
+    if not notification_ids:
+        return
+    try:
+        from .tasks import send_notification_emails
+
+        if getattr(settings, 'NOTIFICATIONS_USE_CELERY', False):
+            try:
+                send_notification_emails.delay(notification_ids)
+                return
+            except Exception as celery_error:
+                print(f"Celery notification email dispatch failed, falling back to sync: {celery_error}")
+
+        send_notification_emails(notification_ids)
+    except Exception as e:
+        print(f"Failed to send email notifications: {e}")
+
 def dispatch_email_notification(notification):
     """Queue email delivery for a newly-created notification."""
     try:
         from .tasks import send_notification_email
-        from django.conf import settings
 
         # Default to synchronous delivery for reliability unless explicitly enabled.
         if getattr(settings, 'NOTIFICATIONS_USE_CELERY', False):
@@ -52,6 +96,11 @@ def dispatch_notification(notification):
     dispatch_in_app_notification(notification)
     dispatch_email_notification(notification)
 
+def dispatch_notifications(notifications):
+    """Dispatch both channels for a batch of notifications."""
+    dispatch_in_app_notifications(notifications)
+    dispatch_email_notifications(notifications)
+
 def create_notification(user, notification_type, title, message, link=''):
     """
     Canonical helper for creating notifications.
@@ -65,3 +114,26 @@ def create_notification(user, notification_type, title, message, link=''):
         link=link
     )
     return notification
+
+def create_notifications(users, notification_type, title, message, link=''):
+    """
+    Create the same notification for many users with a single INSERT.
+
+    `users` may hold User instances or ids. bulk_create skips post_save, so
+    delivery is dispatched here as one batch once the transaction commits.
+    """
+    user_ids = list(dict.fromkeys(getattr(user, 'pk', user) for user in users))
+    if not user_ids:
+        return []
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            link=link,
+        )
+        for user_id in user_ids
+    ])
+    transaction.on_commit(lambda: dispatch_notifications(notifications))
+    return notifications
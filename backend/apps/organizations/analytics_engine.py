@@ -1,8 +1,7 @@
-from django.db import models
 from django.utils import timezone
 from datetime import timedelta
+from apps.organizations import analytics_rollups
 from apps.organizations.models import Organization, User
-from apps.conversations.models import Conversation, Reaction
 from apps.decisions.models import Decision
 from apps.agile.models import Sprint, Issue
 
@@ -65,31 +64,21 @@ class AnalyticsEngine:
         """Get engagement analytics"""
         cutoff_date = timezone.now() - timedelta(days=days)
         
-        conversations = Conversation.objects.filter(
-            organization_id=org_id,
-            created_at__gte=cutoff_date
-        )
-        
-        total_views = conversations.aggregate(
-            total=models.Sum('view_count')
-        )['total'] or 0
-        
-        total_replies = conversations.aggregate(
-            total=models.Sum('reply_count')
-        )['total'] or 0
+        cells = analytics_rollups.window(org_id, ['conversations', 'conversation_replies', 'reactions'], cutoff_date)
+        total_conversations, total_views = analytics_rollups.sum_cells(cells, 'conversations')
+        _, total_replies = analytics_rollups.sum_cells(cells, 'conversation_replies')
         
-        reactions = Reaction.objects.filter(
-            conversation__organization_id=org_id,
-            created_at__gte=cutoff_date
-        ).values('reaction_type').annotate(count=models.Count('id'))
-        
-        reaction_breakdown = {r['reaction_type']: r['count'] for r in reactions}
+        reaction_breakdown = {
+            dimension: count
+            for (metric, dimension), (count, _value) in cells.items()
+            if metric == 'reactions' and count
+        }
         
         return {
-            'total_conversations': conversations.count(),
+            'total_conversations': total_conversations,
             'total_views': total_views,
             'total_replies': total_replies,
-            'avg_views_per_conversation': (total_views / conversations.count()) if conversations.count() > 0 else 0,
+            'avg_views_per_conversation': (total_views / total_conversations) if total_conversations > 0 else 0,
             'reactions': reaction_breakdown,
         }
     
@@ -103,22 +92,20 @@ class AnalyticsEngine:
         else:
             users = User.objects.filter(organization_id=org_id)
         
+        cells = analytics_rollups.window(
+            org_id, ['conversations', 'decisions', 'reactions'], cutoff_date, per_user=True
+        )
+        per_user = {}
+        for (metric, _dimension, cell_user_id), (count, _value) in cells.items():
+            counts = per_user.setdefault(cell_user_id, {})
+            counts[metric] = counts.get(metric, 0) + count
+        
         activities = []
         for user in users:
-            conversations_created = Conversation.objects.filter(
-                author=user,
-                created_at__gte=cutoff_date
-            ).count()
-            
-            decisions_made = Decision.objects.filter(
-                decision_maker=user,
-                created_at__gte=cutoff_date
-            ).count()
-            
-            reactions_given = Reaction.objects.filter(
-                user=user,
-                created_at__gte=cutoff_date
-            ).count()
+            counts = per_user.get(user.id, {})
+            conversations_created = counts.get('conversations', 0)
+            decisions_made = counts.get('decisions', 0)
+            reactions_given = counts.get('reactions', 0)
             
             activities.append({
                 'user_id': user.id,
@@ -134,21 +121,19 @@ class AnalyticsEngine:
     @staticmethod
     def get_memory_health(org_id):
         """Get organizational memory health score"""
-        conversations = Conversation.objects.filter(organization_id=org_id)
-        
-        total = conversations.count()
+        state = analytics_rollups.gauges(org_id, ['conversation_state'])
+        total, total_views = analytics_rollups.sum_cells(state, 'conversation_state')
         if total == 0:
             return 0
         
         # Factors: coverage, engagement, recency
-        archived = conversations.filter(is_archived=True).count()
-        recent = conversations.filter(
-            created_at__gte=timezone.now() - timedelta(days=30)
-        ).count()
+        archived, _ = analytics_rollups.sum_cells(state, 'conversation_state', 'True')
+        recent, _ = analytics_rollups.sum_cells(
+            analytics_rollups.window(org_id, ['conversations'], timezone.now() - timedelta(days=30)),
+            'conversations',
+        )
         
-        avg_views = conversations.aggregate(
-            avg=models.Avg('view_count')
-        )['avg'] or 0
+        avg_views = total_views / total
         
         coverage_score = (total / 100) * 20  # Max 20 points
         engagement_score = min(avg_views / 10, 30)  # Max 30 points
@@ -169,21 +154,20 @@ class AnalyticsEngine:
         """Get trending topics"""
         cutoff_date = timezone.now() - timedelta(days=7)
         
-        conversations = Conversation.objects.filter(
-            organization_id=org_id,
-            created_at__gte=cutoff_date
-        ).values('tags__name').annotate(
-            count=models.Count('id'),
-            total_views=models.Sum('view_count')
-        ).order_by('-total_views')[:limit]
+        cells = analytics_rollups.window(org_id, ['conversation_tags'], cutoff_date)
+        topics = sorted(
+            ((dimension, count, views) for (_metric, dimension), (count, views) in cells.items() if dimension),
+            key=lambda topic: topic[2],
+            reverse=True,
+        )[:limit]
         
         return [
             {
-                'topic': c['tags__name'],
-                'count': c['count'],
-                'engagement': c['total_views'],
+                'topic': topic,
+                'count': count,
+                'engagement': views,
             }
-            for c in conversations if c['tags__name']
+            for topic, count, views in topics
         ]
 
 
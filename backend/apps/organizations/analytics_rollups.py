@@ -0,0 +1,448 @@
+"""
+Materialized analytics rollups
+Dashboard counters (AnalyticsEngine, analytics_overview) are read from
+AnalyticsRollup cells instead of being recounted from the raw tables:
+
+- Write-time deltas: saves and deletes of the tracked models adjust the
+  affected cells in the same transaction (one upsert per changed cell). An
+  update diffs against the stored row's tracked fields, read by the shared
+  save_snapshots hook just before the save.
+- Refresh: a Celery beat task recomputes the recent hour cells and every
+  gauge from the raw tables with grouped queries. That picks up writes that
+  bypass signals (``F()`` view/reply counters, queryset updates, tag m2m
+  changes) and repairs any drift.
+- Compaction: hour cells older than ANALYTICS_ROLLUP_HOURLY_DAYS are folded
+  into day cells.
+
+Windowed reads are range scans over hour cells plus day cells, so their cost
+depends on the window, not on how much history the org has. Windows are
+aligned to the hour (or to the day, for the compacted part). Until an org's
+first build has finished, reads queue it and recount from the raw tables.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from apps.organizations import save_snapshots
+from apps.organizations.rollup_models import AnalyticsRollup, AnalyticsRollupState
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+HOUR = AnalyticsRollup.BUCKET_HOUR
+DAY = AnalyticsRollup.BUCKET_DAY
+TOTAL = AnalyticsRollup.BUCKET_TOTAL
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    """How one metric is derived from one model.
+
+    ``time_field`` makes it an event metric bucketed by hour; without it the
+    metric is a gauge kept in one ``total`` cell per dimension. Rows count
+    once per cell and add ``value_field`` to the cell's value; with
+    ``user_field`` they also count towards that user's cells. ``live`` specs
+    are maintained by write-time deltas, the rest only by refresh.
+    """
+
+    metric: str
+    model: str
+    org_field: str = "organization_id"
+    time_field: str | None = None
+    dimension_field: str | None = None
+    value_field: str | None = None
+    user_field: str | None = None
+    required: tuple = ()
+    live: bool = True
+
+
+SPECS = (
+    RollupSpec("conversations", "conversations.Conversation", time_field="created_at",
+               dimension_field="post_type", value_field="view_count", user_field="author_id"),
+    RollupSpec("conversation_replies", "conversations.Conversation", time_field="created_at",
+               value_field="reply_count"),
+    RollupSpec("conversation_state", "conversations.Conversation", dimension_field="is_archived",
+               value_field="view_count"),
+    RollupSpec("conversation_tags", "conversations.Conversation", time_field="created_at",
+               dimension_field="tags__name", value_field="view_count", required=("tags__name",), live=False),
+    RollupSpec("decisions", "decisions.Decision", time_field="created_at", user_field="decision_maker_id"),
+    RollupSpec("decision_status", "decisions.Decision", dimension_field="status"),
+    RollupSpec("reactions", "conversations.Reaction", org_field="conversation__organization_id",
+               time_field="created_at", dimension_field="reaction_type", user_field="user_id"),
+    RollupSpec("issue_status", "agile.Issue", dimension_field="status", required=("project_id",)),
+    RollupSpec("sprint_status", "agile.Sprint", dimension_field="status", required=("project_id",)),
+    RollupSpec("projects", "agile.Project"),
+)
+
+
+def _model(spec):
+    return apps.get_model(spec.model)
+
+
+def _floor_hour(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_day(moment):
+    return _floor_hour(moment).replace(hour=0)
+
+
+def _dimension(value):
+    return "" if value is None else str(value)[:100]
+
+
+def hourly_horizon(now=None):
+    days = getattr(settings, "ANALYTICS_ROLLUP_HOURLY_DAYS", 35)
+    return _floor_day((now or timezone.now()) - timedelta(days=days))
+
+
+# ----------------------------------------------------------------------------
+# Cell writes
+# ----------------------------------------------------------------------------
+
+def _upsert(cells):
+    """Add (count, value) to each cell, creating missing ones.
+
+    ``cells`` maps (org_id, user_id, bucket, period_start, metric, dimension)
+    to [count, value].
+    """
+    rows = [
+        (org_id, user_id, bucket, connection.ops.adapt_datetimefield_value(period_start),
+         metric, dimension, count, value)
+        for (org_id, user_id, bucket, period_start, metric, dimension), (count, value) in cells.items()
+        if count or value
+    ]
+    if not rows:
+        return 0
+    qn = connection.ops.quote_name
+    table = qn(AnalyticsRollup._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} (organization_id, user_id, bucket, period_start, metric, dimension, "
+        f"{qn('count')}, {qn('value')}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) "
+        f"ON CONFLICT (organization_id, user_id, bucket, metric, dimension, period_start) DO UPDATE SET "
+        f"{qn('count')} = {table}.{qn('count')} + excluded.{qn('count')}, "
+        f"{qn('value')} = {table}.{qn('value')} + excluded.{qn('value')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    return len(rows)
+
+
+def _add_row(cells, spec, org_id, period_start, dimension, user_id, count, value):
+    bucket = HOUR if spec.time_field else TOTAL
+    for cell_user in (0, user_id) if user_id else (0,):
+        cell = cells.setdefault((org_id, cell_user, bucket, period_start, spec.metric, dimension), [0, 0])
+        cell[0] += count
+        cell[1] += value
+
+
+def _instance_cells(cells, spec, org_id, values, sign):
+    if org_id is None or any(values.get(field) in (None, "") for field in spec.required):
+        return
+    if spec.time_field:
+        moment = values.get(spec.time_field)
+        if moment is None:
+            return
+        period_start = _floor_hour(moment)
+    else:
+        period_start = EPOCH
+    dimension = _dimension(values.get(spec.dimension_field)) if spec.dimension_field else ""
+    value = int(values.get(spec.value_field) or 0) if spec.value_field else 0
+    user_id = values.get(spec.user_field) if spec.user_field else None
+    _add_row(cells, spec, org_id, period_start, dimension, user_id, sign, sign * value)
+
+
+# ----------------------------------------------------------------------------
+# Write-time deltas
+# ----------------------------------------------------------------------------
+
+def _live_specs(model):
+    label = model._meta.label
+    return [spec for spec in SPECS if spec.live and spec.model == label]
+
+
+def _snapshot_fields(specs):
+    fields = set()
+    for spec in specs:
+        fields.update(field for field in (spec.time_field, spec.dimension_field, spec.value_field,
+                                          spec.user_field, *spec.required) if field)
+        relation, _, remainder = spec.org_field.partition("__")
+        fields.add(f"{relation}_id" if remainder else spec.org_field)
+    return fields
+
+
+def _org_id(spec, instance, values):
+    relation, _, field = spec.org_field.partition("__")
+    if not field:
+        return values.get(spec.org_field)
+    related = getattr(instance, relation, None)
+    return getattr(related, field, None) if related is not None else None
+
+
+def _values(instance, fields):
+    """Field values as loaded on the instance, or None if any are deferred."""
+    loaded = instance.__dict__
+    if any(field not in loaded for field in fields):
+        return None
+    return {field: loaded[field] for field in fields}
+
+
+def _apply(instance, specs, before, after):
+    cells = {}
+    for spec in specs:
+        if before is not None:
+            _instance_cells(cells, spec, _org_id(spec, instance, before), before, -1)
+        if after is not None:
+            _instance_cells(cells, spec, _org_id(spec, instance, after), after, 1)
+    _upsert(cells)
+
+
+def _on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    specs = _live_specs(sender)
+    fields = _snapshot_fields(specs)
+    before = None if created else save_snapshots.stored(instance, "analytics_rollups")
+    if before is None and not created:
+        return
+    # Deferred fields were not written, so they keep their stored values.
+    after = {**(before or {}), **{field: instance.__dict__[field] for field in fields if field in instance.__dict__}}
+    if created and len(after) < len(fields) or before == after:
+        return
+    try:
+        _apply(instance, specs, before, after)
+    except Exception:
+        logger.exception("Failed to update analytics rollups for %s #%s", sender.__name__, instance.pk)
+
+
+def _on_delete(sender, instance, **kwargs):
+    specs = _live_specs(sender)
+    before = _values(instance, _snapshot_fields(specs))
+    if before is None:
+        return
+    try:
+        _apply(instance, specs, before, None)
+    except Exception:
+        logger.exception("Failed to update analytics rollups for %s #%s", sender.__name__, instance.pk)
+
+
+def _on_organization_created(sender, instance, created, raw=False, **kwargs):
+    # A new org has nothing to backfill, so its rollups start out built.
+    if created and not raw:
+        AnalyticsRollupState.objects.get_or_create(organization=instance, defaults={"built_at": timezone.now()})
+
+
+def connect_signals():
+    from apps.organizations.models import Organization
+
+    post_save.connect(_on_organization_created, sender=Organization, dispatch_uid="analytics_rollup_org_created")
+    for model in {_model(spec) for spec in SPECS if spec.live}:
+        name = model._meta.label_lower
+        save_snapshots.track(model, "analytics_rollups", _snapshot_fields(_live_specs(model)))
+        post_save.connect(_on_save, sender=model, dispatch_uid=f"analytics_rollup_save_{name}")
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f"analytics_rollup_delete_{name}")
+
+
+# ----------------------------------------------------------------------------
+# Refresh from the raw tables
+# ----------------------------------------------------------------------------
+
+def _recount(cells, spec, org_id, since=None):
+    queryset = _model(spec)._default_manager.filter(**{spec.org_field: org_id})
+    for field in spec.required:
+        queryset = queryset.exclude(**{f"{field}__isnull": True})
+    if since is not None and spec.time_field:
+        queryset = queryset.filter(**{f"{spec.time_field}__gte": since})
+
+    group = {}
+    if spec.time_field:
+        group["rollup_period"] = TruncHour(spec.time_field, tzinfo=dt_timezone.utc)
+    if spec.dimension_field:
+        group["rollup_dimension"] = F(spec.dimension_field)
+    if spec.user_field:
+        group["rollup_user"] = F(spec.user_field)
+    aggregates = {"rollup_count": Count("pk")}
+    if spec.value_field:
+        aggregates["rollup_value"] = Sum(spec.value_field)
+
+    rows = queryset.values(**group).annotate(**aggregates).order_by() if group else [queryset.aggregate(**aggregates)]
+    for row in rows:
+        if not row["rollup_count"]:
+            continue
+        _add_row(
+            cells, spec, org_id,
+            row.get("rollup_period", EPOCH),
+            _dimension(row.get("rollup_dimension")) if spec.dimension_field else "",
+            row.get("rollup_user"),
+            row["rollup_count"],
+            int(row.get("rollup_value") or 0),
+        )
+
+
+def _replace(org_id, since=None):
+    """Recount gauges, and hour cells from ``since`` (all of history when None)."""
+    cells = {}
+    for spec in SPECS:
+        _recount(cells, spec, org_id, since)
+
+    stale = AnalyticsRollup.objects.filter(organization_id=org_id)
+    if since is None:
+        stale.delete()
+    else:
+        stale.filter(Q(bucket=TOTAL) | Q(bucket=HOUR, period_start__gte=since)).delete()
+    _upsert(cells)
+
+
+def rebuild(org_id, now=None, unbuilt_only=False):
+    """Recompute every cell of an org from scratch, then compact.
+
+    With ``unbuilt_only`` an org that has been built meanwhile is left alone.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        state, _ = AnalyticsRollupState.objects.select_for_update().get_or_create(organization_id=org_id)
+        if unbuilt_only and state.built_at is not None:
+            return state
+        _replace(org_id)
+        state.built_at = state.refreshed_at = now
+        state.compacted_through = None
+        state.save()
+    compact(org_id, now)
+    return state
+
+
+def refresh(org_id, now=None):
+    """Recount gauges and the last ANALYTICS_ROLLUP_REFRESH_DAYS of hour cells."""
+    now = now or timezone.now()
+    state = AnalyticsRollupState.objects.filter(organization_id=org_id).first()
+    if state is None or state.built_at is None:
+        return rebuild(org_id, now)
+
+    since = _floor_hour(now - timedelta(days=getattr(settings, "ANALYTICS_ROLLUP_REFRESH_DAYS", 31)))
+    with transaction.atomic():
+        state = AnalyticsRollupState.objects.select_for_update().get(pk=state.pk)
+        if state.compacted_through:
+            # Compacted periods only have day cells; recounting them as hours would double them.
+            since = max(since, state.compacted_through)
+        _replace(org_id, since)
+        state.refreshed_at = now
+        state.save(update_fields=["refreshed_at"])
+    compact(org_id, now)
+    return state
+
+
+def compact(org_id, now=None):
+    """Fold hour cells older than the hourly horizon into day cells."""
+    horizon = hourly_horizon(now)
+    with transaction.atomic():
+        state, _ = AnalyticsRollupState.objects.select_for_update().get_or_create(organization_id=org_id)
+        hours = AnalyticsRollup.objects.filter(organization_id=org_id, bucket=HOUR, period_start__lt=horizon)
+        days = (
+            hours.values("user_id", "metric", "dimension", day=TruncDay("period_start", tzinfo=dt_timezone.utc))
+            .annotate(day_count=Sum("count"), day_value=Sum("value"))
+            .order_by()
+        )
+        cells = {
+            (org_id, row["user_id"], DAY, row["day"], row["metric"], row["dimension"]): [row["day_count"], row["day_value"]]
+            for row in days
+        }
+        _upsert(cells)
+        hours.delete()
+        if state.compacted_through is None or state.compacted_through < horizon:
+            state.compacted_through = horizon
+            state.save(update_fields=["compacted_through"])
+    return len(cells)
+
+
+# ----------------------------------------------------------------------------
+# Reads
+# ----------------------------------------------------------------------------
+
+BUILD_QUEUE_SECONDS = 300
+
+
+def ensure_built(org_id):
+    """Whether an org's rollups are built; if not, queue the first build.
+
+    Callers read from the raw tables until it has finished.
+    """
+    if AnalyticsRollupState.objects.filter(organization_id=org_id, built_at__isnull=False).exists():
+        return True
+    from apps.organizations.tasks import build_org_analytics_rollups
+
+    # Only throttles repeat queueing from this process; the task skips orgs
+    # that are already built.
+    if cache.add(f"analytics_rollups:build:{org_id}", 1, BUILD_QUEUE_SECONDS):
+        transaction.on_commit(lambda: build_org_analytics_rollups.delay(org_id))
+    return False
+
+
+def _raw_cells(org_id, metrics, since=None):
+    cells = {}
+    for spec in SPECS:
+        if spec.metric in metrics:
+            _recount(cells, spec, org_id, since)
+    return cells
+
+
+def gauges(org_id, metrics):
+    """{(metric, dimension): (count, value)} for org-wide gauge cells."""
+    if not ensure_built(org_id):
+        return {
+            (metric, dimension): tuple(totals)
+            for (_org, user_id, bucket, _period, metric, dimension), totals in _raw_cells(org_id, metrics).items()
+            if user_id == 0 and bucket == TOTAL
+        }
+    rows = AnalyticsRollup.objects.filter(
+        organization_id=org_id, user_id=0, bucket=TOTAL, metric__in=list(metrics),
+    ).values_list("metric", "dimension", "count", "value")
+    return {(metric, dimension): (count, value) for metric, dimension, count, value in rows}
+
+
+def window(org_id, metrics, since, per_user=False):
+    """Event totals since ``since``.
+
+    Returns {(metric, dimension): (count, value)}, or with ``per_user``
+    {(metric, dimension, user_id): (count, value)} over user cells only.
+    """
+    if not ensure_built(org_id):
+        totals = {}
+        for (_org, user_id, bucket, _period, metric, dimension), (count, value) in _raw_cells(
+            org_id, metrics, _floor_hour(since)
+        ).items():
+            if bucket != HOUR or (user_id > 0) != per_user:
+                continue
+            total = totals.setdefault((metric, dimension, user_id) if per_user else (metric, dimension), [0, 0])
+            total[0] += count
+            total[1] += value
+        return {key: tuple(total) for key, total in totals.items()}
+    cells = AnalyticsRollup.objects.filter(
+        Q(bucket=HOUR, period_start__gte=_floor_hour(since)) | Q(bucket=DAY, period_start__gte=_floor_day(since)),
+        organization_id=org_id,
+        metric__in=list(metrics),
+    )
+    cells = cells.filter(user_id__gt=0) if per_user else cells.filter(user_id=0)
+    keys = ["metric", "dimension", "user_id"] if per_user else ["metric", "dimension"]
+    rows = cells.values(*keys).annotate(total_count=Sum("count"), total_value=Sum("value")).order_by()
+    return {tuple(row[key] for key in keys): (row["total_count"], row["total_value"]) for row in rows}
+
+
+def sum_cells(cells, metric, dimension=None):
+    """(count, value) summed over a metric's cells, optionally one dimension only."""
+    count = value = 0
+    for key, (cell_count, cell_value) in cells.items():
+        if key[0] == metric and (dimension is None or key[1] == dimension):
+            count += cell_count
+            value += cell_value
+    return count, value
@@ -3,4 +3,9 @@ from django.apps import AppConfig
 class OrganizationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.organizations'
-    verbose_name = 'Organizations'
\ No newline at end of file
+    verbose_name = 'Organizations'
+
+    def ready(self):
+        from apps.organizations.analytics_rollups import connect_signals
+
+        connect_signals()
@@ -0,0 +1,113 @@
+"""Background export jobs.
+
+Large exports run in a Celery worker instead of inside the request. A job
+walks its sections (one per exported model) in id order and writes every
+`shard_size` rows to its own file in export storage, so clients download
+finished shards rather than holding a request open. See export_jobs.py.
+
+- `ExportShard` rows are the manifest: one per written file, inserted as
+  soon as the file is stored. Each records the last id it covers, which is
+  where a resumed run picks up after a worker crash.
+- `claim_token` / `heartbeat_at` keep a single worker on a job. A run whose
+  heartbeat goes stale can be claimed by another worker.
+"""
+
+from __future__ import annotations
+
+from django.db import models
+
+from apps.organizations.models import Organization, User
+
+
+class ExportJob(models.Model):
+    KIND_DATA = "data"
+    KIND_RECORDS = "records"
+    KIND_PDF = "pdf"
+    KIND_CHOICES = [
+        (KIND_DATA, "Organization data"),
+        (KIND_RECORDS, "Record list"),
+        (KIND_PDF, "Bulk PDF"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="export_jobs"
+    )
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="export_jobs"
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    sections = models.JSONField(default=list)
+    format = models.CharField(max_length=16)
+    options = models.JSONField(default=dict, blank=True)
+    shard_size = models.PositiveIntegerField()
+
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True
+    )
+    total_rows = models.PositiveIntegerField(default=0)
+    exported_rows = models.PositiveIntegerField(default=0)
+    completed_sections = models.JSONField(default=list, blank=True)
+    manifest_path = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    claim_token = models.CharField(max_length=32, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "export_jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["organization", "-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} export {self.pk} ({self.status})"
+
+    @property
+    def progress(self) -> float:
+        if self.status == self.STATUS_COMPLETED:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.exported_rows / self.total_rows, 1.0)
+
+
+class ExportShard(models.Model):
+    """One file written by an export job; ``position`` is its place in the manifest."""
+
+    job = models.ForeignKey(ExportJob, on_delete=models.CASCADE, related_name="shards")
+    position = models.PositiveIntegerField()
+    section = models.CharField(max_length=64)
+    index = models.PositiveIntegerField()
+    path = models.CharField(max_length=255)
+    rows = models.PositiveIntegerField()
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    bytes = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    content_type = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = "export_shards"
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(fields=["job", "position"], name="export_shard_job_position"),
+        ]
+
+    def __str__(self):
+        return f"{self.section} shard {self.index} of export {self.job_id}"
@@ -0,0 +1,364 @@
+"""
+Background export jobs
+A job is a list of sections (one exported model each). Each section is read
+in id order, ``shard_size`` rows at a time, and every window is written to
+its own file in export storage and recorded as an ExportShard row before the
+next window is read. A resumed run skips completed sections and continues
+each section after the last id in its manifest, so a worker crash costs at
+most one shard of work. Shard files are named after the claim that wrote
+them, so a stalled worker that wakes up mid-render never overwrites the file
+its successor recorded.
+"""
+import hashlib
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .export_job_models import ExportJob, ExportShard
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'pdf': 'application/pdf',
+}
+
+_storage = None
+_storage_config = None
+
+
+def export_storage():
+    """Storage backend for shard files, configured by DATA_EXPORT_STORAGE."""
+    global _storage, _storage_config
+    storage_config = (getattr(settings, 'DATA_EXPORT_STORAGE', None) or {}, settings.DATA_EXPORT_ROOT)
+    if _storage is None or _storage_config != storage_config:
+        backend, root = storage_config
+        if backend.get('BACKEND'):
+            _storage = import_string(backend['BACKEND'])(**backend.get('OPTIONS', {}))
+        else:
+            _storage = FileSystemStorage(location=root)
+        _storage_config = storage_config
+    return _storage
+
+
+@dataclass
+class ExportSection:
+    name: str
+    extension: str
+    count: Callable[[], int]
+    # fetch(after_id, limit) -> up to ``limit`` rows with ids above after_id, in id order
+    fetch: Callable[[object, int], list]
+    render: Callable[[list], bytes]
+
+
+def _row_id(row):
+    return row['id'] if isinstance(row, dict) else row.pk
+
+
+def _window(queryset, after_id, limit):
+    if after_id is not None:
+        queryset = queryset.filter(id__gt=after_id)
+    return list(queryset[:limit])
+
+
+def _data_section(job, name):
+    from .export_service import DataExportService
+
+    organization = job.organization
+
+    def fetch(after_id, limit):
+        return list(DataExportService.rows(organization, name, after_id=after_id, limit=limit))
+
+    return ExportSection(
+        name=name,
+        extension=job.format,
+        count=lambda: DataExportService.queryset(organization, name).count(),
+        fetch=fetch,
+        render=lambda rows: DataExportService.render(name, rows, job.format).encode('utf-8'),
+    )
+
+
+def _records_section(job, name):
+    import csv
+    import io
+
+    from .import_export_views import EXPORT_SOURCES, export_queryset
+
+    queryset = export_queryset(name, job.organization)
+    fields = EXPORT_SOURCES[name][1]
+
+    def render(rows):
+        if job.format == 'csv':
+            output = io.StringIO()
+            writer = csv.DictWriter(output, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+            return output.getvalue().encode('utf-8')
+        return json.dumps(rows, indent=2, default=str).encode('utf-8')
+
+    return ExportSection(
+        name=name,
+        extension=job.format,
+        count=queryset.count,
+        fetch=lambda after_id, limit: _window(queryset, after_id, limit),
+        render=render,
+    )
+
+
+def _pdf_section(job, name):
+    from .pdf_export import build_bulk_pdf, bulk_pdf_queryset
+
+    queryset = bulk_pdf_queryset(name, job.organization, job.options.get('ids', []))
+    return ExportSection(
+        name=name,
+        extension='pdf',
+        count=queryset.count,
+        fetch=lambda after_id, limit: _window(queryset, after_id, limit),
+        render=lambda items: build_bulk_pdf(name, items),
+    )
+
+
+SECTION_BUILDERS = {
+    ExportJob.KIND_DATA: _data_section,
+    ExportJob.KIND_RECORDS: _records_section,
+    ExportJob.KIND_PDF: _pdf_section,
+}
+
+
+def job_sections(job):
+    return [SECTION_BUILDERS[job.kind](job, name) for name in job.sections]
+
+
+def start_export_job(user, kind, sections, format, options=None, shard_size=None):
+    """Create a job for the user's organization and queue it once the row is committed."""
+    from .tasks import run_export_job
+
+    try:
+        shard_size = int(shard_size) if shard_size else 0
+    except (TypeError, ValueError):
+        shard_size = 0
+    if kind == ExportJob.KIND_PDF:
+        # A PDF shard is rendered in one piece, so it stays small.
+        default = limit = getattr(settings, 'DATA_EXPORT_PDF_SHARD_ROWS', 100)
+    else:
+        default = getattr(settings, 'DATA_EXPORT_SHARD_ROWS', 10000)
+        limit = getattr(settings, 'DATA_EXPORT_MAX_SHARD_ROWS', 50000)
+    job = ExportJob.objects.create(
+        organization=user.organization,
+        requested_by=user,
+        kind=kind,
+        sections=list(sections),
+        format=format,
+        options=options or {},
+        shard_size=min(shard_size, limit) if shard_size > 0 else default,
+    )
+    transaction.on_commit(lambda: run_export_job.delay(job.id))
+    return job
+
+
+def _stall_seconds():
+    return getattr(settings, 'DATA_EXPORT_STALL_SECONDS', 600)
+
+
+def claim(job_id):
+    """
+    Take ownership of a pending job, or of a running one whose worker stopped
+    heartbeating. Returns the claimed job, or None if someone else holds it.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    stale = now - timedelta(seconds=_stall_seconds())
+    claimable = Q(status=ExportJob.STATUS_PENDING) | Q(
+        status=ExportJob.STATUS_RUNNING, heartbeat_at__lt=stale
+    )
+    job = ExportJob.objects.filter(claimable, pk=job_id).first()
+    if job is None:
+        return None
+    claimed = ExportJob.objects.filter(claimable, pk=job_id, claim_token=job.claim_token).update(
+        status=ExportJob.STATUS_RUNNING,
+        claim_token=token,
+        heartbeat_at=now,
+        started_at=job.started_at or now,
+        attempts=job.attempts + 1,
+        error='',
+    )
+    if not claimed:
+        return None
+    return ExportJob.objects.select_related('organization').get(pk=job_id)
+
+
+class ClaimLost(Exception):
+    """Another worker took the job over; stop without touching it further."""
+
+
+def _checkpoint(job, **fields):
+    fields['heartbeat_at'] = timezone.now()
+    updated = ExportJob.objects.filter(pk=job.pk, claim_token=job.claim_token).update(**fields)
+    if not updated:
+        raise ClaimLost(job.pk)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def shard_path(job, section, index):
+    return (
+        f"exports/{job.organization_id}/{job.pk}/"
+        f"{section.name}-{index:05d}-{job.claim_token[:8]}.{section.extension}"
+    )
+
+
+def _write(name, content):
+    storage = export_storage()
+    # Rewriting a shard after a crash must keep its name, not get a suffixed copy.
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def run(job_id):
+    """Run (or resume) a job. Returns the job, or None if it could not be claimed."""
+    job = claim(job_id)
+    if job is None:
+        return None
+    try:
+        sections = job_sections(job)
+        if not job.total_rows:
+            _checkpoint(job, total_rows=sum(section.count() for section in sections))
+        for section in sections:
+            if section.name not in job.completed_sections:
+                _export_section(job, section)
+        manifest_path = _write(
+            f"exports/{job.organization_id}/{job.pk}/manifest.json",
+            json.dumps(manifest(job), indent=2).encode('utf-8'),
+        )
+        _checkpoint(
+            job, status=ExportJob.STATUS_COMPLETED, manifest_path=manifest_path, completed_at=timezone.now(),
+        )
+    except ClaimLost:
+        logger.info("Export job %s was taken over by another worker", job_id)
+        return None
+    except Exception as exc:
+        logger.exception("Export job %s failed", job_id)
+        try:
+            _checkpoint(job, status=ExportJob.STATUS_FAILED, error=str(exc)[:1000])
+        except ClaimLost:
+            return None
+    return job
+
+
+def _record_shard(job, shard, **fields):
+    """Checkpoint the job and insert its new shard row together."""
+    with transaction.atomic():
+        _checkpoint(job, **fields)
+        ExportShard.objects.create(job=job, **shard)
+
+
+def _export_section(job, section):
+    last = job.shards.filter(section=section.name).order_by('-position').first()
+    after_id = last.last_id if last else None
+    index = last.index + 1 if last else 0
+    position = job.shards.count()
+    while True:
+        rows = section.fetch(after_id, job.shard_size)
+        if rows:
+            content = section.render(rows)
+            name = _write(shard_path(job, section, index), content)
+            last_id = _row_id(rows[-1])
+            shard = {
+                'position': position,
+                'section': section.name,
+                'index': index,
+                'path': name,
+                'rows': len(rows),
+                'first_id': _row_id(rows[0]),
+                'last_id': last_id,
+                'bytes': len(content),
+                'sha256': hashlib.sha256(content).hexdigest(),
+                'content_type': CONTENT_TYPES.get(section.extension, 'application/octet-stream'),
+            }
+            done = len(rows) < job.shard_size
+            try:
+                _record_shard(
+                    job, shard,
+                    exported_rows=job.exported_rows + len(rows),
+                    completed_sections=job.completed_sections + ([section.name] if done else []),
+                )
+            except ClaimLost:
+                export_storage().delete(name)
+                raise
+            after_id = last_id
+            index += 1
+            position += 1
+        else:
+            done = True
+            _checkpoint(job, completed_sections=job.completed_sections + [section.name])
+        if done:
+            return
+
+
+def manifest(job):
+    return {
+        'job_id': job.pk,
+        'kind': job.kind,
+        'format': job.format,
+        'sections': job.sections,
+        'completed_sections': job.completed_sections,
+        'shard_size': job.shard_size,
+        'total_rows': job.total_rows,
+        'exported_rows': job.exported_rows,
+        'shards': [shard_entry(shard) for shard in job.shards.all()],
+    }
+
+
+def shard_entry(shard):
+    return {
+        'section': shard.section,
+        'index': shard.index,
+        'path': shard.path,
+        'rows': shard.rows,
+        'first_id': shard.first_id,
+        'last_id': shard.last_id,
+        'bytes': shard.bytes,
+        'sha256': shard.sha256,
+        'content_type': shard.content_type,
+        'download_url': f"/api/organizations/export/jobs/{shard.job_id}/shards/{shard.position}/",
+    }
+
+
+def serialize_job(job):
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': round(job.progress, 4),
+        'error': job.error,
+        'attempts': job.attempts,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+        'manifest': manifest(job),
+    }
+
+
+def stalled_job_ids():
+    """Jobs whose worker stopped heartbeating, or that were never picked up."""
+    stale = timezone.now() - timedelta(seconds=_stall_seconds())
+    return list(
+        ExportJob.objects.filter(
+            Q(status=ExportJob.STATUS_RUNNING, heartbeat_at__lt=stale)
+            | Q(status=ExportJob.STATUS_PENDING, created_at__lt=stale)
+        ).values_list('id', flat=True)
+    )
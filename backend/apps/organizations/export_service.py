@@ -1,129 +1,300 @@
-import json
+"""
+Organization data export
+Rows are read with ``iterator(chunk_size=...)`` and serialized one at a time,
+so an export streams in constant memory however large the organization is.
+``DataExportService.stream`` yields encoded bytes (optionally gzip-compressed)
+for ``StreamingHttpResponse``; the ``export_*`` helpers keep returning whole
+strings for callers that want the full document.
+"""
 import csv
-from io import StringIO
-from django.http import HttpResponse
-from apps.conversations.models import Conversation
+import json
+import zlib
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.agile.models import Issue, Project, Sprint
+from apps.conversations.models import Conversation, ConversationReply
 from apps.decisions.models import Decision
-from apps.agile.models import Project, Issue, Sprint
+
+SECTIONS = ('conversations', 'decisions', 'projects')
+DATA_TYPES = SECTIONS + ('all',)
+FORMATS = ('json', 'ndjson', 'csv')
+
+# Serialized text is coalesced into blocks of about this size before it is
+# encoded (and compressed), instead of yielding one tiny chunk per row.
+WRITE_BUFFER_SIZE = 64 * 1024
+
+CSV_COLUMNS = {
+    'conversations': [
+        ('ID', 'id'), ('Title', 'title'), ('Description', 'description'),
+        ('Created By', 'created_by'), ('Created At', 'created_at'), ('Message Count', 'message_count'),
+    ],
+    'decisions': [
+        ('ID', 'id'), ('Title', 'title'), ('Status', 'status'), ('Impact', 'impact_level'),
+        ('Created By', 'created_by'), ('Created At', 'created_at'),
+    ],
+    'projects': [
+        ('ID', 'id'), ('Name', 'name'), ('Key', 'key'), ('Issue Count', 'issue_count'),
+        ('Sprint Count', 'sprint_count'), ('Created At', 'created_at'),
+    ],
+}
+
+
+def _chunk_size():
+    return getattr(settings, 'DATA_EXPORT_CHUNK_SIZE', 2000)
+
+
+def _name(user):
+    if user is None:
+        return None
+    return user.full_name or user.get_full_name()
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back to csv.writer."""
+
+    def write(self, value):
+        return value
+
 
 class DataExportService:
     @staticmethod
-    def export_conversations(organization, format='json'):
-        conversations = Conversation.objects.filter(organization=organization).prefetch_related('messages')
-        
-        data = []
-        for conv in conversations:
-            messages = [{
-                'author': msg.author.full_name,
-                'content': msg.content,
-                'created_at': msg.created_at.isoformat()
-            } for msg in conv.messages.all()]
-            
-            data.append({
-                'id': conv.id,
-                'title': conv.title,
-                'description': conv.description,
-                'created_by': conv.created_by.full_name if conv.created_by else None,
-                'created_at': conv.created_at.isoformat(),
-                'messages': messages
-            })
-        
-        if format == 'json':
-            return json.dumps(data, indent=2)
-        elif format == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-            writer.writerow(['ID', 'Title', 'Description', 'Created By', 'Created At', 'Message Count'])
-            for item in data:
-                writer.writerow([
-                    item['id'],
-                    item['title'],
-                    item['description'],
-                    item['created_by'],
-                    item['created_at'],
-                    len(item['messages'])
-                ])
-            return output.getvalue()
-    
+    def queryset(organization, data_type):
+        """Base queryset for one section, ordered by id so it can be read in keyset windows."""
+        if data_type == 'conversations':
+            replies = ConversationReply.objects.select_related('author').order_by('created_at', 'id')
+            return (
+                Conversation.objects.filter(organization=organization)
+                .select_related('author')
+                .prefetch_related(Prefetch('replies', queryset=replies))
+                .order_by('id')
+            )
+        if data_type == 'decisions':
+            return (
+                Decision.objects.filter(organization=organization)
+                .select_related('decision_maker')
+                .order_by('id')
+            )
+        if data_type == 'projects':
+            issues = Issue.objects.only('id', 'project_id', 'key', 'title', 'status', 'priority').order_by('id')
+            # A correlated count per project; joining issues and sprints in one
+            # GROUP BY would expand every project to issues x sprints rows.
+            sprint_count = (
+                Sprint.objects.filter(project=OuterRef('pk'))
+                .order_by()
+                .values('project')
+                .annotate(count=Count('id'))
+                .values('count')
+            )
+            return (
+                Project.objects.filter(organization=organization)
+                .annotate(sprint_count=Coalesce(Subquery(sprint_count), 0))
+                .prefetch_related(Prefetch('issues', queryset=issues))
+                .order_by('id')
+            )
+        raise ValueError(f"Unsupported export type: {data_type}")
+
     @staticmethod
-    def export_decisions(organization, format='json'):
-        decisions = Decision.objects.filter(organization=organization)
-        
-        data = [{
+    def rows(organization, data_type, after_id=None, limit=None):
+        """Yield serialized rows of one section, optionally only ids after ``after_id``."""
+        queryset = DataExportService.queryset(organization, data_type)
+        if after_id is not None:
+            queryset = queryset.filter(id__gt=after_id)
+        if limit is not None:
+            queryset = queryset[:limit]
+        serialize = {
+            'conversations': DataExportService._conversation_row,
+            'decisions': DataExportService._decision_row,
+            'projects': DataExportService._project_row,
+        }[data_type]
+        for obj in queryset.iterator(chunk_size=_chunk_size()):
+            yield serialize(obj)
+
+    @staticmethod
+    def conversation_rows(organization):
+        return DataExportService.rows(organization, 'conversations')
+
+    @staticmethod
+    def decision_rows(organization):
+        return DataExportService.rows(organization, 'decisions')
+
+    @staticmethod
+    def project_rows(organization):
+        return DataExportService.rows(organization, 'projects')
+
+    @staticmethod
+    def _conversation_row(conv):
+        messages = [{
+            'author': _name(reply.author),
+            'content': reply.content,
+            'created_at': reply.created_at.isoformat(),
+        } for reply in conv.replies.all()]
+        return {
+            'id': conv.id,
+            'title': conv.title,
+            'description': conv.content,
+            'created_by': _name(conv.author),
+            'created_at': conv.created_at.isoformat(),
+            'message_count': len(messages),
+            'messages': messages,
+        }
+
+    @staticmethod
+    def _decision_row(dec):
+        return {
             'id': dec.id,
             'title': dec.title,
             'description': dec.description,
             'status': dec.status,
-            'decision_type': dec.decision_type,
-            'created_by': dec.created_by.full_name if dec.created_by else None,
+            'impact_level': dec.impact_level,
+            'created_by': _name(dec.decision_maker),
             'created_at': dec.created_at.isoformat(),
-            'locked_at': dec.locked_at.isoformat() if dec.locked_at else None
-        } for dec in decisions]
-        
-        if format == 'json':
-            return json.dumps(data, indent=2)
-        elif format == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-            writer.writerow(['ID', 'Title', 'Status', 'Type', 'Created By', 'Created At'])
-            for item in data:
-                writer.writerow([
-                    item['id'],
-                    item['title'],
-                    item['status'],
-                    item['decision_type'],
-                    item['created_by'],
-                    item['created_at']
-                ])
-            return output.getvalue()
-    
+            'locked_at': _isoformat(dec.locked_at),
+        }
+
+    @staticmethod
+    def _project_row(proj):
+        return {
+            'id': proj.id,
+            'name': proj.name,
+            'key': proj.key,
+            'description': proj.description,
+            'created_at': proj.created_at.isoformat(),
+            'issue_count': len(proj.issues.all()),
+            'sprint_count': proj.sprint_count,
+            'issues': [{
+                'key': issue.key,
+                'title': issue.title,
+                'status': issue.status,
+                'priority': issue.priority,
+            } for issue in proj.issues.all()],
+        }
+
+    @staticmethod
+    def iter_json(organization, data_type):
+        """Yield a JSON document piece by piece: an array, or an object of arrays for ``all``."""
+        if data_type != 'all':
+            yield from DataExportService._json_array(DataExportService.rows(organization, data_type))
+            return
+        yield '{'
+        for index, name in enumerate(SECTIONS):
+            yield f'{", " if index else ""}{json.dumps(name)}: '
+            yield from DataExportService._json_array(DataExportService.rows(organization, name))
+        yield '}'
+
+    @staticmethod
+    def iter_ndjson(organization, data_type):
+        """Yield one JSON object per line; ``all`` tags each line with its ``type``."""
+        if data_type != 'all':
+            for row in DataExportService.rows(organization, data_type):
+                yield json.dumps(row) + '\n'
+            return
+        for name in SECTIONS:
+            for row in DataExportService.rows(organization, name):
+                yield json.dumps({'type': name, **row}) + '\n'
+
+    @staticmethod
+    def iter_csv(organization, data_type):
+        return DataExportService.csv_lines(data_type, DataExportService.rows(organization, data_type))
+
+    @staticmethod
+    def csv_lines(data_type, rows):
+        """Yield the CSV header and one line per already-serialized row."""
+        columns = CSV_COLUMNS[data_type]
+        writer = csv.writer(_Echo())
+        yield writer.writerow([header for header, _ in columns])
+        for row in rows:
+            yield writer.writerow([row[key] for _, key in columns])
+
+    @staticmethod
+    def render(data_type, rows, format):
+        """Serialize a finite list of rows of one section as a standalone document."""
+        if format == 'ndjson':
+            return ''.join(json.dumps(row) + '\n' for row in rows)
+        if format == 'csv':
+            return ''.join(DataExportService.csv_lines(data_type, rows))
+        return ''.join(DataExportService._json_array(rows))
+
+    @staticmethod
+    def stream(organization, data_type='all', format='json', compress=False):
+        """
+        Yield the export as bytes for a StreamingHttpResponse.
+        ``all`` has no CSV form and is written as JSON, like the buffered export.
+        """
+        if data_type not in DATA_TYPES or format not in FORMATS:
+            raise ValueError(f"Unsupported export: {data_type}/{format}")
+        if format == 'ndjson':
+            pieces = DataExportService.iter_ndjson(organization, data_type)
+        elif format == 'csv' and data_type != 'all':
+            pieces = DataExportService.iter_csv(organization, data_type)
+        else:
+            pieces = DataExportService.iter_json(organization, data_type)
+        chunks = _encoded(pieces)
+        return gzip_chunks(chunks) if compress else chunks
+
+    @staticmethod
+    def export_conversations(organization, format='json'):
+        return DataExportService._render(organization, 'conversations', format)
+
+    @staticmethod
+    def export_decisions(organization, format='json'):
+        return DataExportService._render(organization, 'decisions', format)
+
     @staticmethod
     def export_projects(organization, format='json'):
-        projects = Project.objects.filter(organization=organization)
-        
-        data = []
-        for proj in projects:
-            issues = Issue.objects.filter(project=proj)
-            sprints = Sprint.objects.filter(project=proj)
-            
-            data.append({
-                'id': proj.id,
-                'name': proj.name,
-                'key': proj.key,
-                'description': proj.description,
-                'created_at': proj.created_at.isoformat(),
-                'issue_count': issues.count(),
-                'sprint_count': sprints.count(),
-                'issues': [{
-                    'key': issue.key,
-                    'title': issue.title,
-                    'status': issue.status,
-                    'priority': issue.priority
-                } for issue in issues]
-            })
-        
-        if format == 'json':
-            return json.dumps(data, indent=2)
-        elif format == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-            writer.writerow(['ID', 'Name', 'Key', 'Issue Count', 'Sprint Count', 'Created At'])
-            for item in data:
-                writer.writerow([
-                    item['id'],
-                    item['name'],
-                    item['key'],
-                    item['issue_count'],
-                    item['sprint_count'],
-                    item['created_at']
-                ])
-            return output.getvalue()
-    
+        return DataExportService._render(organization, 'projects', format)
+
     @staticmethod
     def export_all(organization, format='json'):
         """Export all data"""
         return {
-            'conversations': json.loads(DataExportService.export_conversations(organization, 'json')),
-            'decisions': json.loads(DataExportService.export_decisions(organization, 'json')),
-            'projects': json.loads(DataExportService.export_projects(organization, 'json'))
+            name: list(DataExportService.rows(organization, name))
+            for name in SECTIONS
         }
+
+    @staticmethod
+    def _json_array(rows):
+        yield '['
+        for index, row in enumerate(rows):
+            yield (',\n' if index else '\n') + json.dumps(row)
+        yield '\n]'
+
+    @staticmethod
+    def _render(organization, data_type, format):
+        if format == 'json':
+            return ''.join(DataExportService.iter_json(organization, data_type))
+        if format == 'ndjson':
+            return ''.join(DataExportService.iter_ndjson(organization, data_type))
+        if format == 'csv':
+            return ''.join(DataExportService.iter_csv(organization, data_type))
+        return None
+
+
+def _encoded(pieces, size=WRITE_BUFFER_SIZE):
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def gzip_chunks(chunks):
+    """Compress a byte stream into a single gzip member, chunk by chunk."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,53 +1,170 @@
+import logging
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.http import HttpResponse
-from .export_service import DataExportService
-import json
+from django.http import FileResponse, StreamingHttpResponse
+from .export_service import DATA_TYPES, FORMATS, SECTIONS, DataExportService
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def export_data_endpoint(request):
     if request.user.role != 'admin':
         return Response({'error': 'Only admins can export data'}, status=403)
-    
+
     data_type = request.data.get('type', 'all')  # conversations, decisions, projects, all
-    format_type = request.data.get('format', 'json')  # json, csv
-    
-    service = DataExportService()
-    
+    format_type = request.data.get('format', 'json')  # json, ndjson, csv
+    compress = str(request.data.get('compress', '')).lower() in ('1', 'true', 'yes', 'gzip')
+
+    if data_type not in DATA_TYPES:
+        return Response({'error': 'Invalid data type'}, status=400)
+    if format_type not in FORMATS:
+        return Response({'error': 'Invalid format'}, status=400)
+
+    if _wants_background(request):
+        # Large exports: write sharded files in a worker and return the job to poll.
+        from .export_jobs import serialize_job, start_export_job
+        from .models import ExportJob
+        sections = SECTIONS if data_type == 'all' else (data_type,)
+        job = start_export_job(
+            request.user, ExportJob.KIND_DATA, sections, format_type,
+            shard_size=request.data.get('shard_size'),
+        )
+        return Response(serialize_job(job), status=202)
+
+    if data_type == 'all' and format_type == 'csv':
+        format_type = 'json'
+
     try:
-        if data_type == 'conversations':
-            data = service.export_conversations(request.user.organization, format_type)
-        elif data_type == 'decisions':
-            data = service.export_decisions(request.user.organization, format_type)
-        elif data_type == 'projects':
-            data = service.export_projects(request.user.organization, format_type)
-        elif data_type == 'all':
-            data = json.dumps(service.export_all(request.user.organization), indent=2)
-            format_type = 'json'
-        else:
-            return Response({'error': 'Invalid data type'}, status=400)
-        
-        # Create response with appropriate content type
-        if format_type == 'json':
-            response = HttpResponse(data, content_type='application/json')
-            response['Content-Disposition'] = f'attachment; filename="{data_type}_export.json"'
-        else:
-            response = HttpResponse(data, content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="{data_type}_export.csv"'
-        
-        # Log export
-        from .auditlog_models import AuditLog
-        AuditLog.log(
-            organization=request.user.organization,
-            user=request.user,
-            action='export',
-            resource_type=data_type,
-            details={'format': format_type},
-            request=request
+        # Rows are read and serialized as the response is consumed, so errors
+        # and the audit entry are handled by _audited_stream, not here.
+        stream = _audited_stream(
+            DataExportService.stream(request.user.organization, data_type, format_type, compress),
+            request, data_type, {'format': format_type, 'compressed': compress},
         )
-        
+
+        filename = f'{data_type}_export.{format_type}'
+        if compress:
+            response = StreamingHttpResponse(stream, content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = StreamingHttpResponse(stream, content_type=CONTENT_TYPES[format_type])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
     except Exception as e:
         return Response({'error': str(e)}, status=500)
+
+
+def _audited_stream(chunks, request, data_type, details):
+    """Pass the export through, then write its audit entry with the outcome.
+
+    The status is ``completed``, ``failed`` (the export raised after the
+    headers were sent; the client gets a truncated body) or ``aborted`` (the
+    client went away first).
+    """
+    sent = 0
+    status = 'aborted'
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+        status = 'completed'
+    except Exception:
+        status = 'failed'
+        logger.exception("Data export of %s failed for org %s", data_type, request.user.organization_id)
+        raise
+    finally:
+        try:
+            from .auditlog_models import AuditLog
+            AuditLog.log(
+                organization=request.user.organization,
+                user=request.user,
+                action='export',
+                resource_type=data_type,
+                details={**details, 'status': status, 'bytes': sent},
+                request=request
+            )
+        except Exception:
+            logger.exception("Failed to audit data export for org %s", request.user.organization_id)
+
+
+def _wants_background(request):
+    value = request.data.get('background', request.query_params.get('background', ''))
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def _visible_jobs(user):
+    from .models import ExportJob
+    jobs = ExportJob.objects.filter(organization=user.organization)
+    if user.role != 'admin':
+        jobs = jobs.filter(requested_by=user)
+    return jobs
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_jobs_list(request):
+    from .export_jobs import serialize_job
+    jobs = _visible_jobs(request.user).prefetch_related('shards')[:50]
+    return Response([serialize_job(job) for job in jobs])
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_job_detail(request, job_id):
+    from .export_jobs import serialize_job
+    job = _visible_jobs(request.user).filter(pk=job_id).first()
+    if job is None:
+        return Response({'error': 'Export job not found'}, status=404)
+    return Response(serialize_job(job))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def export_job_resume(request, job_id):
+    """Requeue a failed job; it continues after the last shard already written."""
+    from django.db import transaction
+    from .export_jobs import serialize_job
+    from .models import ExportJob
+    from .tasks import run_export_job
+
+    job = _visible_jobs(request.user).filter(pk=job_id).first()
+    if job is None:
+        return Response({'error': 'Export job not found'}, status=404)
+    if job.status != ExportJob.STATUS_FAILED:
+        return Response({'error': f'Job is {job.status}'}, status=409)
+    ExportJob.objects.filter(pk=job.pk, status=ExportJob.STATUS_FAILED).update(status=ExportJob.STATUS_PENDING)
+    job.status = ExportJob.STATUS_PENDING
+    transaction.on_commit(lambda: run_export_job.delay(job.pk))
+    return Response(serialize_job(job), status=202)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_job_shard(request, job_id, position):
+    """Download one finished shard listed in the job manifest."""
+    from .export_jobs import export_storage
+
+    from .models import ExportShard
+
+    shard = ExportShard.objects.filter(job__in=_visible_jobs(request.user), job_id=job_id, position=position).first()
+    if shard is None:
+        return Response({'error': 'Shard not found'}, status=404)
+    storage = export_storage()
+    if not storage.exists(shard.path):
+        return Response({'error': 'Shard file is missing'}, status=404)
+    return FileResponse(
+        storage.open(shard.path, 'rb'),
+        as_attachment=True,
+        filename=f"{shard.section}-{shard.index:05d}.{shard.path.rsplit('.', 1)[-1]}",
+        content_type=shard.content_type,
+    )
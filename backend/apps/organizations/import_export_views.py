@@ -166,6 +166,17 @@ def export_data(request):
     
     if not data_type:
         return Response({'error': 'Type parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if str(request.query_params.get('background', '')).lower() in ('1', 'true', 'yes'):
+        if data_type not in EXPORT_SOURCES:
+            return Response({'error': 'Invalid type'}, status=status.HTTP_400_BAD_REQUEST)
+        from apps.organizations.export_jobs import serialize_job, start_export_job
+        from apps.organizations.models import ExportJob
+        job = start_export_job(
+            request.user, ExportJob.KIND_RECORDS, [data_type], 'csv' if format_type == 'csv' else 'json',
+            shard_size=request.query_params.get('shard_size'),
+        )
+        return Response(serialize_job(job), status=status.HTTP_202_ACCEPTED)
     
     try:
         data = get_export_data(data_type, request.user.organization)
@@ -243,46 +254,31 @@ def import_csv_data(data, data_type, organization):
     return import_json_data(data, data_type, organization)
 
 
+# data_type -> (model, exported fields)
+EXPORT_SOURCES = {
+    'conversations': ('conversations.Conversation', ('id', 'title', 'content', 'created_at')),
+    'decisions': ('decisions.Decision', ('id', 'title', 'description', 'status', 'created_at')),
+    'knowledge': ('knowledge.KnowledgeEntry', ('id', 'title', 'content', 'created_at')),
+    'goals': ('business.Goal', ('id', 'title', 'description', 'status', 'priority', 'created_at')),
+    'meetings': ('business.Meeting', ('id', 'title', 'description', 'meeting_date', 'duration', 'created_at')),
+    'tasks': ('business.Task', ('id', 'title', 'description', 'status', 'priority', 'created_at')),
+}
+
+
+def export_queryset(data_type, organization):
+    """Values queryset for one export type, ordered by id; None for unknown types."""
+    from django.apps import apps
+
+    if data_type not in EXPORT_SOURCES:
+        return None
+    model_label, fields = EXPORT_SOURCES[data_type]
+    model = apps.get_model(model_label)
+    return model.objects.filter(organization=organization).order_by('id').values(*fields)
+
+
 def get_export_data(data_type, organization):
     """Get data for export"""
-    
-    if data_type == 'conversations':
-        from apps.conversations.models import Conversation
-        items = Conversation.objects.filter(organization=organization).values(
-            'id', 'title', 'content', 'created_at'
-        )
-    
-    elif data_type == 'decisions':
-        from apps.decisions.models import Decision
-        items = Decision.objects.filter(organization=organization).values(
-            'id', 'title', 'description', 'status', 'created_at'
-        )
-    
-    elif data_type == 'knowledge':
-        from apps.knowledge.models import KnowledgeEntry
-        items = KnowledgeEntry.objects.filter(organization=organization).values(
-            'id', 'title', 'content', 'created_at'
-        )
-    
-    elif data_type == 'goals':
-        from apps.business.models import Goal
-        items = Goal.objects.filter(organization=organization).values(
-            'id', 'title', 'description', 'status', 'priority', 'created_at'
-        )
-    
-    elif data_type == 'meetings':
-        from apps.business.models import Meeting
-        items = Meeting.objects.filter(organization=organization).values(
-            'id', 'title', 'description', 'meeting_date', 'duration', 'created_at'
-        )
-    
-    elif data_type == 'tasks':
-        from apps.business.models import Task
-        items = Task.objects.filter(organization=organization).values(
-            'id', 'title', 'description', 'status', 'priority', 'created_at'
-        )
-    
-    else:
+    items = export_queryset(data_type, organization)
+    if items is None:
         return []
-    
     return list(items)
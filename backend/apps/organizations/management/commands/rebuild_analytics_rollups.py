@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.organizations.analytics_rollups import rebuild
+from apps.organizations.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Recompute materialized analytics rollups from the raw tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--org-id",
+            type=int,
+            default=None,
+            help="Organization ID. If omitted, rebuilds all organizations.",
+        )
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.all()
+        if options.get("org_id"):
+            organizations = organizations.filter(id=options["org_id"])
+
+        for organization in organizations:
+            rebuild(organization.id)
+            self.stdout.write(self.style.SUCCESS(f"[rebuilt] org={organization.id} {organization.name}"))
@@ -1,3 +1,8 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
 from django.http import HttpResponseForbidden
 from django.utils.deprecation import MiddlewareMixin
 
@@ -11,4 +16,68 @@ class OrganizationMiddleware(MiddlewareMixin):
         
         # Add organization context to request
         request.organization = request.user.organization
-        return None
\ No newline at end of file
+        return None
+
+class RequestInstrumentationMiddleware:
+    """
+    Time every request and the queries it runs, and feed the per-process
+    metrics in monitoring.instrumentation. Works with DEBUG off: queries are
+    observed through connection.execute_wrapper, not connection.queries.
+    A streaming response is recorded once its body has been consumed, so the
+    queries that produce the body count towards the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from .monitoring import QueryRecorder
+
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION_ENABLED', True):
+            return self.get_response(request)
+
+        recorder = QueryRecorder(getattr(settings, 'SLOW_QUERY_MS', 100))
+        start = time.perf_counter()
+        try:
+            with _recording(recorder):
+                response = self.get_response(request)
+        except Exception:
+            self._finish(request, 500, start, recorder)
+            raise
+        if response.streaming and not getattr(response, 'is_async', False):
+            response.streaming_content = self._stream(request, response, response.streaming_content, start, recorder)
+        else:
+            self._finish(request, response.status_code, start, recorder)
+        return response
+
+    def _stream(self, request, response, content, start, recorder):
+        status_code = response.status_code
+        try:
+            with _recording(recorder):
+                yield from content
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            self._finish(request, status_code, start, recorder)
+
+    def _finish(self, request, status_code, start, recorder):
+        from .monitoring import instrumentation
+
+        duration_ms = (time.perf_counter() - start) * 1000
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else '<unresolved>'
+        instrumentation.record_request(
+            f"{request.method} /{route}",
+            status_code,
+            duration_ms,
+            recorder,
+            n_plus_one_threshold=getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5),
+        )
+
+
+def _recording(recorder):
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(recorder))
+    return stack
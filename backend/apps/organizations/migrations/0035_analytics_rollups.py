@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0034_rename_agent_budget_org_ym_idx_org_agent_b_organiz_f8b17f_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('built_at', models.DateTimeField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('compacted_through', models.DateTimeField(blank=True, null=True)),
+                ('organization', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollup_state', to='organizations.organization')),
+            ],
+            options={
+                'db_table': 'analytics_rollup_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(default=0)),
+                ('bucket', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('total', 'Total')], max_length=8)),
+                ('period_start', models.DateTimeField()),
+                ('metric', models.CharField(max_length=48)),
+                ('dimension', models.CharField(blank=True, default='', max_length=100)),
+                ('count', models.BigIntegerField(default=0)),
+                ('value', models.BigIntegerField(default=0)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='organizations.organization')),
+            ],
+            options={
+                'db_table': 'analytics_rollups',
+                'indexes': [models.Index(fields=['organization', 'metric', 'bucket', 'period_start'], name='analytics_r_organiz_463357_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='analyticsrollup',
+            constraint=models.UniqueConstraint(fields=('organization', 'user_id', 'bucket', 'metric', 'dimension', 'period_start'), name='analytics_rollup_cell'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0035_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('data', 'Organization data'), ('records', 'Record list'), ('pdf', 'Bulk PDF')], max_length=16)),
+                ('sections', models.JSONField(default=list)),
+                ('format', models.CharField(max_length=16)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('shard_size', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('exported_rows', models.PositiveIntegerField(default=0)),
+                ('shards', models.JSONField(blank=True, default=list)),
+                ('completed_sections', models.JSONField(blank=True, default=list)),
+                ('manifest_path', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('claim_token', models.CharField(blank=True, max_length=32)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='organizations.organization')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'export_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['organization', '-created_at'], name='export_jobs_organiz_be0f2e_idx')],
+            },
+        ),
+    ]
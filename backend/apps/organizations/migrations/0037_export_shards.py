@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_manifest_entries(apps, schema_editor):
+    ExportJob = apps.get_model('organizations', 'ExportJob')
+    ExportShard = apps.get_model('organizations', 'ExportShard')
+    for job_id, entries in ExportJob.objects.exclude(legacy_shards=[]).values_list('id', 'legacy_shards').iterator():
+        ExportShard.objects.bulk_create([
+            ExportShard(job_id=job_id, position=position, **entry)
+            for position, entry in enumerate(entries or [])
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0036_export_jobs'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='exportjob',
+            old_name='shards',
+            new_name='legacy_shards',
+        ),
+        migrations.CreateModel(
+            name='ExportShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('section', models.CharField(max_length=64)),
+                ('index', models.PositiveIntegerField()),
+                ('path', models.CharField(max_length=255)),
+                ('rows', models.PositiveIntegerField()),
+                ('first_id', models.BigIntegerField()),
+                ('last_id', models.BigIntegerField()),
+                ('bytes', models.PositiveBigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('content_type', models.CharField(max_length=100)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='organizations.exportjob')),
+            ],
+            options={
+                'db_table': 'export_shards',
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='exportshard',
+            constraint=models.UniqueConstraint(fields=('job', 'position'), name='export_shard_job_position'),
+        ),
+        migrations.RunPython(copy_manifest_entries, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='exportjob',
+            name='legacy_shards',
+        ),
+    ]
@@ -324,3 +324,12 @@ from apps.organizations.webhook_models import (  # noqa: E402,F401
     WebhookSubscription,
     WebhookDelivery,
 )
+
+# Analytics rollups — see rollup_models.py.
+from apps.organizations.rollup_models import (  # noqa: E402,F401
+    AnalyticsRollup,
+    AnalyticsRollupState,
+)
+
+# Background export jobs — see export_job_models.py.
+from apps.organizations.export_job_models import ExportJob, ExportShard  # noqa: E402,F401
@@ -2,12 +2,221 @@ from django.http import JsonResponse
 from django.db import connection
 from django.core.cache import cache
 from django.conf import settings
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from collections import deque
+import bisect
+import hmac
+import os
+import socket
+import threading
 import time
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+
+# Latency histogram bucket upper bounds (ms); one more bucket catches the rest.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SLOT_SECONDS = 10
+SLOT_COUNT = 90  # 15 minutes of 10-second slots
+MAX_ENDPOINTS = 500
+OTHER_ENDPOINT = '<other>'
+
+
+def _percentile(histogram, total, quantile, max_ms):
+    """Upper bound of the histogram bucket holding the quantile (max seen for the overflow bucket)."""
+    if not total:
+        return 0.0
+    rank = quantile * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            if index < len(LATENCY_BUCKETS_MS):
+                return float(min(LATENCY_BUCKETS_MS[index], max_ms))
+            return float(max_ms)
+    return float(max_ms)
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() hook for one request: counts queries and
+    their time, and notes slow ones and identical statements run repeatedly.
+    ORM statements keep parameters out of the SQL, so repeats of the same
+    string with different params are the N+1 pattern.
+    """
+
+    def __init__(self, slow_ms):
+        self.slow_ms = slow_ms
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = {}
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.statements[sql] = self.statements.get(sql, 0) + 1
+            if elapsed_ms >= self.slow_ms:
+                self.slow.append((sql, elapsed_ms))
+
+    def duplicates(self, threshold):
+        return [(sql, count) for sql, count in self.statements.items() if count >= threshold]
+
+
+class _EndpointStats:
+    __slots__ = ('requests', 'errors', 'histogram', 'latency_ms', 'max_ms', 'queries', 'query_ms', 'n_plus_one')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_ms = 0.0
+        self.max_ms = 0.0
+        self.queries = 0
+        self.query_ms = 0.0
+        self.n_plus_one = 0
+
+
+class InstrumentationRegistry:
+    """
+    Process-local request and query metrics.
+    Every worker process keeps its own registry and nothing is shared, so a
+    snapshot covers only the process that served it; it is labelled with
+    host and pid, and a scraper aggregates across workers by summing the
+    counters and histograms of each process it sees.
+    Per-endpoint totals and histograms since start (or the last reset), a ring
+    of 10-second slots for windowed error rates and latency percentiles, and
+    bounded ring buffers of slow-query and duplicate-query samples. Updates
+    are a few integer additions under one lock.
+    """
+
+    def __init__(self, sample_size=200):
+        self._lock = threading.Lock()
+        self._sample_size = sample_size
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+            # [slot id, requests, errors, latency histogram, max ms, total ms]
+            self._slots = [None] * SLOT_COUNT
+            self.slow_queries = deque(maxlen=self._sample_size)
+            self.duplicate_queries = deque(maxlen=self._sample_size)
+            self.started_at = time.time()
+
+    def record_request(self, endpoint, status_code, duration_ms, recorder=None, n_plus_one_threshold=5):
+        now = time.time()
+        bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)
+        is_error = status_code >= 500
+        duplicates = recorder.duplicates(n_plus_one_threshold) if recorder else []
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                if len(self._endpoints) >= MAX_ENDPOINTS:
+                    endpoint = OTHER_ENDPOINT
+                    stats = self._endpoints.get(endpoint)
+                if stats is None:
+                    stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.requests += 1
+            stats.errors += is_error
+            stats.histogram[bucket] += 1
+            stats.latency_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            if recorder is not None:
+                stats.queries += recorder.count
+                stats.query_ms += recorder.total_ms
+            stats.n_plus_one += bool(duplicates)
+
+            slot_id = int(now // SLOT_SECONDS)
+            slot = self._slots[slot_id % SLOT_COUNT]
+            if slot is None or slot[0] != slot_id:
+                slot = self._slots[slot_id % SLOT_COUNT] = [slot_id, 0, 0, [0] * (len(LATENCY_BUCKETS_MS) + 1), 0.0, 0.0]
+            slot[1] += 1
+            slot[2] += is_error
+            slot[3][bucket] += 1
+            slot[4] = max(slot[4], duration_ms)
+            slot[5] += duration_ms
+
+        # deque appends are atomic; samples need no lock.
+        if recorder is not None:
+            for sql, elapsed_ms in recorder.slow:
+                self.slow_queries.append({
+                    'endpoint': endpoint, 'sql': sql[:500], 'time_ms': round(elapsed_ms, 2), 'at': now,
+                })
+        for sql, count in duplicates:
+            self.duplicate_queries.append({
+                'endpoint': endpoint, 'sql': sql[:500], 'count': count, 'at': now,
+            })
+
+    def window(self, seconds=300):
+        """(requests, errors, histogram, max_ms, total_ms) over roughly the last ``seconds``."""
+        oldest = int((time.time() - seconds) // SLOT_SECONDS)
+        requests = errors = 0
+        histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        max_ms = total_ms = 0.0
+        with self._lock:
+            for slot in self._slots:
+                if slot is None or slot[0] < oldest:
+                    continue
+                requests += slot[1]
+                errors += slot[2]
+                for index, count in enumerate(slot[3]):
+                    histogram[index] += count
+                max_ms = max(max_ms, slot[4])
+                total_ms += slot[5]
+        return requests, errors, histogram, max_ms, total_ms
+
+    def error_rate(self, seconds=300):
+        requests, errors, _histogram, _max_ms, _total_ms = self.window(seconds)
+        return errors / requests if requests else 0.0
+
+    def latency_percentile(self, quantile, seconds=300):
+        requests, _errors, histogram, max_ms, _total_ms = self.window(seconds)
+        return _percentile(histogram, requests, quantile, max_ms)
+
+    def average_latency(self, seconds=300):
+        requests, _errors, _histogram, _max_ms, total_ms = self.window(seconds)
+        return total_ms / requests if requests else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {
+                name: {
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'avg_ms': round(stats.latency_ms / stats.requests, 2) if stats.requests else 0.0,
+                    'p50_ms': _percentile(stats.histogram, stats.requests, 0.5, stats.max_ms),
+                    'p95_ms': _percentile(stats.histogram, stats.requests, 0.95, stats.max_ms),
+                    'p99_ms': _percentile(stats.histogram, stats.requests, 0.99, stats.max_ms),
+                    'max_ms': round(stats.max_ms, 2),
+                    'histogram': dict(zip([str(b) for b in LATENCY_BUCKETS_MS] + ['+Inf'], stats.histogram)),
+                    'avg_queries': round(stats.queries / stats.requests, 2) if stats.requests else 0.0,
+                    'query_ms': round(stats.query_ms, 2),
+                    'n_plus_one_requests': stats.n_plus_one,
+                }
+                for name, stats in self._endpoints.items()
+            }
+        return {
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'since': datetime.fromtimestamp(self.started_at).isoformat(),
+            'endpoints': endpoints,
+            'slow_queries': list(self.slow_queries),
+            'duplicate_queries': list(self.duplicate_queries),
+        }
+
+
+instrumentation = InstrumentationRegistry()
+
 class HealthCheck:
     """System health checks"""
     
@@ -69,19 +278,21 @@ class PerformanceMonitor:
     
     @staticmethod
     def get_slow_queries(threshold_ms=100):
-        """Get slow database queries"""
-        from django.db import connection
-        from django.test.utils import CaptureQueriesContext
-        
-        slow_queries = []
-        for query in connection.queries:
-            time_ms = float(query['time']) * 1000
-            if time_ms > threshold_ms:
-                slow_queries.append({
-                    'sql': query['sql'][:200],
-                    'time_ms': time_ms
-                })
-        return slow_queries
+        """Get slow database queries recorded by the request instrumentation"""
+        return [
+            {'sql': sample['sql'][:200], 'time_ms': sample['time_ms'], 'endpoint': sample['endpoint']}
+            for sample in list(instrumentation.slow_queries)
+            if sample['time_ms'] > threshold_ms
+        ]
+
+    @staticmethod
+    def get_error_rate(window=300):
+        """Share of requests answered with a 5xx over the last ``window`` seconds"""
+        return instrumentation.error_rate(window)
+
+    @staticmethod
+    def get_latency_percentile(quantile=0.95, window=300):
+        return instrumentation.latency_percentile(quantile, window)
 
 
 class AlertingRules:
@@ -116,12 +327,23 @@ class AlertingRules:
         alerts = []
         
         # Check error rate
-        error_rate = PerformanceMonitor.get_error_rate()
-        if error_rate > AlertingRules.RULES['high_error_rate']['threshold']:
+        rule = AlertingRules.RULES['high_error_rate']
+        error_rate = PerformanceMonitor.get_error_rate(rule['window'])
+        if error_rate > rule['threshold']:
             alerts.append({
                 'rule': 'high_error_rate',
                 'value': error_rate,
-                'severity': 'critical'
+                'severity': rule['severity']
+            })
+
+        # Check p95 response time
+        rule = AlertingRules.RULES['slow_response_time']
+        p95 = PerformanceMonitor.get_latency_percentile(0.95, rule['window'])
+        if p95 > rule['threshold']:
+            alerts.append({
+                'rule': 'slow_response_time',
+                'value': p95,
+                'severity': rule['severity']
             })
         
         return alerts
@@ -154,10 +376,24 @@ class Metrics:
         return query.values('user').distinct().count()
     
     @staticmethod
-    def get_api_latency():
-        """Get average API latency"""
-        from django.db import connection
-        
-        total_time = sum(float(q['time']) for q in connection.queries)
-        avg_time = total_time / len(connection.queries) if connection.queries else 0
-        return avg_time * 1000  # Convert to ms
+    def get_api_latency(window=300):
+        """Get average API latency (ms) over the last ``window`` seconds"""
+        return instrumentation.average_latency(window)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def metrics_view(request):
+    """Instrumentation snapshot of this worker process plus its alerts, for staff or a METRICS_TOKEN holder"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    supplied = request.headers.get('X-Metrics-Token', '')
+    authorized = (token and hmac.compare_digest(supplied.encode(), token.encode())) or (
+        request.user.is_authenticated and request.user.is_staff
+    )
+    if not authorized:
+        return Response({'error': 'Forbidden'}, status=403)
+    payload = instrumentation.snapshot()
+    payload['error_rate_5m'] = PerformanceMonitor.get_error_rate(300)
+    payload['p95_ms_5m'] = PerformanceMonitor.get_latency_percentile(0.95, 300)
+    payload['alerts'] = AlertingRules.check_alerts()
+    return Response(payload)
@@ -167,6 +167,42 @@ def export_decision_pdf(request, pk):
     response['Content-Disposition'] = f'attachment; filename="{decision.title}.pdf"'
     return response
 
+BULK_PDF_MODELS = {
+    'documents': Document,
+    'conversations': Conversation,
+    'decisions': Decision,
+}
+
+
+def bulk_pdf_queryset(item_type, organization, ids):
+    """Items of one type selected for a bulk PDF, ordered by id; None for unknown types."""
+    model = BULK_PDF_MODELS.get(item_type)
+    if model is None:
+        return None
+    return model.objects.filter(id__in=ids, organization=organization).order_by('id')
+
+
+def build_bulk_pdf(item_type, items):
+    """Render items (one per page) into a single PDF and return its bytes."""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.75*inch, bottomMargin=0.75*inch)
+    story = []
+    styles = getSampleStyleSheet()
+
+    for item in items:
+        body = item.description if item_type == 'decisions' else item.content
+        story.append(Paragraph(item.title, styles['Heading1']))
+        story.append(Spacer(1, 0.2*inch))
+        if body:
+            for para in body.split('\n\n'):
+                if para.strip():
+                    story.append(Paragraph(para.replace('\n', '<br/>'), styles['Normal']))
+        story.append(PageBreak())
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def export_bulk_pdf(request):
@@ -176,47 +212,21 @@ def export_bulk_pdf(request):
     
     if not ids:
         return Response({'error': 'No IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if str(request.data.get('background', '')).lower() in ('1', 'true', 'yes'):
+        if item_type not in BULK_PDF_MODELS:
+            return Response({'error': 'Invalid type'}, status=status.HTTP_400_BAD_REQUEST)
+        from .export_jobs import serialize_job, start_export_job
+        from .models import ExportJob
+        job = start_export_job(
+            request.user, ExportJob.KIND_PDF, [item_type], 'pdf', options={'ids': ids},
+            shard_size=request.data.get('shard_size'),
+        )
+        return Response(serialize_job(job), status=status.HTTP_202_ACCEPTED)
+
+    items = bulk_pdf_queryset(item_type, request.user.organization, ids)
+    pdf = build_bulk_pdf(item_type, items if items is not None else [])
     
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.75*inch, bottomMargin=0.75*inch)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    if item_type == 'documents':
-        documents = Document.objects.filter(id__in=ids, organization=request.user.organization)
-        for document in documents:
-            story.append(Paragraph(document.title, styles['Heading1']))
-            story.append(Spacer(1, 0.2*inch))
-            if document.content:
-                for para in document.content.split('\n\n'):
-                    if para.strip():
-                        story.append(Paragraph(para.replace('\n', '<br/>'), styles['Normal']))
-            story.append(PageBreak())
-    
-    elif item_type == 'conversations':
-        conversations = Conversation.objects.filter(id__in=ids, organization=request.user.organization)
-        for conv in conversations:
-            story.append(Paragraph(conv.title, styles['Heading1']))
-            story.append(Spacer(1, 0.2*inch))
-            for para in conv.content.split('\n\n'):
-                if para.strip():
-                    story.append(Paragraph(para.replace('\n', '<br/>'), styles['Normal']))
-            story.append(PageBreak())
-    
-    elif item_type == 'decisions':
-        decisions = Decision.objects.filter(id__in=ids, organization=request.user.organization)
-        for decision in decisions:
-            story.append(Paragraph(decision.title, styles['Heading1']))
-            story.append(Spacer(1, 0.2*inch))
-            if decision.description:
-                for para in decision.description.split('\n\n'):
-                    if para.strip():
-                        story.append(Paragraph(para.replace('\n', '<br/>'), styles['Normal']))
-            story.append(PageBreak())
-    
-    doc.build(story)
-    buffer.seek(0)
-    
-    response = HttpResponse(buffer, content_type='application/pdf')
+    response = HttpResponse(pdf, content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="export.pdf"'
     return response
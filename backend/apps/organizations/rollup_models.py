@@ -0,0 +1,70 @@
+"""Materialized analytics rollups.
+
+Dashboard counters are kept as pre-aggregated cells instead of being
+recounted from raw tables on every request. See analytics_rollups.py for how
+the cells are maintained and read.
+
+- `AnalyticsRollup` — one counter cell per (org, user, bucket, period start,
+  metric, dimension). `user_id` is 0 for org-wide cells. Event metrics
+  (things created at a point in time) live in `hour` cells, compacted into
+  `day` cells once they age out of the hourly horizon. Gauges (current state,
+  e.g. decisions by status) live in a single `total` cell per dimension.
+- `AnalyticsRollupState` — per-org bookkeeping: when the cells were last
+  rebuilt from the raw tables and how far hour cells have been compacted.
+"""
+
+from __future__ import annotations
+
+from django.db import models
+
+from apps.organizations.models import Organization
+
+
+class AnalyticsRollup(models.Model):
+    BUCKET_HOUR = "hour"
+    BUCKET_DAY = "day"
+    BUCKET_TOTAL = "total"
+    BUCKET_CHOICES = [
+        (BUCKET_HOUR, "Hour"),
+        (BUCKET_DAY, "Day"),
+        (BUCKET_TOTAL, "Total"),
+    ]
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="analytics_rollups"
+    )
+    # Plain id rather than a FK: 0 marks org-wide cells and keeps the unique
+    # constraint usable as an upsert target.
+    user_id = models.BigIntegerField(default=0)
+    bucket = models.CharField(max_length=8, choices=BUCKET_CHOICES)
+    period_start = models.DateTimeField()
+    metric = models.CharField(max_length=48)
+    dimension = models.CharField(max_length=100, blank=True, default="")
+
+    count = models.BigIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "analytics_rollups"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["organization", "user_id", "bucket", "metric", "dimension", "period_start"],
+                name="analytics_rollup_cell",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["organization", "metric", "bucket", "period_start"]),
+        ]
+
+
+class AnalyticsRollupState(models.Model):
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, related_name="analytics_rollup_state"
+    )
+    built_at = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    # Hour cells before this instant have been folded into day cells.
+    compacted_through = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "analytics_rollup_state"
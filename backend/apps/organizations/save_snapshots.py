@@ -0,0 +1,56 @@
+"""
+Stored values of rows about to be updated
+Write-time handlers that diff an update against the stored row (analytics
+rollups, agile ML deltas, keyword profiles) register the fields they need
+with ``track``. One pre_save hook per model then reads the union of what the
+save's handlers need in a single query, and each handler takes its slice
+with ``stored`` in post_save.
+"""
+from django.db.models.signals import pre_save
+
+_handlers = {}
+
+
+def track(model, name, fields, wants=None):
+    """Snapshot ``fields`` (attnames) of ``model`` for handler ``name`` before updates.
+
+    Saves whose ``update_fields`` touch none of ``fields`` skip the handler,
+    and so does an instance for which ``wants(instance)`` is false.
+    """
+    _handlers.setdefault(model, {})[name] = (frozenset(fields), wants)
+    pre_save.connect(_before_save, sender=model, dispatch_uid=f"save_snapshot_{model._meta.label_lower}")
+
+
+def _before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._stored_snapshot = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    touched = None
+    if update_fields is not None:
+        touched = {sender._meta.get_field(name).attname for name in update_fields}
+    names = set()
+    fields = set()
+    for name, (wanted, wants) in _handlers.get(sender, {}).items():
+        if touched is not None and not wanted & touched:
+            continue
+        if wants is not None and not wants(instance):
+            continue
+        names.add(name)
+        fields |= wanted
+    if not names:
+        return
+    row = sender._default_manager.filter(pk=instance.pk).values(*sorted(fields)).order_by().first()
+    instance._stored_snapshot = (frozenset(names), row)
+
+
+def stored(instance, name):
+    """Handler ``name``'s fields as stored before the current save.
+
+    None for inserts, for saves the handler skipped, and when the row was
+    already gone.
+    """
+    snapshot = instance.__dict__.get("_stored_snapshot")
+    if snapshot is None or name not in snapshot[0] or snapshot[1] is None:
+        return None
+    fields = _handlers[type(instance)][name][0]
+    return {field: snapshot[1][field] for field in fields}
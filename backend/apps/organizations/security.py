@@ -1,11 +1,76 @@
 from django.core.cache import cache
 from django.http import JsonResponse
 from functools import wraps
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import hashlib
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sliding-window counter over any number of buckets in one round trip.
+# KEYS: (current window key, previous window key) per bucket.
+# ARGV: (limit, window seconds, weight of the previous window) per bucket.
+# Returns {rejected bucket index or 0, current_1, previous_1, current_2, ...}.
+# A rejected request is taken back out of every bucket so it doesn't count.
+SLIDING_WINDOW_LUA = """
+local buckets = #KEYS / 2
+local result = {0}
+for i = 1, buckets do
+    local current = redis.call('INCR', KEYS[2 * i - 1])
+    if current == 1 then
+        redis.call('EXPIRE', KEYS[2 * i - 1], 2 * tonumber(ARGV[3 * i - 1]))
+    end
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    result[2 * i] = current
+    result[2 * i + 1] = previous
+    if result[1] == 0 and previous * tonumber(ARGV[3 * i]) + current > tonumber(ARGV[3 * i - 2]) then
+        result[1] = i
+    end
+end
+if result[1] > 0 then
+    for i = 1, buckets do
+        redis.call('DECR', KEYS[2 * i - 1])
+        result[2 * i] = result[2 * i] - 1
+    end
+end
+return result
+"""
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_at: int  # epoch seconds when the current window ends
+    retry_after: int = 0
+
+    def headers(self):
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset_at),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
 
 class RateLimiter:
-    """Rate limiting for API endpoints"""
+    """Rate limiting for API endpoints
+
+    Each (limit type, client) is a sliding-window counter: the current fixed
+    window plus the previous one weighted by how much of it still overlaps.
+    Authenticated requests also count against an org-wide quota. All buckets
+    are checked and incremented atomically, in one Lua call when
+    RATE_LIMIT_REDIS_URL is set and with cache add/incr otherwise. Clients
+    already known to be over a limit are turned away in-process until their
+    window has slid far enough, without a round trip.
+    """
     
     LIMITS = {
         'login': (5, 300),  # 5 attempts per 5 minutes
@@ -14,6 +79,21 @@ class RateLimiter:
         'api_search': (30, 60),
         'api_write': (50, 60),
     }
+
+    # Org-wide quotas shared by every member; RATE_LIMIT_ORG_QUOTAS overrides per org.
+    ORG_LIMITS = {
+        'api_general': (2000, 60),
+        'api_search': (600, 60),
+        'api_write': (1000, 60),
+    }
+
+    LOCAL_BLOCK_MAX_KEYS = 10000
+
+    _local_blocks = {}
+    _local_lock = threading.Lock()
+    _redis = None
+    _redis_script = None
+    _redis_url = None
     
     @staticmethod
     def get_client_id(request):
@@ -24,27 +104,196 @@ class RateLimiter:
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         ip = x_forwarded_for.split(',')[0] if x_forwarded_for else request.META.get('REMOTE_ADDR')
         return f"ip_{ip}"
-    
+
+    @staticmethod
+    def org_quota(org_id, limit_type):
+        """(limit, window) of the org-wide bucket for this limit type, or None."""
+        from django.conf import settings
+
+        overrides = getattr(settings, 'RATE_LIMIT_ORG_QUOTAS', None) or {}
+        quota = (overrides.get(str(org_id)) or {}).get(limit_type)
+        if quota is None:
+            quota = RateLimiter.ORG_LIMITS.get(limit_type)
+        return tuple(quota) if quota else None
+
     @staticmethod
-    def is_rate_limited(client_id, limit_type='api_general'):
-        """Check if client is rate limited"""
+    def buckets(client_id, limit_type='api_general', org_id=None):
+        """[(key prefix, limit, window)] a request of this type counts against."""
         limit, window = RateLimiter.LIMITS.get(limit_type, (100, 60))
-        key = f"ratelimit:{limit_type}:{client_id}"
-        
-        current = cache.get(key, 0)
-        if current >= limit:
-            return True
-        
-        cache.set(key, current + 1, window)
-        return False
+        buckets = [(f"ratelimit:{limit_type}:{client_id}", limit, window)]
+        if org_id is not None:
+            quota = RateLimiter.org_quota(org_id, limit_type)
+            if quota:
+                buckets.append((f"ratelimit:{limit_type}:org_{org_id}", quota[0], quota[1]))
+        return buckets
+
+    @staticmethod
+    def check(client_id, limit_type='api_general', org_id=None):
+        """Count one request and return a RateLimitResult for it."""
+        now = time.time()
+        buckets = RateLimiter.buckets(client_id, limit_type, org_id)
+
+        blocked = RateLimiter._local_block(buckets, now)
+        if blocked:
+            return blocked
+
+        windows = []
+        for prefix, limit, window in buckets:
+            index = int(now // window)
+            weight = 1 - (now - index * window) / window
+            windows.append((f"{prefix}:{index}", f"{prefix}:{index - 1}", limit, window, weight))
+
+        rejected, counts = RateLimiter._count(windows)
+        results = [
+            RateLimiter._result(now, spec, current, previous, rejected == position + 1)
+            for position, (spec, (current, previous)) in enumerate(zip(windows, counts))
+        ]
+        if rejected:
+            result = results[rejected - 1]
+            RateLimiter._remember_block(buckets[rejected - 1][0], now + result.retry_after, result)
+            return result
+        return min(results, key=lambda result: result.remaining)
+    
+    @staticmethod
+    def is_rate_limited(client_id, limit_type='api_general', org_id=None):
+        """Check if client is rate limited (and count the request if not)"""
+        return not RateLimiter.check(client_id, limit_type, org_id).allowed
     
     @staticmethod
     def get_remaining(client_id, limit_type='api_general'):
         """Get remaining requests"""
-        limit, _ = RateLimiter.LIMITS.get(limit_type, (100, 60))
-        key = f"ratelimit:{limit_type}:{client_id}"
-        current = cache.get(key, 0)
-        return max(0, limit - current)
+        limit, window = RateLimiter.LIMITS.get(limit_type, (100, 60))
+        prefix = f"ratelimit:{limit_type}:{client_id}"
+        now = time.time()
+        index = int(now // window)
+        weight = 1 - (now - index * window) / window
+        current, previous = RateLimiter._read_counts([f"{prefix}:{index}", f"{prefix}:{index - 1}"])
+        return max(0, math.floor(limit - previous * weight - current))
+
+    @staticmethod
+    def _read_counts(keys):
+        client = RateLimiter._redis_client()
+        if client is not None:
+            try:
+                return [int(value or 0) for value in client.mget(keys)]
+            except Exception:
+                logger.warning("Rate limit store unavailable; reading the cache counters", exc_info=True)
+        values = cache.get_many(keys)
+        return [values.get(key, 0) for key in keys]
+
+    @staticmethod
+    def _result(now, spec, current, previous, rejected):
+        _current_key, _previous_key, limit, window, weight = spec
+        window_end = (int(now // window) + 1) * window
+        used = previous * weight + current
+        retry_after = 0
+        if rejected:
+            if current >= limit or not previous:
+                # Over on this window's hits alone: wait for the next window.
+                retry_after = window_end - now
+            else:
+                # Wait until the previous window's share has decayed enough
+                # for one more request.
+                retry_after = (window_end - window) + window * (1 - (limit - current - 1) / previous) - now
+        return RateLimitResult(
+            allowed=not rejected,
+            limit=limit,
+            remaining=max(0, math.floor(limit - used)),
+            reset_at=int(window_end),
+            retry_after=max(1, math.ceil(retry_after)) if rejected else 0,
+        )
+
+    @staticmethod
+    def _count(windows):
+        """Atomically count one hit in every window; returns (rejected index, [(current, previous)])."""
+        client = RateLimiter._redis_client()
+        if client is not None:
+            try:
+                keys, args = [], []
+                for current_key, previous_key, limit, window, weight in windows:
+                    keys += [current_key, previous_key]
+                    args += [limit, window, weight]
+                reply = RateLimiter._redis_script(keys=keys, args=args, client=client)
+                counts = [(int(reply[i]), int(reply[i + 1])) for i in range(1, len(reply), 2)]
+                return int(reply[0]), counts
+            except Exception:
+                logger.warning("Rate limit store unavailable; counting in the cache", exc_info=True)
+        return RateLimiter._count_in_cache(windows)
+
+    @staticmethod
+    def _count_in_cache(windows):
+        # add/incr are atomic in every cache backend; the TTL is set once per window.
+        rejected, counts = 0, []
+        for position, (current_key, previous_key, limit, window, weight) in enumerate(windows, start=1):
+            cache.add(current_key, 0, timeout=2 * window)
+            try:
+                current = cache.incr(current_key)
+            except ValueError:
+                cache.add(current_key, 1, timeout=2 * window)
+                current = 1
+            previous = cache.get(previous_key, 0)
+            counts.append((current, previous))
+            if not rejected and previous * weight + current > limit:
+                rejected = position
+        if rejected:
+            for position, (current_key, *_rest) in enumerate(windows):
+                try:
+                    cache.decr(current_key)
+                except ValueError:
+                    pass
+                current, previous = counts[position]
+                counts[position] = (current - 1, previous)
+        return rejected, counts
+
+    @staticmethod
+    def _redis_client():
+        from django.conf import settings
+
+        url = getattr(settings, 'RATE_LIMIT_REDIS_URL', '')
+        if not url:
+            return None
+        if RateLimiter._redis is None or RateLimiter._redis_url != url:
+            import redis
+
+            RateLimiter._redis = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+            RateLimiter._redis_script = RateLimiter._redis.register_script(SLIDING_WINDOW_LUA)
+            RateLimiter._redis_url = url
+        return RateLimiter._redis
+
+    @staticmethod
+    def _local_block(buckets, now):
+        with RateLimiter._local_lock:
+            for prefix, _limit, _window in buckets:
+                entry = RateLimiter._local_blocks.get(prefix)
+                if entry is None:
+                    continue
+                until, result = entry
+                if until > now:
+                    return RateLimitResult(
+                        allowed=False,
+                        limit=result.limit,
+                        remaining=0,
+                        reset_at=result.reset_at,
+                        retry_after=max(1, math.ceil(until - now)),
+                    )
+                del RateLimiter._local_blocks[prefix]
+        return None
+
+    @staticmethod
+    def _remember_block(prefix, until, result):
+        with RateLimiter._local_lock:
+            if len(RateLimiter._local_blocks) >= RateLimiter.LOCAL_BLOCK_MAX_KEYS:
+                now = time.time()
+                for key in [key for key, (expires, _) in RateLimiter._local_blocks.items() if expires <= now]:
+                    del RateLimiter._local_blocks[key]
+                if len(RateLimiter._local_blocks) >= RateLimiter.LOCAL_BLOCK_MAX_KEYS:
+                    RateLimiter._local_blocks.clear()
+            RateLimiter._local_blocks[prefix] = (until, result)
+
+    @staticmethod
+    def reset_local_state():
+        with RateLimiter._local_lock:
+            RateLimiter._local_blocks.clear()
 
 
 def rate_limit(limit_type='api_general'):
@@ -53,16 +302,20 @@ def rate_limit(limit_type='api_general'):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
             client_id = RateLimiter.get_client_id(request)
+            org_id = None
+            if request.user.is_authenticated:
+                org_id = getattr(request.user, 'organization_id', None)
             
-            if RateLimiter.is_rate_limited(client_id, limit_type):
-                return JsonResponse(
+            result = RateLimiter.check(client_id, limit_type, org_id)
+            if not result.allowed:
+                response = JsonResponse(
                     {'error': 'Rate limit exceeded'},
                     status=429
                 )
-            
-            response = view_func(request, *args, **kwargs)
-            remaining = RateLimiter.get_remaining(client_id, limit_type)
-            response['X-RateLimit-Remaining'] = remaining
+            else:
+                response = view_func(request, *args, **kwargs)
+            for header, value in result.headers().items():
+                response[header] = value
             return response
         
         return wrapper
@@ -73,3 +73,68 @@ def disable_failing_webhooks(threshold: int = 25):
     if disabled:
         logger.info("Disabled %d webhook subscriptions after %d consecutive failures", len(disabled), threshold)
     return {"disabled": disabled}
+
+
+@shared_task
+def refresh_analytics_rollups():
+    """Hourly: recount recent rollup cells and gauges for every active org.
+
+    Orgs that have never been built get a full rebuild instead. Each org is
+    refreshed independently so one failure doesn't stall the rest.
+    """
+    from apps.organizations.analytics_rollups import refresh
+    from apps.organizations.models import Organization
+
+    refreshed = failed = 0
+    for org_id in Organization.objects.filter(is_active=True).values_list("id", flat=True):
+        try:
+            refresh(org_id)
+            refreshed += 1
+        except Exception:
+            failed += 1
+            logger.exception("analytics rollup refresh failed for org %s", org_id)
+    return {"refreshed": refreshed, "failed": failed}
+
+
+@shared_task
+def rebuild_org_analytics_rollups(org_id):
+    """Recompute every rollup cell of one org from the raw tables."""
+    from apps.organizations.analytics_rollups import rebuild
+
+    rebuild(org_id)
+    return {"org_id": org_id, "status": "ok"}
+
+
+@shared_task
+def build_org_analytics_rollups(org_id):
+    """First build of an org's rollups, queued by a read that found none."""
+    from apps.organizations.analytics_rollups import rebuild
+
+    rebuild(org_id, unbuilt_only=True)
+    return {"org_id": org_id, "status": "ok"}
+
+
+@shared_task(acks_late=True)
+def run_export_job(job_id):
+    """Run or resume one background export job (see export_jobs.py)."""
+    from apps.organizations.export_jobs import run
+
+    job = run(job_id)
+    if job is None:
+        return {"job_id": job_id, "status": "skipped"}
+    return {"job_id": job_id, "status": job.status, "shards": job.shards.count()}
+
+
+@shared_task
+def resume_stalled_export_jobs():
+    """Requeue export jobs whose worker died mid-run or that were never picked up.
+
+    The run resumes after the last shard in the job's manifest; claiming is
+    done in the job row, so requeueing a job that is still alive is harmless.
+    """
+    from apps.organizations.export_jobs import stalled_job_ids
+
+    job_ids = stalled_job_ids()
+    for job_id in job_ids:
+        run_export_job.delay(job_id)
+    return {"requeued": len(job_ids)}
@@ -0,0 +1,191 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.agile.models import Board, Column, Issue, Project, Sprint
+from apps.conversations.models import Conversation, Reaction, Tag
+from apps.decisions.models import Decision
+from apps.organizations import analytics_rollups
+from apps.organizations.analytics_engine import AnalyticsEngine
+from apps.organizations.models import AnalyticsRollup, AnalyticsRollupState, Organization, User
+
+
+def live_cells(org_id):
+    return {
+        (row.user_id, row.bucket, row.period_start, row.metric, row.dimension): (row.count, row.value)
+        for row in AnalyticsRollup.objects.filter(organization_id=org_id).exclude(metric="conversation_tags")
+        if row.count or row.value
+    }
+
+
+class AnalyticsRollupTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Rollup Org", slug="rollup-org")
+        self.alice = User.objects.create_user(
+            username="rollup_alice", email="alice@example.com", password="pass",
+            organization=self.org, role="admin", first_name="Alice",
+        )
+        self.bob = User.objects.create_user(
+            username="rollup_bob", email="bob@example.com", password="pass",
+            organization=self.org, role="contributor", first_name="Bob",
+        )
+        self.project = Project.objects.create(organization=self.org, name="Rollups", key="RLP", lead=self.alice)
+        self.board = Board.objects.create(organization=self.org, project=self.project, name="Board")
+        self.column = Column.objects.create(board=self.board, name="Todo", order=0)
+
+    def _conversation(self, title, author, **kwargs):
+        return Conversation.objects.create(
+            organization=self.org, author=author, post_type="update", title=title, content="Body text", **kwargs
+        )
+
+    def _issue(self, key, status):
+        return Issue.objects.create(
+            organization=self.org, project=self.project, board=self.board, column=self.column,
+            key=key, title=f"Issue {key}", reporter=self.alice, status=status,
+        )
+
+    def _populate(self):
+        first = self._conversation("Rollup design notes", self.alice)
+        second = self._conversation("Weekly sync summary", self.bob)
+        Reaction.objects.create(conversation=first, user=self.bob, reaction_type="agree")
+        Reaction.objects.create(conversation=second, user=self.alice, reaction_type="concern")
+        decision = Decision.objects.create(
+            organization=self.org, title="Adopt rollups", description="Pre-aggregate dashboards.",
+            decision_maker=self.alice,
+        )
+        Decision.objects.create(
+            organization=self.org, title="Drop nightly recount", description="Use deltas.", decision_maker=self.bob,
+        )
+        issues = [self._issue("RLP-1", "todo"), self._issue("RLP-2", "done"), self._issue("RLP-3", "in_progress")]
+        Sprint.objects.create(
+            organization=self.org, project=self.project, name="Sprint 1", status="active",
+            start_date=date(2024, 1, 1), end_date=date(2024, 1, 14),
+        )
+        return first, second, decision, issues
+
+    def test_new_org_starts_built(self):
+        self.assertTrue(AnalyticsRollupState.objects.filter(organization=self.org, built_at__isnull=False).exists())
+
+    def test_write_time_deltas_match_a_full_rebuild(self):
+        first, second, decision, issues = self._populate()
+        second.is_archived = True
+        second.save()
+        decision.status = "approved"
+        decision.save()
+        issues[0].status = "done"
+        issues[0].save()
+        issues[2].delete()
+        Reaction.objects.get(conversation=first).delete()
+
+        incremental = live_cells(self.org.id)
+        analytics_rollups.rebuild(self.org.id)
+
+        self.assertEqual(incremental, live_cells(self.org.id))
+
+    def test_engine_reads_rollups(self):
+        first, second, _decision, _issues = self._populate()
+        tag = Tag.objects.create(organization=self.org, name="infra")
+        first.tags.add(tag)
+        # Counter bumps bypass signals; the hourly refresh picks them up.
+        Conversation.objects.filter(pk=first.pk).update(view_count=F("view_count") + 30, reply_count=2)
+        analytics_rollups.refresh(self.org.id)
+
+        engagement = AnalyticsEngine.get_engagement_metrics(self.org.id)
+        self.assertEqual(engagement["total_conversations"], 2)
+        self.assertEqual(engagement["total_views"], 30)
+        self.assertEqual(engagement["total_replies"], 2)
+        self.assertEqual(engagement["reactions"], {"agree": 1, "concern": 1})
+
+        health = AnalyticsEngine.get_memory_health(self.org.id)
+        self.assertEqual(health["total_conversations"], 2)
+        self.assertEqual(health["recent_conversations"], 2)
+        self.assertEqual(health["avg_engagement"], 15)
+
+        activity = {row["user_id"]: row for row in AnalyticsEngine.get_user_activity(self.org.id)}
+        self.assertEqual(activity[self.alice.id]["conversations_created"], 1)
+        self.assertEqual(activity[self.alice.id]["decisions_made"], 1)
+        self.assertEqual(activity[self.alice.id]["reactions_given"], 1)
+
+        self.assertEqual(
+            AnalyticsEngine.get_trending_topics(self.org.id),
+            [{"topic": "infra", "count": 1, "engagement": 30}],
+        )
+
+    def test_old_hour_cells_are_compacted_into_day_cells(self):
+        conversation = self._conversation("Old planning thread", self.alice)
+        old = timezone.now() - timedelta(days=60)
+        Conversation.objects.filter(pk=conversation.pk).update(created_at=old)
+        analytics_rollups.rebuild(self.org.id)
+
+        buckets = set(
+            AnalyticsRollup.objects.filter(organization=self.org, metric="conversations").values_list("bucket", flat=True)
+        )
+        self.assertEqual(buckets, {AnalyticsRollup.BUCKET_DAY})
+        cells = analytics_rollups.window(self.org.id, ["conversations"], timezone.now() - timedelta(days=90))
+        self.assertEqual(analytics_rollups.sum_cells(cells, "conversations")[0], 1)
+        cells = analytics_rollups.window(self.org.id, ["conversations"], timezone.now() - timedelta(days=30))
+        self.assertEqual(analytics_rollups.sum_cells(cells, "conversations")[0], 0)
+
+    def test_unbuilt_org_reads_raw_tables_and_queues_a_build(self):
+        self._populate()
+        built = (
+            AnalyticsEngine.get_engagement_metrics(self.org.id),
+            AnalyticsEngine.get_memory_health(self.org.id),
+            AnalyticsEngine.get_user_activity(self.org.id),
+        )
+        AnalyticsRollup.objects.filter(organization=self.org).delete()
+        AnalyticsRollupState.objects.filter(organization=self.org).delete()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            raw = (
+                AnalyticsEngine.get_engagement_metrics(self.org.id),
+                AnalyticsEngine.get_memory_health(self.org.id),
+                AnalyticsEngine.get_user_activity(self.org.id),
+            )
+        self.assertEqual(raw, built)
+        self.assertFalse(AnalyticsRollup.objects.filter(organization=self.org).exists())
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertTrue(AnalyticsRollupState.objects.filter(organization=self.org, built_at__isnull=False).exists())
+        self.assertEqual(AnalyticsEngine.get_memory_health(self.org.id), built[1])
+
+    def test_updates_read_the_stored_row_once(self):
+        _first, second, _decision, _issues = self._populate()
+        second = Conversation.objects.get(pk=second.pk)
+
+        def snapshot_reads(save):
+            with CaptureQueriesContext(connection) as queries:
+                save()
+            return [q["sql"] for q in queries if q["sql"].startswith('SELECT "conversations"."')]
+
+        self.assertEqual(snapshot_reads(lambda: second.save(update_fields=["content"])), [])
+        # Fields deferred on the instance keep their stored values.
+        loaded = Conversation.objects.only("id", "is_archived").get(pk=second.pk)
+        loaded.is_archived = True
+        reads = snapshot_reads(lambda: loaded.save(update_fields=["is_archived"]))
+        self.assertEqual(len([sql for sql in reads if '"conversations"."view_count"' in sql]), 1)
+
+        incremental = live_cells(self.org.id)
+        analytics_rollups.rebuild(self.org.id)
+        self.assertEqual(incremental, live_cells(self.org.id))
+
+    def test_analytics_overview_payload(self):
+        self._populate()
+        client = APIClient()
+        client.force_authenticate(self.alice)
+
+        response = client.get("/api/analytics/overview/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["conversations"], {"total": 2, "last_30_days": 2})
+        self.assertEqual(response.data["decisions"]["total"], 2)
+        self.assertEqual(response.data["projects"]["total_issues"], 3)
+        self.assertEqual(response.data["projects"]["completed_issues"], 1)
+        self.assertEqual(response.data["projects"]["completion_rate"], 33.3)
+        self.assertEqual(response.data["sprints"], {"active": 1})
@@ -0,0 +1,183 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.conversations.models import Conversation
+from apps.decisions.models import Decision
+from apps.organizations import export_jobs
+from apps.organizations.models import ExportJob, Organization, User
+
+
+class ExportJobTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(DATA_EXPORT_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.org = Organization.objects.create(name="Jobs Org", slug="jobs-org")
+        self.admin = User.objects.create_user(
+            username="jobs_admin", email="jobs@example.com", password="pass",
+            organization=self.org, role="admin", full_name="Jo Admin",
+        )
+        self.conversations = [
+            Conversation.objects.create(
+                organization=self.org, author=self.admin, post_type="update",
+                title=f"Sharded thread {number}", content="Thread body text",
+            )
+            for number in range(5)
+        ]
+        self.decisions = [
+            Decision.objects.create(
+                organization=self.org, title=f"Decision {number}", description="Shard the exports.",
+                decision_maker=self.admin,
+            )
+            for number in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _job(self, kind=ExportJob.KIND_DATA, sections=("conversations",), format="ndjson", **kwargs):
+        kwargs.setdefault("shard_size", 2)
+        return ExportJob.objects.create(
+            organization=self.org, requested_by=self.admin, kind=kind, sections=list(sections),
+            format=format, **kwargs,
+        )
+
+    def _read(self, shard):
+        with export_jobs.export_storage().open(shard.path, "rb") as handle:
+            return handle.read()
+
+    def _exported_ids(self, job):
+        return [
+            json.loads(line)["id"]
+            for shard in job.shards.all()
+            for line in self._read(shard).decode().splitlines()
+        ]
+
+    def test_job_writes_shards_and_manifest(self):
+        job = export_jobs.run(self._job(sections=("conversations", "decisions")).pk)
+
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETED)
+        self.assertEqual(
+            [(shard.section, shard.index, shard.rows) for shard in job.shards.all()],
+            [("conversations", 0, 2), ("conversations", 1, 2), ("conversations", 2, 1), ("decisions", 0, 2)],
+        )
+        self.assertEqual(job.exported_rows, 7)
+        self.assertEqual(job.total_rows, 7)
+        self.assertEqual(job.progress, 1.0)
+        self.assertEqual(
+            self._exported_ids(job),
+            [conv.id for conv in self.conversations] + [dec.id for dec in self.decisions],
+        )
+        with export_jobs.export_storage().open(job.manifest_path, "rb") as handle:
+            manifest = json.load(handle)
+        self.assertEqual(manifest["completed_sections"], ["conversations", "decisions"])
+        self.assertEqual(manifest["shards"][3]["download_url"], f"/api/organizations/export/jobs/{job.pk}/shards/3/")
+
+    def test_crashed_job_resumes_after_last_shard(self):
+        job = self._job()
+        real_write = export_jobs._write
+        writes = []
+
+        def crash_on_second_shard(name, content):
+            writes.append(name)
+            if len(writes) == 2:
+                raise OSError("worker lost")
+            return real_write(name, content)
+
+        with mock.patch.object(export_jobs, "_write", side_effect=crash_on_second_shard):
+            failed = export_jobs.run(job.pk)
+        self.assertEqual(failed.status, ExportJob.STATUS_FAILED)
+        self.assertEqual(failed.shards.count(), 1)
+
+        # A hard crash leaves the job "running" with a heartbeat that goes stale.
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.STATUS_RUNNING, heartbeat_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(export_jobs.stalled_job_ids(), [job.pk])
+        with mock.patch.object(export_jobs, "_write", wraps=real_write) as write:
+            resumed = export_jobs.run(job.pk)
+
+        self.assertEqual(resumed.status, ExportJob.STATUS_COMPLETED)
+        self.assertEqual(resumed.attempts, 2)
+        # Shards 1 and 2 plus the manifest; shard 0 is not rewritten.
+        self.assertEqual(write.call_count, 3)
+        self.assertEqual(self._exported_ids(resumed), [conv.id for conv in self.conversations])
+
+    def test_stalled_worker_does_not_overwrite_its_successor(self):
+        job = self._job()
+        section = export_jobs._data_section(job, "conversations")
+        real_render = section.render
+
+        def render_then_lose_claim(rows):
+            # Another worker claims the job while this render is running.
+            ExportJob.objects.filter(pk=job.pk).update(claim_token="successor")
+            return real_render(rows)
+
+        section.render = render_then_lose_claim
+        with mock.patch.object(export_jobs, "job_sections", return_value=[section]):
+            self.assertIsNone(export_jobs.run(job.pk))
+
+        self.assertFalse(ExportJob.objects.get(pk=job.pk).shards.exists())
+        directory = f"exports/{self.org.id}/{job.pk}"
+        self.assertEqual(export_jobs.export_storage().listdir(directory)[1], [])
+
+    def test_requested_shard_size_is_capped(self):
+        with self.settings(DATA_EXPORT_MAX_SHARD_ROWS=100, DATA_EXPORT_PDF_SHARD_ROWS=10):
+            data = export_jobs.start_export_job(self.admin, ExportJob.KIND_DATA, ["conversations"], "json", shard_size=10**6)
+            pdf = export_jobs.start_export_job(self.admin, ExportJob.KIND_PDF, ["decisions"], "pdf")
+            small = export_jobs.start_export_job(self.admin, ExportJob.KIND_PDF, ["decisions"], "pdf", shard_size=3)
+
+        self.assertEqual((data.shard_size, pdf.shard_size, small.shard_size), (100, 10, 3))
+
+    def test_live_job_is_not_claimed_twice(self):
+        job = self._job(status=ExportJob.STATUS_RUNNING, heartbeat_at=timezone.now(), claim_token="live")
+
+        self.assertIsNone(export_jobs.run(job.pk))
+        self.assertEqual(ExportJob.objects.get(pk=job.pk).claim_token, "live")
+
+    def test_background_endpoint_and_shard_download(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/organizations/export/", {"type": "decisions", "format": "csv", "background": True, "shard_size": 1},
+            )
+        self.assertEqual(response.status_code, 202)
+
+        detail = self.client.get(f"/api/organizations/export/jobs/{response.data['id']}/")
+        self.assertEqual(detail.data["status"], ExportJob.STATUS_COMPLETED)
+        self.assertEqual(len(detail.data["manifest"]["shards"]), 2)
+
+        download = self.client.get(detail.data["manifest"]["shards"][1]["download_url"])
+        self.assertEqual(download.status_code, 200)
+        lines = b"".join(download.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["ID", "Title"])
+        self.assertTrue(lines[1].startswith(f"{self.decisions[1].id},Decision 1,"))
+
+    def test_record_and_pdf_exports_run_as_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(
+                "/api/organizations/data-export/", {"type": "conversations", "background": "true", "shard_size": 3},
+            )
+        job = ExportJob.objects.get(pk=response.data["id"])
+        self.assertEqual(job.kind, ExportJob.KIND_RECORDS)
+        self.assertEqual([shard.rows for shard in job.shards.all()], [3, 2])
+        self.assertEqual(json.loads(self._read(job.shards.all()[1]))[0]["title"], "Sharded thread 3")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/organizations/pdf/bulk/",
+                {"type": "decisions", "ids": [dec.id for dec in self.decisions], "background": True, "shard_size": 1},
+                format="json",
+            )
+        job = ExportJob.objects.get(pk=response.data["id"])
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETED)
+        self.assertEqual(job.shards.count(), 2)
+        self.assertTrue(self._read(job.shards.first()).startswith(b"%PDF"))
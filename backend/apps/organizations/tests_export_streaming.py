@@ -0,0 +1,137 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.agile.models import Board, Column, Issue, Project, Sprint
+from apps.conversations.models import Conversation, ConversationReply
+from apps.decisions.models import Decision
+from apps.organizations.export_service import DataExportService
+from apps.organizations.models import Organization, User
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Export Org", slug="export-org")
+        self.admin = User.objects.create_user(
+            username="export_admin", email="admin@example.com", password="pass",
+            organization=self.org, role="admin", full_name="Ada Admin",
+        )
+        self.member = User.objects.create_user(
+            username="export_member", email="member@example.com", password="pass",
+            organization=self.org, role="contributor", full_name="Mo Member",
+        )
+        for number in range(3):
+            conversation = Conversation.objects.create(
+                organization=self.org, author=self.admin, post_type="update",
+                title=f"Export thread {number}", content="Thread body text",
+            )
+            ConversationReply.objects.create(conversation=conversation, author=self.member, content="First reply")
+            ConversationReply.objects.create(conversation=conversation, author=self.admin, content="Second reply")
+        Decision.objects.create(
+            organization=self.org, title="Stream exports", description="Use iterator() everywhere.",
+            decision_maker=self.member,
+        )
+        for key in ("EXA", "EXB"):
+            project = Project.objects.create(organization=self.org, name=f"Project {key}", key=key, lead=self.admin)
+            board = Board.objects.create(organization=self.org, project=project, name="Board")
+            column = Column.objects.create(board=board, name="Todo", order=0)
+            for number in range(2):
+                Issue.objects.create(
+                    organization=self.org, project=project, board=board, column=column,
+                    key=f"{key}-{number}", title=f"Issue {number}", reporter=self.admin, description="",
+                )
+            Sprint.objects.create(
+                organization=self.org, project=project, name="Sprint 1",
+                start_date=date(2024, 1, 1), end_date=date(2024, 1, 14),
+            )
+
+    def _stream(self, *args, **kwargs):
+        return b"".join(DataExportService.stream(self.org, *args, **kwargs))
+
+    def test_rows_use_related_records(self):
+        conversations = list(DataExportService.conversation_rows(self.org))
+        self.assertEqual(len(conversations), 3)
+        self.assertEqual(conversations[0]["created_by"], "Ada Admin")
+        self.assertEqual([m["author"] for m in conversations[0]["messages"]], ["Mo Member", "Ada Admin"])
+
+        decision = next(DataExportService.decision_rows(self.org))
+        self.assertEqual(decision["created_by"], "Mo Member")
+
+        projects = list(DataExportService.project_rows(self.org))
+        self.assertEqual([(p["issue_count"], p["sprint_count"], len(p["issues"])) for p in projects], [(2, 1, 2)] * 2)
+
+        # Counts never join issues and sprints into one grouped result.
+        project_sql = str(DataExportService.queryset(self.org, "projects").query)
+        self.assertNotIn('JOIN "issues"', project_sql)
+        self.assertNotIn('JOIN "sprints"', project_sql)
+
+    @override_settings(DATA_EXPORT_CHUNK_SIZE=2)
+    def test_query_count_does_not_grow_per_row(self):
+        # conversations: 1 + a replies query per chunk of 2; decisions: 1; projects: 1 + issues for the chunk
+        with self.assertNumQueries(6):
+            self._stream("all", "ndjson")
+
+    def test_json_formats(self):
+        document = json.loads(self._stream("all", "json"))
+        self.assertEqual(document, DataExportService.export_all(self.org))
+        self.assertEqual(json.loads(DataExportService.export_decisions(self.org)), document["decisions"])
+
+        lines = [json.loads(line) for line in self._stream("all", "ndjson").decode().splitlines()]
+        self.assertEqual([line["type"] for line in lines], ["conversations"] * 3 + ["decisions"] + ["projects"] * 2)
+
+    def test_csv_and_gzip(self):
+        raw = self._stream("projects", "csv")
+        rows = list(csv.reader(io.StringIO(raw.decode())))
+        self.assertEqual(rows[0], ["ID", "Name", "Key", "Issue Count", "Sprint Count", "Created At"])
+        self.assertEqual([row[2:5] for row in rows[1:]], [["EXA", "2", "1"], ["EXB", "2", "1"]])
+
+        self.assertEqual(gzip.decompress(self._stream("projects", "csv", compress=True)), raw)
+
+    def test_endpoint_streams_attachment(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        # audit_logs has no migration in this schema; the view's logging call is not under test here.
+        with mock.patch("apps.organizations.auditlog_models.AuditLog.log") as audit_log:
+            response = client.post(
+                "/api/organizations/export/", {"type": "conversations", "format": "ndjson", "compress": True}
+            )
+
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(audit_log.called)  # nothing has been read yet
+            self.assertTrue(response.streaming)
+            self.assertEqual(response["Content-Disposition"], 'attachment; filename="conversations_export.ndjson.gz"')
+            content = b"".join(response.streaming_content)
+
+        body = gzip.decompress(content).decode()
+        self.assertEqual(len(body.splitlines()), 3)
+        self.assertEqual(
+            audit_log.call_args.kwargs["details"],
+            {"format": "ndjson", "compressed": True, "status": "completed", "bytes": len(content)},
+        )
+
+        response = client.post("/api/organizations/export/", {"type": "everything"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_audits_a_failed_stream(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        def broken_rows(organization, data_type):
+            yield '{"id": 1}\n'
+            raise RuntimeError("database went away")
+
+        with mock.patch("apps.organizations.auditlog_models.AuditLog.log") as audit_log, \
+                mock.patch.object(DataExportService, "iter_ndjson", side_effect=broken_rows), \
+                self.assertLogs("apps.organizations.export_views", "ERROR"):
+            response = client.post("/api/organizations/export/", {"type": "conversations", "format": "ndjson"})
+            with self.assertRaises(RuntimeError):
+                b"".join(response.streaming_content)
+
+        self.assertEqual(audit_log.call_args.kwargs["details"]["status"], "failed")
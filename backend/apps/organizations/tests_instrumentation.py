@@ -0,0 +1,100 @@
+import os
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.organizations.middleware import RequestInstrumentationMiddleware
+from apps.organizations.models import Organization, User
+from apps.organizations.monitoring import AlertingRules, Metrics, PerformanceMonitor, instrumentation
+
+
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+        self.org = Organization.objects.create(name="Metrics Org", slug="metrics-org")
+
+    def _run(self, view, path="/probe/"):
+        return RequestInstrumentationMiddleware(view)(RequestFactory().get(path))
+
+    def test_records_queries_and_flags_repeated_statements(self):
+        def n_plus_one(request):
+            for _ in range(6):
+                Organization.objects.filter(pk=self.org.pk).exists()
+            Organization.objects.count()
+            return HttpResponse("ok")
+
+        with override_settings(DEBUG=False, SLOW_QUERY_MS=0):
+            self._run(n_plus_one)
+
+        stats = instrumentation.snapshot()["endpoints"]["GET /<unresolved>"]
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["avg_queries"], 7)
+        self.assertEqual(stats["n_plus_one_requests"], 1)
+        [duplicate] = instrumentation.duplicate_queries
+        self.assertEqual(duplicate["count"], 6)
+        self.assertIn('FROM "organizations"', duplicate["sql"])
+        self.assertEqual(len(PerformanceMonitor.get_slow_queries(threshold_ms=-1)), 7)
+
+    def test_streaming_body_queries_count_towards_the_request(self):
+        def streamed(request):
+            def rows():
+                for _ in range(3):
+                    yield str(Organization.objects.count())
+            return StreamingHttpResponse(rows())
+
+        response = self._run(streamed)
+        self.assertEqual(instrumentation.snapshot()["endpoints"], {})
+
+        self.assertEqual(b"".join(response.streaming_content), b"111")
+        stats = instrumentation.snapshot()["endpoints"]["GET /<unresolved>"]
+        self.assertEqual((stats["requests"], stats["avg_queries"]), (1, 3))
+
+    def test_error_rate_and_latency_feed_alerts(self):
+        self._run(lambda request: HttpResponse("ok"))
+        self._run(lambda request: HttpResponse("ok"))
+        self._run(lambda request: HttpResponse("boom", status=503))
+        for duration_ms in (20, 40, 3000):
+            instrumentation.record_request("GET /slow/", 200, duration_ms)
+
+        self.assertAlmostEqual(PerformanceMonitor.get_error_rate(), 1 / 6)
+        self.assertEqual(PerformanceMonitor.get_latency_percentile(0.95), 3000)
+        self.assertGreater(Metrics.get_api_latency(), 500)
+        self.assertEqual(
+            {alert["rule"] for alert in AlertingRules.check_alerts()},
+            {"high_error_rate", "slow_response_time"},
+        )
+        slow = instrumentation.snapshot()["endpoints"]["GET /slow/"]
+        self.assertEqual((slow["p50_ms"], slow["max_ms"]), (50.0, 3000))
+        self.assertEqual(slow["histogram"]["+Inf"], 0)
+        self.assertEqual(slow["histogram"]["5000"], 1)
+
+    def test_metrics_endpoint(self):
+        staff = User.objects.create_user(
+            username="metrics_staff", email="staff@example.com", password="pass",
+            organization=self.org, is_staff=True,
+        )
+        member = User.objects.create_user(
+            username="metrics_member", email="member@example.com", password="pass", organization=self.org,
+        )
+        client = APIClient()
+
+        client.force_authenticate(member)
+        self.assertEqual(client.get("/api/health/metrics/").status_code, 403)
+
+        client.force_authenticate(staff)
+        response = client.get("/api/health/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("GET /api/health/metrics/", response.json()["endpoints"])
+        self.assertEqual(response.json()["pid"], os.getpid())
+        self.assertEqual(response.json()["alerts"], [])
+
+        client.force_authenticate(None)
+        with override_settings(METRICS_TOKEN="scrape-me"):
+            self.assertEqual(
+                client.get("/api/health/metrics/", HTTP_X_METRICS_TOKEN="scrape-me").status_code, 200,
+            )
+            self.assertEqual(
+                client.get("/api/health/metrics/", HTTP_X_METRICS_TOKEN="scrape-you").status_code, 403,
+            )
@@ -0,0 +1,121 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from apps.organizations.security import RateLimiter, rate_limit
+
+WINDOW_START = 1_700_000_100.0  # a multiple of 60 and 300
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        RateLimiter.reset_local_state()
+        self.addCleanup(cache.clear)
+        self.addCleanup(RateLimiter.reset_local_state)
+        self.clock = FakeClock(WINDOW_START + 1)
+        patcher = mock.patch("apps.organizations.security.time.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def hits(self, count, client_id="user_1", limit_type="api_search", org_id=None):
+        return [RateLimiter.check(client_id, limit_type, org_id) for _ in range(count)]
+
+    def test_concurrent_hits_are_not_undercounted(self):
+        allowed = []
+
+        def worker():
+            for _ in range(10):
+                if not RateLimiter.is_rate_limited("user_1", "api_general"):
+                    allowed.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(allowed), 100)
+
+    def test_window_slides_instead_of_resetting(self):
+        results = self.hits(31)
+        self.assertEqual([r.remaining for r in results[-2:]], [0, 0])
+        self.assertTrue(results[-2].allowed)
+        self.assertFalse(results[-1].allowed)
+        self.assertEqual(results[-1].reset_at, int(WINDOW_START + 60))
+
+        # Halfway through the next window half of the previous window still counts.
+        RateLimiter.reset_local_state()
+        self.clock.now = WINDOW_START + 90
+        results = self.hits(16)
+        self.assertEqual(sum(r.allowed for r in results), 15)
+        self.assertEqual(RateLimiter.get_remaining("user_1", "api_search"), 0)
+
+        # Two windows later nothing from the first window is left.
+        self.clock.now = WINDOW_START + 181
+        self.assertEqual(RateLimiter.get_remaining("user_1", "api_search"), 30)
+
+    def test_retry_after_tracks_the_decaying_window(self):
+        self.hits(30)
+        self.clock.now = WINDOW_START + 60
+        rejected = self.hits(1)[0]
+
+        self.assertFalse(rejected.allowed)
+        # The previous window's 30 hits decay to 29 after 1/30 of the window.
+        self.assertEqual(rejected.retry_after, 2)
+        self.clock.now += 2
+        RateLimiter.reset_local_state()
+        self.assertTrue(self.hits(1)[0].allowed)
+
+    def test_blocked_clients_are_rejected_locally(self):
+        self.hits(31)
+        with mock.patch.object(cache, "incr") as incr:
+            result = self.hits(1)[0]
+        self.assertFalse(result.allowed)
+        incr.assert_not_called()
+
+    @override_settings(RATE_LIMIT_ORG_QUOTAS={"7": {"api_search": [40, 60]}})
+    def test_org_quota_is_shared_by_members(self):
+        first = self.hits(25, client_id="user_1", org_id=7)
+        second = self.hits(20, client_id="user_2", org_id=7)
+
+        self.assertTrue(all(r.allowed for r in first))
+        self.assertEqual(sum(r.allowed for r in second), 15)
+        self.assertEqual(second[0].limit, 40)
+        self.assertEqual(RateLimiter.org_quota(8, "api_search"), RateLimiter.ORG_LIMITS["api_search"])
+        # Rejected requests are not counted against the member's own bucket either.
+        self.assertEqual(RateLimiter.get_remaining("user_2", "api_search"), 15)
+
+    @override_settings(RATE_LIMIT_REDIS_URL="redis://127.0.0.1:1/0")
+    def test_unreachable_redis_falls_back_to_cache(self):
+        with self.assertLogs("apps.organizations.security", "WARNING"):
+            results = self.hits(31)
+        self.assertEqual(sum(r.allowed for r in results), 30)
+
+    def test_decorator_sets_headers(self):
+        @rate_limit("login")
+        def view(request):
+            return JsonResponse({"ok": True})
+
+        request = RequestFactory().post("/login/", REMOTE_ADDR="10.0.0.1")
+        request.user = AnonymousUser()
+        responses = [view(request) for _ in range(6)]
+
+        self.assertEqual(responses[0]["X-RateLimit-Limit"], "5")
+        self.assertEqual(responses[0]["X-RateLimit-Remaining"], "4")
+        self.assertEqual(responses[0]["X-RateLimit-Reset"], str(int(WINDOW_START + 300)))
+        self.assertEqual(responses[-1].status_code, 429)
+        self.assertEqual(responses[-1]["X-RateLimit-Remaining"], "0")
+        self.assertIn("Retry-After", responses[-1])
@@ -27,7 +27,9 @@ from .analytics_views import (
 
 from .apikey_views import api_keys_list, api_key_delete, api_key_toggle
 from .auditlog_views import audit_logs_list, audit_log_stats
-from .export_views import export_data_endpoint
+from .export_views import (
+    export_data_endpoint, export_jobs_list, export_job_detail, export_job_resume, export_job_shard,
+)
 from .webhook_views import (
     webhook_subscriptions, webhook_subscription_detail, webhook_deliveries,
 )
@@ -81,6 +83,10 @@ urlpatterns = [
     path('api-keys/<int:key_id>/toggle/', api_key_toggle, name='api-key-toggle'),
     path('settings/export/', export_data, name='export-data'),
     path('export/', export_data_endpoint, name='export-endpoint'),
+    path('export/jobs/', export_jobs_list, name='export-jobs'),
+    path('export/jobs/<int:job_id>/', export_job_detail, name='export-job-detail'),
+    path('export/jobs/<int:job_id>/resume/', export_job_resume, name='export-job-resume'),
+    path('export/jobs/<int:job_id>/shards/<int:position>/', export_job_shard, name='export-job-shard'),
     path('settings/delete-account/', delete_account, name='delete-account'),
     path('settings/activity-log/', activity_log, name='activity-log'),
     path('settings/security-log/', security_log, name='security-log'),
@@ -15,6 +15,10 @@ from config.ws_auth import JWTAuthMiddleware
 
 django_asgi_app = get_asgi_application()
 
+from apps.knowledge.embedding_model import warmup_if_enabled  # noqa: E402
+
+warmup_if_enabled()
+
 websocket_urlpatterns = [
     path('ws/boards/<int:board_id>/', BoardConsumer.as_asgi()),
     path('ws/notifications/', NotificationConsumer.as_asgi()),
@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
@@ -8,6 +9,14 @@ app = Celery('recall')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+
+@worker_process_init.connect
+def warmup_embedding_model(**kwargs):
+    from apps.knowledge.embedding_model import warmup_if_enabled
+
+    warmup_if_enabled()
+
+
 app.conf.beat_schedule = {
     'check-decision-reminders': {
         'task': 'apps.decisions.tasks.check_decision_reminders',
@@ -41,6 +50,18 @@ app.conf.beat_schedule = {
         'task': 'apps.knowledge.tasks.train_all_org_knowledge_models_nightly',
         'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
     },
+    'backfill-content-embeddings-nightly': {
+        'task': 'knowledge.backfill_all_org_embeddings',
+        'schedule': crontab(hour=2, minute=30),  # Daily at 2:30 AM
+    },
+    'prune-index-changes': {
+        'task': 'knowledge.prune_index_changes',
+        'schedule': crontab(minute=45),  # Hourly; keeps a day of typeahead/profile patches
+    },
+    'apply-agile-ml-issue-changes': {
+        'task': 'agile.apply_pending_ml_issue_changes',
+        'schedule': crontab(minute='*'),  # Every minute; one artifact write per org
+    },
     'webhook-retry-sweep': {
         'task': 'apps.organizations.tasks.webhook_retry_sweep',
         'schedule': crontab(minute='*/2'),  # Every 2 minutes — backoff is in-task
@@ -49,4 +70,12 @@ app.conf.beat_schedule = {
         'task': 'apps.organizations.tasks.disable_failing_webhooks',
         'schedule': crontab(hour=3, minute=30),  # Nightly cleanup
     },
+    'refresh-analytics-rollups': {
+        'task': 'apps.organizations.tasks.refresh_analytics_rollups',
+        'schedule': crontab(minute=15),  # Hourly; also compacts old hour cells
+    },
+    'resume-stalled-export-jobs': {
+        'task': 'apps.organizations.tasks.resume_stalled_export_jobs',
+        'schedule': crontab(minute='*/5'),  # Resumes from the last written shard
+    },
 }
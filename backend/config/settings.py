@@ -1,3 +1,4 @@
+import json
 import os
 import ssl
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
@@ -110,6 +111,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.organizations.middleware.RequestInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'config.security_middleware.LocalDevelopmentSecurityMiddleware',
     'config.security_middleware.RequestSecurityMiddleware',
@@ -215,6 +217,34 @@ AUTH_RATE_LIMITS = {
         'window': config('AUTH_INVITE_RESEND_RATE_WINDOW', default=3600, cast=int),
     },
 }
+# API rate limiter (apps.organizations.security.RateLimiter). With a Redis URL every
+# check is one atomic Lua call shared by all workers; empty counts in the Django cache.
+RATE_LIMIT_REDIS_URL = config('RATE_LIMIT_REDIS_URL', default='')
+# Per-org overrides of the org-wide quotas as JSON, e.g. {"42": {"api_general": [5000, 60]}}.
+RATE_LIMIT_ORG_QUOTAS = config('RATE_LIMIT_ORG_QUOTAS', default='{}', cast=json.loads)
+
+# Request/query instrumentation (apps.organizations.monitoring), served at /api/health/metrics/
+# to staff users or callers sending X-Metrics-Token. Metrics are kept per worker process; each
+# snapshot reports its host and pid, so scrape every worker and sum them.
+REQUEST_INSTRUMENTATION_ENABLED = _env_bool('REQUEST_INSTRUMENTATION_ENABLED', default=True)
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=100, cast=int)
+# Requests running one statement this many times are sampled as N+1 suspects.
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Outbound integration webhooks (apps.integrations.webhook_service): delivery threads per
+# worker, per-attempt timeouts, retry budget with jittered exponential backoff, and the
+# consecutive-failure count that opens an endpoint's circuit for the cooldown. Events
+# held back by an open circuit are kept for at most WEBHOOK_MAX_DEFER_SECONDS.
+WEBHOOK_DELIVERY_WORKERS = config('WEBHOOK_DELIVERY_WORKERS', default=8, cast=int)
+WEBHOOK_CONNECT_TIMEOUT_SECONDS = config('WEBHOOK_CONNECT_TIMEOUT_SECONDS', default=3, cast=float)
+WEBHOOK_TIMEOUT_SECONDS = config('WEBHOOK_TIMEOUT_SECONDS', default=10, cast=float)
+WEBHOOK_MAX_ATTEMPTS = config('WEBHOOK_MAX_ATTEMPTS', default=5, cast=int)
+WEBHOOK_RETRY_BASE_SECONDS = config('WEBHOOK_RETRY_BASE_SECONDS', default=30, cast=int)
+WEBHOOK_RETRY_MAX_SECONDS = config('WEBHOOK_RETRY_MAX_SECONDS', default=3600, cast=int)
+WEBHOOK_CIRCUIT_FAILURES = config('WEBHOOK_CIRCUIT_FAILURES', default=10, cast=int)
+WEBHOOK_CIRCUIT_COOLDOWN_SECONDS = config('WEBHOOK_CIRCUIT_COOLDOWN_SECONDS', default=600, cast=int)
+WEBHOOK_MAX_DEFER_SECONDS = config('WEBHOOK_MAX_DEFER_SECONDS', default=86400, cast=int)
 
 # Celery Configuration
 redis_url = config('REDIS_URL', default='redis://localhost:6379/0')
@@ -231,6 +261,24 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 NOTIFICATIONS_USE_CELERY = _env_bool('NOTIFICATIONS_USE_CELERY', default=False)
+# Concurrent channel-layer sends when a notification broadcast is pushed to websockets
+NOTIFICATIONS_FANOUT_CONCURRENCY = config('NOTIFICATIONS_FANOUT_CONCURRENCY', default=50, cast=int)
+# Digest runs are sharded into Celery chunks of this many users
+DIGEST_CHUNK_SIZE = config('DIGEST_CHUNK_SIZE', default=500, cast=int)
+# Concurrent email sends within one digest chunk
+DIGEST_SEND_CONCURRENCY = config('DIGEST_SEND_CONCURRENCY', default=8, cast=int)
+# Attempts per user before a failed digest send is given up, and the base delay between them
+DIGEST_MAX_ATTEMPTS = config('DIGEST_MAX_ATTEMPTS', default=3, cast=int)
+DIGEST_RETRY_SECONDS = config('DIGEST_RETRY_SECONDS', default=300, cast=int)
+# Marketing campaigns: recipients per insert/update page, concurrent senders,
+# and the provider request rate they share (Resend's default limit is 2/s)
+CAMPAIGN_BATCH_SIZE = config('CAMPAIGN_BATCH_SIZE', default=500, cast=int)
+CAMPAIGN_SEND_CONCURRENCY = config('CAMPAIGN_SEND_CONCURRENCY', default=4, cast=int)
+CAMPAIGN_SEND_RATE = config('CAMPAIGN_SEND_RATE', default=2.0, cast=float)
+# Runs of a campaign that still has recipients left pending by a provider outage (429/5xx),
+# and the base delay before the next run
+CAMPAIGN_MAX_ATTEMPTS = config('CAMPAIGN_MAX_ATTEMPTS', default=3, cast=int)
+CAMPAIGN_RETRY_SECONDS = config('CAMPAIGN_RETRY_SECONDS', default=300, cast=int)
 
 # AI Configuration
 AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID', default='')
@@ -256,6 +304,19 @@ TURNSTILE_MOBILE_BYPASS_TOKEN = config('TURNSTILE_MOBILE_BYPASS_TOKEN', default=
 # Email Configuration (Resend)
 RESEND_API_KEY = config('RESEND_API_KEY', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='Knoledgr <support@knoledgr.com>')
+# Outbound email transport (dotted path + kwargs). Empty BACKEND uses Resend when
+# RESEND_API_KEY is set and Django's EMAIL_BACKEND otherwise; point
+# apps.notifications.email_transports.ResendTransport at `manage.py email_sink` to benchmark offline.
+EMAIL_TRANSPORT = {
+    'BACKEND': config('EMAIL_TRANSPORT_BACKEND', default=''),
+    'OPTIONS': json.loads(config('EMAIL_TRANSPORT_OPTIONS', default='{}')),
+}
+# Keep-alive connections held to the email provider, and its connect/read timeouts
+EMAIL_HTTP_POOL_SIZE = config('EMAIL_HTTP_POOL_SIZE', default=16, cast=int)
+EMAIL_CONNECT_TIMEOUT_SECONDS = config('EMAIL_CONNECT_TIMEOUT_SECONDS', default=5, cast=float)
+EMAIL_TIMEOUT_SECONDS = config('EMAIL_TIMEOUT_SECONDS', default=20, cast=float)
+# Threads behind send_email_async / send_emails
+EMAIL_SEND_WORKERS = config('EMAIL_SEND_WORKERS', default=8, cast=int)
 SUPPORT_EMAIL = config('SUPPORT_EMAIL', default='support@knoledgr.com')
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
 PUBLIC_API_URL = config('PUBLIC_API_URL', default='').strip()
@@ -279,6 +340,72 @@ PAYPAL_ENTERPRISE_PLAN_ID = config('PAYPAL_ENTERPRISE_PLAN_ID', default='').stri
 # Vector Database
 CHROMA_PERSIST_DIRECTORY = config('CHROMA_PERSIST_DIRECTORY', default='./chroma_db')
 
+# Full-text search: query stored tsvector columns on PostgreSQL (icontains elsewhere)
+SEARCH_USE_FULLTEXT = _env_bool('SEARCH_USE_FULLTEXT', default=True)
+# Run EnhancedSearchEngine's per-type queries concurrently (one DB connection per worker)
+SEARCH_PARALLEL = _env_bool('SEARCH_PARALLEL', default=False)
+SEARCH_PARALLEL_WORKERS = config('SEARCH_PARALLEL_WORKERS', default=4, cast=int)
+# Wall-clock budget per search in seconds; unfinished buckets come back empty (0 = no deadline)
+SEARCH_DEADLINE_SECONDS = config('SEARCH_DEADLINE_SECONDS', default=0, cast=float)
+# Seconds before a process rebuilds its in-memory typeahead index to refresh popularity
+SEARCH_SUGGEST_MAX_AGE = config('SEARCH_SUGGEST_MAX_AGE', default=300, cast=int)
+# Organizations whose typeahead index a process keeps loaded (least recently used are dropped)
+SEARCH_SUGGEST_MAX_INDEXES = config('SEARCH_SUGGEST_MAX_INDEXES', default=64, cast=int)
+
+# Semantic Search Embeddings
+SEMANTIC_SEARCH_MODEL = config('SEMANTIC_SEARCH_MODEL', default='all-MiniLM-L6-v2')
+SEMANTIC_SEARCH_BACKEND = config('SEMANTIC_SEARCH_BACKEND', default='torch')  # torch | onnx
+SEMANTIC_SEARCH_ONNX_FILE = config('SEMANTIC_SEARCH_ONNX_FILE', default='')  # e.g. onnx/model_qint8_avx512.onnx
+SEMANTIC_SEARCH_WARMUP = _env_bool('SEMANTIC_SEARCH_WARMUP', default=False)
+
+# Agent runs: stream model output to the run's websocket as it is generated
+AGENT_STREAMING = _env_bool('AGENT_STREAMING', default=True)
+# Read-only tools from one model turn run concurrently on up to this many threads
+# per turn, each bounded by the timeout from when it starts
+AGENT_TOOL_WORKERS = config('AGENT_TOOL_WORKERS', default=4, cast=int)
+AGENT_TOOL_TIMEOUT_SECONDS = config('AGENT_TOOL_TIMEOUT_SECONDS', default=20, cast=float)
+# Tool output larger than this (serialized chars) is stored on the step as a preview
+AGENT_TOOL_MAX_RESULT_CHARS = config('AGENT_TOOL_MAX_RESULT_CHARS', default=20000, cast=int)
+
+# Agile ML artifacts. Leave BACKEND empty for local apps/agile/model_artifacts/;
+# set a shared storage class (e.g. storages.backends.s3.S3Storage) for multi-host workers.
+AGILE_ML_ARTIFACT_STORAGE = {
+    'BACKEND': config('AGILE_ML_ARTIFACT_STORAGE_BACKEND', default=''),
+    'OPTIONS': {},
+}
+AGILE_ML_REGISTRY_SIZE = config('AGILE_ML_REGISTRY_SIZE', default=64, cast=int)
+AGILE_ML_REGISTRY_RECHECK_SECONDS = config('AGILE_ML_REGISTRY_RECHECK_SECONDS', default=5, cast=float)
+# Fold Issue saves/deletes into trained models as they happen (full retrains still work).
+AGILE_ML_ONLINE_TRAINING = _env_bool('AGILE_ML_ONLINE_TRAINING', True)
+# Rebuild per-project assignee keyword profiles at least this often (seconds).
+AGILE_ASSIGNEE_PROFILE_MAX_AGE = config('AGILE_ASSIGNEE_PROFILE_MAX_AGE', default=600, cast=int)
+# Projects whose assignee keyword profile a process keeps loaded (least recently used are dropped)
+AGILE_ASSIGNEE_PROFILE_MAX_PROJECTS = config('AGILE_ASSIGNEE_PROFILE_MAX_PROJECTS', default=256, cast=int)
+# Seconds to cache team/project analytics payloads (0 disables); Issue/Decision writes bump a DB version that invalidates them.
+AGILE_ANALYTICS_CACHE_SECONDS = config('AGILE_ANALYTICS_CACHE_SECONDS', default=60, cast=int)
+
+# Analytics rollups: hour cells older than this many days are compacted into day cells,
+# and the hourly refresh recounts this many days of hour cells from the raw tables.
+ANALYTICS_ROLLUP_HOURLY_DAYS = config('ANALYTICS_ROLLUP_HOURLY_DAYS', default=35, cast=int)
+ANALYTICS_ROLLUP_REFRESH_DAYS = config('ANALYTICS_ROLLUP_REFRESH_DAYS', default=31, cast=int)
+# Rows fetched per database round trip when streaming organization data exports.
+DATA_EXPORT_CHUNK_SIZE = config('DATA_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+# Background export jobs write shards here. Leave BACKEND empty for local DATA_EXPORT_ROOT
+# (kept out of MEDIA_ROOT); set a shared storage class (e.g. storages.backends.s3.S3Storage)
+# so any worker can resume a job and serve its shards.
+DATA_EXPORT_STORAGE = {
+    'BACKEND': config('DATA_EXPORT_STORAGE_BACKEND', default=''),
+    'OPTIONS': {},
+}
+DATA_EXPORT_ROOT = config('DATA_EXPORT_ROOT', default=os.path.join(BASE_DIR, 'data_exports'))
+# Rows per shard file (a requested shard_size is capped at the max; PDF shards use their own
+# smaller size as both default and cap), and seconds without a heartbeat before another
+# worker resumes a job.
+DATA_EXPORT_SHARD_ROWS = config('DATA_EXPORT_SHARD_ROWS', default=10000, cast=int)
+DATA_EXPORT_MAX_SHARD_ROWS = config('DATA_EXPORT_MAX_SHARD_ROWS', default=50000, cast=int)
+DATA_EXPORT_PDF_SHARD_ROWS = config('DATA_EXPORT_PDF_SHARD_ROWS', default=100, cast=int)
+DATA_EXPORT_STALL_SECONDS = config('DATA_EXPORT_STALL_SECONDS', default=600, cast=int)
+
 # Model Cache Directories
 HUGGINGFACE_HUB_CACHE = config('HUGGINGFACE_HUB_CACHE', default='D:\\\\huggingface_cache')
 TRANSFORMERS_CACHE = config('TRANSFORMERS_CACHE', default='D:\\\\transformers_cache')
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse
 from apps.organizations.health import health_check, realtime_health_check, email_deliverability_health_check
+from apps.organizations.monitoring import metrics_view
 
 def websocket_unavailable(request):
     return HttpResponse(status=404)
@@ -18,6 +19,7 @@ urlpatterns = [
     path('api/health/', health_check, name='health_check'),
     path('api/health/realtime/', realtime_health_check, name='realtime_health_check'),
     path('api/health/email/', email_deliverability_health_check, name='email_deliverability_health_check'),
+    path('api/health/metrics/', metrics_view, name='metrics'),
     path('api/auth/', include('apps.users.urls')),
     path('api/conversations/', include('apps.conversations.urls')),
     path('api/recall/', include('apps.conversations.unified_urls')),
@@ -4,3 +4,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Opt-in (SEMANTIC_SEARCH_WARMUP): load the embedding model at boot. With
+# gunicorn --preload this happens once in the master and is shared by forks.
+from apps.knowledge.embedding_model import warmup_if_enabled  # noqa: E402
+
+warmup_if_enabled()